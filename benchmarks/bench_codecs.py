@@ -0,0 +1,252 @@
+"""
+Benchmark the codecs picked for the datasets of a figure
+
+Writes a figure with the kinds of data figpack stores (a multichannel
+timeseries with its pyramid, a timeseries graph with float timestamps, spike
+trains with int64 sample-index timestamps and unit indices, a data frame and
+markdown text) to an in-memory zarr store, as prepare_figure_bundle_in_memory
+does, once for each FIGPACK_CODECS mode (zarr's default codec, the codecs of
+the dataset roles, and the auto-tuner), and reports the stored size and the
+decode time of each kind of data, the write time and the time to read all
+the arrays back. With --datasets, it also lists the codec, stored size and
+decode time of each dataset.
+
+Decode times are those of the Python codecs (numcodecs), which use the same
+blosc library as the viewer's numcodecs.js build; they compare the codecs
+with each other rather than predict the decode time in the browser.
+
+Usage (with figpack installed, e.g. `pip install -e .`):
+    python benchmarks/bench_codecs.py [--duration-sec D] [--runs R] [--datasets]
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+import zarr
+
+import figpack
+import figpack.views as vv
+from figpack.core._bundle_utils import _write_view_data
+from figpack.core._pack_store import _is_metadata_key, _to_bytes, create_memory_store
+
+SAMPLING_FREQUENCY = 30000
+
+# The items of the layout, in order (their groups are item_0, item_1, ...)
+ITEM_NAMES = ["signal", "graph", "spikes", "table", "notes"]
+
+
+class SpikeTrains(figpack.FigpackView):
+    """Spike times stored the way the spike sorting raster plot stores them"""
+
+    def __init__(self, sample_indices: np.ndarray, unit_indices: np.ndarray):
+        self.sample_indices = sample_indices
+        self.unit_indices = unit_indices
+
+    def write_to_zarr_group(self, group: figpack.Group) -> None:
+        group.attrs["view_type"] = "SpikeTrains"
+        group.create_dataset(
+            "sample_indices", data=self.sample_indices, role="timestamps"
+        )
+        group.create_dataset("unit_indices", data=self.unit_indices, role="indices")
+
+
+def _make_figure(duration_sec: float):
+    rng = np.random.default_rng(0)
+
+    # 8-channel recording at 1 kHz: oscillations and noise
+    num_samples = int(duration_sec * 1000)
+    t = np.arange(num_samples) / 1000
+    data = np.zeros((num_samples, 8), dtype=np.float32)
+    for channel in range(8):
+        data[:, channel] = np.sin(2 * np.pi * (channel + 1) * t) + 0.1 * (
+            rng.standard_normal(num_samples)
+        )
+    signal = vv.MultiChannelTimeseries(
+        start_time_sec=0, sampling_frequency_hz=1000, data=data
+    )
+
+    graph = vv.TimeseriesGraph()
+    graph_t = np.cumsum(rng.exponential(0.01, num_samples))
+    graph.add_line_series(name="line", t=graph_t, y=np.cos(graph_t).astype(np.float32))
+
+    num_spikes = int(duration_sec * 200)
+    sample_indices = np.sort(
+        rng.integers(0, int(duration_sec * SAMPLING_FREQUENCY), num_spikes)
+    )
+    unit_indices = rng.integers(0, 100, num_spikes).astype(np.uint16)
+    spikes = SpikeTrains(sample_indices, unit_indices)
+
+    df = pd.DataFrame(
+        {
+            "unit": np.arange(2000),
+            "firing_rate": rng.exponential(5, 2000).round(3),
+            "quality": rng.choice(["good", "mua", "noise"], 2000),
+        }
+    )
+    table = vv.DataFrame(df)
+    notes = vv.Markdown("\n".join(f"- unit {i}: notes" for i in range(5000)))
+
+    return vv.Box(
+        items=[
+            vv.LayoutItem(item, title=name)
+            for name, item in zip(ITEM_NAMES, [signal, graph, spikes, table, notes])
+        ]
+    )
+
+
+def _iter_arrays(group, path=""):
+    for name, array in group.arrays():
+        yield f"{path}{name}", array
+    for name, subgroup in group.groups():
+        yield from _iter_arrays(subgroup, f"{path}{name}/")
+
+
+_SHUFFLE_NAMES = {0: "noshuffle", 1: "shuffle", 2: "bitshuffle"}
+
+
+def _describe_codec(array) -> str:
+    """Filters and compressor of an array, e.g. 'delta + blosc-zstd-shuffle'"""
+    if hasattr(array, "compressors"):
+        codecs = list(array.filters or []) + list(array.compressors or [])
+    else:
+        codecs = list(array.filters or []) + (
+            [array.compressor] if array.compressor is not None else []
+        )
+    names = []
+    for codec in codecs:
+        if getattr(codec, "codec_id", None) == "blosc":
+            names.append(
+                f"blosc-{codec.cname}-{_SHUFFLE_NAMES.get(codec.shuffle, codec.shuffle)}"
+            )
+        else:
+            names.append(getattr(codec, "codec_id", type(codec).__name__.lower()))
+    return " + ".join(names) or "none"
+
+
+def _run(view, mode: str, runs: int):
+    os.environ["FIGPACK_CODECS"] = mode
+    write_times = []
+    read_times = []
+    decode_times = {}  # dataset path -> decode time of each run
+    sizes = {}
+    datasets = {}  # dataset path -> (kind, codec, stored bytes)
+    for _ in range(runs):
+        store, store_dict = create_memory_store()
+        timer = time.perf_counter()
+        _write_view_data(
+            view,
+            store,
+            title="bench",
+            description=None,
+            script=None,
+            num_write_workers=1,
+        )
+        write_times.append(time.perf_counter() - timer)
+
+        sizes = {}
+        chunk_sizes = {}
+        for key, value in store_dict.items():
+            if not _is_metadata_key(key):
+                kind = ITEM_NAMES[int(key.split("/")[0].split("_")[1])]
+                sizes[kind] = sizes.get(kind, 0) + len(_to_bytes(value))
+                array_path = key.rsplit("/", 1)[0]
+                chunk_sizes[array_path] = chunk_sizes.get(array_path, 0) + len(
+                    _to_bytes(value)
+                )
+
+        group = zarr.open_group(store, mode="r")
+        read_timer = time.perf_counter()
+        for path, array in _iter_arrays(group):
+            timer = time.perf_counter()
+            array[...]
+            decode_times.setdefault(path, []).append(time.perf_counter() - timer)
+            if path.startswith("item_"):
+                kind = ITEM_NAMES[int(path.split("/")[0].split("_")[1])]
+                datasets[path] = (
+                    kind,
+                    _describe_codec(array),
+                    chunk_sizes.get(path, 0),
+                )
+        read_times.append(time.perf_counter() - read_timer)
+
+    decode_by_kind = {}
+    for path, (kind, _, _) in datasets.items():
+        decode_by_kind[kind] = decode_by_kind.get(kind, 0) + statistics.median(
+            decode_times[path]
+        )
+    dataset_rows = [
+        (path, kind, codec, size, statistics.median(decode_times[path]))
+        for path, (kind, codec, size) in sorted(datasets.items())
+    ]
+    return (
+        sizes,
+        statistics.median(write_times),
+        statistics.median(read_times),
+        decode_by_kind,
+        dataset_rows,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--duration-sec", type=float, default=240)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--datasets",
+        action="store_true",
+        help="Also list the codec, size and decode time of each dataset",
+    )
+    args = parser.parse_args()
+
+    view = _make_figure(args.duration_sec)
+    results = {}
+    try:
+        for mode in ("default", "policy", "auto"):
+            results[mode] = _run(view, mode, args.runs)
+    finally:
+        os.environ.pop("FIGPACK_CODECS", None)
+
+    kinds = [kind for kind in ITEM_NAMES if kind in results["default"][0]]
+    header = f"  {'':10s}" + "".join(f"{mode:>10s}" for mode in results)
+    print(f"Stored size in kB (median of {args.runs} runs)")
+    print(header)
+    for kind in kinds + ["total"]:
+        row = []
+        for sizes, *_ in results.values():
+            size = sum(sizes.values()) if kind == "total" else sizes[kind]
+            row.append(f"{size / 1000:10.1f}")
+        print(f"  {kind:10s}" + "".join(row))
+    print(f"  {'write (s)':10s}" + "".join(f"{r[1]:10.3f}" for r in results.values()))
+    print(f"  {'read (s)':10s}" + "".join(f"{r[2]:10.3f}" for r in results.values()))
+
+    print()
+    print(f"Decode time in ms (median of {args.runs} runs)")
+    print(header)
+    for kind in kinds + ["total"]:
+        row = []
+        for _, _, _, decode_by_kind, _ in results.values():
+            decode = (
+                sum(decode_by_kind.values())
+                if kind == "total"
+                else decode_by_kind.get(kind, 0)
+            )
+            row.append(f"{decode * 1000:10.1f}")
+        print(f"  {kind:10s}" + "".join(row))
+
+    if args.datasets:
+        for mode, result in results.items():
+            print()
+            print(f"Datasets ({mode})")
+            print(f"  {'dataset':44s} {'codec':30s} {'kB':>9s} {'decode ms':>10s}")
+            for path, _, codec, size, decode in result[4]:
+                print(
+                    f"  {path:44s} {codec:30s} {size / 1000:9.1f} {decode * 1000:10.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
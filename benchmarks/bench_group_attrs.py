@@ -0,0 +1,80 @@
+"""
+Benchmark buffered group attribute writes on a large layout
+
+Writes a Box of N small views (TimeseriesGraphs with one line series and
+Markdown views, alternating) to an in-memory zarr store, as
+prepare_figure_bundle_in_memory does, with the attributes of each group
+buffered and written once per group (the default, see GroupAttributes) and
+with every attribute assignment written through to the zarr group, and
+reports the median time of each.
+
+Usage (with figpack installed, e.g. `pip install -e .`):
+    python benchmarks/bench_group_attrs.py [--num-views N] [--runs R]
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+import figpack.views as vv
+from figpack.core._bundle_utils import _write_view_data
+from figpack.core._pack_store import create_memory_store
+from figpack.core.zarr import Group
+
+
+def _make_layout(num_views: int):
+    t = np.arange(100, dtype=np.float32)
+    items = []
+    for i in range(num_views):
+        if i % 2 == 0:
+            view = vv.TimeseriesGraph(y_label=f"view {i}")
+            view.add_line_series(name="line", t=t, y=np.sin(t + i))
+        else:
+            view = vv.Markdown(f"# View {i}")
+        items.append(vv.LayoutItem(view, title=f"view {i}"))
+    return vv.Box(items=items)
+
+
+def _time_write(view, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        store, _ = create_memory_store()
+        timer = time.perf_counter()
+        _write_view_data(
+            view,
+            store,
+            title="bench",
+            description=None,
+            script=None,
+            num_write_workers=1,
+        )
+        times.append(time.perf_counter() - timer)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--num-views", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    view = _make_layout(args.num_views)
+    buffered = _time_write(view, args.runs)
+
+    buffered_attrs = Group.attrs
+    Group.attrs = property(lambda self: self._zarr_group.attrs)  # type: ignore
+    try:
+        unbuffered = _time_write(view, args.runs)
+    finally:
+        Group.attrs = buffered_attrs  # type: ignore
+
+    print(f"Box of {args.num_views} views (median of {args.runs} runs)")
+    print(f"  attributes written through: {unbuffered:8.3f} s")
+    print(f"  attributes buffered:        {buffered:8.3f} s")
+    print(f"  speedup: {unbuffered / buffered:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
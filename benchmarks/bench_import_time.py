@@ -0,0 +1,112 @@
+"""
+Import-time benchmark for `import figpack, figpack.views` and for
+`import figpack.cli`, each with a budget
+
+Runs each import statement in fresh interpreters (so nothing is cached in
+sys.modules) and reports the median wall time above that of a bare
+interpreter (`python -c pass`). Also lists the heavy dependencies that the
+import pulled in, which should be none: figpack, figpack.core and
+figpack.views import their contents on first attribute access, and the CLI
+imports the dependencies of a subcommand when it runs.
+
+Exits with status 1 if a median import time exceeds its budget or a heavy
+dependency was imported, so it can be used as a regression check in CI.
+
+Usage (with figpack installed, e.g. `pip install -e .`):
+    python benchmarks/bench_import_time.py [--runs N]
+        [--statement STMT --budget-ms MS]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# Modules that `import figpack, figpack.views` must not import
+HEAVY_MODULES = [
+    "numpy",
+    "zarr",
+    "requests",
+    "psutil",
+    "argparse",
+    "tarfile",
+    "http.server",
+    "figpack.cli",
+]
+
+# Modules that `import figpack.cli` must not import (argparse is what the CLI
+# is built on)
+CLI_HEAVY_MODULES = [
+    "numpy",
+    "zarr",
+    "requests",
+    "psutil",
+    "tarfile",
+    "http.server",
+]
+
+# (statement, budget in ms, modules it must not import)
+CHECKS = [
+    ("import figpack, figpack.views", 50.0, HEAVY_MODULES),
+    ("import figpack.cli", 60.0, CLI_HEAVY_MODULES),
+]
+
+
+def _time_statement(statement: str, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        timer = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True)
+        times.append(time.perf_counter() - timer)
+    return statistics.median(times)
+
+
+def _imported_heavy_modules(statement: str, heavy_modules):
+    code = (
+        f"{statement}\n"
+        "import sys\n"
+        f"print(','.join(m for m in {heavy_modules!r} if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout.strip()
+    return [m for m in output.split(",") if m]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument(
+        "--statement", help="Check only this statement (default: all checks)"
+    )
+    parser.add_argument(
+        "--budget-ms", type=float, default=50.0, help="Budget of --statement"
+    )
+    args = parser.parse_args()
+
+    if args.statement:
+        checks = [(args.statement, args.budget_ms, HEAVY_MODULES)]
+    else:
+        checks = CHECKS
+
+    baseline = _time_statement("pass", args.runs)
+    failed = False
+    for statement, budget_ms, heavy_modules in checks:
+        total = _time_statement(statement, args.runs)
+        import_ms = (total - baseline) * 1000
+        heavy = _imported_heavy_modules(statement, heavy_modules)
+
+        print(f"{statement!r}: {import_ms:.1f} ms above a bare interpreter")
+        print(f"  (median of {args.runs} runs, budget {budget_ms:.0f} ms)")
+        print(f"  heavy modules imported: {', '.join(heavy) or 'none'}")
+        if import_ms > budget_ms or heavy:
+            failed = True
+
+    if failed:
+        print("FAILED: import-time budget exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
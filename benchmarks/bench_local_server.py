@@ -0,0 +1,187 @@
+"""
+Load benchmark for the local figure server (CORSRequestHandler)
+
+Serves a large pack file from a server running in a separate process and
+hits it with concurrent clients issuing random Range requests, reporting
+requests/s, MB/s and the server's CPU time per GB sent. The current handler
+(sendfile, multi-range responses) is compared with the previous one, which
+copied each range through Python in 8 KB chunks and accepted a single range
+per request.
+
+Usage (with figpack installed, e.g. `pip install -e .`):
+    python benchmarks/bench_local_server.py [--file-size-mb MB]
+        [--clients N] [--duration SEC] [--range-kb KB] [--ranges-per-request K]
+"""
+
+import argparse
+import multiprocessing
+import os
+import pathlib
+import random
+import socket
+import tempfile
+import threading
+import time
+from http.client import HTTPConnection
+from http.server import ThreadingHTTPServer
+
+import psutil
+
+from figpack.core._server_manager import CORSRequestHandler
+
+
+class LegacyRangeRequestHandler(CORSRequestHandler):
+    """The previous single-range implementation (8 KB reads and writes)"""
+
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        range_header = self.headers.get("Range")
+        if not os.path.isfile(path) or range_header is None:
+            return super().do_GET()
+        file_size = os.path.getsize(path)
+        start_str, end_str = range_header[6:].split("-", 1)
+        start = int(start_str)
+        end = int(end_str) if end_str else file_size - 1
+        self.send_response(206, "Partial Content")
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Content-Range", f"bytes {start}-{end}/{file_size}")
+        self.end_headers()
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(8192, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+
+def _serve(directory: str, port: int, legacy: bool) -> None:
+    handler_class = LegacyRangeRequestHandler if legacy else CORSRequestHandler
+
+    def handler_factory(*args, **kwargs):
+        return handler_class(*args, directory=directory, **kwargs)
+
+    ThreadingHTTPServer(("127.0.0.1", port), handler_factory).serve_forever()
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _client(port, file_size, range_size, ranges_per_request, deadline, totals, lock):
+    rng = random.Random()
+    num_requests = 0
+    num_bytes = 0
+    while time.perf_counter() < deadline:
+        starts = [
+            rng.randrange(0, file_size - range_size) for _ in range(ranges_per_request)
+        ]
+        spec = ",".join(f"{s}-{s + range_size - 1}" for s in starts)
+        conn = HTTPConnection("127.0.0.1", port)
+        try:
+            conn.request("GET", "/pack.dat", headers={"Range": f"bytes={spec}"})
+            response = conn.getresponse()
+            body = response.read()
+            if response.status != 206:
+                raise RuntimeError(f"Unexpected status {response.status}")
+        finally:
+            conn.close()
+        num_requests += 1
+        num_bytes += len(body)
+    with lock:
+        totals["requests"] += num_requests
+        totals["bytes"] += num_bytes
+
+
+def run(directory, file_size, args, legacy: bool, ranges_per_request: int):
+    port = _free_port()
+    server = multiprocessing.Process(
+        target=_serve, args=(directory, port, legacy), daemon=True
+    )
+    server.start()
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+
+        server_process = psutil.Process(server.pid)
+        cpu_before = sum(server_process.cpu_times()[:2])
+        totals = {"requests": 0, "bytes": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + args.duration
+        timer = time.perf_counter()
+        clients = [
+            threading.Thread(
+                target=_client,
+                args=(
+                    port,
+                    file_size,
+                    args.range_kb * 1024,
+                    ranges_per_request,
+                    deadline,
+                    totals,
+                    lock,
+                ),
+            )
+            for _ in range(args.clients)
+        ]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - timer
+        cpu = sum(server_process.cpu_times()[:2]) - cpu_before
+    finally:
+        server.terminate()
+        server.join()
+
+    label = "legacy 8 KB copy" if legacy else "sendfile"
+    label += f", {ranges_per_request} range(s)/request"
+    gb = totals["bytes"] / 1e9
+    print(
+        f"{label:>36}: {totals['requests'] / elapsed:8.1f} req/s  "
+        f"{totals['bytes'] / 1e6 / elapsed:8.1f} MB/s  "
+        f"server CPU {cpu / gb if gb else float('nan'):6.2f} s/GB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--file-size-mb", type=int, default=100)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--range-kb", type=int, default=256)
+    parser.add_argument("--ranges-per-request", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_size = args.file_size_mb * 1024 * 1024
+        pack_path = pathlib.Path(tmpdir) / "pack.dat"
+        with open(pack_path, "wb") as f:
+            for _ in range(args.file_size_mb):
+                f.write(os.urandom(1024 * 1024))
+        print(
+            f"{args.clients} clients, {args.range_kb} KB ranges, "
+            f"{args.file_size_mb} MB file, {args.duration:.0f} s per run"
+        )
+        run(tmpdir, file_size, args, legacy=True, ranges_per_request=1)
+        run(tmpdir, file_size, args, legacy=False, ranges_per_request=1)
+        run(
+            tmpdir,
+            file_size,
+            args,
+            legacy=False,
+            ranges_per_request=args.ranges_per_request,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark the streaming downsampling pyramid against the legacy in-memory code
+
+Compares figpack.core.pyramid.compute_pyramid with the previous per-view
+implementation (NaN padding + nanmin/nanmax over the whole array) on a
+synthetic float32 recording. By default 10^8 samples are used (e.g. 10^7
+timepoints x 10 channels); pass --n-timepoints / --n-channels for smaller runs.
+
+Usage (with figpack installed, e.g. `pip install -e .`):
+    python benchmarks/bench_pyramid.py [--n-timepoints N] [--n-channels M]
+        [--block-size-mb MB] [--skip-legacy]
+"""
+
+import argparse
+import math
+import time
+import tracemalloc
+
+import numpy as np
+
+from figpack.core.pyramid import compute_pyramid, get_downsample_factors
+
+
+def legacy_minmax_pyramid(data: np.ndarray) -> dict:
+    """The pre-refactor MultiChannelTimeseries implementation"""
+    n_timepoints, n_channels = data.shape
+    downsampled = {}
+    if n_timepoints < 4:
+        return downsampled
+
+    def _reduce(x: np.ndarray, lo_index=None, hi_index=None) -> np.ndarray:
+        n = x.shape[0]
+        n_bins = math.ceil(n / 4)
+        pad = [(0, n_bins * 4 - n)] + [(0, 0)] * (x.ndim - 1)
+        blk = np.pad(x, pad, mode="constant", constant_values=np.nan)
+        blk = blk.reshape((n_bins, 4) + x.shape[1:])
+        out = np.empty((n_bins, 2, n_channels), dtype=np.float32)
+        if x.ndim == 2:
+            out[:, 0, :] = np.nanmin(blk, axis=1)
+            out[:, 1, :] = np.nanmax(blk, axis=1)
+        else:
+            out[:, 0, :] = np.nanmin(blk[:, :, 0, :], axis=1)
+            out[:, 1, :] = np.nanmax(blk[:, :, 1, :], axis=1)
+        return out
+
+    level = _reduce(data)
+    downsampled[4] = level
+    factor = 16
+    while factor < n_timepoints / 1000:
+        level = _reduce(level)
+        downsampled[factor] = level
+        factor *= 4
+    return downsampled
+
+
+def _run(label: str, func):
+    tracemalloc.start()
+    timer = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - timer
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>10}: {elapsed:8.2f} s, peak allocations {peak / 1024**2:9.1f} MB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n-timepoints", type=int, default=10_000_000)
+    parser.add_argument("--n-channels", type=int, default=10)
+    parser.add_argument("--block-size-mb", type=float, default=64.0)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = rng.standard_normal((args.n_timepoints, args.n_channels), np.float32)
+    print(
+        f"{data.size:,} samples ({args.n_timepoints:,} x {args.n_channels}), "
+        f"factors {get_downsample_factors(args.n_timepoints)}"
+    )
+
+    streaming = _run(
+        "streaming",
+        lambda: compute_pyramid(
+            data, reduction="minmax", block_size_mb=args.block_size_mb
+        ),
+    )
+    if not args.skip_legacy:
+        legacy = _run("legacy", lambda: legacy_minmax_pyramid(data))
+        for factor, level in legacy.items():
+            np.testing.assert_array_equal(streaming[factor], level)
+        print("outputs identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark the quantized integer storage of MultiChannelTimeseries
+
+Writes a MultiChannelTimeseries of a simulated int16 recording (band-limited
+noise with spikes, as an ADC would produce) to an in-memory zarr store, as
+prepare_figure_bundle_in_memory does, with the default float32 storage and
+with storage_dtype="int16" (stored exactly) and "int8" (quantized), and
+reports the stored size of the data and its pyramid and the write time.
+
+Usage (with figpack installed, e.g. `pip install -e .`):
+    python benchmarks/bench_quantized_storage.py [--duration-sec D] [--num-channels M]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from figpack.core._bundle_utils import _write_view_data
+from figpack.core._pack_store import _is_metadata_key, _to_bytes, create_memory_store
+from figpack.views import MultiChannelTimeseries
+
+SAMPLING_FREQUENCY = 30000
+
+
+def _make_recording(duration_sec: float, num_channels: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    num_samples = int(duration_sec * SAMPLING_FREQUENCY)
+    noise = rng.standard_normal((num_samples, num_channels)) * 20
+    # Smooth the noise a little so that it is band-limited like real data
+    kernel = np.array([0.25, 0.5, 0.25])
+    for channel in range(num_channels):
+        noise[:, channel] = np.convolve(noise[:, channel], kernel, mode="same")
+    spike_times = rng.integers(0, num_samples - 30, int(duration_sec * 50))
+    waveform = -200 * np.exp(-(((np.arange(30) - 10) / 4) ** 2))
+    for t in spike_times:
+        noise[t : t + 30, rng.integers(num_channels)] += waveform
+    return np.round(noise).astype(np.int16)
+
+
+def _write(view):
+    store, store_dict = create_memory_store()
+    timer = time.perf_counter()
+    _write_view_data(
+        view,
+        store,
+        title="bench",
+        description=None,
+        script=None,
+        num_write_workers=1,
+    )
+    elapsed = time.perf_counter() - timer
+    size = sum(
+        len(_to_bytes(value))
+        for key, value in store_dict.items()
+        if not _is_metadata_key(key)
+    )
+    return size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--duration-sec", type=float, default=60)
+    parser.add_argument("--num-channels", type=int, default=32)
+    args = parser.parse_args()
+
+    data = _make_recording(args.duration_sec, args.num_channels)
+    print(
+        f"{args.duration_sec:g} s x {args.num_channels} channels at "
+        f"{SAMPLING_FREQUENCY} Hz ({data.nbytes / 1e6:.1f} MB as int16)"
+    )
+    float32_size = None
+    for storage_dtype in ("float32", "int16", "int8"):
+        view = MultiChannelTimeseries(
+            start_time_sec=0,
+            sampling_frequency_hz=SAMPLING_FREQUENCY,
+            data=data,
+            storage_dtype=storage_dtype,
+        )
+        size, elapsed = _write(view)
+        if float32_size is None:
+            float32_size = size
+        print(
+            f"  {storage_dtype:8s} {size / 1e6:8.1f} MB "
+            f"({size / float32_size:.2f}x)  write {elapsed:6.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
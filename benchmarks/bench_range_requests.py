@@ -0,0 +1,284 @@
+"""
+Benchmark the number of range requests needed to pan and zoom a packed figure
+
+Writes several synced series (raw data plus pyramid levels, as stored by the
+timeseries views) to a zarr directory, packs the chunks with the legacy largest-first first-fit
+packer and with the locality-aware packer used by consolidate_zarr_chunks,
+and replays a simulated pan/zoom trace. For every viewport the viewer fetches
+the chunks of the pyramid level that matches the zoom, after loading all
+other arrays when the figure opens; adjacent byte ranges
+in the same pack file are merged into one request. Counts are reported with
+and without a browser cache of already fetched chunks.
+
+Also times both packers on a large synthetic set of chunks.
+
+Usage (with figpack installed, e.g. `pip install -e .`):
+    python benchmarks/bench_range_requests.py [--n-series S] [--n-timepoints N]
+        [--n-channels M] [--chunk-len L] [--max-file-size BYTES]
+        [--n-synthetic-chunks K]
+"""
+
+import argparse
+import json
+import pathlib
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+import zarr
+
+from figpack.core.pyramid import write_series_with_pyramid
+from figpack.core._zarr_consolidate import get_array_paths, sort_chunks_by_locality
+from figpack.core.zarr import Group, _check_zarr_version
+
+# Maximum number of bins drawn across the viewport before a finer level is used
+MAX_VISIBLE_BINS = 4000
+
+
+def legacy_first_fit(chunk_sizes: Dict[str, int], max_size: int) -> List[List[str]]:
+    """The previous _group_files_by_size packer (largest first, first fit)"""
+    groups: List[List[str]] = []
+    group_sizes: List[int] = []
+    for key, size in sorted(chunk_sizes.items(), key=lambda x: x[1], reverse=True):
+        if size > max_size:
+            groups.append([key])
+            group_sizes.append(size)
+            continue
+        for i, group_size in enumerate(group_sizes):
+            if group_size + size <= max_size:
+                groups[i].append(key)
+                group_sizes[i] += size
+                break
+        else:
+            groups.append([key])
+            group_sizes.append(size)
+    return groups
+
+
+def locality_next_fit(
+    chunk_sizes: Dict[str, int], max_size: int, array_paths: List[str]
+) -> List[List[str]]:
+    """The packing order of consolidate_zarr_chunks, with next-fit bins"""
+    groups: List[List[str]] = []
+    current_size = 0
+    for key in sort_chunks_by_locality(chunk_sizes, array_paths):
+        if not groups or current_size + chunk_sizes[key] > max_size:
+            groups.append([])
+            current_size = 0
+        groups[-1].append(key)
+        current_size += chunk_sizes[key]
+    return groups
+
+
+def to_refs(groups: List[List[str]], chunk_sizes: Dict[str, int]) -> Dict[str, Tuple]:
+    refs = {}
+    for group_idx, group in enumerate(groups):
+        offset = 0
+        for key in group:
+            refs[key] = (group_idx, offset, chunk_sizes[key])
+            offset += chunk_sizes[key]
+    return refs
+
+
+def write_figure(
+    zarr_dir: pathlib.Path,
+    n_series: int,
+    n_timepoints: int,
+    n_channels: int,
+    chunk_len: int,
+):
+    """Series with pyramids (as written by the timeseries views) and metadata"""
+    if _check_zarr_version() == 3:
+        zarr.config.set({"default_zarr_format": 2})  # type: ignore
+    group = Group(zarr.open_group(str(zarr_dir), mode="w"))
+    rng = np.random.default_rng(0)
+    for i in range(n_series):
+        series_group = group.create_group(f"series_{i}")
+        # Bursts of activity separated by quiet periods, so that chunk sizes
+        # vary after compression as they do for real recordings
+        activity = np.repeat(rng.random(n_timepoints // 10_000 + 1) < 0.3, 10_000)
+        data = rng.standard_normal((n_timepoints, n_channels)).astype(np.float32)
+        data *= activity[:n_timepoints, None]
+        write_series_with_pyramid(
+            series_group,
+            data,
+            get_chunks=lambda shape: (min(chunk_len, shape[0]),) + tuple(shape[1:]),
+        )
+        # Small per-view arrays that are loaded in full when the view opens
+        series_group.create_dataset("channel_ids", data=np.arange(n_channels))
+        series_group.create_dataset(
+            "channel_colors", data=rng.integers(0, 255, (n_channels, 3))
+        )
+        series_group.create_dataset(
+            "event_times", data=np.sort(rng.random(rng.integers(100, 5000)))
+        )
+    zarr.consolidate_metadata(str(zarr_dir))
+
+
+def get_series_levels(zmetadata: dict) -> Dict[str, Dict[int, int]]:
+    """{series group path: {downsample factor: chunk length}}"""
+    series: Dict[str, Dict[int, int]] = {}
+    for array_path in get_array_paths(zmetadata):
+        parent, _, name = array_path.rpartition("/")
+        if name == "data":
+            factor = 1
+        elif name.startswith("data_ds_"):
+            factor = int(name[len("data_ds_") :])
+        else:
+            continue
+        zarray = zmetadata["metadata"][f"{array_path}/.zarray"]
+        series.setdefault(parent, {})[factor] = zarray["chunks"][0]
+    return series
+
+
+def make_trace(n_timepoints: int) -> List[Tuple[int, int]]:
+    """Zoom in from the full recording, pan, then zoom back out"""
+    trace = []
+    center = n_timepoints // 3
+    width = n_timepoints
+    while width > 2000:
+        trace.append(
+            (max(center - width // 2, 0), min(center + width // 2, n_timepoints))
+        )
+        width //= 2
+    for _ in range(40):
+        center = min(center + width // 2, n_timepoints - width // 2)
+        trace.append((center - width // 2, center + width // 2))
+    while width < n_timepoints:
+        width *= 4
+        trace.append(
+            (max(center - width // 2, 0), min(center + width // 2, n_timepoints))
+        )
+    return trace
+
+
+def count_requests(keys: List[str], refs: Dict[str, Tuple]) -> Tuple[int, int]:
+    """Number of merged range requests and bytes needed to fetch chunks"""
+    num_requests = 0
+    num_bytes = 0
+    previous_end = None
+    for file_idx, offset, size in sorted(refs[key] for key in keys):
+        if previous_end != (file_idx, offset):
+            num_requests += 1
+        previous_end = (file_idx, offset + size)
+        num_bytes += size
+    return num_requests, num_bytes
+
+
+def replay(trace, series_levels, refs, use_cache: bool) -> Tuple[int, int]:
+    fetched = set()
+    num_requests = 0
+    num_bytes = 0
+    for t0, t1 in trace:
+        needed = []
+        for parent, levels in series_levels.items():
+            factor = min(
+                (f for f in levels if (t1 - t0) / f <= MAX_VISIBLE_BINS),
+                default=max(levels),
+            )
+            chunk_len = levels[factor]
+            name = "data" if factor == 1 else f"data_ds_{factor}"
+            # All axes but the first have a single chunk
+            suffix = ".0" if factor == 1 else ".0.0"
+            first = (t0 // factor) // chunk_len
+            last = ((t1 - 1) // factor) // chunk_len
+            for i in range(first, last + 1):
+                key = f"{parent}/{name}/{i}{suffix}"
+                if key in refs and not (use_cache and key in fetched):
+                    needed.append(key)
+        step_requests, step_bytes = count_requests(needed, refs)
+        num_requests += step_requests
+        num_bytes += step_bytes
+        fetched.update(needed)
+    return num_requests, num_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--n-series", type=int, default=8)
+    parser.add_argument("--n-timepoints", type=int, default=1_000_000)
+    parser.add_argument("--n-channels", type=int, default=8)
+    parser.add_argument("--chunk-len", type=int, default=8192)
+    parser.add_argument("--max-file-size", type=int, default=20_000_000)
+    parser.add_argument("--n-synthetic-chunks", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        zarr_dir = pathlib.Path(tmpdir) / "data.zarr"
+        write_figure(
+            zarr_dir,
+            args.n_series,
+            args.n_timepoints,
+            args.n_channels,
+            args.chunk_len,
+        )
+        with open(zarr_dir / ".zmetadata") as f:
+            zmetadata = json.load(f)
+        chunk_sizes = {
+            p.relative_to(zarr_dir).as_posix(): p.stat().st_size
+            for p in zarr_dir.rglob("*")
+            if p.is_file() and not p.name.startswith(".z")
+        }
+
+    array_paths = get_array_paths(zmetadata)
+    series_levels = get_series_levels(zmetadata)
+    trace = make_trace(args.n_timepoints)
+    print(
+        f"{len(chunk_sizes)} chunks ({sum(chunk_sizes.values()) / 1e6:.1f} MB), "
+        f"{len(trace)} viewports, pack files of {args.max_file_size / 1e6:.0f} MB"
+    )
+    layouts = {
+        "legacy first-fit": legacy_first_fit(chunk_sizes, args.max_file_size),
+        "locality next-fit": locality_next_fit(
+            chunk_sizes, args.max_file_size, array_paths
+        ),
+    }
+    # Opening the figure loads every array that is not part of a series
+    series_arrays = {
+        f"{parent}/{'data' if factor == 1 else f'data_ds_{factor}'}"
+        for parent, levels in series_levels.items()
+        for factor in levels
+    }
+    initial_keys = [
+        key for key in chunk_sizes if key.rsplit("/", 1)[0] not in series_arrays
+    ]
+    for label, groups in layouts.items():
+        refs = to_refs(groups, chunk_sizes)
+        num_requests, num_bytes = count_requests(initial_keys, refs)
+        results = [f"{num_requests} requests ({num_bytes / 1e3:.0f} kB)"]
+        for use_cache in (False, True):
+            num_requests, num_bytes = replay(trace, series_levels, refs, use_cache)
+            results.append(f"{num_requests} requests ({num_bytes / 1e6:.1f} MB)")
+        print(
+            f"{label:>18}: {len(groups)} pack files\n"
+            f"{'':>20}open figure: {results[0]}\n"
+            f"{'':>20}pan/zoom, no cache: {results[1]}\n"
+            f"{'':>20}pan/zoom, with cache: {results[2]}"
+        )
+
+    # Packing time on many small chunks (e.g. a figure with many units/tiles)
+    rng = np.random.default_rng(1)
+    synthetic = {
+        f"unit_{i // 100}/values/{i % 100}": int(size)
+        for i, size in enumerate(rng.integers(1_000, 200_000, args.n_synthetic_chunks))
+    }
+    synthetic_arrays = sorted({key.rsplit("/", 1)[0] for key in synthetic})
+    for label, pack in [
+        ("legacy first-fit", lambda: legacy_first_fit(synthetic, args.max_file_size)),
+        (
+            "locality next-fit",
+            lambda: locality_next_fit(synthetic, args.max_file_size, synthetic_arrays),
+        ),
+    ]:
+        timer = time.perf_counter()
+        groups = pack()
+        elapsed = time.perf_counter() - timer
+        print(
+            f"{label:>18}: packed {len(synthetic)} chunks into {len(groups)} "
+            f"files in {elapsed:.3f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Latency benchmark for the local figure server backends under concurrent load
+
+Serves a pack file from a server running in a separate process, with either
+the threading backend (ThreadingHTTPServer, a thread per connection) or the
+asyncio backend (AsyncHTTPServer). An asyncio client then fires a burst of
+concurrent Range requests, each on its own connection, as a browser does
+when several open figures fetch chunks in parallel. The benchmark reports
+p50/p99/max latency (connect to last byte), the wall time of the burst and
+the server's peak thread count. Requests whose connection is refused or
+reset, or that take longer than the timeout (e.g. because the listen
+backlog overflowed), are counted as failed.
+
+Usage (with figpack installed, e.g. `pip install -e .`):
+    python benchmarks/bench_server_latency.py [--requests N] [--rounds R]
+        [--range-kb KB] [--file-size-mb MB] [--timeout SEC]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import pathlib
+import random
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from typing import Optional
+
+import psutil
+
+from figpack.core._server_manager import create_http_server
+
+
+def _serve(directory: str, port: int, backend: str) -> None:
+    server = create_http_server(
+        ("127.0.0.1", port), directory=directory, backend=backend
+    )
+    server.serve_forever()
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _range_request(
+    port: int, start: int, size: int, timeout: float
+) -> Optional[float]:
+    """
+    Latency of one request, or None if the connection was refused or reset
+    or the request timed out
+    """
+    timer = time.perf_counter()
+    try:
+        return await asyncio.wait_for(_fetch_range(port, start, size, timer), timeout)
+    except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+        return None
+
+
+async def _fetch_range(port: int, start: int, size: int, timer: float) -> float:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(
+            (
+                f"GET /pack.dat HTTP/1.1\r\nHost: localhost\r\n"
+                f"Range: bytes={start}-{start + size - 1}\r\n"
+                f"Connection: close\r\n\r\n"
+            ).encode("latin-1")
+        )
+        head = await reader.readuntil(b"\r\n\r\n")
+        status = int(head.split(b" ", 2)[1])
+        if status != 206:
+            raise RuntimeError(f"Unexpected status {status}")
+        content_length = None
+        for line in head.split(b"\r\n")[1:]:
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                content_length = int(value)
+        if content_length != size:
+            raise RuntimeError(f"Unexpected Content-Length {content_length}")
+        await reader.readexactly(content_length)
+    finally:
+        writer.close()
+    return time.perf_counter() - timer
+
+
+async def _burst(
+    port: int, num_requests: int, file_size: int, range_size: int, timeout: float
+):
+    rng = random.Random(0)
+    starts = [rng.randrange(0, file_size - range_size) for _ in range(num_requests)]
+    timer = time.perf_counter()
+    latencies = await asyncio.gather(
+        *(_range_request(port, start, range_size, timeout) for start in starts)
+    )
+    return list(latencies), time.perf_counter() - timer
+
+
+def _percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def _monitor_threads(process: psutil.Process, stop: threading.Event, peak: list):
+    while not stop.is_set():
+        try:
+            peak[0] = max(peak[0], process.num_threads())
+        except psutil.Error:
+            break
+        stop.wait(0.005)
+
+
+def run(directory: str, file_size: int, backend: str, args) -> None:
+    port = _free_port()
+    server = multiprocessing.Process(
+        target=_serve, args=(directory, port, backend), daemon=True
+    )
+    server.start()
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+
+        range_size = args.range_kb * 1024
+        # Warm up (ETag hashing of the file, page cache)
+        asyncio.run(_burst(port, 10, file_size, range_size, args.timeout))
+
+        stop = threading.Event()
+        peak_threads = [0]
+        monitor = threading.Thread(
+            target=_monitor_threads,
+            args=(psutil.Process(server.pid), stop, peak_threads),
+            daemon=True,
+        )
+        monitor.start()
+        latencies = []
+        num_failed = 0
+        wall_times = []
+        for _ in range(args.rounds):
+            round_latencies, wall_time = asyncio.run(
+                _burst(port, args.requests, file_size, range_size, args.timeout)
+            )
+            latencies.extend(t for t in round_latencies if t is not None)
+            num_failed += sum(t is None for t in round_latencies)
+            wall_times.append(wall_time)
+        stop.set()
+        monitor.join()
+    finally:
+        server.terminate()
+        server.join()
+
+    print(
+        f"{backend:>10}: p50 {_percentile(latencies, 0.5) * 1000:8.1f} ms  "
+        f"p99 {_percentile(latencies, 0.99) * 1000:8.1f} ms  "
+        f"max {max(latencies) * 1000:8.1f} ms  "
+        f"burst {statistics.median(wall_times):6.2f} s  "
+        f"peak threads {peak_threads[0]:5d}  "
+        f"failed {num_failed}/{args.requests * args.rounds}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--range-kb", type=int, default=64)
+    parser.add_argument("--file-size-mb", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_size = args.file_size_mb * 1024 * 1024
+        pack_path = pathlib.Path(tmpdir) / "pack.dat"
+        with open(pack_path, "wb") as f:
+            for _ in range(args.file_size_mb):
+                f.write(os.urandom(1024 * 1024))
+        print(
+            f"{args.requests} concurrent {args.range_kb} KB range requests, "
+            f"{args.rounds} rounds, {args.file_size_mb} MB file"
+        )
+        for backend in ("threading", "asyncio"):
+            run(tmpdir, file_size, backend, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark the fetch volume of zoomed-in windows of a RasterPlot
+
+Writes a RasterPlot of simulated sorted units of a long recording to an
+in-memory zarr store, as prepare_figure_bundle_in_memory does, with the
+time-bucketed chunks and chunk index of the unified spike arrays, and the same
+arrays with fixed chunks of 2,000,000 spikes. For random windows of a few
+seconds it locates the spikes with the chunk index, as the viewer does, and
+reports the stored bytes of the chunks of timestamps and unit_indices that
+have to be fetched.
+
+Usage (with figpack and figpack_spike_sorting installed):
+    python benchmarks/bench_spike_chunks.py [--duration-hours H] [--window-sec W]
+"""
+
+import argparse
+
+import numpy as np
+import zarr
+
+import figpack
+from figpack.core._bundle_utils import _write_view_data
+from figpack.core._pack_store import _is_metadata_key, _to_bytes, create_memory_store
+from figpack_spike_sorting.views import RasterPlot, RasterPlotItem
+
+SAMPLING_FREQUENCY = 30000
+# The spike arrays and their dataset roles
+SPIKE_ARRAYS = {"timestamps": "timestamps", "unit_indices": "indices"}
+FIXED_CHUNK_LENGTH = 2_000_000
+
+
+def _make_plots(duration_hours: float, num_units: int):
+    rng = np.random.default_rng(0)
+    num_samples = int(duration_hours * 3600 * SAMPLING_FREQUENCY)
+    plots = []
+    for unit_id in range(num_units):
+        firing_rate = rng.uniform(0.5, 10)
+        num_spikes = int(firing_rate * duration_hours * 3600)
+        samples = np.unique(rng.integers(0, num_samples, num_spikes))
+        plots.append(
+            RasterPlotItem(
+                unit_id=unit_id, spike_times_sec=samples / SAMPLING_FREQUENCY
+            )
+        )
+    return plots
+
+
+def _chunk_sizes(store_dict, prefix: str):
+    """Stored bytes of each chunk of the spike arrays under prefix"""
+    sizes = {name: {} for name in SPIKE_ARRAYS}
+    for key, value in store_dict.items():
+        if _is_metadata_key(key) or not key.startswith(prefix):
+            continue
+        parts = key[len(prefix) :].split("/")
+        if len(parts) == 2 and parts[0] in sizes:
+            sizes[parts[0]][int(parts[1])] = len(_to_bytes(value))
+    return sizes
+
+
+def _fetch_bytes(sizes, chunk_length: int, start: int, end: int) -> int:
+    if start >= end:
+        return 0
+    chunks = range(start // chunk_length, (end - 1) // chunk_length + 1)
+    return sum(sizes[name][c] for name in SPIKE_ARRAYS for c in chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--duration-hours", type=float, default=4)
+    parser.add_argument("--num-units", type=int, default=100)
+    parser.add_argument("--window-sec", type=float, default=5)
+    parser.add_argument("--num-windows", type=int, default=200)
+    args = parser.parse_args()
+
+    duration_sec = args.duration_hours * 3600
+    view = RasterPlot(
+        start_time_sec=0,
+        end_time_sec=duration_sec,
+        plots=_make_plots(args.duration_hours, args.num_units),
+        sampling_frequency_hz=SAMPLING_FREQUENCY,
+    )
+    store, store_dict = create_memory_store()
+    _write_view_data(
+        view, store, title="bench", description=None, script=None, num_write_workers=1
+    )
+    root = zarr.open_group(store, mode="r")
+    timestamps = root["timestamps"][:]
+    chunk_index = root["chunk_index"][:]
+    chunk_length = root["timestamps"].chunks[0]
+
+    # The same arrays with fixed chunks
+    fixed = figpack.Group(zarr.open_group(store, mode="a").create_group("fixed"))
+    for name, role in SPIKE_ARRAYS.items():
+        fixed.create_dataset(
+            name,
+            data=root[name][:],
+            chunks=(min(FIXED_CHUNK_LENGTH, len(timestamps)),),
+            role=role,
+        )
+    fixed.flush()
+
+    sizes = _chunk_sizes(store_dict, "")
+    fixed_sizes = _chunk_sizes(store_dict, "fixed/")
+    print(
+        f"{len(timestamps)} spikes over {args.duration_hours:g} h: "
+        f"{len(chunk_index)} chunks of {chunk_length} spikes "
+        f"(vs {len(fixed_sizes['timestamps'])} of {FIXED_CHUNK_LENGTH})"
+    )
+
+    rng = np.random.default_rng(1)
+    t0 = float(root.attrs["sample_offset"]) / SAMPLING_FREQUENCY
+    bucketed_bytes = []
+    fixed_bytes = []
+    num_spikes = []
+    for start_time in rng.uniform(0, duration_sec - args.window_sec, args.num_windows):
+        end_time = start_time + args.window_sec
+        # Spikes of the chunks that overlap the window, from the chunk index
+        first = int(np.searchsorted(chunk_index[:, 1], start_time, side="left"))
+        last = int(np.searchsorted(chunk_index[:, 0], end_time, side="right"))
+        start = (
+            int(chunk_index[first, 2]) if first < len(chunk_index) else len(timestamps)
+        )
+        end = int(chunk_index[last, 2]) if last < len(chunk_index) else len(timestamps)
+        # The spikes in the window, which the fixed chunks have to cover
+        window = np.searchsorted(
+            timestamps, (np.array([start_time, end_time]) - t0) * SAMPLING_FREQUENCY
+        )
+        num_spikes.append(window[1] - window[0])
+        bucketed_bytes.append(_fetch_bytes(sizes, chunk_length, start, end))
+        fixed_bytes.append(
+            _fetch_bytes(fixed_sizes, FIXED_CHUNK_LENGTH, window[0], window[1])
+        )
+
+    print(
+        f"{args.window_sec:g} s windows ({np.mean(num_spikes):.0f} spikes on "
+        f"average), mean fetch volume:"
+    )
+    print(f"  fixed chunks     {np.mean(fixed_bytes) / 1e3:10.1f} kB")
+    print(f"  bucketed chunks  {np.mean(bucketed_bytes) / 1e3:10.1f} kB")
+    print(f"  {np.mean(fixed_bytes) / np.mean(bucketed_bytes):.1f}x less")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark the storage of spike times as sample indices in RasterPlot
+
+Writes a RasterPlot of simulated sorted units of a long recording (spike times
+on the sample grid of a 30 kHz recording) to an in-memory zarr store, as
+prepare_figure_bundle_in_memory does, with spike times stored as float32
+seconds (the default) and as delta-encoded sample indices (sampling_frequency_hz
+given), and reports the stored size of each spike array and the largest
+error of the spike times read back.
+
+Usage (with figpack and figpack_spike_sorting installed):
+    python benchmarks/bench_spike_times.py [--duration-hours H] [--num-units U]
+"""
+
+import argparse
+
+import numpy as np
+import zarr
+
+from figpack.core._bundle_utils import _write_view_data
+from figpack.core._pack_store import _is_metadata_key, _to_bytes, create_memory_store
+from figpack_spike_sorting.views import RasterPlot, RasterPlotItem
+
+SAMPLING_FREQUENCY = 30000
+SPIKE_ARRAYS = ("timestamps", "unit_indices")
+
+
+def _make_plots(duration_hours: float, num_units: int):
+    rng = np.random.default_rng(0)
+    num_samples = int(duration_hours * 3600 * SAMPLING_FREQUENCY)
+    plots = []
+    for unit_id in range(num_units):
+        firing_rate = rng.uniform(0.5, 10)
+        num_spikes = int(firing_rate * duration_hours * 3600)
+        samples = np.unique(rng.integers(0, num_samples, num_spikes))
+        plots.append(
+            RasterPlotItem(
+                unit_id=unit_id, spike_times_sec=samples / SAMPLING_FREQUENCY
+            )
+        )
+    return plots
+
+
+def _write(view):
+    store, store_dict = create_memory_store()
+    _write_view_data(
+        view, store, title="bench", description=None, script=None, num_write_workers=1
+    )
+    sizes = {name: 0 for name in SPIKE_ARRAYS}
+    for key, value in store_dict.items():
+        name = key.split("/")[0]
+        if not _is_metadata_key(key) and name in sizes:
+            sizes[name] += len(_to_bytes(value))
+    group = zarr.open_group(store, mode="r")
+    timestamps = group["timestamps"][:]
+    if "sampling_frequency_hz" in group.attrs:
+        timestamps = (group.attrs["sample_offset"] + timestamps.astype(np.float64)) / (
+            group.attrs["sampling_frequency_hz"]
+        )
+    return sizes, timestamps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--duration-hours", type=float, default=4)
+    parser.add_argument("--num-units", type=int, default=100)
+    args = parser.parse_args()
+
+    plots = _make_plots(args.duration_hours, args.num_units)
+    expected = np.sort(np.concatenate([plot.spike_times_sec for plot in plots]))
+    duration_sec = args.duration_hours * 3600
+    print(
+        f"{len(expected)} spikes of {args.num_units} units over "
+        f"{args.duration_hours:g} h"
+    )
+    results = {}
+    for label, sampling_frequency_hz in (
+        ("float32 seconds", None),
+        ("sample indices", SAMPLING_FREQUENCY),
+    ):
+        view = RasterPlot(
+            start_time_sec=0,
+            end_time_sec=duration_sec,
+            plots=plots,
+            sampling_frequency_hz=sampling_frequency_hz,
+        )
+        sizes, timestamps = _write(view)
+        error = np.abs(np.sort(timestamps) - expected).max()
+        results[label] = sizes
+        print(
+            f"  {label:16s} "
+            + "".join(f"{name} {sizes[name] / 1e6:6.2f} MB  " for name in SPIKE_ARRAYS)
+            + f"max time error {error * 1e6:8.2f} us"
+        )
+    for name in SPIKE_ARRAYS:
+        ratio = results["float32 seconds"][name] / results["sample indices"][name]
+        print(f"  {name}: {ratio:.2f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark the unified spike data preparation of RasterPlot and SpikeAmplitudes
+
+Builds synthetic sortings (sorted spike trains, 1 kHz total firing rate spread
+over a number of units) and reports spikes per second for
+_prepare_unified_data, which merges all units into time-sorted arrays and
+computes the reference arrays. The default sizes are 1M, 10M and 100M spikes;
+100M spikes need roughly 4 GB of memory.
+
+Usage (with figpack and figpack_spike_sorting installed):
+    python benchmarks/bench_spike_unified_data.py [--sizes N [N ...]]
+        [--n-units U] [--view raster|amplitudes|both]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from figpack_spike_sorting.views import (
+    RasterPlot,
+    RasterPlotItem,
+    SpikeAmplitudes,
+    SpikeAmplitudesItem,
+)
+
+
+def _make_spike_trains(total_spikes: int, n_units: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    duration_sec = total_spikes / 1000.0
+    counts = rng.multinomial(total_spikes, np.full(n_units, 1.0 / n_units))
+    trains = []
+    for count in counts:
+        times = rng.uniform(0, duration_sec, count).astype(np.float32)
+        times.sort()
+        trains.append(times)
+    return duration_sec, trains
+
+
+def _bench(label: str, view, total_spikes: int) -> None:
+    timer = time.perf_counter()
+    unified = view._prepare_unified_data()
+    elapsed = time.perf_counter() - timer
+    assert unified["total_spikes"] == total_spikes
+    print(
+        f"  {label:>10}: {elapsed:8.2f} s, {total_spikes / elapsed:14,.0f} spikes/s, "
+        f"{len(unified['reference_indices']):,} reference points"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000, 100_000_000]
+    )
+    parser.add_argument("--n-units", type=int, default=200)
+    parser.add_argument(
+        "--view", choices=["raster", "amplitudes", "both"], default="both"
+    )
+    args = parser.parse_args()
+
+    for total_spikes in args.sizes:
+        print(f"{total_spikes:,} spikes, {args.n_units} units")
+        duration_sec, trains = _make_spike_trains(total_spikes, args.n_units)
+        if args.view in ("raster", "both"):
+            view = RasterPlot(
+                start_time_sec=0,
+                end_time_sec=duration_sec,
+                plots=[
+                    RasterPlotItem(unit_id=i, spike_times_sec=times)
+                    for i, times in enumerate(trains)
+                ],
+            )
+            _bench("RasterPlot", view, total_spikes)
+            del view
+        if args.view in ("amplitudes", "both"):
+            view = SpikeAmplitudes(
+                start_time_sec=0,
+                end_time_sec=duration_sec,
+                plots=[
+                    SpikeAmplitudesItem(
+                        unit_id=i,
+                        spike_times_sec=times,
+                        spike_amplitudes=np.ones(len(times), dtype=np.float32),
+                    )
+                    for i, times in enumerate(trains)
+                ],
+            )
+            _bench("Amplitudes", view, total_spikes)
+            del view
+        del trains
+
+
+if __name__ == "__main__":
+    main()
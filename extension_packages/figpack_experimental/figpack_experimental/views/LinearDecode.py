@@ -9,6 +9,7 @@ import numpy as np
 from typing import Optional
 
 from figpack import Group, ExtensionView
+from figpack.core.pyramid import compute_pyramid, write_series_with_pyramid
 
 
 class LinearDecode(ExtensionView):
@@ -54,12 +55,21 @@ class LinearDecode(ExtensionView):
         self.data_min = float(np.nanmin(data))
         self.data_max = float(np.nanmax(data))
 
-        # Prepare downsampled arrays for efficient rendering
-        self.downsampled_data = self._compute_downsampled_data()
+        self._downsampled_data: Optional[dict] = None
 
         self.observed_positions = observed_positions.astype(np.float32)
         self.position_grid = position_grid.astype(np.float32)
 
+    @property
+    def downsampled_data(self) -> dict:
+        """
+        The downsampled pyramid as in-memory arrays (computed on first access).
+        write_to_zarr_group streams the pyramid directly into the output group.
+        """
+        if self._downsampled_data is None:
+            self._downsampled_data = self._compute_downsampled_data()
+        return self._downsampled_data
+
     def _compute_downsampled_data(self) -> dict:
         """
         Compute downsampled arrays at power-of-4 factors using max values only.
@@ -68,60 +78,7 @@ class LinearDecode(ExtensionView):
             dict: {factor: (ceil(N/factor), M) float32 array}, where each bin
                 contains the maximum value across the time dimension.
         """
-        data = self.data  # (N, M), float32
-        n_timepoints, n_frequencies = data.shape
-        downsampled = {}
-
-        if n_timepoints < 4:
-            # No level with factor >= 4 fits the stop condition (factor < N)
-            return downsampled
-
-        def _first_level_from_raw(x: np.ndarray) -> np.ndarray:
-            """Build the factor=4 level directly from the raw data."""
-            N, M = x.shape
-            n_bins = math.ceil(N / 4)
-            pad = n_bins * 4 - N
-            # Pad time axis with NaNs so max ignores the padded tail
-            x_pad = np.pad(
-                x, ((0, pad), (0, 0)), mode="constant", constant_values=np.nan
-            )
-            blk = x_pad.reshape(n_bins, 4, M)  # (B, 4, M)
-            maxs = np.nanmax(blk, axis=1)  # (B, M)
-            return maxs.astype(np.float32)
-
-        def _downsample4_bins(level_max: np.ndarray) -> np.ndarray:
-            """
-            Build the next pyramid level from the previous one by grouping every 4
-            bins. Input is (B, M) -> Output is (ceil(B/4), M).
-            """
-            B, M = level_max.shape
-            n_bins_next = math.ceil(B / 4)
-            pad = n_bins_next * 4 - B
-            lvl_pad = np.pad(
-                level_max,
-                ((0, pad), (0, 0)),
-                mode="constant",
-                constant_values=np.nan,
-            )
-            blk = lvl_pad.reshape(n_bins_next, 4, M)  # (B', 4, M)
-
-            # Next maxs from maxs
-            maxs = np.nanmax(blk, axis=1)  # (B', M)
-            return maxs.astype(np.float32)
-
-        # Level 1: factor = 4 from raw data
-        factor = 4
-        level = _first_level_from_raw(data)
-        downsampled[factor] = level
-
-        # Higher levels: factor *= 4 each time, built from previous level
-        factor *= 4  # -> 16
-        while factor < n_timepoints / 1000:
-            level = _downsample4_bins(level)
-            downsampled[factor] = level
-            factor *= 4
-
-        return downsampled
+        return compute_pyramid(self.data, reduction="max")
 
     def _calculate_optimal_chunk_size(
         self, shape: tuple, target_size_mb: float = 5.0
@@ -176,34 +133,21 @@ class LinearDecode(ExtensionView):
         group.attrs["data_min"] = self.data_min
         group.attrs["data_max"] = self.data_max
 
-        # Store original data with optimal chunking
-        original_chunks = self._calculate_optimal_chunk_size(self.data.shape)
-        group.create_dataset(
-            "data",
-            data=self.data,
-            chunks=original_chunks,
+        # Store original data and downsampled (max) levels in a single pass
+        ds_shapes = write_series_with_pyramid(
+            group,
+            self.data,
+            get_chunks=self._calculate_optimal_chunk_size,
+            reduction="max",
         )
-
-        # Store downsampled data arrays
-        downsample_factors = list(self.downsampled_data.keys())
+        downsample_factors = list(ds_shapes.keys())
         group.attrs["downsample_factors"] = downsample_factors
 
-        for factor, downsampled_array in self.downsampled_data.items():
-            dataset_name = f"data_ds_{factor}"
-
-            # Calculate optimal chunks for this downsampled array
-            ds_chunks = self._calculate_optimal_chunk_size(downsampled_array.shape)
-
-            group.create_dataset(
-                dataset_name,
-                data=downsampled_array,
-                chunks=ds_chunks,
-            )
-
+        original_chunks = self._calculate_optimal_chunk_size(self.data.shape)
         print(f"Stored data with {len(downsample_factors)} downsampled levels:")
         print(f"  Original: {self.data.shape} (chunks: {original_chunks})")
         for factor in downsample_factors:
-            ds_shape = self.downsampled_data[factor].shape
+            ds_shape = ds_shapes[factor]
             ds_chunks = self._calculate_optimal_chunk_size(ds_shape)
             print(f"  Factor {factor}: {ds_shape} (chunks: {ds_chunks})")
 
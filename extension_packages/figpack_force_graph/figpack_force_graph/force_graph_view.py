@@ -5,11 +5,10 @@ ForceGraphView - Interactive force-directed graph visualization for figpack
 import json
 import numpy as np
 import zarr
-import urllib.request
-import urllib.error
 from typing import List, Dict, Any, Optional, Union
 
 import figpack
+from figpack.core.figpack_extension import get_extension_asset
 
 
 class CustomJSONEncoder(json.JSONEncoder):
@@ -26,13 +25,12 @@ class CustomJSONEncoder(json.JSONEncoder):
 
 
 def _download_force_graph_library():
-    """Download the force-graph library from CDN"""
-    url = "https://cdn.jsdelivr.net/npm/force-graph@1.50.1/dist/force-graph.min.js"
-    try:
-        with urllib.request.urlopen(url) as response:
-            return response.read().decode("utf-8")
-    except urllib.error.URLError as e:
-        raise RuntimeError(f"Failed to download force-graph library from {url}: {e}")
+    """Get the force-graph library from the figpack extension asset cache"""
+    return get_extension_asset(
+        "https://cdn.jsdelivr.net/npm/force-graph@1.50.1/dist/force-graph.min.js",
+        name="figpack-force-graph",
+        version="1.50.1",
+    )
 
 
 def _load_javascript_code():
@@ -50,22 +48,31 @@ def _load_javascript_code():
         )
 
 
-# Download the force-graph library and create the extension with additional files
-try:
-    force_graph_lib_js = _download_force_graph_library()
-    additional_files = {"force-graph.min.js": force_graph_lib_js}
-except Exception as e:
-    print(f"Warning: Could not download force-graph library: {e}")
-    print("Extension will fall back to CDN loading")
-    additional_files = {}
+_force_graph_extension: Optional[figpack.FigpackExtension] = None
+
 
-# Create and register the force graph extension
-_force_graph_extension = figpack.FigpackExtension(
-    name="figpack-force-graph",
-    javascript_code=_load_javascript_code(),
-    additional_files=additional_files,
-    version="1.0.0",
-)
+def _get_force_graph_extension() -> figpack.FigpackExtension:
+    """
+    Create the force graph extension on first use, so that importing this
+    module does not download the force-graph library
+    """
+    global _force_graph_extension
+    if _force_graph_extension is None:
+        try:
+            force_graph_lib_js = _download_force_graph_library()
+            additional_files = {"force-graph.min.js": force_graph_lib_js}
+        except Exception as e:
+            print(f"Warning: Could not download force-graph library: {e}")
+            print("Extension will fall back to CDN loading")
+            additional_files = {}
+
+        _force_graph_extension = figpack.FigpackExtension(
+            name="figpack-force-graph",
+            javascript_code=_load_javascript_code(),
+            additional_files=additional_files,
+            version="1.0.0",
+        )
+    return _force_graph_extension
 
 
 class ForceGraphView(figpack.ExtensionView):
@@ -116,7 +123,8 @@ class ForceGraphView(figpack.ExtensionView):
             warmup_ticks: Number of ticks to run before starting to render
         """
         super().__init__(
-            extension=_force_graph_extension, view_type="force-graph.ForceGraphView"
+            extension=_get_force_graph_extension(),
+            view_type="force-graph.ForceGraphView",
         )
 
         self.nodes = nodes or []
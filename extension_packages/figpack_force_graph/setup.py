@@ -30,7 +30,7 @@ setup(
     },
     include_package_data=True,
     install_requires=[
-        "figpack>=0.2.9",
+        "figpack>=0.3.21",
         "numpy",
         "zarr",
     ],
@@ -1,5 +1,5 @@
 import numpy as np
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Iterator
 
 import figpack
 from .slides_extension import slides_extension
@@ -98,6 +98,11 @@ class Slide(figpack.ExtensionView):
         self.background_color = background_color
         self.slide_metadata = slide_metadata or {}
 
+    def iter_child_views(self) -> Iterator[figpack.FigpackView]:
+        """The content view of the slide"""
+        if self.content is not None:
+            yield self.content
+
     def write_to_zarr_group(self, group: figpack.Group) -> None:
         """
         Write the data to a Zarr group
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Iterator, List
 
 import figpack
 from .slides_extension import slides_extension
@@ -14,6 +14,10 @@ class Slides(figpack.ExtensionView):
 
         self.slides = slides
 
+    def iter_child_views(self) -> Iterator[figpack.FigpackView]:
+        """The slides of the deck"""
+        yield from self.slides
+
     def write_to_zarr_group(self, group: figpack.Group) -> None:
         """
         Write the data to a Zarr group
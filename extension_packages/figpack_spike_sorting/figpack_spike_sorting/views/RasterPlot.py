@@ -2,10 +2,17 @@
 RasterPlot view for figpack - displays multiple raster plots
 """
 
-from typing import List, Any
+from typing import Any, Iterator, List, Optional
 import numpy as np
 
 from .RasterPlotItem import RasterPlotItem
+from ._unified_spikes import (
+    generate_reference_arrays,
+    get_event_chunk_length,
+    merge_spike_trains,
+    write_chunk_index,
+    write_spike_times,
+)
 from .UnitsTable import UnitsTable, UnitsTableColumn, UnitsTableRow
 
 import figpack
@@ -16,6 +23,14 @@ from ..spike_sorting_extension import spike_sorting_extension
 class RasterPlot(figpack.ExtensionView):
     """
     A view that displays multiple raster plots for spike sorting analysis
+
+    By default spike times are stored as float32 seconds, which round times to
+    about 0.5 ms after a couple of hours of recording. Passing
+    sampling_frequency_hz stores them as exact sample indices instead. This is
+    opt-in because it is about exactness, not size: for long recordings the
+    exact indices can take slightly more space than the rounded float32 times
+    (about 4% more for 4 hours of 100 units at 30 kHz, see
+    benchmarks/bench_spike_times.py), and less for short ones.
     """
 
     def __init__(
@@ -24,6 +39,7 @@ class RasterPlot(figpack.ExtensionView):
         start_time_sec: float,
         end_time_sec: float,
         plots: List[RasterPlotItem],
+        sampling_frequency_hz: Optional[float] = None,
     ):
         """
         Initialize a RasterPlot view
@@ -33,6 +49,11 @@ class RasterPlot(figpack.ExtensionView):
             end_time_sec: End time in seconds for the plot range
             plots: List of RasterPlotItem objects
             height: Height of the plot in pixels (default: 500)
+            sampling_frequency_hz: Optional sampling frequency of the recording.
+                When given, spike times are stored as exact integer sample
+                indices instead of float32 seconds (pass float64 spike times
+                to the plots to keep them exact). The stored size stays about
+                the same and can grow for long recordings (see above).
         """
         super().__init__(
             extension=spike_sorting_extension, view_type="spike_sorting.RasterPlot"
@@ -40,6 +61,12 @@ class RasterPlot(figpack.ExtensionView):
         self.start_time_sec = float(start_time_sec)
         self.end_time_sec = float(end_time_sec)
         self.plots = plots
+        self.sampling_frequency_hz = sampling_frequency_hz
+
+    def iter_child_views(self) -> Iterator[figpack.FigpackView]:
+        """No child views (the plots are data items), so the potentially long
+        list of plots is not scanned"""
+        return iter(())
 
     @staticmethod
     def from_nwb_units_table(
@@ -136,32 +163,34 @@ class RasterPlot(figpack.ExtensionView):
             group.attrs["total_spikes"] = 0
             return
 
-        chunks = (
-            (2_000_000,)
-            if unified_data["total_spikes"] > 2_000_000
-            else (len(unified_data["timestamps"]),)
-        )
+        chunks = (get_event_chunk_length(unified_data["timestamps"]),)
         # Store main data arrays
-        group.create_dataset(
+        stored_times = write_spike_times(
+            group,
             "timestamps",
-            data=unified_data["timestamps"],
+            unified_data["timestamps"],
+            sampling_frequency_hz=self.sampling_frequency_hz,
             chunks=chunks,
         )
         group.create_dataset(
             "unit_indices",
             data=unified_data["unit_indices"],
             chunks=chunks,
+            role="indices",
         )
         group.create_dataset(
             "reference_times",
             data=unified_data["reference_times"],
             chunks=(len(unified_data["reference_times"]),),
+            role="timestamps",
         )
         group.create_dataset(
             "reference_indices",
             data=unified_data["reference_indices"],
             chunks=(len(unified_data["reference_indices"]),),
+            role="indices",
         )
+        write_chunk_index(group, stored_times, chunks[0])
 
         # Create spike counts array with 1-second bins
         duration = self.end_time_sec - self.start_time_sec
@@ -216,14 +245,9 @@ class RasterPlot(figpack.ExtensionView):
         unit_ids = [str(plot.unit_id) for plot in self.plots]
         unit_id_to_index = {unit_id: i for i, unit_id in enumerate(unit_ids)}
 
-        # Collect all spikes with their unit indices
-        all_spikes = []
-        for plot in self.plots:
-            unit_index = unit_id_to_index[str(plot.unit_id)]
-            for time in plot.spike_times_sec:
-                all_spikes.append((float(time), unit_index))
-
-        if not all_spikes:
+        # Merge the per-unit spike trains into time-sorted arrays
+        total_spikes = sum(len(plot.spike_times_sec) for plot in self.plots)
+        if total_spikes == 0:
             return {
                 "timestamps": np.array([], dtype=np.float32),
                 "unit_indices": np.array([], dtype=np.uint16),
@@ -233,12 +257,11 @@ class RasterPlot(figpack.ExtensionView):
                 "total_spikes": 0,
             }
 
-        # Sort by timestamp
-        all_spikes.sort(key=lambda x: x[0])
-
-        # Extract sorted arrays
-        timestamps = np.array([spike[0] for spike in all_spikes], dtype=np.float32)
-        unit_indices = np.array([spike[1] for spike in all_spikes], dtype=np.uint16)
+        timestamps, unit_indices, _ = merge_spike_trains(
+            [plot.spike_times_sec for plot in self.plots],
+            [unit_id_to_index[str(plot.unit_id)] for plot in self.plots],
+            timestamps_dtype=self._timestamps_dtype(),
+        )
 
         # Generate reference arrays
         reference_times, reference_indices = self._generate_reference_arrays(timestamps)
@@ -249,9 +272,13 @@ class RasterPlot(figpack.ExtensionView):
             "reference_times": reference_times,
             "reference_indices": reference_indices,
             "unit_ids": unit_ids,
-            "total_spikes": len(all_spikes),
+            "total_spikes": total_spikes,
         }
 
+    def _timestamps_dtype(self):
+        # Sample-index storage needs the full precision of the spike times
+        return np.float32 if self.sampling_frequency_hz is None else np.float64
+
     def _generate_reference_arrays(
         self, timestamps: np.ndarray, interval_sec: float = 1.0
     ) -> tuple:
@@ -265,23 +292,4 @@ class RasterPlot(figpack.ExtensionView):
         Returns:
             Tuple of (reference_times, reference_indices)
         """
-        if len(timestamps) == 0:
-            return np.array([], dtype=np.float32), np.array([], dtype=np.uint32)
-
-        reference_times = []
-        reference_indices = []
-
-        current_ref_time = timestamps[0]
-        reference_times.append(current_ref_time)
-        reference_indices.append(0)
-
-        # Find the next reference point at least interval_sec later
-        for i, timestamp in enumerate(timestamps):
-            if timestamp >= current_ref_time + interval_sec:
-                reference_times.append(timestamp)
-                reference_indices.append(i)
-                current_ref_time = timestamp
-
-        return np.array(reference_times, dtype=np.float32), np.array(
-            reference_indices, dtype=np.uint32
-        )
+        return generate_reference_arrays(timestamps, interval_sec)
@@ -5,6 +5,8 @@ RasterPlotItem for figpack - represents a single unit's raster plot
 from typing import Union
 import numpy as np
 
+from ._unified_spikes import as_spike_times
+
 
 class RasterPlotItem:
     """
@@ -22,7 +24,8 @@ class RasterPlotItem:
 
         Args:
             unit_id: Identifier for the unit
-            spike_times_sec: Numpy array of spike times in seconds
+            spike_times_sec: Numpy array of spike times in seconds (float32, or
+                float64 to keep exact times, see RasterPlot)
         """
         self.unit_id = unit_id
-        self.spike_times_sec = np.array(spike_times_sec, dtype=np.float32)
+        self.spike_times_sec = as_spike_times(spike_times_sec)
@@ -2,11 +2,18 @@
 SpikeAmplitudes view for figpack - displays spike amplitudes over time
 """
 
-from typing import List, Any
+from typing import Any, Iterator, List, Optional
 
 import numpy as np
 
 from .SpikeAmplitudesItem import SpikeAmplitudesItem
+from ._unified_spikes import (
+    generate_reference_arrays,
+    get_event_chunk_length,
+    merge_spike_trains,
+    write_chunk_index,
+    write_spike_times,
+)
 from .UnitsTable import UnitsTable, UnitsTableColumn, UnitsTableRow
 
 import figpack
@@ -17,6 +24,14 @@ from ..spike_sorting_extension import spike_sorting_extension
 class SpikeAmplitudes(figpack.ExtensionView):
     """
     A view that displays spike amplitudes over time for multiple units
+
+    Spike times are stored as float32 seconds unless sampling_frequency_hz is
+    given, in which case they are stored as exact sample indices. The sample
+    indices do not make the figure smaller: compared with float32 seconds,
+    whose precision drops to about 0.5 ms in a 4 hour recording, they are
+    somewhat smaller for recordings under an hour and a few percent larger
+    for recordings of several hours (benchmarks/bench_spike_times.py). Use
+    them when exact spike times matter.
     """
 
     def __init__(
@@ -25,6 +40,7 @@ class SpikeAmplitudes(figpack.ExtensionView):
         start_time_sec: float,
         end_time_sec: float,
         plots: List[SpikeAmplitudesItem],
+        sampling_frequency_hz: Optional[float] = None,
     ):
         """
         Initialize a SpikeAmplitudes view
@@ -33,6 +49,11 @@ class SpikeAmplitudes(figpack.ExtensionView):
             start_time_sec: Start time of the view in seconds
             end_time_sec: End time of the view in seconds
             plots: List of SpikeAmplitudesItem objects
+            sampling_frequency_hz: Optional sampling frequency of the recording.
+                When given, spike times (including those of the subsampled
+                levels) are stored as exact integer sample indices instead of
+                float32 seconds (pass float64 spike times to the plots to keep
+                them exact), at a similar stored size (see above).
         """
         super().__init__(
             extension=spike_sorting_extension, view_type="spike_sorting.SpikeAmplitudes"
@@ -40,6 +61,12 @@ class SpikeAmplitudes(figpack.ExtensionView):
         self.start_time_sec = start_time_sec
         self.end_time_sec = end_time_sec
         self.plots = plots
+        self.sampling_frequency_hz = sampling_frequency_hz
+
+    def iter_child_views(self) -> Iterator[figpack.FigpackView]:
+        """No child views (the plots are data items), so the potentially long
+        list of plots is not scanned"""
+        return iter(())
 
     @staticmethod
     def from_nwb_units_table(
@@ -146,37 +173,40 @@ class SpikeAmplitudes(figpack.ExtensionView):
             group.attrs["total_spikes"] = 0
             return
 
-        chunks = (
-            (2_000_000,)
-            if unified_data["total_spikes"] > 2_000_000
-            else (len(unified_data["timestamps"]),)
-        )
+        chunks = (get_event_chunk_length(unified_data["timestamps"]),)
         # Store main data arrays
-        group.create_dataset(
+        stored_times = write_spike_times(
+            group,
             "timestamps",
-            data=unified_data["timestamps"],
+            unified_data["timestamps"],
+            sampling_frequency_hz=self.sampling_frequency_hz,
             chunks=chunks,
         )
         group.create_dataset(
             "unit_indices",
             data=unified_data["unit_indices"],
             chunks=chunks,
+            role="indices",
         )
         group.create_dataset(
             "amplitudes",
             data=unified_data["amplitudes"],
             chunks=chunks,
+            role="signal",
         )
         group.create_dataset(
             "reference_times",
             data=unified_data["reference_times"],
             chunks=(len(unified_data["reference_times"]),),
+            role="timestamps",
         )
         group.create_dataset(
             "reference_indices",
             data=unified_data["reference_indices"],
             chunks=(len(unified_data["reference_indices"]),),
+            role="indices",
         )
+        write_chunk_index(group, stored_times, chunks[0])
 
         # Store unit ID mapping
         group.attrs["unit_ids"] = unified_data["unit_ids"]
@@ -192,37 +222,40 @@ class SpikeAmplitudes(figpack.ExtensionView):
         if subsampled_data:
             subsampled_group = group.create_group("subsampled_data")
             for factor_name, data in subsampled_data.items():
-                chunks = (
-                    (2_000_000,)
-                    if len(data["timestamps"]) > 2_000_000
-                    else (len(data["timestamps"]),)
-                )
+                chunks = (get_event_chunk_length(data["timestamps"]),)
                 factor_group = subsampled_group.create_group(factor_name)
-                factor_group.create_dataset(
+                stored_times = write_spike_times(
+                    factor_group,
                     "timestamps",
-                    data=data["timestamps"],
+                    data["timestamps"],
+                    sampling_frequency_hz=self.sampling_frequency_hz,
                     chunks=chunks,
                 )
                 factor_group.create_dataset(
                     "unit_indices",
                     data=data["unit_indices"],
                     chunks=chunks,
+                    role="indices",
                 )
                 factor_group.create_dataset(
                     "amplitudes",
                     data=data["amplitudes"],
                     chunks=chunks,
+                    role="signal",
                 )
                 factor_group.create_dataset(
                     "reference_times",
                     data=data["reference_times"],
                     chunks=(len(data["reference_times"]),),
+                    role="timestamps",
                 )
                 factor_group.create_dataset(
                     "reference_indices",
                     data=data["reference_indices"],
                     chunks=(len(data["reference_indices"]),),
+                    role="indices",
                 )
+                write_chunk_index(factor_group, stored_times, chunks[0])
 
     def _prepare_unified_data(self) -> dict:
         """
@@ -246,14 +279,9 @@ class SpikeAmplitudes(figpack.ExtensionView):
         unit_ids = [str(plot.unit_id) for plot in self.plots]
         unit_id_to_index = {unit_id: i for i, unit_id in enumerate(unit_ids)}
 
-        # Collect all spikes with their unit indices
-        all_spikes = []
-        for plot in self.plots:
-            unit_index = unit_id_to_index[str(plot.unit_id)]
-            for time, amplitude in zip(plot.spike_times_sec, plot.spike_amplitudes):
-                all_spikes.append((float(time), unit_index, float(amplitude)))
-
-        if not all_spikes:
+        # Merge the per-unit spike trains into time-sorted arrays
+        total_spikes = sum(len(plot.spike_times_sec) for plot in self.plots)
+        if total_spikes == 0:
             return {
                 "timestamps": np.array([], dtype=np.float32),
                 "unit_indices": np.array([], dtype=np.uint16),
@@ -264,13 +292,12 @@ class SpikeAmplitudes(figpack.ExtensionView):
                 "total_spikes": 0,
             }
 
-        # Sort by timestamp
-        all_spikes.sort(key=lambda x: x[0])
-
-        # Extract sorted arrays
-        timestamps = np.array([spike[0] for spike in all_spikes], dtype=np.float32)
-        unit_indices = np.array([spike[1] for spike in all_spikes], dtype=np.uint16)
-        amplitudes = np.array([spike[2] for spike in all_spikes], dtype=np.float32)
+        timestamps, unit_indices, amplitudes = merge_spike_trains(
+            [plot.spike_times_sec for plot in self.plots],
+            [unit_id_to_index[str(plot.unit_id)] for plot in self.plots],
+            [plot.spike_amplitudes for plot in self.plots],
+            timestamps_dtype=self._timestamps_dtype(),
+        )
 
         # Generate reference arrays
         reference_times, reference_indices = self._generate_reference_arrays(timestamps)
@@ -282,9 +309,13 @@ class SpikeAmplitudes(figpack.ExtensionView):
             "reference_times": reference_times,
             "reference_indices": reference_indices,
             "unit_ids": unit_ids,
-            "total_spikes": len(all_spikes),
+            "total_spikes": total_spikes,
         }
 
+    def _timestamps_dtype(self):
+        # Sample-index storage needs the full precision of the spike times
+        return np.float32 if self.sampling_frequency_hz is None else np.float64
+
     def _generate_reference_arrays(
         self, timestamps: np.ndarray, interval_sec: float = 1.0
     ) -> tuple:
@@ -298,26 +329,7 @@ class SpikeAmplitudes(figpack.ExtensionView):
         Returns:
             Tuple of (reference_times, reference_indices)
         """
-        if len(timestamps) == 0:
-            return np.array([], dtype=np.float32), np.array([], dtype=np.uint32)
-
-        reference_times = []
-        reference_indices = []
-
-        current_ref_time = timestamps[0]
-        reference_times.append(current_ref_time)
-        reference_indices.append(0)
-
-        # Find the next reference point at least interval_sec later
-        for i, timestamp in enumerate(timestamps):
-            if timestamp >= current_ref_time + interval_sec:
-                reference_times.append(timestamp)
-                reference_indices.append(i)
-                current_ref_time = timestamp
-
-        return np.array(reference_times, dtype=np.float32), np.array(
-            reference_indices, dtype=np.uint32
-        )
+        return generate_reference_arrays(timestamps, interval_sec)
 
     def _create_subsampled_data(
         self, timestamps: np.ndarray, unit_indices: np.ndarray, amplitudes: np.ndarray
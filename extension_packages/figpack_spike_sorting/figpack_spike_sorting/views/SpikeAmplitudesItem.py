@@ -6,6 +6,8 @@ from typing import Union
 
 import numpy as np
 
+from ._unified_spikes import as_spike_times
+
 
 class SpikeAmplitudesItem:
     """
@@ -24,7 +26,8 @@ class SpikeAmplitudesItem:
 
         Args:
             unit_id: Identifier for the unit
-            spike_times_sec: 1D numpy array of spike times in seconds
+            spike_times_sec: 1D numpy array of spike times in seconds (float32,
+                or float64 to keep exact times, see SpikeAmplitudes)
             spike_amplitudes: 1D numpy array of spike amplitudes
         """
         assert spike_times_sec.ndim == 1, "Spike times must be 1-dimensional"
@@ -34,5 +37,5 @@ class SpikeAmplitudesItem:
         ), "Spike times and amplitudes must have the same length"
 
         self.unit_id = unit_id
-        self.spike_times_sec = np.array(spike_times_sec, dtype=np.float32)
+        self.spike_times_sec = as_spike_times(spike_times_sec)
         self.spike_amplitudes = np.array(spike_amplitudes, dtype=np.float32)
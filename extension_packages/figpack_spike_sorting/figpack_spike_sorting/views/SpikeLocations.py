@@ -7,6 +7,7 @@ from typing import Dict, List, Optional, Tuple, Union
 import numpy as np
 import figpack
 from ..spike_sorting_extension import spike_sorting_extension
+from ._unified_spikes import as_spike_times, encode_spike_times, write_spike_times
 
 
 class SpikeLocationsItem:
@@ -27,12 +28,13 @@ class SpikeLocationsItem:
 
         Args:
             unit_id: Identifier for the unit
-            spike_times_sec: Array of spike times in seconds
+            spike_times_sec: Array of spike times in seconds (float32, or
+                float64 to keep exact times, see SpikeLocations)
             x_locations: Array of x coordinates for each spike
             y_locations: Array of y coordinates for each spike
         """
         self.unit_id = unit_id
-        self.spike_times_sec = np.array(spike_times_sec, dtype=np.float32)
+        self.spike_times_sec = as_spike_times(spike_times_sec)
         self.x_locations = np.array(x_locations, dtype=np.float32)
         self.y_locations = np.array(y_locations, dtype=np.float32)
 
@@ -59,6 +61,7 @@ class SpikeLocations(figpack.ExtensionView):
         channel_locations: Optional[Dict[str, np.ndarray]] = None,
         hide_unit_selector: bool = False,
         disable_auto_rotate: bool = False,
+        sampling_frequency_hz: Optional[float] = None,
     ):
         """
         Initialize a SpikeLocations view
@@ -70,6 +73,9 @@ class SpikeLocations(figpack.ExtensionView):
             channel_locations: Optional dictionary mapping channel IDs to (x, y) coordinates
             hide_unit_selector: Whether to hide the unit selector
             disable_auto_rotate: Whether to disable automatic rotation of the view
+            sampling_frequency_hz: Optional sampling frequency of the recording.
+                When given, spike times are stored as exact integer sample
+                indices instead of float32 seconds.
         """
         super().__init__(
             extension=spike_sorting_extension,
@@ -81,6 +87,7 @@ class SpikeLocations(figpack.ExtensionView):
         self.channel_locations = channel_locations
         self.hide_unit_selector = hide_unit_selector
         self.disable_auto_rotate = disable_auto_rotate
+        self.sampling_frequency_hz = sampling_frequency_hz
 
     def write_to_zarr_group(self, group: figpack.Group) -> None:
         """
@@ -108,6 +115,17 @@ class SpikeLocations(figpack.ExtensionView):
                 channel_locations_dict[str(ch_id)] = [float(a) for a in loc]
             group.attrs["channel_locations"] = channel_locations_dict
 
+        # All units share the sample offset of the earliest spike
+        sample_offset = None
+        if self.sampling_frequency_hz is not None:
+            first_times = [
+                u.spike_times_sec.min() for u in self.units if len(u.spike_times_sec)
+            ]
+            if first_times:
+                _, sample_offset = encode_spike_times(
+                    np.array(first_times), self.sampling_frequency_hz
+                )
+
         # Store unit data
         unit_metadata = []
         for i, unit_item in enumerate(self.units):
@@ -121,9 +139,12 @@ class SpikeLocations(figpack.ExtensionView):
             unit_metadata.append(metadata)
 
             # Create datasets for this unit
-            group.create_dataset(
+            write_spike_times(
+                group,
                 f"{unit_name}/spike_times_sec",
-                data=unit_item.spike_times_sec,
+                unit_item.spike_times_sec,
+                sampling_frequency_hz=self.sampling_frequency_hz,
+                sample_offset=sample_offset,
             )
             group.create_dataset(
                 f"{unit_name}/x_locations",
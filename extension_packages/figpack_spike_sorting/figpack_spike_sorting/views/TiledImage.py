@@ -142,7 +142,9 @@ class TiledImage(figpack.ExtensionView):
                             # Store as uint8 array in zarr
                             tile_key = f"{z}_{j}_{k}"
                             jpeg_array = np.frombuffer(jpeg_bytes, dtype=np.uint8)
-                            tiles_group.create_dataset(tile_key, data=jpeg_array)
+                            tiles_group.create_dataset(
+                                tile_key, data=jpeg_array, role="precompressed"
+                            )
 
                             if self.verbose:
                                 print(
@@ -0,0 +1,278 @@
+"""
+Helpers for building the unified (time-sorted, all units) spike arrays used by
+RasterPlot and SpikeAmplitudes, and for storing spike times
+
+Spike times are stored as float32 seconds by default. When the view is given
+the sampling frequency of the recording, they are stored instead as integer
+sample indices relative to the first spike (uint32, or uint64 for spans of
+more than 2^32 samples), delta encoded, with the attributes
+
+    sampling_frequency_hz, sample_offset
+
+from which the viewer computes (sample_offset + index) / sampling_frequency_hz.
+This keeps spike times exact in long recordings, where float32 seconds lose
+sub-millisecond precision after a couple of hours. It does not make them
+smaller: the exact deltas between consecutive spikes take about as much space
+as the rounded float32 times (a few percent more for recordings of several
+hours), so the sample index storage is opt-in.
+
+The unified arrays are chunked so that a chunk spans about
+EVENT_CHUNK_DURATION_SEC of spikes on average (zarr chunks have a fixed
+number of elements, so chunks are shorter in time where spikes are dense),
+and a chunk_index dataset of shape (num_chunks, 3) holds the
+(t_start, t_end, offset) of each chunk: the times in seconds of its first and
+last spikes and the index of its first spike. The viewer fetches the chunks
+that a time window overlaps and trims them to the window, so the data fetched
+for a zoomed-in window scales with the spikes in the window rather than with
+the chunk size. The reference_times/reference_indices arrays are only used by
+the viewer for figures written without a chunk index.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import figpack
+
+# Target time span of a chunk of the unified arrays, and bounds of the chunk
+# length (in spikes) that keep the number of chunk files and the size of a
+# chunk reasonable
+EVENT_CHUNK_DURATION_SEC = 30.0
+MIN_EVENT_CHUNK_LENGTH = 50_000
+MAX_EVENT_CHUNK_LENGTH = 2_000_000
+
+
+def as_spike_times(spike_times_sec) -> np.ndarray:
+    """
+    Spike times as a float32 array, or float64 if given as float64 (so that
+    they can be stored exactly as sample indices)
+    """
+    spike_times_sec = np.asarray(spike_times_sec)
+    if spike_times_sec.dtype == np.float64:
+        return spike_times_sec.copy()
+    return spike_times_sec.astype(np.float32)
+
+
+def get_unit_index_dtype(num_units: int) -> np.dtype:
+    """
+    The smallest unsigned integer dtype that holds the indices of num_units units
+    """
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if num_units <= int(np.iinfo(dtype).max) + 1:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+
+def encode_spike_times(
+    timestamps: np.ndarray,
+    sampling_frequency_hz: float,
+    sample_offset: Optional[int] = None,
+) -> Tuple[np.ndarray, int]:
+    """
+    Spike times (seconds) as integer sample indices relative to sample_offset
+
+    Args:
+        timestamps: Spike times in seconds
+        sampling_frequency_hz: Sampling frequency of the recording
+        sample_offset: Sample of index 0 (default: the first spike)
+
+    Returns:
+        Tuple of (indices, sample_offset) where indices is uint32, or uint64
+        if the spikes span more than 2^32 samples
+    """
+    samples = np.round(
+        np.asarray(timestamps, dtype=np.float64) * sampling_frequency_hz
+    ).astype(np.int64)
+    if sample_offset is None:
+        sample_offset = int(samples.min()) if len(samples) > 0 else 0
+    samples -= sample_offset
+    if len(samples) > 0 and samples.min() < 0:
+        raise ValueError("Spike times before the sample offset")
+    if len(samples) == 0 or samples.max() <= np.iinfo(np.uint32).max:
+        return samples.astype(np.uint32), sample_offset
+    return samples.astype(np.uint64), sample_offset
+
+
+def write_spike_times(
+    group: figpack.Group,
+    name: str,
+    timestamps: np.ndarray,
+    *,
+    sampling_frequency_hz: Optional[float],
+    sample_offset: Optional[int] = None,
+    **kwargs,
+) -> np.ndarray:
+    """
+    Write spike times (seconds) to group[name], as float32 seconds or, when
+    sampling_frequency_hz is given, as sample indices (see the module
+    docstring; the attributes are written to the group)
+
+    Args:
+        group: Group to write into
+        name: Name of the dataset
+        timestamps: Spike times in seconds
+        sampling_frequency_hz: Sampling frequency of the recording, or None
+        sample_offset: Sample of index 0 (default: the first spike)
+        kwargs: Passed to create_dataset (e.g. chunks)
+
+    Returns:
+        The spike times in seconds as the viewer reads them back
+    """
+    if sampling_frequency_hz is None:
+        data = np.asarray(timestamps, dtype=np.float32)
+        stored_times = data
+    else:
+        data, sample_offset = encode_spike_times(
+            timestamps, sampling_frequency_hz, sample_offset
+        )
+        group.attrs["sampling_frequency_hz"] = float(sampling_frequency_hz)
+        group.attrs["sample_offset"] = sample_offset
+        stored_times = (sample_offset + data.astype(np.float64)) / float(
+            sampling_frequency_hz
+        )
+    group.create_dataset(name, data=data, role="timestamps", **kwargs)
+    return stored_times
+
+
+def get_event_chunk_length(
+    timestamps: np.ndarray, chunk_duration_sec: float = EVENT_CHUNK_DURATION_SEC
+) -> int:
+    """
+    Chunk length of the unified arrays, so that a chunk spans about
+    chunk_duration_sec on average (within MIN_EVENT_CHUNK_LENGTH and
+    MAX_EVENT_CHUNK_LENGTH, and at most the number of spikes)
+
+    Args:
+        timestamps: Sorted spike times in seconds
+        chunk_duration_sec: Target time span of a chunk
+
+    Returns:
+        Number of spikes per chunk
+    """
+    n = len(timestamps)
+    if n == 0:
+        return 1
+    span = float(timestamps[-1]) - float(timestamps[0])
+    length = n * chunk_duration_sec / span if span > 0 else n
+    length = min(max(length, MIN_EVENT_CHUNK_LENGTH), MAX_EVENT_CHUNK_LENGTH)
+    return int(min(length, n))
+
+
+def get_chunk_index(timestamps: np.ndarray, chunk_length: int) -> np.ndarray:
+    """
+    The (t_start, t_end, offset) of each chunk of the unified arrays
+
+    Args:
+        timestamps: Sorted spike times in seconds
+        chunk_length: Number of spikes per chunk
+
+    Returns:
+        float64 array of shape (num_chunks, 3)
+    """
+    n = len(timestamps)
+    offsets = np.arange(0, n, chunk_length, dtype=np.int64)
+    last = np.minimum(offsets + chunk_length, n) - 1
+    chunk_index = np.zeros((len(offsets), 3), dtype=np.float64)
+    chunk_index[:, 0] = timestamps[offsets]
+    chunk_index[:, 1] = timestamps[last]
+    chunk_index[:, 2] = offsets
+    return chunk_index
+
+
+def write_chunk_index(
+    group: figpack.Group, timestamps: np.ndarray, chunk_length: int
+) -> None:
+    """
+    Write the chunk_index dataset of the unified arrays (see the module
+    docstring)
+
+    Args:
+        group: Group of the unified arrays
+        timestamps: Sorted spike times in seconds, as returned by
+            write_spike_times
+        chunk_length: Number of spikes per chunk
+    """
+    chunk_index = get_chunk_index(timestamps, chunk_length)
+    group.create_dataset("chunk_index", data=chunk_index, chunks=chunk_index.shape)
+
+
+def merge_spike_trains(
+    spike_times_per_unit: Sequence[np.ndarray],
+    unit_indices: Sequence[int],
+    values_per_unit: Optional[Sequence[np.ndarray]] = None,
+    timestamps_dtype=np.float32,
+) -> tuple:
+    """
+    Merge per-unit spike trains into arrays sorted by spike time
+
+    Ties are broken by unit order and then by the order within each unit. The
+    per-unit trains are typically already sorted, so the stable sort only has
+    to merge a few presorted runs.
+
+    Args:
+        spike_times_per_unit: Spike times (seconds) for each unit
+        unit_indices: Unit index to assign to the spikes of each unit
+        values_per_unit: Optional per-spike values (e.g. amplitudes) for each unit
+        timestamps_dtype: dtype of the merged timestamps (float64 keeps them
+            exact for storage as sample indices)
+
+    Returns:
+        Tuple of (timestamps, unit_indices, values) where values are float32,
+        unit_indices has the smallest sufficient unsigned integer dtype (see
+        get_unit_index_dtype) and values is None if values_per_unit is None
+    """
+    counts = np.array([len(times) for times in spike_times_per_unit], dtype=np.int64)
+    timestamps = np.concatenate(
+        [np.asarray(times, dtype=timestamps_dtype) for times in spike_times_per_unit]
+    )
+    order = np.argsort(timestamps, kind="stable")
+    timestamps = timestamps[order]
+    index_dtype = get_unit_index_dtype(max(unit_indices, default=0) + 1)
+    unit_index_array = np.repeat(np.asarray(unit_indices, dtype=index_dtype), counts)[
+        order
+    ]
+
+    values = None
+    if values_per_unit is not None:
+        values = np.concatenate(
+            [np.asarray(v, dtype=np.float32) for v in values_per_unit]
+        )[order]
+
+    return timestamps, unit_index_array, values
+
+
+def generate_reference_arrays(
+    timestamps: np.ndarray, interval_sec: float = 1.0
+) -> tuple:
+    """
+    Generate reference arrays using actual timestamps from the data
+
+    The first reference is the first timestamp and each following reference is
+    the first timestamp at least interval_sec after the previous reference.
+    Each reference is located with a binary search, so the cost scales with the
+    number of references rather than the number of spikes.
+
+    Args:
+        timestamps: Sorted array of timestamps
+        interval_sec: Minimum interval between reference points
+
+    Returns:
+        Tuple of (reference_times, reference_indices)
+    """
+    n = len(timestamps)
+    if n == 0:
+        return np.array([], dtype=np.float32), np.array([], dtype=np.uint32)
+
+    reference_indices: List[int] = [0]
+    i = 0
+    while True:
+        next_i = int(
+            np.searchsorted(timestamps, timestamps[i] + interval_sec, side="left")
+        )
+        i = max(next_i, i + 1)
+        if i >= n:
+            break
+        reference_indices.append(i)
+
+    indices = np.array(reference_indices, dtype=np.uint32)
+    return timestamps[indices].astype(np.float32), indices
@@ -1,5 +1,10 @@
 import { FunctionComponent, useEffect, useState } from "react";
-import { FPViewContexts, ZarrGroup } from "../figpack-interface";
+import {
+  DatasetDataType,
+  FPViewContexts,
+  ZarrGroup,
+} from "../figpack-interface";
+import { spikeTimesFromStored } from "./core-utils";
 import SpikeLocationsView from "./view-spike-locations/SpikeLocationsView";
 import { SpikeLocationsViewData } from "./view-spike-locations/SpikeLocationsViewData";
 import { ProvideUnitSelectionContext } from "./FPAutocorrelograms";
@@ -60,7 +65,10 @@ export const FPSpikeLocations: FunctionComponent<Props> = ({
 
           units.push({
             unitId,
-            spikeTimesSec: Array.from(spikeTimesSec),
+            spikeTimesSec: spikeTimesFromStored(
+              spikeTimesSec as DatasetDataType,
+              zarrGroup.attrs,
+            ),
             xLocations: Array.from(xLocations),
             yLocations: Array.from(yLocations),
           });
@@ -1,3 +1,4 @@
 export * from "./unit-colors";
 export * from "./validate-object";
 export * from "./drag-select";
+export * from "./spike-times";
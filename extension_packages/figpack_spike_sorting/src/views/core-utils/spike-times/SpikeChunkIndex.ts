@@ -0,0 +1,136 @@
+import { DatasetDataType, ZarrGroup } from "../../../figpack-interface";
+
+// Per-chunk (t_start, t_end, offset) of the unified spike arrays of a group
+// (the chunk_index dataset, see _unified_spikes.py), used to map a time
+// window to the range of spikes in the chunks that it overlaps. The data
+// clients fetch that range (whole zarr chunks, which are fetched in full
+// anyway) and trim it to the window with windowRange.
+class SpikeChunkIndex {
+  constructor(
+    private chunkIndex: DatasetDataType,
+    public numEvents: number,
+  ) {}
+
+  // Returns undefined for groups written without a chunk index
+  static async load(
+    zarrGroup: ZarrGroup,
+  ): Promise<SpikeChunkIndex | undefined> {
+    if (!zarrGroup.datasets.find((ds) => ds.name === "chunk_index")) {
+      return undefined;
+    }
+    const timestampsDataset = zarrGroup.datasets.find(
+      (ds) => ds.name === "timestamps",
+    );
+    const chunkIndex = await zarrGroup.getDatasetData("chunk_index", {});
+    if (!chunkIndex || !timestampsDataset) {
+      return undefined;
+    }
+    return new SpikeChunkIndex(chunkIndex, timestampsDataset.shape[0]);
+  }
+
+  get numChunks(): number {
+    return this.chunkIndex.length / 3;
+  }
+
+  private tStart(i: number): number {
+    return this.chunkIndex[i * 3] as number;
+  }
+
+  private tEnd(i: number): number {
+    return this.chunkIndex[i * 3 + 1] as number;
+  }
+
+  private offset(i: number): number {
+    return i < this.numChunks
+      ? (this.chunkIndex[i * 3 + 2] as number)
+      : this.numEvents;
+  }
+
+  // [startIndex, endIndex) of the spikes of the chunks overlapping the window
+  indexRange(startTimeSec: number, endTimeSec: number): [number, number] {
+    // First chunk ending at or after the start of the window
+    let lo = 0;
+    let hi = this.numChunks;
+    while (lo < hi) {
+      const mid = (lo + hi) >> 1;
+      if (this.tEnd(mid) < startTimeSec) lo = mid + 1;
+      else hi = mid;
+    }
+    const firstChunk = lo;
+    // First chunk starting after the end of the window
+    lo = firstChunk;
+    hi = this.numChunks;
+    while (lo < hi) {
+      const mid = (lo + hi) >> 1;
+      if (this.tStart(mid) <= endTimeSec) lo = mid + 1;
+      else hi = mid;
+    }
+    if (lo <= firstChunk) {
+      return [0, 0];
+    }
+    return [this.offset(firstChunk), this.offset(lo)];
+  }
+
+  // Approximate number of spikes in the window, interpolating linearly
+  // within the chunks at its ends (without fetching any spikes)
+  estimateNumEvents(startTimeSec: number, endTimeSec: number): number {
+    if (endTimeSec < startTimeSec) {
+      return 0;
+    }
+    return (
+      this.estimateIndex(endTimeSec, true) -
+      this.estimateIndex(startTimeSec, false)
+    );
+  }
+
+  private estimateIndex(timeSec: number, inclusive: boolean): number {
+    // Last chunk starting before (or at) the time
+    let lo = 0;
+    let hi = this.numChunks;
+    while (lo < hi) {
+      const mid = (lo + hi) >> 1;
+      const t = this.tStart(mid);
+      if (t < timeSec || (inclusive && t === timeSec)) lo = mid + 1;
+      else hi = mid;
+    }
+    const i = lo - 1;
+    if (i < 0) {
+      return 0;
+    }
+    const tStart = this.tStart(i);
+    const tEnd = this.tEnd(i);
+    const length = this.offset(i + 1) - this.offset(i);
+    if (timeSec > tEnd || (inclusive && timeSec === tEnd)) {
+      return this.offset(i + 1);
+    }
+    const fraction = tEnd > tStart ? (timeSec - tStart) / (tEnd - tStart) : 0;
+    return this.offset(i) + Math.round(fraction * length);
+  }
+
+  // [startIndex, endIndex) of the sorted spike times within the window
+  static windowRange(
+    times: number[],
+    startTimeSec: number,
+    endTimeSec: number,
+  ): [number, number] {
+    // First spike at or after the start of the window
+    let lo = 0;
+    let hi = times.length;
+    while (lo < hi) {
+      const mid = (lo + hi) >> 1;
+      if (times[mid] < startTimeSec) lo = mid + 1;
+      else hi = mid;
+    }
+    const startIndex = lo;
+    // First spike after the end of the window
+    hi = times.length;
+    while (lo < hi) {
+      const mid = (lo + hi) >> 1;
+      if (times[mid] <= endTimeSec) lo = mid + 1;
+      else hi = mid;
+    }
+    return [startIndex, lo];
+  }
+}
+
+export default SpikeChunkIndex;
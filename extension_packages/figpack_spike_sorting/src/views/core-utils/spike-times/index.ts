@@ -0,0 +1,2 @@
+export { default as spikeTimesFromStored } from "./spikeTimesFromStored";
+export { default as SpikeChunkIndex } from "./SpikeChunkIndex";
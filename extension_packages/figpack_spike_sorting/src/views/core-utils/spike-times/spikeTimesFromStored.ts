@@ -0,0 +1,22 @@
+import { DatasetDataType } from "../../../figpack-interface";
+
+// Spike times are stored either as float32 seconds or, when the group has a
+// sampling_frequency_hz attribute, as integer sample indices relative to the
+// sample_offset attribute (see _unified_spikes.py)
+const spikeTimesFromStored = (
+  data: DatasetDataType,
+  attrs: { [key: string]: any },
+): number[] => {
+  const samplingFrequencyHz = attrs["sampling_frequency_hz"];
+  if (samplingFrequencyHz === undefined) {
+    return Array.from(data);
+  }
+  const sampleOffset: number = attrs["sample_offset"] || 0;
+  const ret: number[] = new Array(data.length);
+  for (let i = 0; i < data.length; i++) {
+    ret[i] = (sampleOffset + data[i]) / samplingFrequencyHz;
+  }
+  return ret;
+};
+
+export default spikeTimesFromStored;
@@ -1,4 +1,5 @@
 import { DatasetDataType, ZarrGroup } from "../../figpack-interface";
+import { SpikeChunkIndex, spikeTimesFromStored } from "../core-utils";
 
 export interface RasterPlotMetadata {
   startTimeSec: number;
@@ -27,10 +28,12 @@ export class RasterPlotDataClient {
   constructor(
     private zarrGroup: ZarrGroup,
     public metadata: RasterPlotMetadata,
-    private referenceTimes: DatasetDataType,
-    private referenceIndices: DatasetDataType,
+    private referenceTimes: DatasetDataType | undefined,
+    private referenceIndices: DatasetDataType | undefined,
     private counts2dArray: number[][],
     private binEdges: number[],
+    private numEvents: number,
+    private chunkIndex: SpikeChunkIndex | undefined,
   ) {
     this.zarrGroup = zarrGroup;
   }
@@ -42,16 +45,17 @@ export class RasterPlotDataClient {
       unitIds: zarrGroup.attrs["unit_ids"] || [],
       totalSpikes: zarrGroup.attrs["total_spikes"] || 0,
     };
-    const referenceTimes = await zarrGroup.getDatasetData(
-      "reference_times",
-      {},
-    );
-    const referenceIndices = await zarrGroup.getDatasetData(
-      "reference_indices",
-      {},
-    );
+    const chunkIndex = await SpikeChunkIndex.load(zarrGroup);
+    // The reference arrays are only needed for figures written without a
+    // chunk index
+    const referenceTimes = chunkIndex
+      ? undefined
+      : await zarrGroup.getDatasetData("reference_times", {});
+    const referenceIndices = chunkIndex
+      ? undefined
+      : await zarrGroup.getDatasetData("reference_indices", {});
 
-    if (!referenceTimes || !referenceIndices) {
+    if (!chunkIndex && (!referenceTimes || !referenceIndices)) {
       throw new Error(
         `Reference arrays not found in Zarr group: ${zarrGroup.path}`,
       );
@@ -89,6 +93,9 @@ export class RasterPlotDataClient {
       binEdges[i] = metadata.startTimeSec + i;
     }
 
+    const numEvents =
+      zarrGroup.datasets.find((ds) => ds.name === "timestamps")?.shape[0] ?? 0;
+
     const client = new RasterPlotDataClient(
       zarrGroup,
       metadata,
@@ -96,23 +103,35 @@ export class RasterPlotDataClient {
       referenceIndices,
       counts2dArray,
       binEdges,
+      numEvents,
+      chunkIndex,
     );
 
     return client;
   }
 
   async getDataForRange(params: DataRangeParams): Promise<RasterPlotRangeData> {
-    // Find start and end indices using reference arrays
-    const startIndex = this.findStartIndex(
-      this.referenceTimes,
-      this.referenceIndices,
-      params.startTimeSec,
-    );
-    const endIndex = this.findEndIndex(
-      this.referenceTimes,
-      this.referenceIndices,
-      params.endTimeSec,
-    );
+    let startIndex = 0;
+    let endIndex = 0;
+    if (this.chunkIndex) {
+      // The chunks that overlap the window (trimmed to the window below)
+      [startIndex, endIndex] = this.chunkIndex.indexRange(
+        params.startTimeSec,
+        params.endTimeSec,
+      );
+    } else if (this.referenceTimes && this.referenceIndices) {
+      // Find start and end indices using reference arrays
+      startIndex = this.findStartIndex(
+        this.referenceTimes,
+        this.referenceIndices,
+        params.startTimeSec,
+      );
+      endIndex = this.findEndIndex(
+        this.referenceTimes,
+        this.referenceIndices,
+        params.endTimeSec,
+      );
+    }
 
     if (startIndex >= endIndex) {
       // No data in range
@@ -132,9 +151,21 @@ export class RasterPlotDataClient {
     );
 
     const rangeData = {
-      timestamps: Array.from(timestampsData as Float32Array),
-      unitIndices: Array.from(unitIndicesData as Uint16Array),
+      timestamps: spikeTimesFromStored(
+        timestampsData as DatasetDataType,
+        this.zarrGroup.attrs,
+      ),
+      unitIndices: Array.from(unitIndicesData as DatasetDataType),
     };
+    if (this.chunkIndex) {
+      const [i1, i2] = SpikeChunkIndex.windowRange(
+        rangeData.timestamps,
+        params.startTimeSec,
+        params.endTimeSec,
+      );
+      rangeData.timestamps = rangeData.timestamps.slice(i1, i2);
+      rangeData.unitIndices = rangeData.unitIndices.slice(i1, i2);
+    }
 
     return rangeData;
   }
@@ -218,6 +249,10 @@ export class RasterPlotDataClient {
     while (i - 1 >= 0 && referenceTimes[i - 1] > endTime) {
       i--;
     }
+    if (i < 0 || referenceTimes[i] <= endTime) {
+      // The window extends past the last reference
+      return this.numEvents;
+    }
     return referenceIndices[i];
   }
 }
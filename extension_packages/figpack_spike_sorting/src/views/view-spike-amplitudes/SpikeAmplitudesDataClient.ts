@@ -1,4 +1,5 @@
 import { DatasetDataType, ZarrGroup } from "../../figpack-interface";
+import { SpikeChunkIndex, spikeTimesFromStored } from "../core-utils";
 
 export interface SpikeAmplitudesMetadata {
   startTimeSec: number;
@@ -26,8 +27,10 @@ export class SpikeAmplitudesDataClient {
     private subsampleClients: {
       [factor: number]: SpikeAmplitudesDataClient;
     } = {},
-    private referenceTimes: DatasetDataType,
-    private referenceIndices: DatasetDataType,
+    private referenceTimes: DatasetDataType | undefined,
+    private referenceIndices: DatasetDataType | undefined,
+    private numEvents: number,
+    private chunkIndex: SpikeChunkIndex | undefined,
   ) {
     this.zarrGroup = zarrGroup;
   }
@@ -46,15 +49,16 @@ export class SpikeAmplitudesDataClient {
     const subsampledDataGroup = zarrGroup.subgroups.find(
       (g) => g.name === "subsampled_data",
     );
-    const referenceTimes = await zarrGroup.getDatasetData(
-      "reference_times",
-      {},
-    );
-    const referenceIndices = await zarrGroup.getDatasetData(
-      "reference_indices",
-      {},
-    );
-    if (!referenceTimes || !referenceIndices) {
+    const chunkIndex = await SpikeChunkIndex.load(zarrGroup);
+    // The reference arrays are only needed for figures written without a
+    // chunk index
+    const referenceTimes = chunkIndex
+      ? undefined
+      : await zarrGroup.getDatasetData("reference_times", {});
+    const referenceIndices = chunkIndex
+      ? undefined
+      : await zarrGroup.getDatasetData("reference_indices", {});
+    if (!chunkIndex && (!referenceTimes || !referenceIndices)) {
       throw new Error(
         `Reference arrays not found in Zarr group: ${zarrGroup.path}`,
       );
@@ -85,12 +89,17 @@ export class SpikeAmplitudesDataClient {
       }
     }
 
+    const numEvents =
+      zarrGroup.datasets.find((ds) => ds.name === "timestamps")?.shape[0] ?? 0;
+
     return new SpikeAmplitudesDataClient(
       zarrGroup,
       metadata,
       subsampleClients,
       referenceTimes,
       referenceIndices,
+      numEvents,
+      chunkIndex,
     );
   }
 
@@ -100,17 +109,33 @@ export class SpikeAmplitudesDataClient {
       maxNumEvents: number;
     },
   ): Promise<SpikeAmplitudesRangeData> {
-    // Find start and end indices using reference arrays
-    const startIndex = this.findStartIndex(
-      this.referenceTimes,
-      this.referenceIndices,
-      params.startTimeSec,
-    );
-    const endIndex = this.findEndIndex(
-      this.referenceTimes,
-      this.referenceIndices,
-      params.endTimeSec,
-    );
+    let startIndex = 0;
+    let endIndex = 0;
+    let numEvents = 0;
+    if (this.chunkIndex) {
+      // The chunks that overlap the window (trimmed to the window below)
+      [startIndex, endIndex] = this.chunkIndex.indexRange(
+        params.startTimeSec,
+        params.endTimeSec,
+      );
+      numEvents = this.chunkIndex.estimateNumEvents(
+        params.startTimeSec,
+        params.endTimeSec,
+      );
+    } else if (this.referenceTimes && this.referenceIndices) {
+      // Find start and end indices using reference arrays
+      startIndex = this.findStartIndex(
+        this.referenceTimes,
+        this.referenceIndices,
+        params.startTimeSec,
+      );
+      endIndex = this.findEndIndex(
+        this.referenceTimes,
+        this.referenceIndices,
+        params.endTimeSec,
+      );
+      numEvents = endIndex - startIndex;
+    }
 
     if (startIndex >= endIndex) {
       // No data in range
@@ -123,12 +148,12 @@ export class SpikeAmplitudesDataClient {
       return emptyData;
     }
 
-    if (o.maxNumEvents > 0 && endIndex - startIndex > o.maxNumEvents) {
+    if (o.maxNumEvents > 0 && numEvents > o.maxNumEvents) {
       // Too many events, try to use a subsampled client
       let subsampleFactor = 4;
       while (
         subsampleFactor * 4 in this.subsampleClients &&
-        (endIndex - startIndex) / subsampleFactor > o.maxNumEvents
+        numEvents / subsampleFactor > o.maxNumEvents
       ) {
         subsampleFactor *= 4;
       }
@@ -154,11 +179,24 @@ export class SpikeAmplitudesDataClient {
     });
 
     const rangeData = {
-      timestamps: Array.from(timestampsData as Float32Array),
-      unitIndices: Array.from(unitIndicesData as Uint16Array),
+      timestamps: spikeTimesFromStored(
+        timestampsData as DatasetDataType,
+        this.zarrGroup.attrs,
+      ),
+      unitIndices: Array.from(unitIndicesData as DatasetDataType),
       amplitudes: Array.from(amplitudesData as Float32Array),
       subsampleFactor: 1,
     };
+    if (this.chunkIndex) {
+      const [i1, i2] = SpikeChunkIndex.windowRange(
+        rangeData.timestamps,
+        params.startTimeSec,
+        params.endTimeSec,
+      );
+      rangeData.timestamps = rangeData.timestamps.slice(i1, i2);
+      rangeData.unitIndices = rangeData.unitIndices.slice(i1, i2);
+      rangeData.amplitudes = rangeData.amplitudes.slice(i1, i2);
+    }
 
     return rangeData;
   }
@@ -184,6 +222,10 @@ export class SpikeAmplitudesDataClient {
     while (i - 1 >= 0 && referenceTimes[i - 1] > endTime) {
       i--;
     }
+    if (i < 0 || referenceTimes[i] <= endTime) {
+      // The window extends past the last reference
+      return this.numEvents;
+    }
     return referenceIndices[i];
   }
 }
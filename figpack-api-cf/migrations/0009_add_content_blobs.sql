@@ -0,0 +1,14 @@
+-- Migration number: 0009 	 2026-10-17T00:00:00.000Z
+
+-- Content-addressed blobs that new figures can reference instead of uploading.
+-- A blob is recorded only after the server has verified the SHA-256 of its
+-- content, and it is stored under a key that no upload URL can target, so it
+-- cannot be changed afterwards.
+CREATE TABLE content_blobs (
+  bucket TEXT NOT NULL,
+  sha256 TEXT NOT NULL,
+  object_key TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  created_at INTEGER NOT NULL DEFAULT (unixepoch() * 1000),
+  PRIMARY KEY (bucket, sha256)
+);
@@ -0,0 +1,145 @@
+import { BucketInfo, copyObject, getObject, putObject } from './s3Utils';
+import { Env } from './types';
+
+// Content-addressed blobs let a new figure reference files (the figure
+// frontend, extension scripts) that an earlier figure in the same bucket
+// already uploaded, instead of uploading them again.
+//
+// A blob is only recorded after the server has downloaded the file and
+// verified its SHA-256, and the verified bytes are written to a key under
+// BLOB_KEY_PREFIX, which no upload URL can target. Clients therefore cannot
+// change the content behind a hash after it has been recorded.
+
+const BLOB_KEY_PREFIX = 'blobs/sha256/';
+
+// Largest file that is verified and recorded as a blob
+const MAX_BLOB_SIZE = 32 * 1024 * 1024;
+
+// Bound on the number of files downloaded and verified when finalizing a figure
+const MAX_BLOBS_REGISTERED_PER_FIGURE = 16;
+
+// D1 limits the number of bound parameters of a statement
+const MAX_HASHES_PER_QUERY = 90;
+
+export type ContentBlob = {
+	sha256: string;
+	objectKey: string;
+	size: number;
+};
+
+export function isSha256(value: unknown): value is string {
+	return typeof value === 'string' && /^[0-9a-f]{64}$/.test(value);
+}
+
+// Only files that are shared between figures are recorded. Figure data and
+// per-figure metadata are not, which also means that the blob check cannot be
+// used to probe whether another user uploaded some particular data.
+export function isShareablePath(relativePath: string): boolean {
+	if (relativePath.startsWith('data.zarr/')) {
+		return false;
+	}
+	return !['manifest.json', 'annotations.json', 'figpack.json'].includes(relativePath);
+}
+
+async function sha256Hex(data: Uint8Array): Promise<string> {
+	const digest = await crypto.subtle.digest('SHA-256', data);
+	return Array.from(new Uint8Array(digest))
+		.map((b) => b.toString(16).padStart(2, '0'))
+		.join('');
+}
+
+// Look up the recorded blobs of a bucket by content hash
+export async function findContentBlobs(env: Env, bucketName: string, hashes: string[]): Promise<Map<string, ContentBlob>> {
+	const blobs = new Map<string, ContentBlob>();
+	const uniqueHashes = Array.from(new Set(hashes));
+
+	for (let i = 0; i < uniqueHashes.length; i += MAX_HASHES_PER_QUERY) {
+		const chunk = uniqueHashes.slice(i, i + MAX_HASHES_PER_QUERY);
+		const placeholders = chunk.map(() => '?').join(', ');
+		const result = await env.figpack_db
+			.prepare(`SELECT sha256, object_key, size FROM content_blobs WHERE bucket = ? AND sha256 IN (${placeholders});`)
+			.bind(bucketName, ...chunk)
+			.all();
+
+		for (const row of result.results) {
+			blobs.set(row.sha256 as string, {
+				sha256: row.sha256 as string,
+				objectKey: row.object_key as string,
+				size: row.size as number,
+			});
+		}
+	}
+
+	return blobs;
+}
+
+// Copy a recorded blob to a file of a figure. Returns false, and forgets the
+// blob, if it is no longer in the bucket.
+export async function linkContentBlob(env: Env, bucketInfo: BucketInfo, blob: ContentBlob, fileKey: string): Promise<boolean> {
+	try {
+		await copyObject(bucketInfo, blob.objectKey, fileKey);
+		return true;
+	} catch (error) {
+		console.error(`Error linking blob ${blob.sha256} to ${fileKey}:`, error);
+		await env.figpack_db
+			.prepare('DELETE FROM content_blobs WHERE bucket = ? AND sha256 = ?;')
+			.bind(bucketInfo.bucketName, blob.sha256)
+			.run();
+		return false;
+	}
+}
+
+// Record the shareable files of a finalized figure as blobs, using the hashes
+// in its manifest.json. Each new file is downloaded and its hash verified
+// before it is recorded.
+export async function registerFigureBlobs(env: Env, bucketInfo: BucketInfo, figureKeyPrefix: string): Promise<number> {
+	const manifest = await getObject(bucketInfo, `${figureKeyPrefix}/manifest.json`);
+	const manifestData = JSON.parse(new TextDecoder().decode(manifest.body));
+	const manifestFiles: any[] = Array.isArray(manifestData.files) ? manifestData.files : [];
+
+	const candidates = manifestFiles.filter(
+		(file) =>
+			typeof file.path === 'string' &&
+			isShareablePath(file.path) &&
+			isSha256(file.sha256) &&
+			typeof file.size === 'number' &&
+			file.size > 0 &&
+			file.size <= MAX_BLOB_SIZE,
+	);
+	if (candidates.length === 0) {
+		return 0;
+	}
+
+	const existing = await findContentBlobs(
+		env,
+		bucketInfo.bucketName,
+		candidates.map((file) => file.sha256),
+	);
+
+	let numRegistered = 0;
+	for (const file of candidates) {
+		if (numRegistered >= MAX_BLOBS_REGISTERED_PER_FIGURE) {
+			break;
+		}
+		if (existing.has(file.sha256)) {
+			continue;
+		}
+
+		const { body, contentType } = await getObject(bucketInfo, `${figureKeyPrefix}/${file.path}`);
+		if (body.length !== file.size || (await sha256Hex(body)) !== file.sha256) {
+			console.warn(`Not recording ${file.path} as a blob: its content does not match the manifest`);
+			continue;
+		}
+
+		const objectKey = `${BLOB_KEY_PREFIX}${file.sha256}`;
+		await putObject(bucketInfo, objectKey, body, contentType);
+		await env.figpack_db
+			.prepare('INSERT OR IGNORE INTO content_blobs (bucket, sha256, object_key, size) VALUES (?, ?, ?, ?);')
+			.bind(bucketInfo.bucketName, file.sha256, objectKey, file.size)
+			.run();
+		existing.set(file.sha256, { sha256: file.sha256, objectKey, size: file.size });
+		numRegistered += 1;
+	}
+
+	return numRegistered;
+}
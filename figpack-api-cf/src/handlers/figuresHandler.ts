@@ -1,7 +1,9 @@
 import { authenticateUser, validateApiKey } from '../auth';
 import { API_LIMITS } from '../config';
+import { registerFigureBlobs } from '../contentBlobs';
 import { updateFigureJson } from '../figureJsonManager';
 import { checkEphemeralFigureLimit } from '../rateLimit';
+import { getBucketInfo } from '../s3Utils';
 import { Bucket, Env, Figure, RateLimitResult } from '../types';
 import { json } from '../utils';
 
@@ -72,7 +74,7 @@ function parseFigure(row: any): Figure {
 export async function handleCreateFigure(request: Request, env: Env, rateLimitResult: RateLimitResult): Promise<Response> {
 	try {
 		const body = (await request.json()) as any;
-		const { apiKey: apiKeyFromBody, ephemeral, bucket: bucketName, figpackVersion, totalFiles, totalSize, title } = body;
+		const { apiKey: apiKeyFromBody, ephemeral, bucket: bucketName, figpackVersion, totalFiles, totalSize, title, resumeFigureUrl } = body;
 
 		// In version 0.3.0 of the python package we used apiKey in the body, so we'll keep supporting that now
 
@@ -96,6 +98,13 @@ export async function handleCreateFigure(request: Request, env: Env, rateLimitRe
 
 		const targetBucket = parseBucket(bucketRow);
 
+		// Upload features that need the server to access the bucket
+		const hasServerCredentials = !!(targetBucket.awsAccessKeyId && targetBucket.awsSecretAccessKey);
+		const uploadCapabilities = {
+			contentDedup: hasServerCredentials,
+			multipartUpload: hasServerCredentials,
+		};
+
 		let userEmail = 'anonymous';
 		let isUserAuthorized = false;
 
@@ -148,6 +157,29 @@ export async function handleCreateFigure(request: Request, env: Env, rateLimitRe
 			);
 		}
 
+		// Resume the figure of an interrupted upload of the same bundle, if it
+		// is still there. Every create otherwise gets a new random figure id.
+		if (resumeFigureUrl) {
+			const resumeRow = await env.figpack_db.prepare('SELECT * FROM figures WHERE figure_url = ?').bind(resumeFigureUrl).first();
+			if (
+				resumeRow &&
+				resumeRow.bucket === targetBucket.name &&
+				resumeRow.owner_email === userEmail &&
+				Boolean(resumeRow.is_ephemeral) === Boolean(ephemeral) &&
+				(resumeRow.status === 'uploading' || resumeRow.status === 'completed')
+			) {
+				return json(
+					{
+						success: true,
+						message: resumeRow.status === 'completed' ? 'Figure already exists and is completed' : 'Resuming figure upload',
+						figure: parseFigure(resumeRow),
+						...uploadCapabilities,
+					},
+					200,
+				);
+			}
+		}
+
 		// Check per-user figure limit (count all figures for this user)
 		if (userEmail !== 'anonymous') {
 			const figureCountResult = await env.figpack_db
@@ -244,6 +276,7 @@ export async function handleCreateFigure(request: Request, env: Env, rateLimitRe
 					success: true,
 					message: figureIsExistingAndCompleted ? 'Figure already exists and is completed' : 'Figure already exists',
 					figure: parseFigure(existingFigure),
+					...uploadCapabilities,
 				},
 				200,
 			);
@@ -314,6 +347,7 @@ export async function handleCreateFigure(request: Request, env: Env, rateLimitRe
 				success: true,
 				message: 'Figure created successfully',
 				figure: parseFigure(newFigure),
+				...uploadCapabilities,
 			},
 			201,
 			{
@@ -741,6 +775,22 @@ export async function handleFinalizeFigure(request: Request, env: Env, rateLimit
 		const bucketRow = await env.figpack_db.prepare('SELECT * FROM buckets WHERE name = ?;').bind(bucketName).first();
 		const hasServerCredentials = !!(bucketRow && bucketRow.aws_access_key_id && bucketRow.aws_secret_access_key);
 
+		// Record the shared files of the figure (frontend, extensions) as
+		// content-addressed blobs that later figures can reference
+		if (bucketRow && hasServerCredentials) {
+			try {
+				const bucketBaseUrl = bucketRow.bucket_base_url as string;
+				const figureUrlWithoutIndexHtml = figureUrl.endsWith('/index.html') ? figureUrl.slice(0, -'/index.html'.length) : figureUrl;
+				if (figureUrlWithoutIndexHtml.startsWith(`${bucketBaseUrl}/`)) {
+					const figureKeyPrefix = figureUrlWithoutIndexHtml.slice(`${bucketBaseUrl}/`.length);
+					await registerFigureBlobs(env, getBucketInfo(bucketRow, bucketName), figureKeyPrefix);
+				}
+			} catch (error) {
+				console.error('Error recording content blobs:', error);
+				// Don't fail the request if the blobs cannot be recorded
+			}
+		}
+
 		// Re-fetch figure to get the updated status
 		const finalRow = await env.figpack_db.prepare('SELECT * FROM figures WHERE figure_url = ?').bind(figureUrl).first();
 
@@ -1,7 +1,16 @@
 import { authenticateUser } from '../auth';
 import { API_LIMITS } from '../config';
-import { BucketInfo, getSignedUploadUrl } from '../s3Utils';
-import { BatchUploadRequest, ClientSignedFileInfo, Env, RateLimitResult, SignedUrlInfo } from '../types';
+import { findContentBlobs, isSha256, isShareablePath, linkContentBlob } from '../contentBlobs';
+import {
+	BucketInfo,
+	abortMultipartUpload,
+	completeMultipartUpload,
+	createMultipartUpload,
+	getBucketInfo,
+	getSignedUploadPartUrl,
+	getSignedUploadUrl,
+} from '../s3Utils';
+import { BatchUploadRequest, BlobCheckRequest, ClientSignedFileInfo, Env, MultipartUploadRequest, RateLimitResult, SignedUrlInfo } from '../types';
 import { json } from '../utils';
 
 // File path validation functions
@@ -71,6 +80,165 @@ function validateFilePath(path: string): { valid: boolean } {
 	return { valid: false };
 }
 
+type UploadTarget = {
+	bucketInfo: BucketInfo;
+	bucketBaseUrl: string;
+	hasServerCredentials: boolean;
+};
+
+// Check that the caller may upload to a figure and look up its bucket.
+// Returns the error response if not.
+async function authorizeFigureUpload(
+	env: Env,
+	figureUrl: string,
+	apiKey: string | null | undefined,
+	adminOverride: boolean | undefined,
+): Promise<UploadTarget | Response> {
+	// Find the figure first to check if it's ephemeral
+	const figureRow = await env.figpack_db.prepare('SELECT * FROM figures WHERE figure_url = ?;').bind(figureUrl).first();
+
+	if (!figureRow) {
+		return json(
+			{
+				success: false,
+				message: 'Figure not found. Please create the figure first using /figures/create',
+			},
+			404,
+		);
+	}
+
+	const isEphemeral = figureRow.is_ephemeral === 1;
+	const figureOwnerEmail = figureRow.owner_email as string;
+
+	let userEmail = 'anonymous';
+
+	// For non-ephemeral figures, API key is required
+	if (!isEphemeral && !apiKey) {
+		return json(
+			{
+				success: false,
+				message: 'API key is required for non-ephemeral figures',
+			},
+			400,
+		);
+	}
+
+	// Authenticate with API key if provided
+	if (apiKey) {
+		const authResult = await authenticateUser(apiKey, env);
+		if (!authResult.isValid || !authResult.user) {
+			return json(
+				{
+					success: false,
+					message: 'Invalid API key',
+				},
+				401,
+			);
+		}
+		userEmail = authResult.user.email;
+		const isAdmin = authResult.isAdmin;
+
+		// Verify figure ownership for authenticated users
+		if (figureOwnerEmail !== userEmail) {
+			// If admin override is requested, verify admin status
+			if (adminOverride) {
+				if (!isAdmin) {
+					return json(
+						{
+							success: false,
+							message: 'Admin privileges required for override. You are not an administrator.',
+						},
+						403,
+					);
+				}
+				// Admin override granted - log the action
+				console.log(`Admin override: ${userEmail} is modifying figure owned by ${figureOwnerEmail} at ${figureUrl}`);
+			} else {
+				// No admin override - deny access
+				return json(
+					{
+						success: false,
+						message: 'Access denied. You are not the owner of this figure.',
+					},
+					403,
+				);
+			}
+		}
+	} else {
+		// For ephemeral figures without API key, verify it's anonymous
+		if (figureOwnerEmail !== 'anonymous') {
+			return json(
+				{
+					success: false,
+					message: 'Access denied. This figure requires authentication.',
+				},
+				403,
+			);
+		}
+	}
+
+	// Determine which bucket to use based on the figure
+	const bucketName = (figureRow.bucket as string) || 'figpack-figures';
+
+	// Get bucket configuration from database
+	const bucketRow = await env.figpack_db.prepare('SELECT * FROM buckets WHERE name = ?;').bind(bucketName).first();
+
+	if (!bucketRow) {
+		return json(
+			{
+				success: false,
+				message: `Bucket "${bucketName}" not found`,
+			},
+			400,
+		);
+	}
+
+	// Extract bucket base URL
+	const bucketBaseUrl = bucketRow.bucket_base_url as string;
+
+	const bucketInfo = getBucketInfo(bucketRow, bucketName);
+
+	// Determine whether the server can sign URLs or the client must handle it
+	const hasServerCredentials = !!(bucketInfo.accessKeyId && bucketInfo.secretAccessKey);
+
+	return { bucketInfo, bucketBaseUrl, hasServerCredentials };
+}
+
+// Compute the bucket key of a file of a figure. Returns the error response if
+// the path is not a valid figpack file.
+function getFileKey(figureUrl: string, relativePath: string, bucketBaseUrl: string): string | Response {
+	// Validate file path
+	const fileValidation = validateFilePath(relativePath);
+	if (!fileValidation.valid) {
+		return json(
+			{
+				success: false,
+				message: `Invalid file path ${relativePath}. Must be a valid figpack file type.`,
+			},
+			400,
+		);
+	}
+
+	// Remove /index.html suffix if present in figureUrl for consistency
+	const figureUrlWithoutIndexHtml = figureUrl.endsWith('/index.html') ? figureUrl.slice(0, -'/index.html'.length) : figureUrl;
+
+	// Validate that destination URL starts with bucket base URL
+	const destinationUrl = `${figureUrlWithoutIndexHtml}/${relativePath}`;
+
+	if (!destinationUrl.startsWith(bucketBaseUrl + '/')) {
+		return json(
+			{
+				success: false,
+				message: `Invalid destination URL: ${destinationUrl}. Must start with ${bucketBaseUrl}/`,
+			},
+			400,
+		);
+	}
+
+	// Extract the file key from the destination URL
+	return destinationUrl.slice(`${bucketBaseUrl}/`.length);
+}
+
 export async function handleUpload(request: Request, env: Env, rateLimitResult: RateLimitResult): Promise<Response> {
 	try {
 		// Parse request body
@@ -130,144 +298,11 @@ export async function handleUpload(request: Request, env: Env, rateLimitResult:
 			);
 		}
 
-		// Find the figure first to check if it's ephemeral
-		const figureRow = await env.figpack_db.prepare('SELECT * FROM figures WHERE figure_url = ?;').bind(figureUrl).first();
-
-		if (!figureRow) {
-			return json(
-				{
-					success: false,
-					message: 'Figure not found. Please create the figure first using /figures/create',
-				},
-				404,
-			);
-		}
-
-		const isEphemeral = figureRow.is_ephemeral === 1;
-		const figureOwnerEmail = figureRow.owner_email as string;
-
-		let userEmail = 'anonymous';
-
-		// For non-ephemeral figures, API key is required
-		if (!isEphemeral && !apiKey) {
-			return json(
-				{
-					success: false,
-					message: 'API key is required for non-ephemeral figures',
-				},
-				400,
-			);
-		}
-
-		// Authenticate with API key if provided
-		if (apiKey) {
-			const authResult = await authenticateUser(apiKey, env);
-			if (!authResult.isValid || !authResult.user) {
-				return json(
-					{
-						success: false,
-						message: 'Invalid API key',
-					},
-					401,
-				);
-			}
-			userEmail = authResult.user.email;
-			const isAdmin = authResult.isAdmin;
-
-			// Verify figure ownership for authenticated users
-			if (figureOwnerEmail !== userEmail) {
-				// If admin override is requested, verify admin status
-				if (adminOverride) {
-					if (!isAdmin) {
-						return json(
-							{
-								success: false,
-								message: 'Admin privileges required for override. You are not an administrator.',
-							},
-							403,
-						);
-					}
-					// Admin override granted - log the action
-					console.log(`Admin override: ${userEmail} is modifying figure owned by ${figureOwnerEmail} at ${figureUrl}`);
-				} else {
-					// No admin override - deny access
-					return json(
-						{
-							success: false,
-							message: 'Access denied. You are not the owner of this figure.',
-						},
-						403,
-					);
-				}
-			}
-		} else {
-			// For ephemeral figures without API key, verify it's anonymous
-			if (figureOwnerEmail !== 'anonymous') {
-				return json(
-					{
-						success: false,
-						message: 'Access denied. This figure requires authentication.',
-					},
-					403,
-				);
-			}
+		const target = await authorizeFigureUpload(env, figureUrl, apiKey, adminOverride);
+		if (target instanceof Response) {
+			return target;
 		}
-
-		// Determine which bucket to use based on the figure
-		const bucketName = (figureRow.bucket as string) || 'figpack-figures';
-
-		// Get bucket configuration from database
-		const bucketRow = await env.figpack_db.prepare('SELECT * FROM buckets WHERE name = ?;').bind(bucketName).first();
-
-		if (!bucketRow) {
-			return json(
-				{
-					success: false,
-					message: `Bucket "${bucketName}" not found`,
-				},
-				400,
-			);
-		}
-
-		// Extract bucket base URL - need to construct the URI for S3 access
-		const bucketBaseUrl = bucketRow.bucket_base_url as string;
-
-		// Construct bucket URI from the bucket name
-		// The bucket configuration should tell us the service type
-		let bucketUri: string;
-		const provider = bucketRow.provider as string;
-
-		if (provider === 'cloudflare') {
-			// R2 bucket
-			bucketUri = `r2://${bucketName}`;
-		} else {
-			// AWS S3 or other S3-compatible
-			bucketUri = `s3://${bucketName}`;
-		}
-
-		// Create S3 bucket configuration
-		// const s3Bucket: S3BucketConfig = {
-		// 	uri: bucketUri,
-		// 	credentials: JSON.stringify({
-		// 		accessKeyId: bucketRow.aws_access_key_id,
-		// 		secretAccessKey: bucketRow.aws_secret_access_key,
-		// 		endpoint: bucketRow.s3_endpoint,
-		// 	}),
-		// };
-
-		const bucketInfo: BucketInfo = {
-			provider,
-			bucketName,
-			nativeBucketName: bucketRow.native_bucket_name || bucketName,
-			accessKeyId: bucketRow.aws_access_key_id,
-			secretAccessKey: bucketRow.aws_secret_access_key,
-			sessionToken: bucketRow.aws_session_token || undefined,
-			endpoint: bucketRow.s3_endpoint,
-			region: bucketRow.region || (provider === 'cloudflare' ? 'auto' : 'us-east-1'),
-		};
-
-		// Determine whether the server can sign URLs or the client must handle it
-		const hasServerCredentials = !!(bucketInfo.accessKeyId && bucketInfo.secretAccessKey);
+		const { bucketInfo, bucketBaseUrl, hasServerCredentials } = target;
 
 		// Validate all files and compute keys
 		const signedUrls: SignedUrlInfo[] = [];
@@ -276,18 +311,6 @@ export async function handleUpload(request: Request, env: Env, rateLimitResult:
 		for (const file of files) {
 			const { relativePath, size } = file;
 
-			// Validate file path
-			const fileValidation = validateFilePath(relativePath);
-			if (!fileValidation.valid) {
-				return json(
-					{
-						success: false,
-						message: `Invalid file path ${relativePath}. Must be a valid figpack file type.`,
-					},
-					400,
-				);
-			}
-
 			// Validate size
 			if (typeof size !== 'number' || size <= 0) {
 				return json(
@@ -311,25 +334,11 @@ export async function handleUpload(request: Request, env: Env, rateLimitResult:
 				);
 			}
 
-			// Remove /index.html suffix if present in figureUrl for consistency
-			const figureUrlWithoutIndexHtml = figureUrl.endsWith('/index.html') ? figureUrl.slice(0, -'/index.html'.length) : figureUrl;
-
-			// Validate that destination URL starts with bucket base URL
-			const destinationUrl = `${figureUrlWithoutIndexHtml}/${relativePath}`;
-
-			if (!destinationUrl.startsWith(bucketBaseUrl + '/')) {
-				return json(
-					{
-						success: false,
-						message: `Invalid destination URL: ${destinationUrl}. Must start with ${bucketBaseUrl}/`,
-					},
-					400,
-				);
+			const fileKey = getFileKey(figureUrl, relativePath, bucketBaseUrl);
+			if (typeof fileKey !== 'string') {
+				return fileKey;
 			}
 
-			// Extract the file key from the destination URL
-			const fileKey = destinationUrl.slice(`${bucketBaseUrl}/`.length);
-
 			if (hasServerCredentials) {
 				// Server-signed mode: generate presigned URL
 				try {
@@ -383,8 +392,7 @@ export async function handleUpload(request: Request, env: Env, rateLimitResult:
 				rateLimitHeaders,
 			);
 		} else {
-			const nativeBucketName = (bucketRow.native_bucket_name as string) || bucketName;
-			const region = (bucketRow.region as string) || (provider === 'cloudflare' ? 'auto' : 'us-east-1');
+			const { nativeBucketName, region, provider } = bucketInfo;
 			return json(
 				{
 					success: true,
@@ -413,3 +421,342 @@ export async function handleUpload(request: Request, env: Env, rateLimitResult:
 		);
 	}
 }
+
+// Link the files whose content the bucket already holds into a figure, so
+// that the client does not need to upload them. Responds with the relative
+// paths of the linked files.
+export async function handleUploadBlobs(request: Request, env: Env, rateLimitResult: RateLimitResult): Promise<Response> {
+	try {
+		let body: BlobCheckRequest;
+		try {
+			body = await request.json();
+		} catch (err) {
+			return json({ success: false, message: 'Invalid JSON in request body' }, 400);
+		}
+
+		const { figureUrl, files, adminOverride } = body;
+		const apiKey = request.headers.get('x-api-key');
+
+		if (!figureUrl || !files || !Array.isArray(files)) {
+			return json(
+				{
+					success: false,
+					message: 'Missing required fields: figureUrl, files (array)',
+				},
+				400,
+			);
+		}
+
+		if (files.length > API_LIMITS.MAX_BATCH_UPLOAD_FILES) {
+			return json(
+				{
+					success: false,
+					message: `Too many files in blob check. Maximum ${API_LIMITS.MAX_BATCH_UPLOAD_FILES} files per request. You provided ${files.length} files.`,
+				},
+				400,
+			);
+		}
+
+		const target = await authorizeFigureUpload(env, figureUrl, apiKey, adminOverride);
+		if (target instanceof Response) {
+			return target;
+		}
+		const { bucketInfo, bucketBaseUrl, hasServerCredentials } = target;
+
+		// Blobs are copied within the bucket by the server, which requires
+		// server credentials
+		if (!hasServerCredentials) {
+			return json({ success: true, existingFiles: [] }, 200);
+		}
+
+		const candidates: { relativePath: string; size: number; sha256: string; fileKey: string }[] = [];
+		for (const file of files) {
+			const { relativePath, size, sha256 } = file;
+			const fileKey = getFileKey(figureUrl, relativePath, bucketBaseUrl);
+			if (typeof fileKey !== 'string') {
+				return fileKey;
+			}
+			if (isShareablePath(relativePath) && isSha256(sha256) && typeof size === 'number') {
+				candidates.push({ relativePath, size, sha256, fileKey });
+			}
+		}
+
+		const blobs = await findContentBlobs(
+			env,
+			bucketInfo.bucketName,
+			candidates.map((file) => file.sha256),
+		);
+
+		const existingFiles: string[] = [];
+		for (const file of candidates) {
+			const blob = blobs.get(file.sha256);
+			if (!blob || blob.size !== file.size) {
+				continue;
+			}
+			if (await linkContentBlob(env, bucketInfo, blob, file.fileKey)) {
+				existingFiles.push(file.relativePath);
+			}
+		}
+
+		if (existingFiles.length > 0) {
+			const now = Date.now();
+			await env.figpack_db
+				.prepare('UPDATE figures SET upload_updated = ?, updated_at = ? WHERE figure_url = ?;')
+				.bind(now, now, figureUrl)
+				.run();
+		}
+
+		return json(
+			{
+				success: true,
+				message: `Linked ${existingFiles.length} of ${files.length} files to existing content`,
+				existingFiles,
+			},
+			200,
+			{
+				'X-RateLimit-Limit': '30',
+				'X-RateLimit-Remaining': rateLimitResult.remaining.toString(),
+				'X-RateLimit-Reset': Math.ceil(rateLimitResult.resetTime / 1000).toString(),
+			},
+		);
+	} catch (error) {
+		console.error('Upload blobs API error:', error);
+		return json({ success: false, message: 'Internal server error' }, 500);
+	}
+}
+
+// S3 limits on multipart uploads
+const MULTIPART_MIN_PART_SIZE = 5 * 1024 * 1024;
+const MULTIPART_MAX_PARTS = 10000;
+
+type MultipartTarget = {
+	body: MultipartUploadRequest;
+	bucketInfo: BucketInfo;
+	fileKey: string;
+};
+
+// Parse a multipart upload request and check that the caller may upload the
+// file. Returns the error response if not.
+async function getMultipartTarget(request: Request, env: Env): Promise<MultipartTarget | Response> {
+	let body: MultipartUploadRequest;
+	try {
+		body = await request.json();
+	} catch (err) {
+		return json({ success: false, message: 'Invalid JSON in request body' }, 400);
+	}
+
+	const { figureUrl, relativePath, adminOverride } = body;
+	if (!figureUrl || !relativePath) {
+		return json(
+			{
+				success: false,
+				message: 'Missing required fields: figureUrl, relativePath',
+			},
+			400,
+		);
+	}
+
+	const target = await authorizeFigureUpload(env, figureUrl, request.headers.get('x-api-key'), adminOverride);
+	if (target instanceof Response) {
+		return target;
+	}
+	const { bucketInfo, bucketBaseUrl, hasServerCredentials } = target;
+
+	// Client-signed buckets upload large files in parts with their own credentials
+	if (!hasServerCredentials) {
+		return json(
+			{
+				success: false,
+				message: 'Server-signed multipart uploads are not available for this bucket',
+			},
+			400,
+		);
+	}
+
+	const fileKey = getFileKey(figureUrl, relativePath, bucketBaseUrl);
+	if (typeof fileKey !== 'string') {
+		return fileKey;
+	}
+
+	return { body, bucketInfo, fileKey };
+}
+
+function multipartError(action: string, relativePath: string, err: unknown): Response {
+	console.error(`Error during multipart ${action} of ${relativePath}:`, err);
+	return json(
+		{
+			success: false,
+			message: `Error during multipart ${action} of ${relativePath}: ${err instanceof Error ? err.message : 'Unknown error'}`,
+		},
+		500,
+	);
+}
+
+// Start a multipart upload and return a signed URL for each of its parts
+export async function handleMultipartStart(request: Request, env: Env, rateLimitResult: RateLimitResult): Promise<Response> {
+	try {
+		const target = await getMultipartTarget(request, env);
+		if (target instanceof Response) {
+			return target;
+		}
+		const { body, bucketInfo, fileKey } = target;
+		const { relativePath, size, partSize, numParts, contentType } = body;
+
+		if (typeof size !== 'number' || size <= 0 || size > API_LIMITS.MAX_FILE_SIZE_BYTES) {
+			return json(
+				{
+					success: false,
+					message: `Invalid size for file ${relativePath}. Size must be a positive number of at most ${API_LIMITS.MAX_FILE_SIZE_BYTES} bytes.`,
+				},
+				400,
+			);
+		}
+
+		// Every part but the last must be at least the minimum part size, and
+		// the parts must cover the file exactly
+		if (
+			typeof partSize !== 'number' ||
+			typeof numParts !== 'number' ||
+			!Number.isInteger(partSize) ||
+			!Number.isInteger(numParts) ||
+			partSize < MULTIPART_MIN_PART_SIZE ||
+			numParts < 1 ||
+			numParts > MULTIPART_MAX_PARTS ||
+			partSize * (numParts - 1) >= size ||
+			partSize * numParts < size
+		) {
+			return json(
+				{
+					success: false,
+					message: `Invalid part layout for file ${relativePath}: ${numParts} parts of ${partSize} bytes for ${size} bytes`,
+				},
+				400,
+			);
+		}
+
+		let uploadId: string;
+		const parts: { partNumber: number; signedUrl: string }[] = [];
+		try {
+			uploadId = await createMultipartUpload(bucketInfo, fileKey, contentType || 'application/octet-stream');
+			for (let partNumber = 1; partNumber <= numParts; partNumber++) {
+				const signedUrl = await getSignedUploadPartUrl(bucketInfo, fileKey, uploadId, partNumber);
+				parts.push({ partNumber, signedUrl });
+			}
+		} catch (err) {
+			return multipartError('start', relativePath, err);
+		}
+
+		const now = Date.now();
+		await env.figpack_db
+			.prepare('UPDATE figures SET upload_updated = ?, updated_at = ? WHERE figure_url = ?;')
+			.bind(now, now, body.figureUrl)
+			.run();
+
+		return json(
+			{
+				success: true,
+				message: `Started multipart upload of ${relativePath} in ${numParts} parts`,
+				uploadId,
+				parts,
+			},
+			200,
+			{
+				'X-RateLimit-Limit': '30',
+				'X-RateLimit-Remaining': rateLimitResult.remaining.toString(),
+				'X-RateLimit-Reset': Math.ceil(rateLimitResult.resetTime / 1000).toString(),
+			},
+		);
+	} catch (error) {
+		console.error('Multipart start API error:', error);
+		return json({ success: false, message: 'Internal server error' }, 500);
+	}
+}
+
+// Assemble the uploaded parts of a multipart upload
+export async function handleMultipartComplete(request: Request, env: Env, rateLimitResult: RateLimitResult): Promise<Response> {
+	try {
+		const target = await getMultipartTarget(request, env);
+		if (target instanceof Response) {
+			return target;
+		}
+		const { body, bucketInfo, fileKey } = target;
+		const { relativePath, uploadId, parts } = body;
+
+		if (
+			!uploadId ||
+			!Array.isArray(parts) ||
+			parts.length === 0 ||
+			parts.length > MULTIPART_MAX_PARTS ||
+			!parts.every((part) => Number.isInteger(part.partNumber) && typeof part.etag === 'string')
+		) {
+			return json(
+				{
+					success: false,
+					message: 'Missing or invalid fields: uploadId, parts (array of {partNumber, etag})',
+				},
+				400,
+			);
+		}
+
+		try {
+			const sortedParts = [...parts].sort((a, b) => a.partNumber - b.partNumber);
+			await completeMultipartUpload(bucketInfo, fileKey, uploadId, sortedParts);
+		} catch (err) {
+			return multipartError('complete', relativePath, err);
+		}
+
+		return json(
+			{
+				success: true,
+				message: `Completed multipart upload of ${relativePath}`,
+			},
+			200,
+			{
+				'X-RateLimit-Limit': '30',
+				'X-RateLimit-Remaining': rateLimitResult.remaining.toString(),
+				'X-RateLimit-Reset': Math.ceil(rateLimitResult.resetTime / 1000).toString(),
+			},
+		);
+	} catch (error) {
+		console.error('Multipart complete API error:', error);
+		return json({ success: false, message: 'Internal server error' }, 500);
+	}
+}
+
+// Abort a multipart upload so that the storage discards its parts
+export async function handleMultipartAbort(request: Request, env: Env, rateLimitResult: RateLimitResult): Promise<Response> {
+	try {
+		const target = await getMultipartTarget(request, env);
+		if (target instanceof Response) {
+			return target;
+		}
+		const { body, bucketInfo, fileKey } = target;
+		const { relativePath, uploadId } = body;
+
+		if (!uploadId) {
+			return json({ success: false, message: 'Missing required field: uploadId' }, 400);
+		}
+
+		try {
+			await abortMultipartUpload(bucketInfo, fileKey, uploadId);
+		} catch (err) {
+			return multipartError('abort', relativePath, err);
+		}
+
+		return json(
+			{
+				success: true,
+				message: `Aborted multipart upload of ${relativePath}`,
+			},
+			200,
+			{
+				'X-RateLimit-Limit': '30',
+				'X-RateLimit-Remaining': rateLimitResult.remaining.toString(),
+				'X-RateLimit-Reset': Math.ceil(rateLimitResult.resetTime / 1000).toString(),
+			},
+		);
+	} catch (error) {
+		console.error('Multipart abort API error:', error);
+		return json({ success: false, message: 'Internal server error' }, 500);
+	}
+}
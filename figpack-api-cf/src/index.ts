@@ -30,7 +30,13 @@ import {
 	handleGetDocumentsReferencingFigure,
 } from './handlers/documentsHandler';
 import { handlePinFigure, handleUnpinFigure, handleRenewFigure, handleRenewBulkFigures } from './handlers/figureOpsHandler';
-import { handleUpload } from './handlers/uploadHandler';
+import {
+	handleUpload,
+	handleUploadBlobs,
+	handleMultipartStart,
+	handleMultipartComplete,
+	handleMultipartAbort,
+} from './handlers/uploadHandler';
 
 export type { Env } from './types';
 
@@ -320,6 +326,34 @@ export default {
 			return json({ success: false, message: 'Method not allowed' }, 405);
 		}
 
+		if (url.pathname === '/upload/blobs') {
+			if (request.method.toUpperCase() === 'POST') {
+				return handleUploadBlobs(request, env, rateLimitResult);
+			}
+			return json({ success: false, message: 'Method not allowed' }, 405);
+		}
+
+		if (url.pathname === '/upload/multipart/start') {
+			if (request.method.toUpperCase() === 'POST') {
+				return handleMultipartStart(request, env, rateLimitResult);
+			}
+			return json({ success: false, message: 'Method not allowed' }, 405);
+		}
+
+		if (url.pathname === '/upload/multipart/complete') {
+			if (request.method.toUpperCase() === 'POST') {
+				return handleMultipartComplete(request, env, rateLimitResult);
+			}
+			return json({ success: false, message: 'Method not allowed' }, 405);
+		}
+
+		if (url.pathname === '/upload/multipart/abort') {
+			if (request.method.toUpperCase() === 'POST') {
+				return handleMultipartAbort(request, env, rateLimitResult);
+			}
+			return json({ success: false, message: 'Method not allowed' }, 405);
+		}
+
 		return json({ success: true, message: 'API online' });
 	},
 };
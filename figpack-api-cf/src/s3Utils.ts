@@ -1,4 +1,16 @@
-import { S3Client, PutObjectCommand, DeleteObjectCommand, DeleteObjectsCommand, ListObjectsV2Command } from '@aws-sdk/client-s3';
+import {
+	S3Client,
+	PutObjectCommand,
+	GetObjectCommand,
+	CopyObjectCommand,
+	CreateMultipartUploadCommand,
+	UploadPartCommand,
+	CompleteMultipartUploadCommand,
+	AbortMultipartUploadCommand,
+	DeleteObjectCommand,
+	DeleteObjectsCommand,
+	ListObjectsV2Command,
+} from '@aws-sdk/client-s3';
 import { getSignedUrl } from '@aws-sdk/s3-request-presigner';
 
 // Client cache to avoid recreating clients
@@ -92,6 +104,82 @@ export async function getSignedUploadUrl(bucketInfo: BucketInfo, key: string): P
 	return signedUrl;
 }
 
+// Start a multipart upload of a file, returning its upload id
+export async function createMultipartUpload(bucketInfo: BucketInfo, key: string, contentType: string): Promise<string> {
+	const client = createS3Client(bucketInfo);
+	// Use native bucket name for S3 API calls, fall back to bucketName if not defined
+	const bucketName = bucketInfo.nativeBucketName || bucketInfo.bucketName;
+
+	const command = new CreateMultipartUploadCommand({
+		Bucket: bucketName,
+		Key: key,
+		ContentType: contentType,
+	});
+
+	const response = await client.send(command);
+	if (!response.UploadId) {
+		throw new Error(`No upload id returned for ${key}`);
+	}
+	return response.UploadId;
+}
+
+// Generate a presigned URL for one part of a multipart upload
+export async function getSignedUploadPartUrl(bucketInfo: BucketInfo, key: string, uploadId: string, partNumber: number): Promise<string> {
+	const client = createS3Client(bucketInfo);
+	// Use native bucket name for S3 API calls, fall back to bucketName if not defined
+	const bucketName = bucketInfo.nativeBucketName || bucketInfo.bucketName;
+
+	const command = new UploadPartCommand({
+		Bucket: bucketName,
+		Key: key,
+		UploadId: uploadId,
+		PartNumber: partNumber,
+	});
+
+	// Same lifetime as the single-file upload URLs
+	return await getSignedUrl(client, command, {
+		expiresIn: 3600, // 1 hour
+	});
+}
+
+// Assemble the uploaded parts of a multipart upload into the object
+export async function completeMultipartUpload(
+	bucketInfo: BucketInfo,
+	key: string,
+	uploadId: string,
+	parts: { partNumber: number; etag: string }[],
+): Promise<void> {
+	const client = createS3Client(bucketInfo);
+	// Use native bucket name for S3 API calls, fall back to bucketName if not defined
+	const bucketName = bucketInfo.nativeBucketName || bucketInfo.bucketName;
+
+	const command = new CompleteMultipartUploadCommand({
+		Bucket: bucketName,
+		Key: key,
+		UploadId: uploadId,
+		MultipartUpload: {
+			Parts: parts.map((part) => ({ PartNumber: part.partNumber, ETag: part.etag })),
+		},
+	});
+
+	await client.send(command);
+}
+
+// Abort a multipart upload, discarding its uploaded parts
+export async function abortMultipartUpload(bucketInfo: BucketInfo, key: string, uploadId: string): Promise<void> {
+	const client = createS3Client(bucketInfo);
+	// Use native bucket name for S3 API calls, fall back to bucketName if not defined
+	const bucketName = bucketInfo.nativeBucketName || bucketInfo.bucketName;
+
+	const command = new AbortMultipartUploadCommand({
+		Bucket: bucketName,
+		Key: key,
+		UploadId: uploadId,
+	});
+
+	await client.send(command);
+}
+
 export type BucketInfo = {
 	provider: string;
 	bucketName: string;
@@ -103,6 +191,21 @@ export type BucketInfo = {
 	region: string;
 };
 
+// Build the S3 configuration of a bucket from its database row
+export function getBucketInfo(bucketRow: Record<string, any>, bucketName: string): BucketInfo {
+	const provider = bucketRow.provider as string;
+	return {
+		provider,
+		bucketName,
+		nativeBucketName: bucketRow.native_bucket_name || bucketName,
+		accessKeyId: bucketRow.aws_access_key_id,
+		secretAccessKey: bucketRow.aws_secret_access_key,
+		sessionToken: bucketRow.aws_session_token || undefined,
+		endpoint: bucketRow.s3_endpoint,
+		region: bucketRow.region || (provider === 'cloudflare' ? 'auto' : 'us-east-1'),
+	};
+}
+
 export const bucketInfoToString = (bucketInfo: BucketInfo): string => {
 	return `${bucketInfo.provider}:${bucketInfo.bucketName}:${bucketInfo.nativeBucketName}:${bucketInfo.accessKeyId}:${bucketInfo.secretAccessKey}:${bucketInfo.sessionToken || ''}:${bucketInfo.endpoint}:${bucketInfo.region}`;
 };
@@ -111,7 +214,7 @@ export const bucketInfoToString = (bucketInfo: BucketInfo): string => {
 export async function putObject(
 	bucketInfo: BucketInfo,
 	key: string,
-	body: string,
+	body: string | Uint8Array,
 	contentType: string = 'application/octet-stream',
 ): Promise<void> {
 	const client = createS3Client(bucketInfo);
@@ -128,6 +231,41 @@ export async function putObject(
 	await client.send(command);
 }
 
+// Download an object from S3, returning its bytes and content type
+export async function getObject(bucketInfo: BucketInfo, key: string): Promise<{ body: Uint8Array; contentType?: string }> {
+	const client = createS3Client(bucketInfo);
+	// Use native bucket name for S3 API calls, fall back to bucketName if not defined
+	const bucketName = bucketInfo.nativeBucketName || bucketInfo.bucketName;
+
+	const command = new GetObjectCommand({
+		Bucket: bucketName,
+		Key: key,
+	});
+
+	const response = await client.send(command);
+	if (!response.Body) {
+		throw new Error(`Empty response body for ${key}`);
+	}
+	const body = await response.Body.transformToByteArray();
+
+	return { body, contentType: response.ContentType };
+}
+
+// Copy an object within the bucket without downloading it
+export async function copyObject(bucketInfo: BucketInfo, sourceKey: string, destinationKey: string): Promise<void> {
+	const client = createS3Client(bucketInfo);
+	// Use native bucket name for S3 API calls, fall back to bucketName if not defined
+	const bucketName = bucketInfo.nativeBucketName || bucketInfo.bucketName;
+
+	const command = new CopyObjectCommand({
+		Bucket: bucketName,
+		Key: destinationKey,
+		CopySource: `${bucketName}/${encodeURI(sourceKey)}`,
+	});
+
+	await client.send(command);
+}
+
 // Delete a single object from S3
 export async function deleteObject(bucketInfo: BucketInfo, key: string): Promise<void> {
 	const client = createS3Client(bucketInfo);
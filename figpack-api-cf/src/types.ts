@@ -132,6 +132,27 @@ export interface BatchUploadRequest {
 	adminOverride?: boolean; // Allow admins to patch figures they don't own
 }
 
+export interface BlobCheckRequest {
+	figureUrl: string;
+	files: (FileToUpload & { sha256: string })[];
+	adminOverride?: boolean;
+}
+
+export interface MultipartUploadRequest {
+	figureUrl: string;
+	relativePath: string;
+	adminOverride?: boolean;
+	// start
+	size?: number;
+	partSize?: number;
+	numParts?: number;
+	contentType?: string;
+	// complete and abort
+	uploadId?: string;
+	// complete
+	parts?: { partNumber: number; etag: string }[];
+}
+
 export interface SignedUrlInfo {
 	relativePath: string;
 	signedUrl: string;
@@ -13,6 +13,8 @@ interface SortConfig {
 
 interface DataTableProps {
   data: string[][];
+  // Changes when rows are appended to data in place
+  dataVersion?: number;
   columnInfo: ColumnInfo[];
   width: number;
   height: number;
@@ -67,6 +69,7 @@ const sortData = (
 
 export const DataTable: React.FC<DataTableProps> = ({
   data,
+  dataVersion,
   columnInfo,
   width,
   height,
@@ -87,7 +90,7 @@ export const DataTable: React.FC<DataTableProps> = ({
         : data;
 
     return sortData(dataToSort, sortConfig, columnInfo);
-  }, [data, sortConfig, columnInfo]);
+  }, [data, dataVersion, sortConfig, columnInfo]);
 
   const handleSort = (columnName: string) => {
     setSortConfig((prevConfig) => ({
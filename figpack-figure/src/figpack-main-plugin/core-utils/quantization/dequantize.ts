@@ -0,0 +1,24 @@
+// Integer storage of uniformly sampled series (see figpack/core/quantization.py):
+// value = stored * scale[channel] + offset[channel], with nan_value for NaN
+// (null when the series has no NaNs)
+
+export type Quantization = {
+  dtype: string;
+  scale: number[];
+  offset: number[];
+  nan_value: number | null;
+  max_error: number[];
+};
+
+// The value of a stored element of a channel (identity without quantization)
+const dequantize = (
+  stored: number,
+  channel: number,
+  quantization: Quantization | undefined,
+): number => {
+  if (!quantization) return stored;
+  if (stored === quantization.nan_value) return NaN;
+  return stored * quantization.scale[channel] + quantization.offset[channel];
+};
+
+export default dequantize;
@@ -0,0 +1,2 @@
+export { default as dequantize } from "./dequantize";
+export type { Quantization } from "./dequantize";
@@ -1,13 +1,145 @@
 import React, { useEffect, useState } from "react";
-import { ZarrGroup } from "../figpack-interface";
+import { DatasetDataType, ZarrGroup } from "../figpack-interface";
 import { DataTable } from "../components/DataTable";
 
 interface ColumnInfo {
   name: string;
   dtype: string;
   simple_dtype: string;
+  // Encoding of the columns stored as typed arrays (see DataFrame.py)
+  encoding?: "numeric" | "boolean" | "datetime" | "dictionary";
+  unit?: string;
+  date_only?: boolean;
+  has_mask?: boolean;
 }
 
+const UNITS_PER_SECOND: { [unit: string]: number } = {
+  s: 1,
+  ms: 1e3,
+  us: 1e6,
+  ns: 1e9,
+};
+
+// Shortest decimal representation that reads back as the same float32
+const formatFloat32 = (value: number): string => {
+  for (let precision = 1; precision <= 9; precision++) {
+    const x = parseFloat(value.toPrecision(precision));
+    if (Math.fround(x) === value) return String(x);
+  }
+  return String(value);
+};
+
+// Datetime stored as a count of the unit, formatted as pandas writes it.
+// Nanosecond datetimes are stored as whole seconds (value) and the remaining
+// nanoseconds, since nanosecond counts are not exact as numbers.
+const formatDatetime = (
+  value: number,
+  unit: string,
+  dateOnly: boolean,
+  nanoseconds?: number,
+): string => {
+  const perSecond = UNITS_PER_SECOND[unit] ?? 1;
+  const seconds =
+    nanoseconds !== undefined ? value : Math.floor(value / perSecond);
+  const iso = new Date(seconds * 1000).toISOString();
+  if (dateOnly) return iso.slice(0, 10);
+  let ret = `${iso.slice(0, 10)} ${iso.slice(11, 19)}`;
+  if (perSecond > 1) {
+    const fraction =
+      nanoseconds !== undefined
+        ? nanoseconds
+        : Math.round(value - seconds * perSecond);
+    ret +=
+      "." + String(fraction).padStart(Math.round(Math.log10(perSecond)), "0");
+  }
+  return ret;
+};
+
+const formatColumn = (
+  column: ColumnInfo,
+  values: DatasetDataType,
+  mask: DatasetDataType | undefined,
+  nanoseconds: DatasetDataType | undefined,
+  dictionary: string[] | undefined,
+): string[] => {
+  const ret: string[] = new Array(values.length);
+  for (let i = 0; i < values.length; i++) {
+    const value = values[i];
+    if (mask && mask[i]) {
+      ret[i] = "";
+    } else if (column.encoding === "dictionary") {
+      ret[i] = value >= 0 && dictionary ? dictionary[value] : "";
+    } else if (column.encoding === "boolean") {
+      ret[i] = value ? "True" : "False";
+    } else if (column.encoding === "datetime") {
+      ret[i] = formatDatetime(
+        value,
+        column.unit || "s",
+        !!column.date_only,
+        nanoseconds ? nanoseconds[i] : undefined,
+      );
+    } else if (Number.isNaN(value)) {
+      ret[i] = "";
+    } else if (values instanceof Float32Array) {
+      ret[i] = formatFloat32(value);
+    } else {
+      ret[i] = String(value);
+    }
+  }
+  return ret;
+};
+
+// Loads the columns stored as typed arrays a page (chunk) of rows at a time,
+// appending them to rows (which starts with the header row) and calling
+// onRows after each page
+const loadColumns = async (
+  zarrGroup: ZarrGroup,
+  columnInfo: ColumnInfo[],
+  rows: string[][],
+  onRows: () => boolean,
+) => {
+  const rowCount: number = zarrGroup.attrs.row_count || 0;
+  const rowChunkSize: number = zarrGroup.attrs.row_chunk_size || rowCount;
+  const decoder = new TextDecoder("utf-8");
+  const dictionaries = await Promise.all(
+    columnInfo.map(async (column, i) => {
+      if (column.encoding !== "dictionary") return undefined;
+      const data = await zarrGroup.getDatasetData(`column_${i}_dictionary`, {});
+      if (!data) throw new Error(`Missing dictionary of column ${column.name}`);
+      return JSON.parse(decoder.decode(new Uint8Array(data))) as string[];
+    }),
+  );
+
+  rows.push(columnInfo.map((column) => column.name));
+  if (!onRows()) return;
+  for (let start = 0; start < rowCount; start += rowChunkSize) {
+    const end = Math.min(start + rowChunkSize, rowCount);
+    const slice: [number, number][] = [[start, end]];
+    const columns = await Promise.all(
+      columnInfo.map(async (column, i) => {
+        const values = await zarrGroup.getDatasetData(`column_${i}`, {
+          slice,
+        });
+        if (!values) throw new Error(`Missing data of column ${column.name}`);
+        const mask = column.has_mask
+          ? await zarrGroup.getDatasetData(`column_${i}_mask`, { slice })
+          : undefined;
+        const nanoseconds =
+          column.encoding === "datetime" && column.unit === "ns"
+            ? await zarrGroup.getDatasetData(`column_${i}_nanoseconds`, {
+                slice,
+              })
+            : undefined;
+        return formatColumn(column, values, mask, nanoseconds, dictionaries[i]);
+      }),
+    );
+    for (let r = 0; r < end - start; r++) {
+      rows.push(columns.map((column) => column[r]));
+    }
+    if (!onRows()) return;
+  }
+};
+
 const parseCSV = (csvString: string): string[][] => {
   const lines = csvString.trim().split("\n");
   const result: string[][] = [];
@@ -44,6 +176,8 @@ export const FPDataFrame: React.FC<{
   const [error, setError] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [csvData, setCsvData] = useState<string[][] | null>(null);
+  // Incremented as pages of rows are appended to csvData
+  const [dataVersion, setDataVersion] = useState(0);
   const [columnInfo, setColumnInfo] = useState<ColumnInfo[]>([]);
 
   // Load DataFrame data from zarr array
@@ -60,7 +194,27 @@ export const FPDataFrame: React.FC<{
           throw new Error(zarrGroup.attrs.error);
         }
 
-        // Get the CSV data from the zarr array
+        // Get column info
+        const columnInfoStr = zarrGroup.attrs.column_info || "[]";
+        const columnInfoData: ColumnInfo[] = JSON.parse(columnInfoStr);
+
+        if (zarrGroup.attrs.format === "columns") {
+          // Show the rows as their pages load
+          const rows: string[][] = [];
+          if (mounted) {
+            setColumnInfo(columnInfoData);
+            setCsvData(rows);
+          }
+          await loadColumns(zarrGroup, columnInfoData, rows, () => {
+            if (!mounted) return false;
+            setDataVersion((version) => version + 1);
+            if (rows.length > 1) setLoading(false);
+            return true;
+          });
+          return;
+        }
+
+        // Figures written before the columnar storage hold the CSV text
         const data = await zarrGroup.getDatasetData("csv_data", {});
         if (!data || data.length === 0) {
           throw new Error("Empty CSV data");
@@ -74,10 +228,6 @@ export const FPDataFrame: React.FC<{
         // Parse CSV data
         const parsedData = parseCSV(csvString);
 
-        // Get column info
-        const columnInfoStr = zarrGroup.attrs.column_info || "[]";
-        const columnInfoData: ColumnInfo[] = JSON.parse(columnInfoStr);
-
         if (mounted) {
           setCsvData(parsedData);
           setColumnInfo(columnInfoData);
@@ -136,6 +286,7 @@ export const FPDataFrame: React.FC<{
   return (
     <DataTable
       data={csvData}
+      dataVersion={dataVersion}
       columnInfo={columnInfo}
       width={width}
       height={height}
@@ -1,4 +1,5 @@
 import { ZarrGroup } from "../../figpack-interface";
+import { dequantize, Quantization } from "../../core-utils/quantization";
 
 export class MultiChannelTimeseriesClient {
   constructor(
@@ -12,6 +13,7 @@ export class MultiChannelTimeseriesClient {
     public dataMin: number,
     public dataMax: number,
     public downsampleFactors: number[],
+    public quantization: Quantization | undefined,
   ) {}
 
   static async create(zarrGroup: ZarrGroup) {
@@ -21,6 +23,7 @@ export class MultiChannelTimeseriesClient {
     const startTimeSec = zarrGroup.attrs["start_time_sec"] || 0;
     const samplingFrequencyHz = zarrGroup.attrs["sampling_frequency_hz"] || 1;
     const downsampleFactors = zarrGroup.attrs["downsample_factors"] || [];
+    const quantization = zarrGroup.attrs["quantization"];
 
     // Calculate end time from start time, number of timepoints, and sampling frequency
     const endTimeSec = startTimeSec + (nTimepoints - 1) / samplingFrequencyHz;
@@ -38,7 +41,11 @@ export class MultiChannelTimeseriesClient {
 
     if (sampleData) {
       for (let i = 0; i < sampleData.length; i++) {
-        const value = sampleData[i] as number;
+        const value = dequantize(
+          sampleData[i] as number,
+          i % nChannels,
+          quantization,
+        );
         if (value < dataMin) dataMin = value;
         if (value > dataMax) dataMax = value;
       }
@@ -55,6 +62,7 @@ export class MultiChannelTimeseriesClient {
       dataMin,
       dataMax,
       downsampleFactors,
+      quantization,
     );
   }
 
@@ -162,7 +170,11 @@ export class MultiChannelTimeseriesClient {
     for (let ch = 0; ch < this.nChannels; ch++) {
       const channelArray = new Float32Array(length);
       for (let i = 0; i < length; i++) {
-        channelArray[i] = rawData[i * this.nChannels + ch] as number;
+        channelArray[i] = dequantize(
+          rawData[i * this.nChannels + ch] as number,
+          ch,
+          this.quantization,
+        );
       }
       channelData.push(channelArray);
     }
@@ -234,8 +246,8 @@ export class MultiChannelTimeseriesClient {
         const maxValue = rawData[
           i * 2 * this.nChannels + 1 * this.nChannels + ch
         ] as number;
-        channelArray[i * 2] = minValue;
-        channelArray[i * 2 + 1] = maxValue;
+        channelArray[i * 2] = dequantize(minValue, ch, this.quantization);
+        channelArray[i * 2 + 1] = dequantize(maxValue, ch, this.quantization);
       }
       channelData.push(channelArray);
     }
@@ -105,6 +105,7 @@ export class TimeseriesGraphClient {
           channelSpacing: attrs["channel_spacing"],
           yMin: attrs["y_min"],
           yMax: attrs["y_max"],
+          quantization: attrs["quantization"],
         });
       } else {
         console.warn(
@@ -1,3 +1,4 @@
+import { dequantize } from "../../core-utils/quantization";
 import { UniformSeries, UniformSeriesData } from "./types";
 
 export const selectDownsampleFactor = (
@@ -62,7 +63,11 @@ export const loadOriginalData = async (
   for (let ch = 0; ch < series.nChannels; ch++) {
     const channelArray = new Float32Array(length);
     for (let i = 0; i < length; i++) {
-      channelArray[i] = rawData[i * series.nChannels + ch] as number;
+      channelArray[i] = dequantize(
+        rawData[i * series.nChannels + ch] as number,
+        ch,
+        series.quantization,
+      );
     }
     channelData.push(channelArray);
   }
@@ -126,8 +131,8 @@ export const loadDownsampledData = async (
       const maxValue = rawData[
         i * 2 * series.nChannels + 1 * series.nChannels + ch
       ] as number;
-      channelArray[i * 2] = minValue;
-      channelArray[i * 2 + 1] = maxValue;
+      channelArray[i * 2] = dequantize(minValue, ch, series.quantization);
+      channelArray[i * 2 + 1] = dequantize(maxValue, ch, series.quantization);
     }
     channelData.push(channelArray);
   }
@@ -1,4 +1,5 @@
 import { DatasetDataType, ZarrGroup } from "../../figpack-interface";
+import { Quantization } from "../../core-utils/quantization";
 
 export type LineSeries = {
   seriesType: "line";
@@ -45,6 +46,7 @@ export type UniformSeries = {
   channelSpacing?: number;
   yMin: number;
   yMax: number;
+  quantization?: Quantization;
 };
 
 export type TimeseriesSeries =
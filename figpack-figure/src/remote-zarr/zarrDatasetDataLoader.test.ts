@@ -0,0 +1,60 @@
+import assert from "node:assert/strict";
+import { test } from "node:test";
+import type { ZarrFileSystemClient } from "./RemoteZarrImpl";
+import zarrDatasetDataLoader from "./zarrDatasetDataLoader.ts";
+
+// Client that serves already decoded chunks, as readBinary does with
+// decodeArray: true
+const createClient = (chunks: { [path: string]: ArrayLike<number> }) =>
+  ({
+    readBinary: async (path: string) => chunks[path],
+  }) as unknown as ZarrFileSystemClient;
+
+test("reads 64-bit integers across chunks without wrapping", async () => {
+  // Spike times as sample indices beyond 2^32. The decoder returns the
+  // first chunk as a Uint32Array since its values fit, and the second as a
+  // Float64Array.
+  const big = 2 ** 40;
+  const client = createClient({
+    "spike_times/0": new Uint32Array([1, 2, 3]),
+    "spike_times/1": new Float64Array([big, big + 1, 2 ** 53]),
+  });
+  const x = await zarrDatasetDataLoader({
+    client,
+    path: "spike_times",
+    zarray: { shape: [6], chunks: [3], dtype: "<u8" },
+    slice: [[1, 6]],
+  });
+  assert.deepEqual(Array.from(x), [2, 3, big, big + 1, 2 ** 53]);
+});
+
+test("reads negative 64-bit integers across chunks", async () => {
+  const client = createClient({
+    "x/0": new Int32Array([-1, -2]),
+    "x/1": new Float64Array([-(2 ** 40), 2 ** 40]),
+  });
+  const x = await zarrDatasetDataLoader({
+    client,
+    path: "x",
+    zarray: { shape: [4], chunks: [2], dtype: "<i8" },
+    slice: [[0, 4]],
+  });
+  assert.deepEqual(Array.from(x), [-1, -2, -(2 ** 40), 2 ** 40]);
+});
+
+test("reads uncompressed single-chunk 64-bit integers as numbers", async () => {
+  const data = new BigUint64Array([5n, 2n ** 40n, 7n]);
+  const client = {
+    readBinary: async (
+      _path: string,
+      o: { startByte?: number; endByte?: number },
+    ) => data.buffer.slice(o.startByte, o.endByte),
+  } as unknown as ZarrFileSystemClient;
+  const x = await zarrDatasetDataLoader({
+    client,
+    path: "x",
+    zarray: { shape: [3], chunks: [3], dtype: "<u8" },
+    slice: [[1, 3]],
+  });
+  assert.deepEqual(Array.from(x), [2 ** 40, 7]);
+});
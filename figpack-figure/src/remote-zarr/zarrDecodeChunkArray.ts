@@ -65,7 +65,10 @@ const zarrDecodeChunkArray = async (
     } else if (dtype === "<i8") {
       const ret0 = new BigInt64Array(ret);
       // convert to Int32Array because javascript has trouble mixing BigInt64Array with other types
-      ret = new Int32Array(ret0.length);
+      // (or to Float64Array, exact up to 2^53, when the values do not fit)
+      ret = fitsIn32Bits(ret0, -2147483648n, 2147483647n)
+        ? new Int32Array(ret0.length)
+        : new Float64Array(ret0.length);
       for (let i = 0; i < ret0.length; i++) {
         ret[i] = Number(ret0[i]);
       }
@@ -78,7 +81,10 @@ const zarrDecodeChunkArray = async (
     } else if (dtype === "<u8") {
       const ret0 = new BigUint64Array(ret);
       // convert to Uint32Array because javascript has trouble mixing BigUint64Array with other types
-      ret = new Uint32Array(ret0.length);
+      // (or to Float64Array, exact up to 2^53, when the values do not fit)
+      ret = fitsIn32Bits(ret0, 0n, 4294967295n)
+        ? new Uint32Array(ret0.length)
+        : new Float64Array(ret0.length);
       for (let i = 0; i < ret0.length; i++) {
         ret[i] = Number(ret0[i]);
       }
@@ -197,11 +203,60 @@ const applyFilter = async (chunk: ArrayBuffer, filter: any) => {
       ret[j] = view.getUint8(i);
     }
     return ret.buffer;
+  } else if (filter.id === "delta") {
+    return decodeDelta(chunk, filter.dtype);
   }
   console.warn("Filter not yet implemented", filter);
   throw Error("Filter not yet implemented");
 };
 
+// Inverse of the numcodecs delta filter: cumulative sum, wrapping around
+// like the integer type does
+const decodeDelta = (chunk: ArrayBuffer, dtype: string): ArrayBuffer => {
+  const ret = chunk.slice(0);
+  if (dtype === "<i8" || dtype === "<u8") {
+    const a =
+      dtype === "<i8" ? new BigInt64Array(ret) : new BigUint64Array(ret);
+    for (let i = 1; i < a.length; i++) {
+      a[i] = a[i] + a[i - 1];
+    }
+    return ret;
+  }
+  let a:
+    | Int8Array
+    | Int16Array
+    | Int32Array
+    | Uint8Array
+    | Uint16Array
+    | Uint32Array
+    | Float32Array
+    | Float64Array;
+  if (dtype === "<i1" || dtype === "|i1") a = new Int8Array(ret);
+  else if (dtype === "<i2") a = new Int16Array(ret);
+  else if (dtype === "<i4") a = new Int32Array(ret);
+  else if (dtype === "<u1" || dtype === "|u1") a = new Uint8Array(ret);
+  else if (dtype === "<u2") a = new Uint16Array(ret);
+  else if (dtype === "<u4") a = new Uint32Array(ret);
+  else if (dtype === "<f4") a = new Float32Array(ret);
+  else if (dtype === "<f8") a = new Float64Array(ret);
+  else throw Error("Unhandled dtype for delta filter " + dtype);
+  for (let i = 1; i < a.length; i++) {
+    a[i] = a[i] + a[i - 1];
+  }
+  return ret;
+};
+
+const fitsIn32Bits = (
+  a: BigInt64Array | BigUint64Array,
+  min: bigint,
+  max: bigint,
+): boolean => {
+  for (let i = 0; i < a.length; i++) {
+    if (a[i] < min || a[i] > max) return false;
+  }
+  return true;
+};
+
 const sameShape = (a: number[], b: number[]): boolean => {
   if (a.length !== b.length) return false;
   for (let i = 0; i < a.length; i++) {
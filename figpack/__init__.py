@@ -2,13 +2,23 @@
 figpack - A Python package for creating shareable, interactive visualizations in the browser
 """
 
+import importlib
+from typing import TYPE_CHECKING
+
 __version__ = "0.3.20"
 
-from .cli import view_figure
-from .core import FigpackView, FigpackExtension, ExtensionView
-from .core.zarr import Group
-from .core._patch_figure import patch_figure
-from .core._revert_patch_figure import revert_patch_figure
+# The public API is imported on first access (PEP 562), so that
+# `import figpack` does not pay for the CLI (requests, argparse), numpy or
+# zarr until they are needed
+_LAZY_ATTRIBUTES = {
+    "view_figure": ".core._view_figure",
+    "FigpackView": ".core",
+    "FigpackExtension": ".core",
+    "ExtensionView": ".core",
+    "Group": ".core.zarr",
+    "patch_figure": ".core._patch_figure",
+    "revert_patch_figure": ".core._revert_patch_figure",
+}
 
 __all__ = [
     "view_figure",
@@ -19,3 +29,23 @@ __all__ = [
     "patch_figure",
     "revert_patch_figure",
 ]
+
+if TYPE_CHECKING:
+    from .core._view_figure import view_figure
+    from .core import FigpackView, FigpackExtension, ExtensionView
+    from .core.zarr import Group
+    from .core._patch_figure import patch_figure
+    from .core._revert_patch_figure import revert_patch_figure
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
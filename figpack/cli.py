@@ -7,22 +7,17 @@ import json
 import os
 import pathlib
 import sys
-import tarfile
 import tempfile
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Tuple
 from urllib.parse import urljoin
 
-import requests
-
 from . import __version__
-from .core._view_figure import view_figure
-from .core._patch_figure import patch_figure as core_patch_figure
-from .core._revert_patch_figure import revert_patch_figure as core_revert_patch_figure
-from .core._figure_utils import get_figure_base_url, download_file
-from .core._upload_bundle import _upload_bundle
-from .extensions import ExtensionManager
+
+# The dependencies of the subcommands (requests, the upload and patch code, the
+# local server) are imported by their handlers, so that `figpack --help` and
+# the lightweight subcommands start quickly
 
 MAX_WORKERS_FOR_DOWNLOAD = 16
 
@@ -67,11 +62,13 @@ def download_file(
     Returns:
         Tuple of (file_path, success)
     """
+    from .core._http_session import get_http_session
+
     file_path = file_info["path"]
     file_url = urljoin(base_url, file_path)
 
     try:
-        response = requests.get(file_url, timeout=30)
+        response = get_http_session().get(file_url, timeout=30)
         response.raise_for_status()
 
         # Create directory structure if needed
@@ -112,6 +109,12 @@ def download_figure(figure_url: str, dest_path: str) -> None:
         figure_url: The figpack URL
         dest_path: Destination path for the tar.gz file
     """
+    import tarfile
+
+    import requests
+
+    from .core._http_session import get_http_session
+
     print(f"Downloading figure from: {figure_url}")
 
     # Get base URL
@@ -123,7 +126,7 @@ def download_figure(figure_url: str, dest_path: str) -> None:
     print("Checking for manifest.json...")
 
     try:
-        response = requests.get(manifest_url, timeout=10)
+        response = get_http_session().get(manifest_url, timeout=10)
         response.raise_for_status()
         manifest = response.json()
         print(f"Found manifest with {len(manifest['files'])} files")
@@ -221,6 +224,9 @@ def download_figure(figure_url: str, dest_path: str) -> None:
 
 def handle_extensions_command(args):
     """Handle extensions subcommands"""
+    from .core.figpack_extension import seed_extension_asset_cache
+    from .extensions import ExtensionManager
+
     extension_manager = ExtensionManager()
 
     if args.extensions_command == "list":
@@ -244,15 +250,40 @@ def handle_extensions_command(args):
 
         if not success:
             sys.exit(1)
+    elif args.extensions_command == "seed-cache":
+        for source in args.sources:
+            try:
+                seeded = seed_extension_asset_cache(source)
+            except (OSError, ValueError, RuntimeError) as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+            for path in seeded:
+                print(f"Cached {path}")
+            if not seeded:
+                print(f"No extension assets found in {source}")
     else:
         print("Available extension commands:")
-        print("  list      - List available extensions and their status")
-        print("  install   - Install or upgrade extension packages")
-        print("  uninstall - Uninstall extension packages")
+        print("  list       - List available extensions and their status")
+        print("  install    - Install or upgrade extension packages")
+        print("  uninstall  - Uninstall extension packages")
+        print("  seed-cache - Add extension JavaScript libraries to the local cache")
         print()
         print("Use 'figpack extensions <command> --help' for more information.")
 
 
+def view_figure(figure_path: str, port: int = None) -> None:
+    """
+    Extract and serve a figure archive (or directory) locally
+
+    Args:
+        figure_path: Path to a .tar.gz archive file or a directory
+        port: Optional port number to serve on
+    """
+    from .core._view_figure import view_figure as core_view_figure
+
+    core_view_figure(figure_path, port=port)
+
+
 def download_and_view_archive(url: str, port: int = None) -> None:
     """
     Download a tar.gz/tgz archive from a URL and view it
@@ -261,6 +292,10 @@ def download_and_view_archive(url: str, port: int = None) -> None:
         url: URL to the tar.gz or tgz file
         port: Optional port number to serve on
     """
+    import requests
+
+    from .core._http_session import get_http_session
+
     if not (url.endswith(".tar.gz") or url.endswith(".tgz")):
         print(f"Error: URL must point to a .tar.gz or .tgz file: {url}")
         sys.exit(1)
@@ -268,7 +303,7 @@ def download_and_view_archive(url: str, port: int = None) -> None:
     print(f"Downloading archive from: {url}")
 
     try:
-        response = requests.get(url, timeout=60, stream=True)
+        response = get_http_session().get(url, timeout=60, stream=True)
         response.raise_for_status()
 
         # Create a temporary file to store the downloaded archive
@@ -320,6 +355,8 @@ def patch_figure(figure_url: str, admin_override: bool = False) -> None:
         api_key: API key for authentication
         admin_override: If True, allows admins to patch figures they don't own
     """
+    from .core._patch_figure import patch_figure as core_patch_figure
+
     success = core_patch_figure(
         figure_url=figure_url,
         admin_override=admin_override,
@@ -339,6 +376,10 @@ def revert_figure(figure_url: str, admin_override: bool = False) -> None:
         figure_url: The figpack URL to revert
         admin_override: If True, allows admins to revert figures they don't own
     """
+    from .core._revert_patch_figure import (
+        revert_patch_figure as core_revert_patch_figure,
+    )
+
     success = core_revert_patch_figure(
         figure_url=figure_url,
         admin_override=admin_override,
@@ -359,6 +400,8 @@ def upload_figure(dir_path: str, title: str, description: str = None) -> None:
         title: Title for the figure
         description: Optional description for the figure
     """
+    from .core._upload_bundle import _upload_bundle
+
     # Validate directory path
     dir_pathlib = pathlib.Path(dir_path)
     if not dir_pathlib.exists():
@@ -510,6 +553,7 @@ def _old_revert_figure(
         api_key: API key for authentication
         admin_override: If True, allows admins to revert figures they don't own
     """
+    from .core._http_session import get_http_session
     from .core.config import FIGPACK_API_BASE_URL
 
     print(f"Preparing to revert figure: {figure_url}")
@@ -614,7 +658,7 @@ def _old_revert_figure(
                 payload["adminOverride"] = True
 
             # Get signed URLs
-            response = requests.post(
+            response = get_http_session().post(
                 f"{FIGPACK_API_BASE_URL}/upload",
                 json=payload,
                 headers=headers,
@@ -662,7 +706,7 @@ def _old_revert_figure(
 
                 # Upload file
                 with open(file_path, "rb") as f:
-                    upload_response = requests.put(
+                    upload_response = get_http_session().put(
                         signed_url,
                         data=f,
                         headers={"Content-Type": content_type},
@@ -777,6 +821,17 @@ def main():
         "extensions", nargs="+", help="Extension package names to uninstall"
     )
 
+    # Extensions seed-cache subcommand
+    extensions_seed_cache_parser = extensions_subparsers.add_parser(
+        "seed-cache",
+        help="Add extension JavaScript libraries to the local cache without network access",
+    )
+    extensions_seed_cache_parser.add_argument(
+        "sources",
+        nargs="+",
+        help="Wheels (.whl) or directories holding extension assets",
+    )
+
     # Upload command
     upload_parser = subparsers.add_parser(
         "upload", help="Upload a saved figure directory to figpack"
@@ -1,5 +1,29 @@
-from .figpack_view import FigpackView
-from .figpack_extension import FigpackExtension
-from .extension_view import ExtensionView
+import importlib
+from typing import TYPE_CHECKING
+
+# Imported on first access (PEP 562), see figpack/__init__.py
+_LAZY_ATTRIBUTES = {
+    "FigpackView": ".figpack_view",
+    "FigpackExtension": ".figpack_extension",
+    "ExtensionView": ".extension_view",
+}
 
 __all__ = ["FigpackView", "FigpackExtension", "ExtensionView"]
+
+if TYPE_CHECKING:
+    from .figpack_view import FigpackView
+    from .figpack_extension import FigpackExtension
+    from .extension_view import ExtensionView
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
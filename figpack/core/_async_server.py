@@ -0,0 +1,705 @@
+"""
+Asyncio backend for the local figure server
+
+ThreadingHTTPServer spawns an OS thread per connection. When several open
+figures fetch chunks in parallel, that produces thread storms and high tail
+latency. AsyncHTTPServer serves all connections from a single event loop
+instead:
+- HTTP/1.1 with keep-alive
+- file bodies sent with loop.sendfile (zero-copy where supported)
+- blocking disk work (stat, ETag hashing, PUT writes) on a bounded pool of
+  I/O threads
+
+Responses follow CORSRequestHandler and FileUploadCORSRequestHandler: CORS
+headers, (multi-)Range requests, ETags and conditional requests, and PUT
+uploads.
+
+AsyncHTTPServer has the serve_forever / shutdown / server_close interface of
+socketserver servers, so ProcessServerManager runs it like the threading
+backend (see create_http_server).
+"""
+
+import asyncio
+import email.utils
+import html
+import http.client
+import io
+import json
+import mimetypes
+import os
+import pathlib
+import posixpath
+import socket
+import threading
+import urllib.parse
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler
+from typing import List, Optional, Set, Tuple, Union
+
+from ._memory_bundle import InMemoryFigures, MemoryFile
+from ._server_manager import (
+    NO_STORE_CACHE_CONTROL,
+    _etag_in_list,
+    _file_validators,
+    _get_cache_control,
+    _not_modified_since,
+    _parse_byte_ranges,
+    _parse_http_date,
+)
+
+# Threads for blocking disk I/O, shared by all connections
+DEFAULT_IO_WORKERS = 8
+# Pending connections queued by the kernel; ThreadingHTTPServer uses 5
+LISTEN_BACKLOG = 1024
+# Idle keep-alive connections are closed after this many seconds
+KEEP_ALIVE_TIMEOUT = 60.0
+MAX_HEADER_BYTES = 65536
+PUT_CHUNK_SIZE = 64 * 1024
+
+
+class _Request:
+    def __init__(
+        self, method: str, path: str, version: str, headers: http.client.HTTPMessage
+    ):
+        self.method = method
+        self.path = path
+        self.version = version
+        self.headers = headers
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("Connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+def _parse_request_head(head: bytes) -> Optional[_Request]:
+    """Parse the request line and headers, or return None if malformed"""
+    try:
+        request_line, _, header_bytes = head.partition(b"\r\n")
+        method, path, version = request_line.decode("latin-1").split()
+        if not version.startswith("HTTP/1."):
+            return None
+        headers = http.client.parse_headers(io.BytesIO(header_bytes))
+    except (ValueError, http.client.HTTPException):
+        return None
+    return _Request(method, path, version, headers)
+
+
+def _translate_path(directory: str, url_path: str) -> str:
+    """
+    Map a URL path to a file system path below directory, dropping "." and
+    ".." components (as SimpleHTTPRequestHandler.translate_path)
+    """
+    url_path = url_path.split("?", 1)[0].split("#", 1)[0]
+    trailing_slash = url_path.rstrip().endswith("/")
+    try:
+        url_path = urllib.parse.unquote(url_path, errors="surrogatepass")
+    except UnicodeDecodeError:
+        url_path = urllib.parse.unquote(url_path)
+    path = directory
+    for word in posixpath.normpath(url_path).split("/"):
+        if os.path.dirname(word) or word in (os.curdir, os.pardir):
+            continue
+        path = os.path.join(path, word)
+    if trailing_slash:
+        path += "/"
+    return path
+
+
+def _guess_type(path: str) -> str:
+    ext = posixpath.splitext(path)[1].lower()
+    guess = SimpleHTTPRequestHandler.extensions_map.get(ext)
+    if guess is None:
+        guess = mimetypes.guess_type(path)[0]
+    return guess or "application/octet-stream"
+
+
+class _HeadersSent(Exception):
+    """An error occurred after the response headers were sent"""
+
+
+class AsyncHTTPServer:
+    """
+    Event-loop HTTP server for a directory, with the semantics of
+    CORSRequestHandler (and FileUploadCORSRequestHandler when uploads are
+    enabled)
+    """
+
+    def __init__(
+        self,
+        server_address: Tuple[str, int],
+        *,
+        directory: str,
+        allow_origin: Optional[str] = None,
+        sealed_dirs: Optional[Set[str]] = None,
+        memory_figures: Optional[InMemoryFigures] = None,
+        enable_file_upload: bool = False,
+        max_file_size: int = 10 * 1024 * 1024,
+        num_io_workers: int = DEFAULT_IO_WORKERS,
+    ):
+        """
+        Args:
+            server_address: (host, port) to bind to
+            directory: Directory to serve
+            allow_origin: CORS origin to allow (None for no CORS)
+            sealed_dirs: Names of the top-level directories whose pack files
+                and assets are served as immutable (see CORSRequestHandler)
+            memory_figures: Figures served from memory, or None
+            enable_file_upload: Whether to accept PUT requests
+            max_file_size: Maximum file size in bytes for uploads
+            num_io_workers: Number of threads for blocking disk I/O
+        """
+        self.directory = os.fspath(directory)
+        self.allow_origin = allow_origin
+        self.sealed_dirs: Set[str] = sealed_dirs if sealed_dirs is not None else set()
+        self.memory_figures = memory_figures
+        self.enable_file_upload = enable_file_upload
+        self.max_file_size = max_file_size
+
+        # Bind right away, like socketserver servers, so errors surface here
+        self.socket = socket.create_server(server_address, backlog=LISTEN_BACKLOG)
+        self.server_address = self.socket.getsockname()[:2]
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=num_io_workers, thread_name_prefix="figpack-io"
+        )
+        self._loop = asyncio.new_event_loop()
+        self._stop_event: Optional[asyncio.Event] = None
+        self._shutdown_request = False
+        self._serving = False
+        self._is_shut_down = threading.Event()
+        self._connections: Set[asyncio.Task] = set()
+
+    def serve_forever(self) -> None:
+        """Serve requests until shutdown() is called (blocking)"""
+        self._serving = True
+        self._is_shut_down.clear()
+        try:
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._serve())
+        finally:
+            self._serving = False
+            self._is_shut_down.set()
+
+    def shutdown(self) -> None:
+        """Stop serve_forever and wait until it has returned"""
+        self._shutdown_request = True
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._request_stop)
+        if self._serving:
+            self._is_shut_down.wait()
+
+    def server_close(self) -> None:
+        """Release the listening socket, event loop and I/O threads"""
+        self.socket.close()
+        if not self._serving and not self._loop.is_closed():
+            self._loop.close()
+        self._executor.shutdown(wait=False)
+
+    def _request_stop(self) -> None:
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    async def _serve(self) -> None:
+        self._stop_event = asyncio.Event()
+        if self._shutdown_request:
+            return
+        server = await asyncio.start_server(
+            self._handle_connection, sock=self.socket, limit=MAX_HEADER_BYTES
+        )
+        try:
+            await self._stop_event.wait()
+        finally:
+            server.close()
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await server.wait_closed()
+
+    async def _run_io(self, fn, *args):
+        return await self._loop.run_in_executor(self._executor, fn, *args)
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        assert task is not None
+        self._connections.add(task)
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    head = await asyncio.wait_for(
+                        reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT
+                    )
+                except asyncio.LimitOverrunError:
+                    response = _Response(self, None, writer)
+                    await response.send_error(431, "Request Header Fields Too Large")
+                    break
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    break
+                request = _parse_request_head(head)
+                response = _Response(self, request, writer)
+                if request is None:
+                    await response.send_error(400, "Bad request syntax")
+                    break
+                try:
+                    await self._handle_request(request, reader, response)
+                except _HeadersSent:
+                    break
+                except Exception as e:
+                    if response.headers_sent:
+                        break
+                    response.close_connection = True
+                    await response.send_error(500, f"Internal Server Error: {e}")
+                keep_alive = request.keep_alive and not response.close_connection
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _handle_request(
+        self, request: _Request, reader: asyncio.StreamReader, response: "_Response"
+    ) -> None:
+        if request.method in ("GET", "HEAD"):
+            await self._handle_get(request, response)
+        elif request.method == "OPTIONS":
+            response.send_response(204, "No Content")
+            await response.end_headers()
+        elif request.method == "PUT" and self.enable_file_upload:
+            # The connection is only reusable once the whole body was read
+            response.close_connection = True
+            await self._handle_put(request, reader, response)
+        elif request.method == "PUT":
+            response.close_connection = True
+            await response.send_error(405, "Method Not Allowed")
+        else:
+            response.close_connection = True
+            await response.send_error(501, f"Unsupported method ({request.method!r})")
+
+    async def _handle_get(self, request: _Request, response: "_Response") -> None:
+        path = _translate_path(self.directory, request.path)
+        source: Union[str, MemoryFile, None] = None
+        if self.memory_figures is not None:
+            resolved = await self._run_io(self.memory_figures.resolve, request.path)
+            if resolved is not None:
+                source = resolved if isinstance(resolved, MemoryFile) else str(resolved)
+                if path.endswith("/"):
+                    path = os.path.join(path, "index.html")
+        if source is None:
+            source = await self._resolve_disk_file(path, request, response)
+            if source is None:
+                return
+            path = source
+
+        # Validators, answering conditional requests as CORSRequestHandler
+        if isinstance(source, MemoryFile):
+            etag, mtime = await self._run_io(lambda: (source.etag, source.mtime))
+        else:
+            etag, mtime = await self._run_io(_file_validators.get, source)
+        response.etag = etag
+        response.cache_control = _get_cache_control(
+            path, self.directory, self.sealed_dirs
+        )
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None:
+            not_modified = _etag_in_list(etag, if_none_match, weak=True)
+        else:
+            not_modified = _not_modified_since(
+                request.headers.get("If-Modified-Since"), mtime
+            )
+        last_modified = email.utils.formatdate(int(mtime), usegmt=True)
+        if not_modified:
+            response.send_response(304, "Not Modified")
+            response.send_header("Last-Modified", last_modified)
+            await response.end_headers()
+            return
+
+        if isinstance(source, MemoryFile):
+            f = io.BytesIO(source.content)
+        else:
+            f = await self._run_io(open, source, "rb")
+        try:
+            file_size = (
+                source.size
+                if isinstance(source, MemoryFile)
+                else os.fstat(f.fileno()).st_size
+            )
+            content_type = _guess_type(path)
+            head_only = request.method == "HEAD"
+            ranges = None
+            range_header = request.headers.get("Range")
+            if (
+                range_header is not None
+                and range_header.startswith("bytes=")
+                and not head_only
+                and _if_range_matches(request, etag, mtime)
+            ):
+                try:
+                    ranges = _parse_byte_ranges(range_header[6:], file_size)
+                except ValueError:
+                    await response.send_error(400, "Invalid Range header")
+                    return
+                if not ranges:
+                    response.send_response(416, "Range Not Satisfiable")
+                    response.send_header("Content-Range", f"bytes */{file_size}")
+                    response.send_header("Content-Length", "0")
+                    await response.end_headers()
+                    return
+
+            if ranges is None:
+                response.send_response(200, "OK")
+                response.send_header("Content-Type", content_type)
+                response.send_header("Content-Length", str(file_size))
+                response.send_header("Last-Modified", last_modified)
+                await response.end_headers()
+                if not head_only:
+                    await response.send_file_range(f, 0, file_size)
+            elif len(ranges) == 1:
+                start, end = ranges[0]
+                response.send_response(206, "Partial Content")
+                response.send_header("Content-Type", content_type)
+                response.send_header("Content-Length", str(end - start + 1))
+                response.send_header(
+                    "Content-Range", f"bytes {start}-{end}/{file_size}"
+                )
+                response.send_header("Last-Modified", last_modified)
+                await response.end_headers()
+                await response.send_file_range(f, start, end - start + 1)
+            else:
+                await self._send_multipart_byteranges(
+                    response, f, ranges, file_size, last_modified, content_type
+                )
+        finally:
+            f.close()
+
+    async def _resolve_disk_file(
+        self, path: str, request: _Request, response: "_Response"
+    ) -> Optional[str]:
+        """
+        The file to serve from disk, or None if a redirect, directory listing
+        or 404 response was sent
+        """
+        if await self._run_io(os.path.isdir, path):
+            url_parts = urllib.parse.urlsplit(request.path)
+            if not url_parts.path.endswith("/"):
+                # Redirect browser - doing basically what apache does
+                response.send_response(301, "Moved Permanently")
+                new_parts = (url_parts[0], url_parts[1], url_parts[2] + "/") + tuple(
+                    url_parts[3:]
+                )
+                response.send_header("Location", urllib.parse.urlunsplit(new_parts))
+                response.send_header("Content-Length", "0")
+                await response.end_headers()
+                return None
+            for index in ("index.html", "index.htm"):
+                index_path = os.path.join(path, index)
+                if await self._run_io(os.path.isfile, index_path):
+                    path = index_path
+                    break
+            else:
+                await self._send_directory_listing(path, request, response)
+                return None
+        if path.endswith("/") or not await self._run_io(os.path.isfile, path):
+            await response.send_error(404, "File not found")
+            return None
+        return path
+
+    async def _send_multipart_byteranges(
+        self,
+        response: "_Response",
+        f,
+        ranges: List[Tuple[int, int]],
+        file_size: int,
+        last_modified: str,
+        content_type: str,
+    ) -> None:
+        boundary = uuid.uuid4().hex
+        part_headers = [
+            (
+                f"--{boundary}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n"
+            ).encode("latin-1")
+            for start, end in ranges
+        ]
+        closing = f"--{boundary}--\r\n".encode("latin-1")
+        content_length = len(closing) + sum(
+            len(header) + (end - start + 1) + 2
+            for header, (start, end) in zip(part_headers, ranges)
+        )
+
+        response.send_response(206, "Partial Content")
+        response.send_header(
+            "Content-Type", f"multipart/byteranges; boundary={boundary}"
+        )
+        response.send_header("Content-Length", str(content_length))
+        response.send_header("Last-Modified", last_modified)
+        await response.end_headers()
+        for header, (start, end) in zip(part_headers, ranges):
+            response.writer.write(header)
+            await response.send_file_range(f, start, end - start + 1)
+            response.writer.write(b"\r\n")
+        response.writer.write(closing)
+        await response.writer.drain()
+
+    async def _send_directory_listing(
+        self, path: str, request: _Request, response: "_Response"
+    ) -> None:
+        try:
+            names = sorted(await self._run_io(os.listdir, path), key=str.lower)
+        except OSError:
+            await response.send_error(404, "No permission to list directory")
+            return
+        display_path = html.escape(
+            urllib.parse.unquote(urllib.parse.urlsplit(request.path).path)
+        )
+        items = []
+        for name in names:
+            full_name = os.path.join(path, name)
+            link = name + "/" if os.path.isdir(full_name) else name
+            items.append(
+                f'<li><a href="{urllib.parse.quote(link)}">{html.escape(link)}</a></li>'
+            )
+        body = (
+            '<!DOCTYPE HTML>\n<html>\n<head>\n<meta charset="utf-8">\n'
+            f"<title>Directory listing for {display_path}</title>\n</head>\n"
+            f"<body>\n<h1>Directory listing for {display_path}</h1>\n<hr>\n"
+            f"<ul>\n{''.join(items)}\n</ul>\n<hr>\n</body>\n</html>\n"
+        ).encode("utf-8")
+        response.send_response(200, "OK")
+        response.send_header("Content-Type", "text/html; charset=utf-8")
+        response.send_header("Content-Length", str(len(body)))
+        await response.end_headers()
+        if request.method != "HEAD":
+            response.writer.write(body)
+            await response.writer.drain()
+
+    async def _handle_put(
+        self, request: _Request, reader: asyncio.StreamReader, response: "_Response"
+    ) -> None:
+        """Handle a PUT upload as FileUploadCORSRequestHandler.do_PUT"""
+        relative_path = urllib.parse.unquote(
+            urllib.parse.urlparse(request.path).path.lstrip("/")
+        )
+        if not relative_path:
+            await response.send_error(400, "Bad Request: Empty file path")
+            return
+        served_dir = pathlib.Path(self.directory).resolve()
+        try:
+            file_path = (served_dir / relative_path).resolve()
+        except (OSError, ValueError) as e:
+            await response.send_error(400, f"Bad Request: Invalid path - {str(e)}")
+            return
+        if not str(file_path).startswith(str(served_dir)):
+            await response.send_error(403, "Forbidden: Path outside served directory")
+            return
+
+        content_length_header = request.headers.get("Content-Length")
+        if not content_length_header:
+            await response.send_error(
+                400, "Bad Request: Content-Length header required"
+            )
+            return
+        try:
+            content_length = int(content_length_header)
+        except ValueError:
+            await response.send_error(400, "Bad Request: Invalid Content-Length")
+            return
+        if content_length < 0:
+            await response.send_error(400, "Bad Request: Negative Content-Length")
+            return
+        if content_length > self.max_file_size:
+            await response.send_error(
+                413,
+                f"Payload Too Large: Maximum file size is {self.max_file_size} bytes",
+            )
+            return
+
+        parts = file_path.relative_to(served_dir).parts
+        # A figure served from memory is written to its directory first
+        if self.memory_figures is not None and parts:
+            await self._run_io(self.memory_figures.materialize, parts[0])
+
+        is_new_file = not await self._run_io(file_path.exists)
+        written = await self._write_file_content(file_path, content_length, reader)
+
+        # As in FileUploadCORSRequestHandler: drop the cached ETag and stop
+        # serving the figure as immutable
+        _file_validators.invalidate(_translate_path(self.directory, request.path))
+        _file_validators.invalidate(str(file_path))
+        if parts:
+            self.sealed_dirs.discard(parts[0])
+
+        if written is not None:
+            await response.send_error(*written)
+            return
+        response.close_connection = False
+        body = json.dumps(
+            {"status": "success", "path": str(file_path.relative_to(served_dir))}
+        ).encode("utf-8")
+        response.send_response(201 if is_new_file else 200)
+        response.send_header("Content-Type", "application/json")
+        response.send_header("Content-Length", str(len(body)))
+        await response.end_headers()
+        response.writer.write(body)
+        await response.writer.drain()
+
+    async def _write_file_content(
+        self, file_path: pathlib.Path, content_length: int, reader
+    ) -> Optional[Tuple[int, str]]:
+        """
+        Write the request body to a file, reading it from the connection in
+        chunks and writing each chunk on the I/O threads.
+
+        Returns:
+            None on success, or the (status code, message) of the error
+        """
+        try:
+            await self._run_io(
+                lambda: file_path.parent.mkdir(parents=True, exist_ok=True)
+            )
+            f = await self._run_io(open, file_path, "wb")
+        except OSError as e:
+            return 500, f"Internal Server Error: Could not write file - {str(e)}"
+        try:
+            remaining = content_length
+            while remaining > 0:
+                try:
+                    chunk = await reader.readexactly(min(PUT_CHUNK_SIZE, remaining))
+                except asyncio.IncompleteReadError:
+                    return 400, "Bad Request: Incomplete data"
+                await self._run_io(f.write, chunk)
+                remaining -= len(chunk)
+        except OSError as e:
+            return 500, f"Internal Server Error: Could not write file - {str(e)}"
+        finally:
+            await self._run_io(f.close)
+        return None
+
+
+def _if_range_matches(request: _Request, etag: str, mtime: float) -> bool:
+    """Whether a Range request should be honored given its If-Range header"""
+    if_range = request.headers.get("If-Range")
+    if if_range is None:
+        return True
+    if if_range.strip().startswith(('"', "W/")):
+        return _etag_in_list(etag, if_range, weak=False)
+    return _parse_http_date(if_range) == int(mtime)
+
+
+class _Response:
+    """Builds and sends the response to one request"""
+
+    def __init__(
+        self,
+        server: AsyncHTTPServer,
+        request: Optional[_Request],
+        writer: asyncio.StreamWriter,
+    ):
+        self.server = server
+        self.request = request
+        self.writer = writer
+        self.etag: Optional[str] = None
+        self.cache_control = NO_STORE_CACHE_CONTROL
+        self.headers_sent = False
+        self.close_connection = False
+        self._head_lines: List[str] = []
+
+    def send_response(self, code: int, message: Optional[str] = None) -> None:
+        if message is None:
+            message = HTTPStatus(code).phrase
+        self._head_lines = [
+            f"HTTP/1.1 {code} {message}",
+            f"Date: {email.utils.formatdate(usegmt=True)}",
+            "Server: figpack-async",
+        ]
+
+    def send_header(self, keyword: str, value: str) -> None:
+        self._head_lines.append(f"{keyword}: {value}")
+
+    async def end_headers(self) -> None:
+        server = self.server
+        if server.allow_origin is not None:
+            self.send_header("Access-Control-Allow-Origin", server.allow_origin)
+            self.send_header("Vary", "Origin")
+            if server.enable_file_upload:
+                self.send_header(
+                    "Access-Control-Allow-Methods", "GET, HEAD, OPTIONS, PUT"
+                )
+                self.send_header(
+                    "Access-Control-Allow-Headers",
+                    "Content-Type, Range, Content-Length",
+                )
+            else:
+                self.send_header("Access-Control-Allow-Methods", "GET, HEAD, OPTIONS")
+                self.send_header("Access-Control-Allow-Headers", "Content-Type, Range")
+            self.send_header(
+                "Access-Control-Expose-Headers",
+                "Accept-Ranges, Content-Encoding, Content-Length, Content-Range",
+            )
+
+        # Always send Accept-Ranges header to indicate byte-range support
+        self.send_header("Accept-Ranges", "bytes")
+
+        if self.etag is not None:
+            self.send_header("ETag", self.etag)
+        self.send_header("Cache-Control", self.cache_control)
+        if self.cache_control == NO_STORE_CACHE_CONTROL:
+            self.send_header("Pragma", "no-cache")
+            self.send_header("Expires", "0")
+
+        keep_alive = (
+            self.request is not None
+            and self.request.keep_alive
+            and not self.close_connection
+        )
+        self.send_header("Connection", "keep-alive" if keep_alive else "close")
+
+        self.writer.write(
+            ("\r\n".join(self._head_lines) + "\r\n\r\n").encode("latin-1", "replace")
+        )
+        self.headers_sent = True
+        await self.writer.drain()
+
+    async def send_error(self, code: int, message: Optional[str] = None) -> None:
+        if self.headers_sent:
+            raise _HeadersSent()
+        self.etag = None
+        self.cache_control = NO_STORE_CACHE_CONTROL
+        short_message, explain = BaseHTTPRequestHandler.responses.get(
+            HTTPStatus(code), ("???", "???")
+        )
+        if message is None:
+            message = short_message
+        body = b""
+        # Message body is omitted for cases described in RFC 7230 section 3.3
+        head_only = self.request is not None and self.request.method == "HEAD"
+        if code >= 200 and code not in (204, 304) and not head_only:
+            body = (
+                BaseHTTPRequestHandler.error_message_format
+                % {
+                    "code": code,
+                    "message": html.escape(message, quote=False),
+                    "explain": html.escape(explain, quote=False),
+                }
+            ).encode("UTF-8", "replace")
+        self.send_response(code, message.splitlines()[0] if message else None)
+        self.send_header("Content-Type", BaseHTTPRequestHandler.error_content_type)
+        self.send_header("Content-Length", str(len(body)))
+        await self.end_headers()
+        if body:
+            self.writer.write(body)
+            await self.writer.drain()
+
+    async def send_file_range(self, f, offset: int, count: int) -> None:
+        """Send bytes of an open file, zero-copy (os.sendfile) where supported"""
+        if count <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        await loop.sendfile(self.writer.transport, f, offset, count)
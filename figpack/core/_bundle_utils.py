@@ -1,18 +1,38 @@
 import os
 import pathlib
 import json
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 import zarr
 
-from .figpack_view import FigpackView
+from .figpack_view import FigpackView, walk_view_tree
 from .figpack_extension import FigpackExtension
 from .extension_view import ExtensionView
-from .zarr import Group, _check_zarr_version
-from ._zarr_consolidate import consolidate_zarr_chunks
+from .zarr import Group, ParallelChunkWriter, _check_zarr_version
+from ._pack_store import (
+    create_memory_store,
+    create_pack_store,
+    memory_store_to_bundle_files,
+    write_consolidated_metadata,
+)
+from ._content_hashes import compute_bundle_content_hashes
+from ._subview_cache import SubviewCache
 
 thisdir = pathlib.Path(__file__).parent.resolve()
 
+# The built figure viewer (index.html and assets)
+FIGURE_DIST_DIR = thisdir / ".." / "figpack-figure-dist"
+
+
+def get_figure_dist_dir() -> pathlib.Path:
+    """
+    The directory holding the built figure viewer (index.html and assets)
+    """
+    html_dir = FIGURE_DIST_DIR
+    if not os.path.exists(html_dir):
+        raise SystemExit(f"Error: directory not found: {html_dir}")
+    return html_dir
+
 
 def prepare_figure_bundle(
     view: FigpackView,
@@ -21,7 +41,10 @@ def prepare_figure_bundle(
     title: str,
     description: Optional[str] = None,
     script: Optional[str] = None,
-) -> None:
+    compute_content_hashes: bool = False,
+    num_write_workers: Optional[int] = None,
+    subview_cache: Optional[SubviewCache] = None,
+) -> Optional[Dict[str, str]]:
     """
     Prepare a figure bundle in the specified temporary directory.
 
@@ -29,7 +52,10 @@ def prepare_figure_bundle(
     1. Copies all files from the figpack-figure-dist directory to tmpdir
     2. Writes the view data to a zarr group
     3. Discovers and writes extension JavaScript files
-    4. Consolidates zarr metadata
+    4. Writes the consolidated zarr metadata (chunks are written directly
+       into consolidated pack files and the metadata is kept in memory until
+       then)
+    5. Optionally computes the content hashes of all bundle files
 
     Args:
         view: The figpack view to prepare
@@ -37,10 +63,20 @@ def prepare_figure_bundle(
         title: Title for the figure (required)
         description: Optional description for the figure (markdown supported)
         script: Optional script text used to generate the figure
+        compute_content_hashes: If True, compute the SHA-256 of every file in
+            the bundle (used to deduplicate uploads)
+        num_write_workers: Number of threads used to compress and write zarr
+            chunks. Defaults to the FIGPACK_WRITE_WORKERS environment variable,
+            or 1 (write on the calling thread) if it is not set.
+        subview_cache: If provided, the data of subviews that were already
+            written with this cache is copied from it instead of being
+            recomputed, and the data of the other subviews is added to it
+
+    Returns:
+        Dict mapping relative path to SHA-256 if compute_content_hashes is
+        True, otherwise None
     """
-    html_dir = thisdir / ".." / "figpack-figure-dist"
-    if not os.path.exists(html_dir):
-        raise SystemExit(f"Error: directory not found: {html_dir}")
+    html_dir = get_figure_dist_dir()
 
     # Copy all files in html_dir recursively to tmpdir
     for item in html_dir.iterdir():
@@ -54,17 +90,137 @@ def prepare_figure_bundle(
                 target_sub = target / subitem.name
                 target_sub.write_bytes(subitem.read_bytes())
 
+    # Write the view data to the Zarr group. Chunks go straight into the
+    # _consolidated_N.dat pack files, and the metadata stays in memory.
+    zarr_dir = pathlib.Path(tmpdir) / "data.zarr"
+    zarr_store = create_pack_store(zarr_dir)
+    required_extensions = _write_view_data(
+        view,
+        zarr_store,
+        title=title,
+        description=description,
+        script=script,
+        num_write_workers=num_write_workers,
+        subview_cache=subview_cache,
+    )
+
+    # Write .zmetadata, the single source of truth for the metadata, with the
+    # location of every chunk in the pack files
+    write_consolidated_metadata(zarr_store)
+
+    # Discover and write extension JavaScript files
+    _write_extension_files(required_extensions, tmpdir)
+
+    # Generate extension manifest
+    _write_extension_manifest(required_extensions, tmpdir)
+
+    if compute_content_hashes:
+        return compute_bundle_content_hashes(pathlib.Path(tmpdir))
+    return None
+
+
+def prepare_figure_bundle_in_memory(
+    view: FigpackView,
+    *,
+    title: str,
+    description: Optional[str] = None,
+    script: Optional[str] = None,
+    num_write_workers: Optional[int] = None,
+    subview_cache: Optional[SubviewCache] = None,
+) -> Dict[str, bytes]:
+    """
+    Prepare the files of a figure bundle in memory, without writing to disk.
+
+    The result holds the files that prepare_figure_bundle would write besides
+    the figpack-figure-dist files (data.zarr/.zmetadata, the pack files and
+    the extension files), with the same content. Used to serve figures shown
+    locally straight from memory (see InMemoryFigures).
+
+    Args:
+        view: The figpack view to prepare
+        title: Title for the figure (required)
+        description: Optional description for the figure (markdown supported)
+        script: Optional script text used to generate the figure
+        num_write_workers: Number of threads used to compress and write zarr
+            chunks (see prepare_figure_bundle)
+        subview_cache: Cache of the data of previously written subviews (see
+            prepare_figure_bundle)
+
+    Returns:
+        Dict mapping relative path to file content
+    """
+    # Fail early, as prepare_figure_bundle does, if the viewer is missing
+    get_figure_dist_dir()
+
+    zarr_store, store_dict = create_memory_store()
+    required_extensions = _write_view_data(
+        view,
+        zarr_store,
+        title=title,
+        description=description,
+        script=script,
+        num_write_workers=num_write_workers,
+        subview_cache=subview_cache,
+    )
+
+    files = {
+        f"data.zarr/{relative_path}": content
+        for relative_path, content in memory_store_to_bundle_files(store_dict).items()
+    }
+    for relative_path, text in _get_extension_files(required_extensions).items():
+        files[relative_path] = text.encode("utf-8")
+    files["extension_manifest.json"] = _get_extension_manifest(
+        required_extensions
+    ).encode("utf-8")
+    return files
+
+
+def _write_view_data(
+    view: FigpackView,
+    zarr_store,
+    *,
+    title: str,
+    description: Optional[str],
+    script: Optional[str],
+    num_write_workers: Optional[int],
+    subview_cache: Optional[SubviewCache] = None,
+) -> List[FigpackExtension]:
+    """
+    Write the view data to a zarr store (the caller consolidates the
+    metadata, see write_consolidated_metadata and memory_store_to_bundle_files)
+
+    Returns:
+        The extensions required by the view
+    """
     # If we are using zarr 3, then we set the default zarr format to 2 temporarily
     # because we only support version 2 on the frontend right now.
+    # The chunks of each write are also stored one at a time, in chunk order,
+    # so that the pack store can keep them in the order it wrote them (see
+    # PackFiles). Writes are parallelized with the ParallelChunkWriter instead.
 
     if _check_zarr_version() == 3:
         old_default_zarr_format = zarr.config.get("default_zarr_format")  # type: ignore
-        zarr.config.set({"default_zarr_format": 2})  # type: ignore
+        old_async_concurrency = zarr.config.get("async.concurrency")  # type: ignore
+        zarr.config.set(  # type: ignore
+            {"default_zarr_format": 2, "async.concurrency": 1}
+        )
+
+    if num_write_workers is None:
+        num_write_workers = int(os.environ.get("FIGPACK_WRITE_WORKERS", "1"))
+    parallel_writer = (
+        ParallelChunkWriter(num_write_workers) if num_write_workers > 1 else None
+    )
+    subview_cache_session = (
+        subview_cache.session() if subview_cache is not None else None
+    )
 
     try:
-        # Write the view data to the Zarr group
-        zarr_group = zarr.open_group(pathlib.Path(tmpdir) / "data.zarr", mode="w")
-        zarr_group = Group(zarr_group)
+        zarr_group = zarr.open_group(zarr_store, mode="w")
+        zarr_group = Group(
+            zarr_group,
+            parallel_writer=parallel_writer,
+            subview_cache=subview_cache_session,
+        )
         view.write_to_zarr_group(zarr_group)
 
         # Add title and description and script as attributes on the top-level zarr group
@@ -74,115 +230,53 @@ def prepare_figure_bundle(
         if script:
             zarr_group.attrs["script"] = script
 
-        # Discover and write extension JavaScript files
         required_extensions = _discover_required_extensions(view)
-        _write_extension_files(required_extensions, tmpdir)
-
-        # Generate extension manifest
-        _write_extension_manifest(required_extensions, tmpdir)
-
-        # Create the .zmetadata file
-        zarr.consolidate_metadata(zarr_group._zarr_group.store)
 
-        # It's important that we remove all the metadata files except for the
-        # consolidated one so there is a single source of truth.
-        _remove_metadata_files_except_consolidated(pathlib.Path(tmpdir) / "data.zarr")
+        # All chunks must be written before the metadata is consolidated and
+        # the chunks are packed
+        zarr_group.flush()
 
-        # Consolidate zarr chunks into larger files to reduce upload count
-        consolidate_zarr_chunks(pathlib.Path(tmpdir) / "data.zarr")
+        if subview_cache_session is not None:
+            subview_cache_session.collect()
     finally:
+        if parallel_writer is not None:
+            parallel_writer.shutdown()
         if _check_zarr_version() == 3:
-            zarr.config.set({"default_zarr_format": old_default_zarr_format})  # type: ignore
+            zarr.config.set(  # type: ignore
+                {
+                    "default_zarr_format": old_default_zarr_format,
+                    "async.concurrency": old_async_concurrency,
+                }
+            )
 
+    return required_extensions
 
-def _remove_metadata_files_except_consolidated(zarr_dir: pathlib.Path) -> None:
-    """
-    Remove all zarr metadata files except for the consolidated one.
 
-    Args:
-        zarr_dir: Path to the zarr directory
+def _discover_required_extensions(
+    view: FigpackView, views: Optional[List[FigpackView]] = None
+) -> List[FigpackExtension]:
     """
-    if not zarr_dir.is_dir():
-        raise ValueError(f"Expected a directory, got: {zarr_dir}")
-
-    for root, dirs, files in os.walk(zarr_dir):
-        for file in files:
-            if (
-                file.endswith(".zarray")
-                or file.endswith(".zgroup")
-                or file.endswith(".zattrs")
-            ):
-                file_path = pathlib.Path(root) / file
-                try:
-                    file_path.unlink()
-                except Exception as e:
-                    print(f"Warning: could not remove file {file_path}: {e}")
-
-
-def _discover_required_extensions(view: FigpackView) -> List[str]:
-    """
-    Recursively discover all extensions required by a view and its children
+    Discover all extensions required by a view and its children
 
     Args:
         view: The root view to analyze
+        views: The views of the tree, if already walked (see walk_view_tree)
 
     Returns:
-        Set of extension names required by this view hierarchy
+        List of the extensions required by this view hierarchy
     """
+    if views is None:
+        views = walk_view_tree(view)
+
     extension_names_discovered = set()
     extensions_discovered = []
-    visited = set()  # Prevent infinite recursion
-
-    def _collect_extensions(v: FigpackView):
-        # Prevent infinite recursion
-        if id(v) in visited:
-            return
-        visited.add(id(v))
-
-        # Check if this view is an extension view
-        if isinstance(v, ExtensionView):
-            if v.extension.name not in extension_names_discovered:
-                extension_names_discovered.add(v.extension.name)
-                extensions_discovered.append(v.extension)
-            if hasattr(v, "other_extensions"):
-                for ext in v.other_extensions:
-                    if ext.name not in extension_names_discovered:
-                        extension_names_discovered.add(ext.name)
-                        extensions_discovered.append(ext)
-
-        # Recursively check all attributes that might contain child views
-        for attr_name in dir(v):
-            if attr_name.startswith("_"):
-                continue
-
-            try:
-                attr_value = getattr(v, attr_name)
-
-                # Handle single child view
-                if isinstance(attr_value, FigpackView):
-                    _collect_extensions(attr_value)
-
-                # Handle lists/tuples of items that might contain views
-                elif isinstance(attr_value, (list, tuple)):
-                    for item in attr_value:
-                        # Check if item has a 'view' attribute (like LayoutItem)
-                        if hasattr(item, "view") and isinstance(item.view, FigpackView):
-                            _collect_extensions(item.view)
-                        # Or if the item itself is a view
-                        elif isinstance(item, FigpackView):
-                            _collect_extensions(item)
-
-                # Handle objects that might have a 'view' attribute
-                elif hasattr(attr_value, "view") and isinstance(
-                    attr_value.view, FigpackView
-                ):
-                    _collect_extensions(attr_value.view)
-
-            except (AttributeError, TypeError):
-                # Skip attributes that can't be accessed or aren't relevant
-                continue
-
-    _collect_extensions(view)
+    for v in views:
+        if not isinstance(v, ExtensionView):
+            continue
+        for ext in [v.extension] + list(getattr(v, "other_extensions", [])):
+            if ext.name not in extension_names_discovered:
+                extension_names_discovered.add(ext.name)
+                extensions_discovered.append(ext)
     return extensions_discovered
 
 
@@ -195,12 +289,26 @@ def _write_extension_files(extensions, tmpdir: str) -> None:
         tmpdir: Directory to write extension files to
     """
     tmpdir_path = pathlib.Path(tmpdir)
+    for relative_path, content in _get_extension_files(extensions).items():
+        (tmpdir_path / relative_path).write_text(content, encoding="utf-8")
+
+
+def _get_extension_files(extensions) -> Dict[str, str]:
+    """
+    JavaScript files for the required extensions
+
+    Args:
+        extensions: List of FigpackExtension instances
+
+    Returns:
+        Dict mapping relative path (in the bundle) to file content
+    """
+    files: Dict[str, str] = {}
 
     for extension in extensions:
         if not isinstance(extension, FigpackExtension):
             raise ValueError("Expected a FigpackExtension instance")
         js_filename = extension.get_javascript_filename()
-        js_path = tmpdir_path / js_filename
 
         # Add some metadata as comments at the top
         js_content = f"""/*
@@ -212,13 +320,12 @@ def _write_extension_files(extensions, tmpdir: str) -> None:
 {extension.javascript_code}
 """
 
-        js_path.write_text(js_content, encoding="utf-8")
+        files[js_filename] = js_content
 
         # Write additional JavaScript files
         additional_filenames = extension.get_additional_filenames()
         for original_name, safe_filename in additional_filenames.items():
             additional_content = extension.additional_files[original_name]
-            additional_path = tmpdir_path / safe_filename
 
             # Add metadata header to additional files too
             additional_js_content = f"""/*
@@ -230,14 +337,15 @@ def _write_extension_files(extensions, tmpdir: str) -> None:
 {additional_content}
 """
 
-            additional_path.write_text(additional_js_content, encoding="utf-8")
+            files[safe_filename] = additional_js_content
 
         # Write additional JavaScript assets
         additional_asset_filenames = extension.additional_javascript_assets.keys()
         for fname in additional_asset_filenames:
             asset_content = extension.additional_javascript_assets[fname]
-            asset_path = tmpdir_path / "assets" / fname
-            asset_path.write_text(asset_content, encoding="utf-8")
+            files[f"assets/{fname}"] = asset_content
+
+    return files
 
 
 def _write_extension_manifest(extensions, tmpdir: str) -> None:
@@ -251,6 +359,18 @@ def _write_extension_manifest(extensions, tmpdir: str) -> None:
     tmpdir_path = pathlib.Path(tmpdir)
     manifest_path = tmpdir_path / "extension_manifest.json"
 
+    # Write the manifest file
+    manifest_path.write_text(_get_extension_manifest(extensions), encoding="utf-8")
+
+
+def _get_extension_manifest(extensions) -> str:
+    """
+    Content of the extension manifest file that lists all extensions and
+    their files
+
+    Args:
+        extensions: List of FigpackExtension instances
+    """
     # Build the manifest data
     manifest_data = {"extensions": []}
 
@@ -274,7 +394,4 @@ def _write_extension_manifest(extensions, tmpdir: str) -> None:
 
         manifest_data["extensions"].append(extension_entry)
 
-    # Write the manifest file
-    manifest_path.write_text(
-        json.dumps(manifest_data, indent=2, ensure_ascii=False), encoding="utf-8"
-    )
+    return json.dumps(manifest_data, indent=2, ensure_ascii=False)
@@ -0,0 +1,204 @@
+"""
+Selection of the codecs (filters and compressor) of the datasets of a figure
+
+Group.create_dataset takes a `role` hint describing what a dataset holds, and
+the codecs are picked from it. All of them must be decodable by the figure
+viewer (see zarrDecodeChunkArray.ts): blosc (any of its compressors and
+shuffle modes), gzip, no compression, and the delta filter.
+
+- "signal": sampled values (voltage traces, amplitudes, spectrograms). They
+  barely compress, zstd with byte shuffle gains a few percent over lz4.
+- "timestamps": increasing times. Integer timestamps are delta encoded.
+- "indices": small integers such as unit indices, which bit shuffle packs.
+- "precompressed": payloads that are already compressed (JPEG or PNG bytes),
+  stored without compression.
+- "text": UTF-8 bytes of text (CSV, JSON, markdown), compressed with zstd.
+
+The FIGPACK_CODECS environment variable selects the mode: "policy" (the
+default) applies the codecs of the role, "default" ignores the roles and
+keeps zarr's default codec, and "auto" trials candidate codecs on a sample of
+each dataset and keeps the one with the lowest estimated load time in the
+viewer (see tune_codecs).
+"""
+
+import os
+import time
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+CODEC_ROLES = ("signal", "timestamps", "indices", "precompressed", "text")
+
+# The auto-tuner estimates the time a chunk takes to load in the viewer as
+# its download time at this bandwidth plus its decode time, measured here
+# and scaled by the slowdown of the viewer's WebAssembly decoders
+AUTOTUNE_BANDWIDTH_BYTES_PER_SEC = 10_000_000
+AUTOTUNE_DECODE_SLOWDOWN = 3.0
+
+# Datasets smaller than this are not worth trialing codecs on
+AUTOTUNE_MIN_BYTES = 64 * 1024
+
+# Size of the sample the codecs are trialed on
+AUTOTUNE_SAMPLE_BYTES = 1024 * 1024
+
+# (filters, compressor), with None meaning no filters or no compression
+Codecs = Tuple[Optional[List[Any]], Optional[Any]]
+
+
+def get_codec_mode() -> str:
+    """
+    The codec mode set by FIGPACK_CODECS: "policy", "default" or "auto"
+    """
+    mode = os.environ.get("FIGPACK_CODECS", "policy")
+    if mode not in ("policy", "default", "auto"):
+        raise ValueError(
+            f"Invalid FIGPACK_CODECS: {mode} (expected policy, default or auto)"
+        )
+    return mode
+
+
+def select_codecs(
+    dtype: Any, role: Optional[str], sample: Optional[np.ndarray] = None
+) -> Optional[Codecs]:
+    """
+    The codecs of a dataset
+
+    Args:
+        dtype: The dtype of the dataset
+        role: What the dataset holds (one of CODEC_ROLES), or None
+        sample: The data of the dataset or a part of it, used by the
+            auto-tuner (FIGPACK_CODECS=auto)
+
+    Returns:
+        (filters, compressor), or None to keep zarr's default codec
+    """
+    if role is not None and role not in CODEC_ROLES:
+        raise ValueError(f"Unknown dataset role: {role}")
+    dtype = np.dtype(dtype)
+    # Object and string arrays need the codecs zarr picks for them
+    if dtype.kind not in "biufc":
+        return None
+    mode = get_codec_mode()
+    if mode == "default":
+        return None
+    codecs = get_role_codecs(dtype, role) if role is not None else None
+    if (
+        mode == "auto"
+        and role != "precompressed"
+        and sample is not None
+        and sample.nbytes >= AUTOTUNE_MIN_BYTES
+    ):
+        return tune_codecs(sample)
+    return codecs
+
+
+def get_role_codecs(dtype: Any, role: str) -> Codecs:
+    """
+    The codecs of a dataset of the given dtype and role (see the module
+    docstring)
+    """
+    from numcodecs import Blosc, Delta
+
+    dtype = np.dtype(dtype)
+    if role == "signal":
+        return None, Blosc(cname="zstd", clevel=3, shuffle=Blosc.SHUFFLE)
+    elif role == "timestamps":
+        compressor = Blosc(cname="zstd", clevel=5, shuffle=Blosc.SHUFFLE)
+        if dtype.kind in "iu":
+            return [Delta(dtype=dtype.str)], compressor
+        return None, compressor
+    elif role == "indices":
+        return None, Blosc(cname="zstd", clevel=5, shuffle=Blosc.BITSHUFFLE)
+    elif role == "precompressed":
+        return None, None
+    elif role == "text":
+        return None, Blosc(cname="zstd", clevel=5, shuffle=Blosc.NOSHUFFLE)
+    else:
+        raise ValueError(f"Unknown dataset role: {role}")
+
+
+def get_candidate_codecs(dtype: Any) -> List[Codecs]:
+    """
+    The codecs trialed by the auto-tuner for a dtype, starting with zarr's
+    default
+    """
+    from numcodecs import Blosc, Delta
+
+    dtype = np.dtype(dtype)
+    # zarr's default codec comes first, so that it wins ties
+    default = Blosc(cname="lz4", clevel=5, shuffle=Blosc.SHUFFLE)
+    candidates: List[Codecs] = [(None, default), (None, None)]
+    if dtype.itemsize == 1:
+        shuffles = [Blosc.NOSHUFFLE]
+    else:
+        shuffles = [Blosc.SHUFFLE, Blosc.BITSHUFFLE]
+    for cname, clevel in (("lz4", 5), ("zstd", 3), ("zstd", 5)):
+        for shuffle in shuffles:
+            compressor = Blosc(cname=cname, clevel=clevel, shuffle=shuffle)
+            if compressor != default:
+                candidates.append((None, compressor))
+    if dtype.kind in "iu":
+        for shuffle in shuffles:
+            compressor = Blosc(cname="zstd", clevel=5, shuffle=shuffle)
+            candidates.append(([Delta(dtype=dtype.str)], compressor))
+    return candidates
+
+
+def tune_codecs(sample: np.ndarray) -> Codecs:
+    """
+    Pick the candidate codecs (see get_candidate_codecs) with the lowest
+    estimated load time of a sample in the viewer: download time at
+    AUTOTUNE_BANDWIDTH_BYTES_PER_SEC plus decode time (scaled by
+    AUTOTUNE_DECODE_SLOWDOWN)
+
+    Args:
+        sample: The data to trial the codecs on. Only its first
+            AUTOTUNE_SAMPLE_BYTES (along the first axis) are used.
+    """
+    sample = np.ascontiguousarray(_head(sample))
+    best: Optional[Codecs] = None
+    best_cost = float("inf")
+    for filters, compressor in get_candidate_codecs(sample.dtype):
+        size, decode_seconds = measure_codecs(sample, filters, compressor)
+        cost = (
+            size / AUTOTUNE_BANDWIDTH_BYTES_PER_SEC
+            + decode_seconds * AUTOTUNE_DECODE_SLOWDOWN
+        )
+        if cost < best_cost:
+            best = (filters, compressor)
+            best_cost = cost
+    assert best is not None
+    return best
+
+
+def measure_codecs(
+    data: np.ndarray, filters: Optional[List[Any]], compressor: Optional[Any]
+) -> Tuple[int, float]:
+    """
+    Encode data with codecs and decode it back
+
+    Returns:
+        (encoded size in bytes, decode time in seconds)
+    """
+    encoded: Any = np.ascontiguousarray(data)
+    for codec in filters or []:
+        encoded = codec.encode(encoded)
+    if compressor is not None:
+        encoded = compressor.encode(encoded)
+    encoded = bytes(memoryview(encoded).cast("B"))
+
+    timer = time.perf_counter()
+    decoded: Any = encoded
+    if compressor is not None:
+        decoded = compressor.decode(decoded)
+    for codec in reversed(filters or []):
+        decoded = codec.decode(decoded)
+    decode_seconds = time.perf_counter() - timer
+    return len(encoded), decode_seconds
+
+
+def _head(data: np.ndarray) -> np.ndarray:
+    if data.ndim == 0 or data.nbytes <= AUTOTUNE_SAMPLE_BYTES:
+        return data
+    row_bytes = max(data[:1].nbytes, 1)
+    return data[: max(1, AUTOTUNE_SAMPLE_BYTES // row_bytes)]
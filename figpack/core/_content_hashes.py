@@ -0,0 +1,53 @@
+"""
+Content hashes of bundle files, used to deduplicate uploads
+"""
+
+import hashlib
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+MAX_WORKERS_FOR_HASHING = 8
+
+
+def _compute_file_sha256(file_path: pathlib.Path) -> str:
+    """
+    Compute the SHA-256 hex digest of a file, reading it in 1 MB blocks
+    """
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def compute_bundle_content_hashes(
+    bundle_dir: pathlib.Path, relative_paths: Optional[Iterable[str]] = None
+) -> Dict[str, str]:
+    """
+    Compute the SHA-256 of files in a figure bundle
+
+    Args:
+        bundle_dir: Root directory of the bundle
+        relative_paths: Paths (relative to bundle_dir) to hash. If None, all
+            files in the bundle are hashed.
+
+    Returns:
+        Dict mapping relative path to SHA-256 hex digest
+    """
+    bundle_dir = pathlib.Path(bundle_dir)
+    if relative_paths is None:
+        relative_paths = [
+            str(file_path.relative_to(bundle_dir))
+            for file_path in bundle_dir.rglob("*")
+            if file_path.is_file()
+        ]
+    relative_paths = list(relative_paths)
+
+    # hashlib releases the GIL while hashing large buffers
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS_FOR_HASHING) as executor:
+        digests = executor.map(
+            lambda rel_path: _compute_file_sha256(bundle_dir / rel_path),
+            relative_paths,
+        )
+        return dict(zip(relative_paths, digests))
@@ -7,7 +7,7 @@ import threading
 from typing import Dict, Tuple
 from urllib.parse import urljoin
 
-import requests
+from ._http_session import get_http_session
 
 
 def get_figure_base_url(figure_url: str) -> str:
@@ -54,7 +54,7 @@ def download_file(
     file_url = urljoin(base_url, file_path)
 
     try:
-        response = requests.get(file_url, timeout=30)
+        response = get_http_session().get(file_url, timeout=30)
         response.raise_for_status()
 
         # Create directory structure if needed
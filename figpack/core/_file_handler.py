@@ -4,7 +4,7 @@ import urllib.parse
 from http.server import SimpleHTTPRequestHandler
 from typing import Optional
 
-from ._server_manager import CORSRequestHandler
+from ._server_manager import CORSRequestHandler, _file_validators
 
 
 class FileUploadCORSRequestHandler(CORSRequestHandler):
@@ -45,11 +45,7 @@ class FileUploadCORSRequestHandler(CORSRequestHandler):
         # Always send Accept-Ranges header to indicate byte-range support
         self.send_header("Accept-Ranges", "bytes")
 
-        # Prevent browser caching - important for when we are editing figures in place
-        # This ensures the browser always fetches the latest version of files
-        self.send_header("Cache-Control", "no-cache, no-store, must-revalidate")
-        self.send_header("Pragma", "no-cache")
-        self.send_header("Expires", "0")
+        self._send_cache_headers()
 
         super(SimpleHTTPRequestHandler, self).end_headers()
 
@@ -70,11 +66,29 @@ class FileUploadCORSRequestHandler(CORSRequestHandler):
             if content_length is None:
                 return  # Error already sent
 
+            relative_path = file_path.relative_to(
+                pathlib.Path(self.directory).resolve()
+            )
+
+            # A figure served from memory is written to its directory first,
+            # so that it is served from disk along with the uploaded file
+            if self.memory_figures is not None and relative_path.parts:
+                self.memory_figures.materialize(relative_path.parts[0])
+
             # Determine if this will be a create or update
             is_new_file = not file_path.exists()
 
             # Read and write the file
-            if self._write_file_content(file_path, content_length):
+            written = self._write_file_content(file_path, content_length)
+
+            # The file may have changed even if the write failed part way:
+            # drop its cached ETag and stop serving its figure as immutable
+            _file_validators.invalidate(self.translate_path(self.path))
+            _file_validators.invalidate(str(file_path))
+            if relative_path.parts:
+                self.sealed_dirs.discard(relative_path.parts[0])
+
+            if written:
                 # Send appropriate status code
                 status_code = 201 if is_new_file else 200
                 self.send_response(status_code)
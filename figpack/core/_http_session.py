@@ -0,0 +1,146 @@
+"""
+Shared HTTP session and S3 clients with connection pooling
+
+All figpack uploads, downloads, patches and reverts go through one
+requests.Session whose connection pool is sized to the number of concurrent
+transfers, so TCP/TLS connections are kept alive and reused across files and
+batches instead of being opened for every request.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Maximum number of concurrent transfers; also the number of pooled connections
+# kept alive per host
+HTTP_POOL_SIZE = 16
+
+# Transport-level retries for connection errors and transient server errors.
+# POST requests to the API are not retried since they are not idempotent. PUT
+# requests are left to the per-file and per-part retry loops of the uploads,
+# which re-open the body and back off; retrying them here as well would
+# multiply the attempts. Failures to connect are retried for all methods.
+HTTP_RETRY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset(["GET", "HEAD", "OPTIONS"]),
+    raise_on_status=False,
+)
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_s3_clients: Dict[str, Any] = {}
+_transfer_slots = threading.BoundedSemaphore(HTTP_POOL_SIZE)
+
+
+@contextmanager
+def transfer_slot() -> Iterator[None]:
+    """
+    Hold one of the HTTP_POOL_SIZE transfer slots for the duration of a
+    request body transfer
+
+    Whole-file uploads and the parts of multipart uploads run on different
+    thread pools. Sharing the slots keeps the number of concurrent transfers
+    within the connection pool, so urllib3 never has to open throwaway
+    connections.
+    """
+    with _transfer_slots:
+        yield
+
+
+def get_http_session() -> requests.Session:
+    """
+    Get the process-wide pooled HTTP session (created on first use)
+
+    The session is shared by all threads. It carries no cookies or auth state,
+    and its urllib3 connection pools are thread-safe.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE,
+                pool_maxsize=HTTP_POOL_SIZE,
+                max_retries=HTTP_RETRY,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def get_connection_stats() -> Dict[str, int]:
+    """
+    Report how well connections are being reused by the shared session
+
+    Returns:
+        Dict with the number of requests sent, new connections opened and
+        requests served over an already open connection, summed over the
+        currently pooled hosts
+    """
+    num_requests = 0
+    num_connections = 0
+    with _lock:
+        session = _session
+    if session is not None:
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                num_requests += pool.num_requests
+                num_connections += pool.num_connections
+    return {
+        "requests": num_requests,
+        "new_connections": num_connections,
+        "reused_connections": max(num_requests - num_connections, 0),
+    }
+
+
+def reset_http_session() -> None:
+    """
+    Close the shared session and its pooled connections
+    """
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def get_s3_client(region: str) -> Any:
+    """
+    Get a shared boto3 S3 client for a region (client-signed uploads)
+
+    boto3 clients are thread-safe, so a single client (and its connection
+    pool) is reused by all upload threads and batches.
+    """
+    with _lock:
+        client = _s3_clients.get(region)
+        if client is None:
+            try:
+                import boto3
+                from botocore.config import Config
+            except ImportError:
+                raise ImportError(
+                    "boto3 is required for uploading to buckets with client-managed credentials. "
+                    "Install it with: pip install boto3"
+                )
+
+            client = boto3.client(
+                "s3",
+                region_name=region,
+                config=Config(
+                    max_pool_connections=HTTP_POOL_SIZE,
+                    retries={"max_attempts": 4, "mode": "standard"},
+                ),
+            )
+            _s3_clients[region] = client
+        return client
@@ -0,0 +1,322 @@
+"""
+Local stand-in for the figpack upload API and bucket
+
+Implements the endpoints used by _upload_bundle (figure creation and
+resumption, upload info, content-hash deduplication, multipart uploads and
+finalization) plus PUT of the signed URLs and GET of the uploaded files.
+Uploaded content is stored in memory by SHA-256, so a file whose content was
+uploaded for any figure becomes a reference instead of being uploaded again. This allows testing uploads offline:
+
+    python -m figpack.core._local_api_server --port 8123
+    FIGPACK_API_BASE_URL=http://localhost:8123 python my_figure_script.py
+"""
+
+import base64
+import hashlib
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+class LocalApiServer:
+    """
+    In-memory, content-addressed stand-in for the figpack API and bucket
+    """
+
+    def __init__(
+        self, *, port: int = 0, content_dedup: bool = True, multipart: bool = True
+    ):
+        """
+        Args:
+            port: Port to listen on (0 picks a free port)
+            content_dedup: Whether to advertise and serve the content-hash
+                deduplication endpoint
+            multipart: Whether to advertise and serve multipart uploads
+        """
+        self.content_dedup = content_dedup
+        self.multipart = multipart
+        # upload id -> {"figure_id", "relative_path", "parts": {part number: bytes}}
+        self.multipart_uploads: Dict[str, dict] = {}
+        self.num_part_puts = 0
+        # Number of upcoming part uploads to reject, for testing retries
+        self.fail_next_part_puts = 0
+        self.blobs: Dict[str, bytes] = {}
+        # figure id -> {"status": str, "files": {relative path: sha256}}
+        self.figures: Dict[str, dict] = {}
+        self.num_creates = 0
+        self.num_puts = 0
+        self.bytes_uploaded = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(
+            ("127.0.0.1", port), _make_handler_class(self)
+        )
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> "LocalApiServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "LocalApiServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def get_figure_id(self, figure_url: str) -> str:
+        prefix = f"{self.base_url}/figures/"
+        if not figure_url.startswith(prefix):
+            raise KeyError(f"Unknown figure URL: {figure_url}")
+        figure_id = figure_url[len(prefix) :].split("/")[0]
+        if figure_id not in self.figures:
+            raise KeyError(f"Unknown figure URL: {figure_url}")
+        return figure_id
+
+    def get_file(self, figure_id: str, relative_path: str) -> Optional[bytes]:
+        with self._lock:
+            sha256 = self.figures[figure_id]["files"].get(relative_path)
+            return self.blobs.get(sha256) if sha256 is not None else None
+
+    # API endpoints, each taking the JSON payload and returning the response
+    def create_figure(self, payload: dict) -> dict:
+        # Like the real API, every created figure gets a new random id, unless
+        # resumeFigureUrl names an existing figure
+        figure_id = None
+        resume_figure_url = payload.get("resumeFigureUrl")
+        if resume_figure_url is not None:
+            try:
+                figure_id = self.get_figure_id(resume_figure_url)
+            except KeyError:
+                pass
+        with self._lock:
+            self.num_creates += 1
+            if figure_id is None:
+                figure_id = uuid.uuid4().hex[:16]
+                self.figures[figure_id] = {"status": "pending", "files": {}}
+            status = self.figures[figure_id]["status"]
+        response = {
+            "success": True,
+            "figure": {
+                "figureUrl": f"{self.base_url}/figures/{figure_id}/index.html",
+                "status": status,
+            },
+        }
+        if self.content_dedup:
+            response["contentDedup"] = True
+        if self.multipart:
+            response["multipartUpload"] = True
+        return response
+
+    def link_existing_blobs(self, payload: dict) -> dict:
+        figure_id = self.get_figure_id(payload["figureUrl"])
+        existing_files = []
+        with self._lock:
+            figure_files = self.figures[figure_id]["files"]
+            for f in payload["files"]:
+                if f["sha256"] in self.blobs:
+                    figure_files[f["relativePath"]] = f["sha256"]
+                    existing_files.append(f["relativePath"])
+        return {"success": True, "existingFiles": existing_files}
+
+    def get_upload_info(self, payload: dict) -> dict:
+        figure_id = self.get_figure_id(payload["figureUrl"])
+        signed_urls = [
+            {
+                "relativePath": f["relativePath"],
+                "signedUrl": f"{self.base_url}/put/{figure_id}/{f['relativePath']}",
+            }
+            for f in payload["files"]
+        ]
+        return {"success": True, "mode": "server-signed", "signedUrls": signed_urls}
+
+    def finalize_figure(self, payload: dict) -> dict:
+        figure_id = self.get_figure_id(payload["figureUrl"])
+        manifest_content = self.get_file(figure_id, "manifest.json")
+        if manifest_content is None:
+            return {"success": False, "message": "manifest.json was not uploaded"}
+        manifest = json.loads(manifest_content)
+        with self._lock:
+            figure = self.figures[figure_id]
+            missing = [
+                f["path"] for f in manifest["files"] if f["path"] not in figure["files"]
+            ]
+            if missing:
+                return {"success": False, "message": f"Missing files: {missing[:10]}"}
+            figure["status"] = "completed"
+        return {"success": True, "figure": {"status": "completed"}}
+
+    def start_multipart_upload(self, payload: dict) -> dict:
+        figure_id = self.get_figure_id(payload["figureUrl"])
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self.multipart_uploads[upload_id] = {
+                "figure_id": figure_id,
+                "relative_path": payload["relativePath"],
+                "parts": {},
+            }
+        parts = [
+            {
+                "partNumber": part_number,
+                "signedUrl": f"{self.base_url}/put-part/{upload_id}/{part_number}",
+            }
+            for part_number in range(1, payload["numParts"] + 1)
+        ]
+        return {"success": True, "uploadId": upload_id, "parts": parts}
+
+    def complete_multipart_upload(self, payload: dict) -> dict:
+        with self._lock:
+            upload = self.multipart_uploads.pop(payload["uploadId"])
+        stored_parts = upload["parts"]
+        content = b""
+        for part in sorted(payload["parts"], key=lambda p: p["partNumber"]):
+            data = stored_parts.get(part["partNumber"])
+            if data is None or part["etag"] != _etag(data):
+                return {"success": False, "message": f"Bad part {part['partNumber']}"}
+            content += data
+        self.put_file(upload["figure_id"], upload["relative_path"], content)
+        return {"success": True}
+
+    def abort_multipart_upload(self, payload: dict) -> dict:
+        with self._lock:
+            self.multipart_uploads.pop(payload["uploadId"], None)
+        return {"success": True}
+
+    def put_part(self, upload_id: str, part_number: int, data: bytes) -> None:
+        with self._lock:
+            self.multipart_uploads[upload_id]["parts"][part_number] = data
+            self.num_part_puts += 1
+            self.bytes_uploaded += len(data)
+
+    def put_file(self, figure_id: str, relative_path: str, content: bytes) -> None:
+        sha256 = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            self.blobs[sha256] = content
+            self.figures[figure_id]["files"][relative_path] = sha256
+            self.num_puts += 1
+            self.bytes_uploaded += len(content)
+
+
+def _etag(data: bytes) -> str:
+    return f'"{hashlib.md5(data).hexdigest()}"'
+
+
+def _make_handler_class(api: LocalApiServer):
+    post_routes = {
+        "/figures/create": api.create_figure,
+        "/upload": api.get_upload_info,
+        "/figures/finalize": api.finalize_figure,
+    }
+    if api.content_dedup:
+        post_routes["/upload/blobs"] = api.link_existing_blobs
+    if api.multipart:
+        post_routes["/upload/multipart/start"] = api.start_multipart_upload
+        post_routes["/upload/multipart/complete"] = api.complete_multipart_upload
+        post_routes["/upload/multipart/abort"] = api.abort_multipart_upload
+
+    class LocalApiRequestHandler(BaseHTTPRequestHandler):
+        # Keep connections alive like the real API and bucket
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _read_body(self) -> bytes:
+            length = int(self.headers.get("Content-Length", 0))
+            return self.rfile.read(length)
+
+        def _send(self, status: int, body: bytes, content_type: str) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, status: int, data: dict) -> None:
+            self._send(status, json.dumps(data).encode("utf-8"), "application/json")
+
+        def do_POST(self):
+            route = post_routes.get(self.path)
+            if route is None:
+                self._send_json(404, {"success": False, "message": "Not found"})
+                return
+            try:
+                response = route(json.loads(self._read_body()))
+            except KeyError as e:
+                self._send_json(400, {"success": False, "message": str(e)})
+                return
+            self._send_json(200 if response.get("success") else 400, response)
+
+        def do_PUT(self):
+            if self.path.startswith("/put-part/"):
+                self._put_part()
+                return
+            parts = self.path.split("/", 3)  # ["", "put", figure_id, path]
+            if len(parts) != 4 or parts[1] != "put" or parts[2] not in api.figures:
+                self._send_json(404, {"success": False, "message": "Not found"})
+                return
+            api.put_file(parts[2], parts[3], self._read_body())
+            self._send(200, b"", "text/plain")
+
+        def _put_part(self):
+            parts = self.path.split("/")  # ["", "put-part", upload_id, number]
+            data = self._read_body()
+            if len(parts) != 4 or parts[2] not in api.multipart_uploads:
+                self._send(404, b"Not found", "text/plain")
+                return
+            with api._lock:
+                fail = api.fail_next_part_puts > 0
+                if fail:
+                    api.fail_next_part_puts -= 1
+            if fail:
+                self._send(503, b"Slow down", "text/plain")
+                return
+            content_md5 = base64.b64encode(hashlib.md5(data).digest()).decode()
+            if self.headers.get("Content-MD5", content_md5) != content_md5:
+                self._send(400, b"BadDigest", "text/plain")
+                return
+            api.put_part(parts[2], int(parts[3]), data)
+            self.send_response(200)
+            self.send_header("ETag", _etag(data))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_GET(self):
+            parts = self.path.split("/", 3)  # ["", "figures", figure_id, path]
+            content = None
+            if len(parts) == 4 and parts[1] == "figures" and parts[2] in api.figures:
+                content = api.get_file(parts[2], parts[3])
+            if content is None:
+                self._send(404, b"Not found", "text/plain")
+                return
+            self._send(200, content, "application/octet-stream")
+
+    return LocalApiRequestHandler
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Local stand-in figpack API server")
+    parser.add_argument("--port", type=int, default=8123)
+    args = parser.parse_args()
+    with LocalApiServer(port=args.port) as server:
+        print(f"Serving stand-in figpack API at {server.base_url}")
+        print(f"Set FIGPACK_API_BASE_URL={server.base_url} to upload to it")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
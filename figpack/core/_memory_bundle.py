@@ -0,0 +1,247 @@
+"""
+Figure bundles served by the local server straight from memory
+
+show() in local mode used to write every figure bundle to the process temp
+directory, only for the server to read it back. For figures registered here
+(see prepare_figure_bundle_in_memory) the server answers requests from
+memory instead:
+- the data files (data.zarr/.zmetadata, pack files, extension files) are
+  held in memory
+- the figpack-figure-dist files (index.html, assets) are served from the
+  installed dist directory, which is shared by all figures
+
+When the figures held in memory exceed a size cap, the least recently used
+ones are spilled to their directory in the process temp directory and served
+from disk from then on.
+"""
+
+import hashlib
+import os
+import pathlib
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+
+# Default cap on the size of the figures held in memory, see
+# FIGPACK_MEMORY_CAP_MB
+DEFAULT_MAX_MEMORY_BYTES = 1024 * 1024 * 1024
+
+
+class MemoryFile:
+    """A file of a figure held in memory"""
+
+    def __init__(self, content: bytes, mtime: float):
+        self.content = content
+        self.mtime = mtime
+        self._etag: Optional[str] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.content)
+
+    @property
+    def etag(self) -> str:
+        """Strong ETag (truncated SHA-256, as for files on disk)"""
+        if self._etag is None:
+            self._etag = f'"{hashlib.sha256(self.content).hexdigest()[:32]}"'
+        return self._etag
+
+
+class InMemoryFigures:
+    """
+    Registry of the figures served from memory, keyed by the name of their
+    figure directory (the first component of the URL path)
+
+    Thread-safe: figures are added by show() while server threads resolve
+    requests. Spilled figures are written to disk outside of the registry
+    lock, and are served from memory until the write completes.
+    """
+
+    def __init__(
+        self,
+        spill_dir: pathlib.Path,
+        dist_dir: pathlib.Path,
+        max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+    ):
+        """
+        Args:
+            spill_dir: Directory holding the figure directories (the process
+                temp directory). Figures are spilled to spill_dir / name.
+            dist_dir: The figpack-figure-dist directory
+            max_memory_bytes: Cap on the total size of the figures held in
+                memory
+        """
+        self.spill_dir = pathlib.Path(spill_dir)
+        self.dist_dir = pathlib.Path(dist_dir)
+        self.max_memory_bytes = max_memory_bytes
+        self._lock = threading.Lock()
+        # Serializes the writes of spilled figures to disk
+        self._spill_lock = threading.Lock()
+        # name -> {relative path: MemoryFile}, least recently used first
+        self._figures: "OrderedDict[str, Dict[str, MemoryFile]]" = OrderedDict()
+        # Figures taken out of _figures that are being written to disk
+        self._spilling: Dict[str, Dict[str, MemoryFile]] = {}
+        self._spilled = set()
+        self._memory_bytes = 0
+
+    @property
+    def memory_bytes(self) -> int:
+        """Total size of the figure files currently held in memory"""
+        with self._lock:
+            return self._memory_bytes
+
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            return (
+                name in self._figures or name in self._spilling or name in self._spilled
+            )
+
+    def is_in_memory(self, name: str) -> bool:
+        with self._lock:
+            return name in self._figures or name in self._spilling
+
+    def add(self, name: str, files: Dict[str, bytes]) -> None:
+        """
+        Register a figure (replacing any figure of the same name), then
+        spill figures to disk while the memory cap is exceeded
+
+        Args:
+            name: Name of the figure directory
+            files: Mapping from relative path to content, as returned by
+                prepare_figure_bundle_in_memory
+        """
+        mtime = time.time()
+        memory_files = {
+            relative_path: MemoryFile(content, mtime)
+            for relative_path, content in files.items()
+        }
+        to_spill = []
+        with self._lock:
+            self._remove(name)
+            self._figures[name] = memory_files
+            self._memory_bytes += sum(f.size for f in memory_files.values())
+            while self._memory_bytes > self.max_memory_bytes and self._figures:
+                to_spill.append(self._start_spill(next(iter(self._figures))))
+        for spilled_name, spilled_files in to_spill:
+            self._finish_spill(spilled_name, spilled_files)
+
+    def remove(self, name: str) -> None:
+        """Forget a figure (files already spilled to disk are kept)"""
+        with self._lock:
+            self._remove(name)
+
+    def materialize(self, name: str) -> None:
+        """
+        Write a figure held in memory to its directory and serve it from disk
+        from then on, e.g. before one of its files is modified by a PUT
+        """
+        with self._lock:
+            if name in self._figures:
+                memory_files = self._start_spill(name)[1]
+            else:
+                # Possibly being spilled by another thread, in which case
+                # _finish_spill waits for (or takes over) the write
+                memory_files = self._spilling.get(name)
+        if memory_files is not None:
+            self._finish_spill(name, memory_files)
+
+    def resolve(self, url_path: str) -> Union[MemoryFile, pathlib.Path, None]:
+        """
+        Find the file for a request URL path
+
+        Args:
+            url_path: The request path, e.g. "/figure_1234abcd/data.zarr/.zmetadata"
+
+        Returns:
+            The MemoryFile, the path of the file on disk (spilled files and
+            figpack-figure-dist files), or None if the path does not belong
+            to a registered figure or the file does not exist
+        """
+        relative_path = _normalize_url_path(url_path)
+        if relative_path is None:
+            return None
+        name, sep, file_path = relative_path.partition("/")
+        if not sep:
+            # The figure directory itself, redirected to name/ as usual
+            return None
+        if file_path == "" or file_path.endswith("/"):
+            file_path += "index.html"
+
+        with self._lock:
+            memory_files = self._figures.get(name)
+            if memory_files is not None:
+                self._figures.move_to_end(name)
+            else:
+                memory_files = self._spilling.get(name)
+            if memory_files is None and name not in self._spilled:
+                return None
+            if memory_files is not None:
+                memory_file = memory_files.get(file_path)
+                if memory_file is not None:
+                    return memory_file
+
+        if memory_files is None:
+            spilled_path = self.spill_dir / name / file_path
+            if spilled_path.is_file():
+                return spilled_path
+        dist_path = self.dist_dir / file_path
+        if dist_path.is_file():
+            return dist_path
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._figures.clear()
+            self._spilling.clear()
+            self._spilled.clear()
+            self._memory_bytes = 0
+
+    def _remove(self, name: str) -> None:
+        memory_files = self._figures.pop(name, None)
+        if memory_files is not None:
+            self._memory_bytes -= sum(f.size for f in memory_files.values())
+        self._spilling.pop(name, None)
+        self._spilled.discard(name)
+
+    def _start_spill(self, name: str) -> Tuple[str, Dict[str, MemoryFile]]:
+        # Called with the lock held: moves the figure to _spilling, from
+        # which it is served until _finish_spill has written it
+        memory_files = self._figures.pop(name)
+        self._memory_bytes -= sum(f.size for f in memory_files.values())
+        self._spilling[name] = memory_files
+        return name, memory_files
+
+    def _finish_spill(self, name: str, memory_files: Dict[str, MemoryFile]) -> None:
+        # Called without the lock held: writes the figure to disk
+        with self._spill_lock:
+            with self._lock:
+                if self._spilling.get(name) is not memory_files:
+                    # Already written by another thread, or removed
+                    return
+            figure_dir = self.spill_dir / name
+            for relative_path, memory_file in memory_files.items():
+                path = figure_dir / relative_path
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(memory_file.content)
+                os.utime(path, (memory_file.mtime, memory_file.mtime))
+            with self._lock:
+                if self._spilling.get(name) is memory_files:
+                    del self._spilling[name]
+                    self._spilled.add(name)
+
+
+def _normalize_url_path(url_path: str) -> Optional[str]:
+    """
+    Relative path of a request URL path, keeping a trailing slash, or None if
+    it escapes the served directory
+    """
+    path = urllib.parse.unquote(urllib.parse.urlsplit(url_path).path)
+    parts = [part for part in path.split("/") if part not in ("", ".")]
+    if ".." in parts or any("\\" in part for part in parts):
+        return None
+    relative_path = "/".join(parts)
+    if relative_path and path.endswith("/"):
+        relative_path += "/"
+    return relative_path
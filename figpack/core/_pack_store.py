@@ -0,0 +1,553 @@
+"""
+Zarr store that writes chunks directly into consolidated pack files
+
+Metadata keys (.zarray, .zgroup, .zattrs, ...) are kept in memory, while chunk
+data is appended to segment files as it is written, one sequence per class of
+arrays, with the byte range of every chunk recorded in a refs mapping. At the
+end, write_consolidated_metadata renames the segment files into the
+_consolidated_N.dat pack files and writes the .zmetadata file (metadata and
+refs) once. This produces the same bundle layout as zarr.consolidate_metadata
+followed by consolidate_zarr_chunks without writing thousands of individual
+chunk and metadata files, reading them back and deleting them.
+"""
+
+import json
+import pathlib
+import threading
+from typing import Any, BinaryIO, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from ._zarr_consolidate import (
+    SMALL_ARRAY_SIZE,
+    get_array_nbytes,
+    get_array_paths,
+    get_array_rank,
+    get_zarray_nbytes,
+    group_chunks_for_packing,
+    pack_chunk_files,
+    pack_chunks_in_memory,
+)
+from .zarr import _check_zarr_version
+
+_METADATA_FILE_NAMES = {".zarray", ".zgroup", ".zattrs", ".zmetadata", "zarr.json"}
+
+# The metadata files gathered in .zmetadata
+_CONSOLIDATED_FILE_NAMES = {".zarray", ".zgroup", ".zattrs"}
+
+
+def _is_metadata_key(key: str) -> bool:
+    return key.rsplit("/", 1)[-1] in _METADATA_FILE_NAMES
+
+
+def _to_bytes(value: Any) -> bytes:
+    return value.to_bytes() if hasattr(value, "to_bytes") else bytes(value)
+
+
+def consolidated_metadata(items: Mapping[str, Any]) -> dict:
+    """
+    Consolidated metadata (the content of .zmetadata) of the metadata keys
+    among the items of a store, as zarr.consolidate_metadata builds it, but
+    without opening the groups and arrays or reading the keys back
+
+    Keys are sorted, so the result does not depend on the order in which the
+    metadata was written (e.g. when buffered attributes get flushed).
+
+    Args:
+        items: Mapping from store key to value (bytes or zarr 3 buffer)
+    """
+    return {
+        "metadata": {
+            key: json.loads(_to_bytes(items[key]))
+            for key in sorted(items)
+            if key.rsplit("/", 1)[-1] in _CONSOLIDATED_FILE_NAMES
+        },
+        "zarr_consolidated_format": 1,
+    }
+
+
+class PackFiles:
+    """
+    Append-only pack files holding the chunks of a zarr store
+
+    Thread-safe, so chunks can be written concurrently (see ParallelChunkWriter).
+    Each class of arrays (see get_array_rank: small arrays, each downsampled
+    pyramid level, other arrays) is appended, in write order, to its own
+    sequence of segment files, so that streamed data and its pyramid levels
+    do not interleave. finalize() turns the segment files into the pack
+    files, in locality order: segment files whose chunks are already in that
+    order are renamed, and only the other chunks (out of order, or in a file
+    with overwritten or deleted chunks) are copied.
+    """
+
+    def __init__(
+        self,
+        root: pathlib.Path,
+        max_file_size: int = 100_000_000,
+        metadata: Optional[Mapping[str, Any]] = None,
+    ):
+        """
+        Args:
+            root: Directory holding the pack files (the zarr directory)
+            max_file_size: Maximum size of each pack file in bytes. A chunk
+                larger than this gets a pack file of its own.
+            metadata: The metadata keys of the store, used to find the array
+                (and its class) of each chunk as it is written
+        """
+        self.root = pathlib.Path(root)
+        self.max_file_size = max_file_size
+        self.metadata = metadata if metadata is not None else {}
+        # chunk key -> [file name, offset, size]
+        self.refs: Dict[str, List] = {}
+        # Number of chunk bytes that finalize() copied instead of renaming
+        self.num_bytes_copied = 0
+        self._lock = threading.Lock()
+        self._file_sizes: Dict[str, int] = {}
+        self._num_segment_files = 0
+        # array class -> (name, handle) of the segment file being appended
+        self._current_files: Dict[Tuple[int, int], Tuple[str, BinaryIO]] = {}
+        self._array_ranks: Dict[str, Tuple[int, int]] = {}
+
+    @staticmethod
+    def _file_name(index: int) -> str:
+        return f"_consolidated_{index}.dat"
+
+    def _close_current_files(self) -> None:
+        for _, f in self._current_files.values():
+            f.close()
+        self._current_files = {}
+
+    def _get_rank(self, key: str) -> Tuple[int, int]:
+        parts = key.split("/")
+        for n in range(1, len(parts)):
+            array_path = "/".join(parts[:-n])
+            zarray_key = f"{array_path}/.zarray" if array_path else ".zarray"
+            if zarray_key in self.metadata:
+                break
+        else:
+            # Not a chunk of a known array: packed with the large arrays
+            return (2, 0)
+        rank = self._array_ranks.get(array_path)
+        if rank is None:
+            nbytes = get_zarray_nbytes(json.loads(_to_bytes(self.metadata[zarray_key])))
+            rank = get_array_rank(
+                array_path, nbytes if nbytes is not None else SMALL_ARRAY_SIZE + 1
+            )
+            self._array_ranks[array_path] = rank
+        return rank
+
+    def put(self, key: str, data: bytes) -> None:
+        rank = self._get_rank(key)
+        with self._lock:
+            self._append(rank, key, data)
+
+    def _append(self, rank: Tuple[int, int], key: str, data: bytes) -> None:
+        current = self._current_files.get(rank)
+        if (
+            current is None
+            or self._file_sizes[current[0]] + len(data) > self.max_file_size
+        ):
+            if current is not None:
+                current[1].close()
+            self.root.mkdir(parents=True, exist_ok=True)
+            file_name = f"_consolidated_segment_{self._num_segment_files}.tmp"
+            self._num_segment_files += 1
+            current = (file_name, open(self.root / file_name, "wb"))
+            self._current_files[rank] = current
+            self._file_sizes[file_name] = 0
+        file_name, f = current
+        offset = self._file_sizes[file_name]
+        f.write(data)
+        self._file_sizes[file_name] += len(data)
+        self.refs[key] = [file_name, offset, len(data)]
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            ref = self.refs.get(key)
+            if ref is None:
+                return None
+            for file_name, f in self._current_files.values():
+                if file_name == ref[0]:
+                    f.flush()
+        file_name, offset, size = ref
+        with open(self.root / file_name, "rb") as f:
+            f.seek(offset)
+            return f.read(size)
+
+    def getsize(self, key: str) -> Optional[int]:
+        with self._lock:
+            ref = self.refs.get(key)
+        return ref[2] if ref is not None else None
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self.refs
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self.refs.keys())
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self.refs.pop(key, None) is not None
+
+    def delete_prefix(self, prefix: str) -> None:
+        prefix = prefix.rstrip("/") + "/" if prefix.strip("/") else ""
+        with self._lock:
+            for key in [k for k in self.refs if k.startswith(prefix)]:
+                del self.refs[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._close_current_files()
+            for file_name in self._file_sizes:
+                (self.root / file_name).unlink(missing_ok=True)
+            self.refs = {}
+            self._file_sizes = {}
+
+    def list_dir(self, prefix: str) -> List[str]:
+        """
+        Names of the immediate children of a prefix that hold chunks
+        """
+        prefix = prefix.rstrip("/") + "/" if prefix.strip("/") else ""
+        with self._lock:
+            return sorted(
+                {
+                    key[len(prefix) :].split("/", 1)[0]
+                    for key in self.refs
+                    if key.startswith(prefix)
+                }
+            )
+
+    def finalize(self, zmetadata: dict) -> None:
+        """
+        Close the segment files, turn them into the pack files in locality
+        order (see group_chunks_for_packing), and add the refs mapping to the
+        consolidated metadata (updated in place)
+        """
+        with self._lock:
+            self._close_current_files()
+            groups = group_chunks_for_packing(
+                {key: ref[2] for key, ref in self.refs.items()},
+                get_array_paths(zmetadata),
+                self.max_file_size,
+                get_array_nbytes(zmetadata),
+            )
+            self._pack(groups)
+
+        zmetadata["refs"] = dict(self.refs)
+
+    def _pack(self, groups: List[List[str]]) -> None:
+        # Live chunks of each segment file, in file order. A segment file
+        # can be kept as is if these fill it and start a pack file.
+        file_keys: Dict[str, List[str]] = {name: [] for name in self._file_sizes}
+        for key, (file_name, offset, _) in sorted(
+            self.refs.items(), key=lambda item: (item[1][0], item[1][1])
+        ):
+            file_keys[file_name].append(key)
+
+        old_refs = self.refs
+        new_refs: Dict[str, List] = {}
+        open_files: Dict[str, BinaryIO] = {}
+        try:
+            for index, keys in enumerate(groups):
+                pack_name = self._file_name(index)
+                pack_path = self.root / pack_name
+                segment_name = old_refs[keys[0]][0]
+                segment_keys = file_keys[segment_name]
+                offset = 0
+                if (
+                    keys[: len(segment_keys)] == segment_keys
+                    and sum(old_refs[key][2] for key in segment_keys)
+                    == self._file_sizes[segment_name]
+                ):
+                    (self.root / segment_name).rename(pack_path)
+                    for key in segment_keys:
+                        new_refs[key] = [pack_name] + old_refs[key][1:]
+                    offset = self._file_sizes[segment_name]
+                    keys = keys[len(segment_keys) :]
+                if not keys:
+                    continue
+                with open(pack_path, "ab" if offset > 0 else "wb") as out:
+                    for key in keys:
+                        file_name, old_offset, size = old_refs[key]
+                        f = open_files.get(file_name)
+                        if f is None:
+                            f = open(self.root / file_name, "rb")
+                            open_files[file_name] = f
+                        f.seek(old_offset)
+                        out.write(f.read(size))
+                        new_refs[key] = [pack_name, offset, size]
+                        offset += size
+                        self.num_bytes_copied += size
+        finally:
+            for f in open_files.values():
+                f.close()
+            for file_name in self._file_sizes:
+                (self.root / file_name).unlink(missing_ok=True)
+
+        self.refs = new_refs
+        self._file_sizes = {}
+
+
+def create_pack_store(zarr_dir: pathlib.Path, max_file_size: int = 100_000_000):
+    """
+    Create a zarr store rooted at zarr_dir that writes chunks into pack files
+    and keeps the metadata keys in memory
+
+    The store's `pack_files` attribute holds the PackFiles instance and its
+    `metadata` attribute the dict of metadata keys. Call
+    write_consolidated_metadata once all data has been written.
+
+    Args:
+        zarr_dir: Path to the zarr directory
+        max_file_size: Maximum size for each pack file in bytes (default: 100 MB)
+    """
+    metadata: Dict = {}
+    pack_files = PackFiles(zarr_dir, max_file_size=max_file_size, metadata=metadata)
+    if _check_zarr_version() == 2:
+        return _make_zarr2_store_class()(metadata, pack_files)
+    elif _check_zarr_version() == 3:
+        return _make_zarr3_store_class()(metadata, pack_files)
+    else:
+        raise RuntimeError("Unsupported Zarr version")
+
+
+def write_consolidated_metadata(zarr_store) -> dict:
+    """
+    Finalize the pack files of a pack store (see create_pack_store) and write
+    its .zmetadata file: the metadata held in memory and the refs of all
+    chunks, including any chunk files written into the zarr directory outside
+    of the store. This is the only metadata file of the bundle.
+
+    Returns:
+        The consolidated metadata
+    """
+    pack_files: PackFiles = zarr_store.pack_files
+    zmetadata = consolidated_metadata(zarr_store.metadata)
+    pack_files.finalize(zmetadata)
+    pack_files.root.mkdir(parents=True, exist_ok=True)
+    pack_chunk_files(pack_files.root, zmetadata, max_file_size=pack_files.max_file_size)
+    with open(pack_files.root / ".zmetadata", "w") as f:
+        json.dump(zmetadata, f, indent=2)
+    return zmetadata
+
+
+def create_memory_store():
+    """
+    Create an in-memory zarr store backed by a plain dict
+
+    Returns:
+        tuple: (store, dict holding the store's keys and values)
+    """
+    store_dict: Dict = {}
+    if _check_zarr_version() == 2:
+        from zarr.storage import KVStore  # type: ignore
+
+        return KVStore(store_dict), store_dict
+    elif _check_zarr_version() == 3:
+        from zarr.storage import MemoryStore
+
+        return MemoryStore(store_dict=store_dict), store_dict
+    else:
+        raise RuntimeError("Unsupported Zarr version")
+
+
+def memory_store_to_bundle_files(
+    store_dict: Dict, max_file_size: int = 100_000_000
+) -> Dict[str, bytes]:
+    """
+    Turn the contents of a consolidated in-memory store into the files of a
+    zarr directory: the .zmetadata file (with refs) and the pack files, as
+    prepare_figure_bundle writes them to disk
+
+    Args:
+        store_dict: The dict of an in-memory store (see create_memory_store)
+        max_file_size: Maximum size for each pack file in bytes (default: 100 MB)
+
+    Returns:
+        Mapping from path relative to the zarr directory to file content
+    """
+    zmetadata = consolidated_metadata(store_dict)
+    chunks = {
+        key: _to_bytes(value)
+        for key, value in store_dict.items()
+        if not _is_metadata_key(key)
+    }
+    files = pack_chunks_in_memory(chunks, zmetadata, max_file_size=max_file_size)
+    files[".zmetadata"] = json.dumps(zmetadata, indent=2).encode("utf-8")
+    return files
+
+
+def _make_zarr2_store_class():
+    from zarr.storage import KVStore  # type: ignore
+
+    class PackKVStore(KVStore):
+        def __init__(self, metadata: Dict, pack_files: PackFiles):
+            super().__init__(metadata)
+            self.metadata = metadata
+            self.pack_files = pack_files
+
+        def __getitem__(self, key):
+            if _is_metadata_key(key):
+                return self.metadata[key]
+            data = self.pack_files.get(key)
+            if data is None:
+                raise KeyError(key)
+            return data
+
+        def __setitem__(self, key, value):
+            if _is_metadata_key(key):
+                self.metadata[key] = bytes(memoryview(value))
+            else:
+                self.pack_files.put(key, bytes(memoryview(value)))
+
+        def __delitem__(self, key):
+            if _is_metadata_key(key):
+                del self.metadata[key]
+            elif not self.pack_files.delete(key):
+                raise KeyError(key)
+
+        def __contains__(self, key):
+            if _is_metadata_key(key):
+                return key in self.metadata
+            return key in self.pack_files
+
+        def keys(self) -> Iterator[str]:
+            yield from list(self.metadata.keys())
+            yield from self.pack_files.keys()
+
+        def __iter__(self):
+            return self.keys()
+
+        def __len__(self):
+            return len(self.metadata) + len(self.pack_files.keys())
+
+        def clear(self):
+            self.pack_files.clear()
+            self.metadata.clear()
+
+    return PackKVStore
+
+
+def _make_zarr3_store_class():
+    from zarr.abc.store import (
+        OffsetByteRequest,
+        RangeByteRequest,
+        SuffixByteRequest,
+    )
+    from zarr.core.buffer import default_buffer_prototype
+    from zarr.storage import MemoryStore
+
+    class PackMemoryStore(MemoryStore):
+        def __init__(
+            self, metadata: Dict, pack_files: PackFiles, *, read_only: bool = False
+        ):
+            super().__init__(store_dict=metadata, read_only=read_only)
+            self.metadata = metadata
+            self.pack_files = pack_files
+
+        def with_read_only(self, read_only: bool = False):
+            return type(self)(self.metadata, self.pack_files, read_only=read_only)
+
+        async def clear(self) -> None:
+            self.pack_files.clear()
+            await super().clear()
+
+        def _get_chunk(self, key, prototype, byte_range):
+            if prototype is None:
+                prototype = default_buffer_prototype()
+            data = self.pack_files.get(key)
+            if data is None:
+                return None
+            if isinstance(byte_range, RangeByteRequest):
+                data = data[byte_range.start : byte_range.end]
+            elif isinstance(byte_range, OffsetByteRequest):
+                data = data[byte_range.offset :]
+            elif isinstance(byte_range, SuffixByteRequest):
+                data = data[max(0, len(data) - byte_range.suffix) :]
+            elif byte_range is not None:
+                raise TypeError(f"Unexpected byte_range, got {byte_range}.")
+            return prototype.buffer.from_bytes(data)
+
+        def get_sync(self, key, *, prototype=None, byte_range=None):
+            if _is_metadata_key(key):
+                return super().get_sync(key, prototype=prototype, byte_range=byte_range)
+            return self._get_chunk(key, prototype, byte_range)
+
+        async def get(self, key, prototype=None, byte_range=None):
+            if _is_metadata_key(key):
+                return await super().get(key, prototype, byte_range)
+            return self._get_chunk(key, prototype, byte_range)
+
+        async def get_partial_values(self, prototype, key_ranges):
+            return [
+                await self.get(key, prototype, byte_range)
+                for key, byte_range in key_ranges
+            ]
+
+        def set_sync(self, key, value) -> None:
+            if _is_metadata_key(key):
+                return super().set_sync(key, value)
+            self._check_writable()
+            self.pack_files.put(key, value.to_bytes())
+
+        async def set(self, key, value, byte_range=None) -> None:
+            if _is_metadata_key(key):
+                return await super().set(key, value, byte_range)
+            self._check_writable()
+            if byte_range is not None:
+                raise NotImplementedError("Partial writes of chunks")
+            self.pack_files.put(key, value.to_bytes())
+
+        async def set_if_not_exists(self, key, value) -> None:
+            if _is_metadata_key(key):
+                return await super().set_if_not_exists(key, value)
+            if key not in self.pack_files:
+                await self.set(key, value)
+
+        def delete_sync(self, key) -> None:
+            if _is_metadata_key(key):
+                return super().delete_sync(key)
+            self._check_writable()
+            self.pack_files.delete(key)
+
+        async def delete(self, key) -> None:
+            if _is_metadata_key(key):
+                return await super().delete(key)
+            self._check_writable()
+            self.pack_files.delete(key)
+
+        async def exists(self, key) -> bool:
+            if _is_metadata_key(key):
+                return await super().exists(key)
+            return key in self.pack_files
+
+        async def getsize(self, key) -> int:
+            if _is_metadata_key(key):
+                return await super().getsize(key)
+            size = self.pack_files.getsize(key)
+            if size is None:
+                raise FileNotFoundError(key)
+            return size
+
+        async def list(self):
+            async for key in super().list():
+                yield key
+            for key in self.pack_files.keys():
+                yield key
+
+        async def list_prefix(self, prefix):
+            async for key in super().list_prefix(prefix):
+                yield key
+            for key in self.pack_files.keys():
+                if key.startswith(prefix):
+                    yield key
+
+        async def list_dir(self, prefix):
+            names = set()
+            async for name in super().list_dir(prefix):
+                names.add(name)
+            names.update(self.pack_files.list_dir(prefix))
+            for name in sorted(names):
+                yield name
+
+    return PackMemoryStore
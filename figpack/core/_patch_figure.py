@@ -17,6 +17,7 @@ import requests
 from .. import __version__
 from .config import FIGPACK_API_BASE_URL
 from ._figure_utils import get_figure_base_url
+from ._http_session import get_http_session
 
 
 def patch_figure(
@@ -64,7 +65,7 @@ def patch_figure(
     # Check if we can get the manifest (figure exists)
     manifest_url = urljoin(base_url, "manifest.json")
     try:
-        response = requests.get(manifest_url, timeout=10)
+        response = get_http_session().get(manifest_url, timeout=10)
         response.raise_for_status()
         manifest = response.json()
     except requests.exceptions.RequestException as e:
@@ -78,7 +79,7 @@ def patch_figure(
         # Get figpack.json to find the owner
         figpack_json_url = urljoin(base_url, "figpack.json")
         try:
-            response = requests.get(figpack_json_url, timeout=10)
+            response = get_http_session().get(figpack_json_url, timeout=10)
             response.raise_for_status()
             figpack_data = response.json()
             figure_owner = figpack_data.get("ownerEmail", "unknown")
@@ -145,7 +146,7 @@ def patch_figure(
         file_url = urljoin(base_url, file_path)
 
         try:
-            response = requests.get(file_url, timeout=30)
+            response = get_http_session().get(file_url, timeout=30)
             response.raise_for_status()
 
             local_file_path = backup_subdir / file_path
@@ -240,7 +241,7 @@ def patch_figure(
                 payload["adminOverride"] = True
 
             # Get signed URLs
-            response = requests.post(
+            response = get_http_session().post(
                 f"{FIGPACK_API_BASE_URL}/upload",
                 json=payload,
                 headers=headers,
@@ -294,7 +295,7 @@ def patch_figure(
 
                 # Upload file
                 with open(file_path, "rb") as f:
-                    upload_response = requests.put(
+                    upload_response = get_http_session().put(
                         signed_url,
                         data=f,
                         headers={"Content-Type": content_type},
@@ -362,7 +363,7 @@ def patch_figure(
             if admin_override:
                 payload["adminOverride"] = True
 
-            response = requests.post(
+            response = get_http_session().post(
                 f"{FIGPACK_API_BASE_URL}/upload",
                 json=payload,
                 headers=headers,
@@ -381,7 +382,7 @@ def patch_figure(
                 return False
 
             with open(temp_file_path, "rb") as f:
-                upload_response = requests.put(
+                upload_response = get_http_session().put(
                     signed_url,
                     data=f,
                     headers={"Content-Type": "application/json"},
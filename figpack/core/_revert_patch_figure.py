@@ -7,10 +7,9 @@ import os
 import pathlib
 from urllib.parse import urljoin
 
-import requests
-
 from .config import FIGPACK_API_BASE_URL
 from ._figure_utils import get_figure_base_url
+from ._http_session import get_http_session
 
 
 def revert_patch_figure(
@@ -151,7 +150,7 @@ def revert_patch_figure(
                 payload["adminOverride"] = True
 
             # Get signed URLs
-            response = requests.post(
+            response = get_http_session().post(
                 f"{FIGPACK_API_BASE_URL}/upload",
                 json=payload,
                 headers=headers,
@@ -201,7 +200,7 @@ def revert_patch_figure(
 
                 # Upload file
                 with open(file_path, "rb") as f:
-                    upload_response = requests.put(
+                    upload_response = get_http_session().put(
                         signed_url,
                         data=f,
                         headers={"Content-Type": content_type},
@@ -1,21 +1,190 @@
 import atexit
+import email.utils
+import io
 import json
 import os
 import pathlib
 import psutil
+import re
 import shutil
 import socket
 import tempfile
 import threading
 import time
 import uuid
+from concurrent.futures import Future
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple, Union
+
+from ._content_hashes import _compute_file_sha256
+from ._memory_bundle import DEFAULT_MAX_MEMORY_BYTES, InMemoryFigures, MemoryFile
+
+if TYPE_CHECKING:
+    from ._async_server import AsyncHTTPServer
+
+# Ranges of a multi-range request beyond this number are rejected as
+# unsatisfiable rather than producing an excessively fragmented response
+MAX_RANGES_PER_REQUEST = 1000
+
+# Responses that must never be cached (directory listings, errors, uploads)
+NO_STORE_CACHE_CONTROL = "no-cache, no-store, must-revalidate"
+# Files that may change in place: cached, but revalidated on every use
+REVALIDATE_CACHE_CONTROL = "no-cache"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Bundler output with a content hash in its name, e.g. assets/index-BqT3z0_d.js
+_HASHED_ASSET_NAME = re.compile(r"-([A-Za-z0-9_-]{8,})\.[A-Za-z0-9]+$")
+# Pack file of a zarr store written with consolidated chunks
+_PACK_FILE_NAME = re.compile(r"_consolidated_\d+\.dat$")
+
+
+class _FileValidatorCache:
+    """
+    Strong ETags and Last-Modified dates of served files
+
+    The ETag of a file is a content hash, computed once and reused until the
+    size, modification time or inode of the file changes, or it is
+    invalidated explicitly (on PUT). Concurrent requests for a file that is
+    being hashed wait for that computation instead of hashing it again.
+
+    Pack files (_consolidated_N.dat) are written once and can be very large,
+    so their ETag is derived from (size, mtime_ns, inode) instead of their
+    content.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # path -> ((size, mtime_ns, inode), etag)
+        self._etags: Dict[str, Tuple[Tuple[int, int, int], str]] = {}
+        # path -> ((size, mtime_ns, inode), etag being computed)
+        self._pending: Dict[str, Tuple[Tuple[int, int, int], Future]] = {}
+
+    def get(self, path: str) -> Tuple[str, float]:
+        """
+        Returns:
+            tuple: (etag, modification time)
+        """
+        st = os.stat(path)
+        key = (st.st_size, st.st_mtime_ns, st.st_ino)
+        if _PACK_FILE_NAME.search(path):
+            return f'"{st.st_size:x}-{st.st_mtime_ns:x}-{st.st_ino:x}"', st.st_mtime
+        with self._lock:
+            cached = self._etags.get(path)
+            if cached is not None and cached[0] == key:
+                return cached[1], st.st_mtime
+            pending = self._pending.get(path)
+            if pending is not None and pending[0] == key:
+                future = pending[1]
+                is_owner = False
+            else:
+                future = Future()
+                self._pending[path] = (key, future)
+                is_owner = True
+        if not is_owner:
+            return future.result(), st.st_mtime
+        try:
+            etag = f'"{_compute_file_sha256(pathlib.Path(path))[:32]}"'
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                if self._pending.get(path, (None, None))[1] is future:
+                    del self._pending[path]
+        with self._lock:
+            self._etags[path] = (key, etag)
+        future.set_result(etag)
+        return etag, st.st_mtime
+
+    def invalidate(self, path: str) -> None:
+        with self._lock:
+            self._etags.pop(path, None)
+
+
+_file_validators = _FileValidatorCache()
+
+
+def _etag_in_list(etag: str, header: str, weak: bool) -> bool:
+    """
+    Whether an ETag matches a header value such as '"a", W/"b"' or '*'
+    (weak comparison for If-None-Match, strong comparison for If-Range)
+    """
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" and weak:
+            return True
+        if candidate.startswith("W/"):
+            if not weak:
+                continue
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        return int(email.utils.parsedate_to_datetime(value).timestamp())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def _not_modified_since(if_modified_since: Optional[str], mtime: float) -> bool:
+    since = _parse_http_date(if_modified_since)
+    return since is not None and int(mtime) <= since
+
+
+def _is_hashed_asset(relative_path: str) -> bool:
+    match = _HASHED_ASSET_NAME.search(relative_path)
+    if match is None or not relative_path.startswith("assets/"):
+        return False
+    # Require a digit or capital letter to tell hashes from plain words
+    return any(c.isdigit() or c.isupper() for c in match.group(1))
+
+
+def _get_cache_control(path: str, directory: str, sealed_dirs: Set[str]) -> str:
+    """
+    Cache-Control value for a file served from directory (see
+    CORSRequestHandler for the caching policy)
+    """
+    relative_path = pathlib.Path(os.path.relpath(path, directory)).as_posix()
+    if _is_hashed_asset(relative_path):
+        return IMMUTABLE_CACHE_CONTROL
+    parts = relative_path.split("/")
+    if len(parts) > 1 and parts[0] in sealed_dirs:
+        if parts[1] == "assets" or re.search(
+            r"/_consolidated_\d+\.dat$", relative_path
+        ):
+            return IMMUTABLE_CACHE_CONTROL
+    return REVALIDATE_CACHE_CONTROL
 
 
 class CORSRequestHandler(SimpleHTTPRequestHandler):
-    def __init__(self, *args, allow_origin=None, **kwargs):
+    def __init__(
+        self,
+        *args,
+        allow_origin=None,
+        sealed_dirs=None,
+        memory_figures: Optional[InMemoryFigures] = None,
+        **kwargs,
+    ):
+        """
+        Args:
+            allow_origin: CORS origin to allow (None for no CORS)
+            sealed_dirs: Names of the top-level directories whose files are
+                never rewritten in place (shared with the server manager).
+                Their pack files and assets are served as immutable.
+            memory_figures: Figures served from memory (shared with the
+                server manager), or None
+        """
         self.allow_origin = allow_origin
+        self.memory_figures = memory_figures
+        self.sealed_dirs: Set[str] = sealed_dirs if sealed_dirs is not None else set()
+        # Set when serving a file, see _prepare_file_response
+        self._etag: Optional[str] = None
+        self._cache_control = NO_STORE_CACHE_CONTROL
         super().__init__(*args, **kwargs)
 
     def end_headers(self):
@@ -32,14 +201,101 @@ class CORSRequestHandler(SimpleHTTPRequestHandler):
         # Always send Accept-Ranges header to indicate byte-range support
         self.send_header("Accept-Ranges", "bytes")
 
-        # Prevent browser caching - important for when we are editing figures in place
-        # This ensures the browser always fetches the latest version of files
-        self.send_header("Cache-Control", "no-cache, no-store, must-revalidate")
-        self.send_header("Pragma", "no-cache")
-        self.send_header("Expires", "0")
+        self._send_cache_headers()
 
         super().end_headers()
 
+    def _send_cache_headers(self):
+        """
+        Send the validator and caching headers for the current response.
+        Files are cached by the browser but revalidated (or immutable), so
+        figures edited in place still refresh.
+        """
+        if self._etag is not None:
+            self.send_header("ETag", self._etag)
+        self.send_header("Cache-Control", self._cache_control)
+        if self._cache_control == NO_STORE_CACHE_CONTROL:
+            self.send_header("Pragma", "no-cache")
+            self.send_header("Expires", "0")
+
+    def parse_request(self):
+        # Handlers are reused for keep-alive connections
+        self._etag = None
+        self._cache_control = NO_STORE_CACHE_CONTROL
+        return super().parse_request()
+
+    def send_error(self, code, message=None, explain=None):
+        self._etag = None
+        self._cache_control = NO_STORE_CACHE_CONTROL
+        super().send_error(code, message, explain)
+
+    def _get_cache_control(self, path: str) -> str:
+        return _get_cache_control(path, self.directory, self.sealed_dirs)
+
+    def _resolve_file(self, path: str) -> Union[str, MemoryFile, None]:
+        """
+        The file to serve for the request: a file system path, a file of a
+        figure held in memory, or None if the path is not a file
+        """
+        if self.memory_figures is not None:
+            source = self.memory_figures.resolve(self.path)
+            if isinstance(source, MemoryFile):
+                return source
+            if source is not None:
+                return str(source)
+        if os.path.isfile(path):
+            return path
+        return None
+
+    def _prepare_file_response(
+        self, path: str, source: Union[str, MemoryFile]
+    ) -> Tuple[bool, float]:
+        """
+        Compute the validators of a file about to be served and answer
+        conditional requests.
+
+        Args:
+            path: The path the file is served at (below the served directory)
+            source: Where the file is read from (see _resolve_file)
+
+        Returns:
+            tuple: (whether a 304 Not Modified response was sent, modification time)
+        """
+        if isinstance(source, MemoryFile):
+            etag, mtime = source.etag, source.mtime
+        else:
+            etag, mtime = _file_validators.get(source)
+        self._etag = etag
+        self._cache_control = self._get_cache_control(path)
+
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            not_modified = _etag_in_list(etag, if_none_match, weak=True)
+        else:
+            not_modified = _not_modified_since(
+                self.headers.get("If-Modified-Since"), mtime
+            )
+        if not_modified:
+            self.send_response(304, "Not Modified")
+            self.send_header("Last-Modified", self.date_time_string(int(mtime)))
+            self.end_headers()
+        return not_modified, mtime
+
+    def _if_range_matches(self, mtime: float) -> bool:
+        """Whether a Range request should be honored given its If-Range header"""
+        if_range = self.headers.get("If-Range")
+        if if_range is None:
+            return True
+        if if_range.strip().startswith(('"', "W/")):
+            return self._etag is not None and _etag_in_list(
+                self._etag, if_range, weak=False
+            )
+        # An HTTP date, which must match the modification time exactly
+        return _parse_http_date(if_range) == int(mtime)
+
+    def do_HEAD(self):
+        self._send_file(head_only=True)
+
     def do_OPTIONS(self):
         self.send_response(204, "No Content")
         self.end_headers()
@@ -49,102 +305,209 @@ class CORSRequestHandler(SimpleHTTPRequestHandler):
         self.send_error(405, "Method Not Allowed")
 
     def do_GET(self):
-        """Handle GET requests with support for Range requests."""
+        """Handle GET requests with support for (multi-)Range requests."""
+        self._send_file(head_only=False)
+
+    def _send_file(self, head_only: bool):
         # Translate path and check if file exists
         path = self.translate_path(self.path)
+        source = self._resolve_file(path)
+        if path.endswith("/"):
+            # The index.html of a figure served from memory
+            path = os.path.join(path, "index.html")
 
         # Check if path is a file
-        if not os.path.isfile(path):
+        if source is None:
             # Let parent class handle directories and 404s
-            return super().do_GET()
-
-        # Check for Range header
-        range_header = self.headers.get("Range")
+            return super().do_HEAD() if head_only else super().do_GET()
 
-        if range_header is None:
-            # No range request, use parent's implementation
-            return super().do_GET()
-
-        # Parse range header
         try:
-            # Range header format: "bytes=start-end"
-            if not range_header.startswith("bytes="):
-                # Invalid range format, ignore and serve full file
-                return super().do_GET()
-
-            range_spec = range_header[6:]  # Remove "bytes=" prefix
-
-            # Get file size
-            file_size = os.path.getsize(path)
-
-            # Parse range specification
-            if "-" not in range_spec:
-                # Invalid format
-                self.send_error(400, "Invalid Range header")
+            # Answer conditional requests (If-None-Match / If-Modified-Since)
+            not_modified, mtime = self._prepare_file_response(path, source)
+            if not_modified:
                 return
 
-            range_parts = range_spec.split("-", 1)
-
-            # Determine start and end positions
-            if range_parts[0]:  # Start position specified
-                start = int(range_parts[0])
-                if range_parts[1]:  # End position also specified
-                    end = int(range_parts[1])
-                else:  # Open-ended range (e.g., "1024-")
-                    end = file_size - 1
-            else:  # Suffix range (e.g., "-500" means last 500 bytes)
-                if not range_parts[1]:
-                    self.send_error(400, "Invalid Range header")
-                    return
-                suffix_length = int(range_parts[1])
-                start = max(0, file_size - suffix_length)
-                end = file_size - 1
-
-            # Validate range
-            if start < 0 or end >= file_size or start > end:
-                self.send_response(416, "Range Not Satisfiable")
-                self.send_header("Content-Range", f"bytes */{file_size}")
-                self.end_headers()
-                return
+            if isinstance(source, MemoryFile):
+                f = io.BytesIO(source.content)
+            else:
+                f = open(source, "rb")
+        except OSError:
+            self.send_error(404, "File not found")
+            return
 
-            # Calculate content length
-            content_length = end - start + 1
+        # Check for Range header
+        range_header = self.headers.get("Range")
 
-            # Guess content type
-            import mimetypes
+        try:
+            with f:
+                # Get file size
+                file_size = (
+                    source.size
+                    if isinstance(source, MemoryFile)
+                    else os.fstat(f.fileno()).st_size
+                )
 
-            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                # Guess content type
+                content_type = self.guess_type(path)
+
+                if (
+                    head_only
+                    or range_header is None
+                    or not range_header.startswith("bytes=")
+                    or not self._if_range_matches(mtime)
+                ):
+                    # No range request (or a unit we don't support, or the
+                    # file has changed since the client's copy), serve the
+                    # full file
+                    self.send_response(200)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(file_size))
+                    self.send_header("Last-Modified", self.date_time_string(int(mtime)))
+                    self.end_headers()
+                    if not head_only and file_size > 0:
+                        self._send_file_range(f, 0, file_size)
+                    return
 
-            # Send 206 Partial Content response
-            self.send_response(206, "Partial Content")
-            self.send_header("Content-Type", content_type)
-            self.send_header("Content-Length", str(content_length))
-            self.send_header("Content-Range", f"bytes {start}-{end}/{file_size}")
-            self.end_headers()
+                # Parse range specification, e.g. "bytes=0-99,200-299,-500"
+                ranges = _parse_byte_ranges(range_header[6:], file_size)
+                if not ranges:
+                    self.send_response(416, "Range Not Satisfiable")
+                    self.send_header("Content-Range", f"bytes */{file_size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
 
-            # Send the requested byte range
-            with open(path, "rb") as f:
-                f.seek(start)
-                remaining = content_length
-                while remaining > 0:
-                    chunk_size = min(8192, remaining)
-                    chunk = f.read(chunk_size)
-                    if not chunk:
-                        break
-                    self.wfile.write(chunk)
-                    remaining -= len(chunk)
+                if len(ranges) == 1:
+                    start, end = ranges[0]
+                    self.send_response(206, "Partial Content")
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(end - start + 1))
+                    self.send_header(
+                        "Content-Range", f"bytes {start}-{end}/{file_size}"
+                    )
+                    self.send_header("Last-Modified", self.date_time_string(int(mtime)))
+                    self.end_headers()
+                    self._send_file_range(f, start, end - start + 1)
+                else:
+                    self._send_multipart_byteranges(
+                        f, ranges, file_size, mtime, content_type
+                    )
 
         except ValueError:
             # Invalid range values
             self.send_error(400, "Invalid Range header")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away mid-response
+            pass
         except Exception as e:
             # Log error and return 500
             self.send_error(500, f"Internal Server Error: {str(e)}")
 
+    def _send_multipart_byteranges(
+        self,
+        f,
+        ranges: List[Tuple[int, int]],
+        file_size: int,
+        mtime: float,
+        content_type: str,
+    ) -> None:
+        """Send several ranges of a file as a multipart/byteranges response."""
+        boundary = uuid.uuid4().hex
+        part_headers = [
+            (
+                f"--{boundary}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n"
+            ).encode("latin-1")
+            for start, end in ranges
+        ]
+        closing = f"--{boundary}--\r\n".encode("latin-1")
+        content_length = len(closing) + sum(
+            len(header) + (end - start + 1) + 2
+            for header, (start, end) in zip(part_headers, ranges)
+        )
+
+        self.send_response(206, "Partial Content")
+        self.send_header("Content-Type", f"multipart/byteranges; boundary={boundary}")
+        self.send_header("Content-Length", str(content_length))
+        self.send_header("Last-Modified", self.date_time_string(int(mtime)))
+        self.end_headers()
+        for header, (start, end) in zip(part_headers, ranges):
+            self.wfile.write(header)
+            self._send_file_range(f, start, end - start + 1)
+            self.wfile.write(b"\r\n")
+        self.wfile.write(closing)
+
+    def _send_file_range(self, f, offset: int, count: int) -> None:
+        """
+        Send bytes of an open file to the client, zero-copy (os.sendfile)
+        where the platform supports it
+        """
+        # Anything buffered must go out before bytes are sent on the socket
+        self.wfile.flush()
+        self.connection.sendfile(f, offset, count)
+
+    def copyfile(self, source, outputfile):
+        """Send full files (no Range header) with sendfile as well."""
+        if outputfile is self.wfile and hasattr(source, "fileno"):
+            self._send_file_range(source, source.tell(), None)
+        else:
+            super().copyfile(source, outputfile)
+
     def log_message(self, format, *args):
         pass
 
 
+def _parse_byte_ranges(range_spec: str, file_size: int) -> List[Tuple[int, int]]:
+    """
+    Parse the ranges of a "bytes=" Range header (without the prefix)
+
+    Args:
+        range_spec: e.g. "0-99", "100-", "-500" or "0-99,200-299"
+        file_size: Size of the file in bytes
+
+    Returns:
+        Satisfiable (start, end) ranges with inclusive ends, sorted and with
+        overlapping or adjacent ranges merged. Empty if none is satisfiable.
+
+    Raises:
+        ValueError: If the range specification is malformed
+    """
+    ranges: List[Tuple[int, int]] = []
+    specs = [spec.strip() for spec in range_spec.split(",") if spec.strip()]
+    if not specs:
+        raise ValueError("Empty range specification")
+    if len(specs) > MAX_RANGES_PER_REQUEST:
+        return []
+    for spec in specs:
+        if "-" not in spec:
+            raise ValueError(f"Invalid range: {spec}")
+        first, last = spec.split("-", 1)
+        if first:  # Start position specified
+            start = int(first)
+            # Open-ended range (e.g., "1024-")
+            end = int(last) if last else file_size - 1
+        else:  # Suffix range (e.g., "-500" means last 500 bytes)
+            if not last:
+                raise ValueError(f"Invalid range: {spec}")
+            start = max(0, file_size - int(last))
+            end = file_size - 1
+        if start < 0 or start >= file_size or start > end:
+            # Not satisfiable
+            continue
+        # A range extending past the end of the file is truncated
+        ranges.append((start, min(end, file_size - 1)))
+
+    ranges.sort()
+    merged: List[Tuple[int, int]] = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
 def _is_process_alive(pid: int) -> bool:
     """Check if a process with the given PID is still alive."""
     try:
@@ -204,6 +567,98 @@ def _cleanup_orphaned_directories():
                     pass
 
 
+SERVER_BACKENDS = ("threading", "asyncio")
+
+
+def _resolve_server_backend(backend: Optional[str]) -> str:
+    """
+    The server backend to use: the given one, else the FIGPACK_SERVER_BACKEND
+    environment variable, else "threading"
+    """
+    if backend is None:
+        backend = os.environ.get("FIGPACK_SERVER_BACKEND") or "threading"
+    if backend not in SERVER_BACKENDS:
+        raise ValueError(
+            f"Unknown server backend: {backend} (expected one of {SERVER_BACKENDS})"
+        )
+    return backend
+
+
+def create_http_server(
+    server_address: Tuple[str, int],
+    *,
+    directory: str,
+    allow_origin: Optional[str] = None,
+    sealed_dirs: Optional[Set[str]] = None,
+    memory_figures: Optional[InMemoryFigures] = None,
+    enable_file_upload: bool = False,
+    max_file_size: int = 10 * 1024 * 1024,
+    backend: Optional[str] = None,
+):
+    """
+    Create (and bind) a server for a directory
+
+    Both backends have the same CORS, Range, caching and PUT upload semantics
+    and the serve_forever / shutdown / server_close interface.
+
+    Args:
+        server_address: (host, port) to bind to
+        directory: Directory to serve
+        allow_origin: CORS origin to allow (None for no CORS)
+        sealed_dirs: Names of the top-level directories whose pack files and
+            assets are served as immutable
+        memory_figures: Figures served from memory, or None
+        enable_file_upload: Whether to enable PUT requests for file uploads
+        max_file_size: Maximum file size in bytes for uploads
+        backend: "threading" (ThreadingHTTPServer, a thread per connection)
+            or "asyncio" (AsyncHTTPServer, a single event loop with a bounded
+            pool of disk I/O threads). Defaults to the FIGPACK_SERVER_BACKEND
+            environment variable, or "threading".
+    """
+    if _resolve_server_backend(backend) == "asyncio":
+        from ._async_server import AsyncHTTPServer
+
+        return AsyncHTTPServer(
+            server_address,
+            directory=directory,
+            allow_origin=allow_origin,
+            sealed_dirs=sealed_dirs,
+            memory_figures=memory_figures,
+            enable_file_upload=enable_file_upload,
+            max_file_size=max_file_size,
+        )
+
+    # Choose handler based on file upload requirement
+    if enable_file_upload:
+        from ._file_handler import FileUploadCORSRequestHandler
+
+        def handler_factory_enable_upload(*args, **kwargs):
+            return FileUploadCORSRequestHandler(
+                *args,
+                directory=directory,
+                allow_origin=allow_origin,
+                sealed_dirs=sealed_dirs,
+                memory_figures=memory_figures,
+                enable_file_upload=True,
+                max_file_size=max_file_size,
+                **kwargs,
+            )
+
+        return ThreadingHTTPServer(server_address, handler_factory_enable_upload)
+
+    def handler_factory(*args, **kwargs):
+        return CORSRequestHandler(
+            *args,
+            directory=directory,
+            allow_origin=allow_origin,
+            sealed_dirs=sealed_dirs,
+            memory_figures=memory_figures,
+            **kwargs,
+        )
+
+    return ThreadingHTTPServer(server_address, handler_factory)
+
+
 class ProcessServerManager:
     """
     Manages a single server and temporary directory per process.
@@ -214,12 +669,17 @@ class ProcessServerManager:
 
     def __init__(self):
         self._temp_dir: Optional[pathlib.Path] = None
-        self._server: Optional[ThreadingHTTPServer] = None
+        self._server: Optional[Union[ThreadingHTTPServer, "AsyncHTTPServer"]] = None
         self._server_thread: Optional[threading.Thread] = None
         self._port: Optional[int] = None
         self._allow_origin: Optional[str] = None
+        self._backend: Optional[str] = None
         self._monitor_thread: Optional[threading.Thread] = None
         self._stop_monitoring = threading.Event()
+        # Figure directories written once by show() (not edited in place),
+        # whose pack files and assets can be cached as immutable
+        self._sealed_figure_dirs: Set[str] = set()
+        self._memory_figures: Optional[InMemoryFigures] = None
 
         # Register cleanup on process exit
         atexit.register(self._cleanup)
@@ -257,14 +717,39 @@ class ProcessServerManager:
         )
         figure_dir = temp_dir / f"{local_figure_name}"
         figure_dir.mkdir(exist_ok=True)
+        if _local_figure_name is None:
+            self._sealed_figure_dirs.add(figure_dir.name)
         return figure_dir
 
+    def get_memory_figures(self) -> InMemoryFigures:
+        """
+        Get or create the registry of the figures served from memory.
+
+        Figures are spilled to the process temp directory once their total
+        size exceeds FIGPACK_MEMORY_CAP_MB (default 1024).
+        """
+        if self._memory_figures is None:
+            from ._bundle_utils import FIGURE_DIST_DIR
+
+            max_memory_bytes = DEFAULT_MAX_MEMORY_BYTES
+            if os.environ.get("FIGPACK_MEMORY_CAP_MB"):
+                max_memory_bytes = int(
+                    float(os.environ["FIGPACK_MEMORY_CAP_MB"]) * 1024 * 1024
+                )
+            self._memory_figures = InMemoryFigures(
+                self.get_temp_dir(),
+                FIGURE_DIST_DIR,
+                max_memory_bytes=max_memory_bytes,
+            )
+        return self._memory_figures
+
     def start_server(
         self,
         port: Optional[int] = None,
         allow_origin: Optional[str] = None,
         enable_file_upload: bool = False,
         max_file_size: int = 10 * 1024 * 1024,
+        backend: Optional[str] = None,
     ) -> tuple[str, int]:
         """
         Start the server if not already running, or return existing server info.
@@ -274,16 +759,22 @@ class ProcessServerManager:
             allow_origin: CORS origin to allow (None for no CORS)
             enable_file_upload: Whether to enable PUT requests for file uploads
             max_file_size: Maximum file size in bytes for uploads (default 10MB)
+            backend: Server backend, "threading" or "asyncio" (see
+                create_http_server). Defaults to the FIGPACK_SERVER_BACKEND
+                environment variable, or "threading".
 
         Returns:
             tuple: (base_url, port)
         """
+        backend = _resolve_server_backend(backend)
+
         # If server is already running with compatible settings, return existing info
         if (
             self._server is not None
             and self._server_thread is not None
             and self._server_thread.is_alive()
             and (allow_origin is None or self._allow_origin == allow_origin)
+            and self._backend == backend
         ):
             assert self._port is not None
             return f"http://localhost:{self._port}", self._port
@@ -302,36 +793,20 @@ class ProcessServerManager:
 
         temp_dir = self.get_temp_dir()
 
-        # Choose handler based on file upload requirement
-        if enable_file_upload:
-            from ._file_handler import FileUploadCORSRequestHandler
-
-            def handler_factory_enable_upload(*args, **kwargs):
-                return FileUploadCORSRequestHandler(
-                    *args,
-                    directory=str(temp_dir),
-                    allow_origin=allow_origin,
-                    enable_file_upload=True,
-                    max_file_size=max_file_size,
-                    **kwargs,
-                )
-
-            assert port is not None
-            self._server = ThreadingHTTPServer(
-                ("0.0.0.0", port), handler_factory_enable_upload
-            )
-
-        else:
-
-            def handler_factory(*args, **kwargs):
-                return CORSRequestHandler(
-                    *args, directory=str(temp_dir), allow_origin=allow_origin, **kwargs
-                )
-
-            assert port is not None
-            self._server = ThreadingHTTPServer(("0.0.0.0", port), handler_factory)
+        assert port is not None
+        self._server = create_http_server(
+            ("0.0.0.0", port),
+            directory=str(temp_dir),
+            allow_origin=allow_origin,
+            sealed_dirs=self._sealed_figure_dirs,
+            memory_figures=self.get_memory_figures(),
+            enable_file_upload=enable_file_upload,
+            max_file_size=max_file_size,
+            backend=backend,
+        )
         self._port = port
         self._allow_origin = allow_origin
+        self._backend = backend
 
         # Start server in daemon thread
         self._server_thread = threading.Thread(
@@ -358,6 +833,7 @@ class ProcessServerManager:
             self._server_thread = None
             self._port = None
             self._allow_origin = None
+            self._backend = None
 
     def _create_process_info_file(self):
         """Create the process info file in the temporary directory."""
@@ -435,6 +911,11 @@ class ProcessServerManager:
         # Stop server
         self._stop_server()
 
+        # Drop the figures held in memory
+        if self._memory_figures is not None:
+            self._memory_figures.clear()
+            self._memory_figures = None
+
         # Remove temporary directory
         if self._temp_dir is not None and self._temp_dir.exists():
             try:
@@ -4,8 +4,9 @@ import tempfile
 import webbrowser
 from typing import Union
 
-from ._bundle_utils import prepare_figure_bundle
+from ._bundle_utils import prepare_figure_bundle, prepare_figure_bundle_in_memory
 from ._server_manager import ProcessServerManager
+from ._subview_cache import get_subview_cache
 from ._upload_bundle import _upload_bundle
 from .figpack_view import FigpackView
 
@@ -100,8 +101,14 @@ def _show_view(
     if upload:
         # Upload behavior: create temporary directory for this upload only
         with tempfile.TemporaryDirectory(prefix="figpack_upload_") as tmpdir:
-            prepare_figure_bundle(
-                view, tmpdir, title=title, description=description, script=script
+            content_hashes = prepare_figure_bundle(
+                view,
+                tmpdir,
+                title=title,
+                description=description,
+                script=script,
+                compute_content_hashes=True,
+                subview_cache=get_subview_cache(),
             )
 
             # Check for API key - required for regular uploads, optional for ephemeral
@@ -118,6 +125,7 @@ def _show_view(
                 title=title,
                 ephemeral=ephemeral,
                 use_consolidated_metadata_only=True,
+                content_hashes=content_hashes,
             )
 
             if inline:
@@ -144,10 +152,27 @@ def _show_view(
             _local_figure_name=_local_figure_name
         )
 
-        # Prepare the figure bundle in the subdirectory
-        prepare_figure_bundle(
-            view, str(figure_dir), title=title, description=description, script=script
-        )
+        if _local_figure_name is None and os.environ.get("FIGPACK_IN_MEMORY") != "0":
+            # Serve the figure data straight from memory (spilled to the
+            # subdirectory if the memory cap is exceeded)
+            files = prepare_figure_bundle_in_memory(
+                view,
+                title=title,
+                description=description,
+                script=script,
+                subview_cache=get_subview_cache(),
+            )
+            server_manager.get_memory_figures().add(figure_dir.name, files)
+        else:
+            # Prepare the figure bundle in the subdirectory
+            prepare_figure_bundle(
+                view,
+                str(figure_dir),
+                title=title,
+                description=description,
+                script=script,
+                subview_cache=get_subview_cache(),
+            )
 
         # Start or get existing server
         base_url, server_port = server_manager.start_server(
@@ -0,0 +1,318 @@
+"""
+Reuse of the zarr data of unchanged subviews when a figure is shown again
+
+Calling show() again after tweaking one panel of a large layout used to
+re-serialize the whole view tree, recomputing every pyramid and compressing
+every chunk. Layout views write their children with Group.write_view. When a
+subview cache is in use, write_view fingerprints the child view (its class and
+the content of its attributes, including the bytes of its arrays) and, if the
+same fingerprint was written before in this process, copies the stored keys
+(metadata and compressed chunks) of that subtree into the new figure instead
+of calling write_to_zarr_group.
+
+The cache holds the raw store values of every subtree written through
+write_view, sharing the values of nested subtrees, within a size cap
+(FIGPACK_SUBVIEW_CACHE_MB, default 1024, 0 disables the cache). The least
+recently used subtrees are evicted first.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .zarr import _check_zarr_version
+
+if TYPE_CHECKING:
+    from .figpack_view import FigpackView
+    from .zarr import Group
+
+# Default cap on the size of the cached subview data, see
+# FIGPACK_SUBVIEW_CACHE_MB
+DEFAULT_MAX_CACHE_BYTES = 1024 * 1024 * 1024
+
+
+class SubviewCache:
+    """
+    Per-process cache of the store keys written for subviews, keyed by the
+    fingerprint of the subview
+
+    Thread-safe. Entries map the store keys of a subtree, relative to the
+    subview's group, to their values. Values shared by several entries (the
+    data of a subview is also part of the entries of its ancestors) are
+    counted once against the cap.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # fingerprint -> {relative key: value}, least recently used first
+        self._entries: "OrderedDict[str, Dict[str, bytes]]" = OrderedDict()
+        # id(value) -> [value, number of entries holding it]
+        self._values: Dict[int, list] = {}
+        self._nbytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the distinct values held by the cache"""
+        with self._lock:
+            return self._nbytes
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, bytes]]:
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is not None:
+                self._entries.move_to_end(fingerprint)
+            return entry
+
+    def put(self, fingerprint: str, entry: Dict[str, bytes]) -> None:
+        """
+        Add the store keys of a subtree, evicting the least recently used
+        entries while the cap is exceeded. Subtrees larger than the cap are
+        not cached.
+        """
+        distinct = {id(value): value for value in entry.values()}
+        if sum(len(value) for value in distinct.values()) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(fingerprint)
+            self._entries[fingerprint] = entry
+            for value in distinct.values():
+                ref = self._values.get(id(value))
+                if ref is None:
+                    self._values[id(value)] = [value, 1]
+                    self._nbytes += len(value)
+                else:
+                    ref[1] += 1
+            while self._nbytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._values.clear()
+            self._nbytes = 0
+
+    def session(self) -> "SubviewCacheSession":
+        """State for writing one figure (see Group.write_view)"""
+        return SubviewCacheSession(self)
+
+    def _remove(self, fingerprint: str) -> None:
+        entry = self._entries.pop(fingerprint, None)
+        if entry is None:
+            return
+        for value_id in {id(value) for value in entry.values()}:
+            ref = self._values[value_id]
+            ref[1] -= 1
+            if ref[1] == 0:
+                del self._values[value_id]
+                self._nbytes -= len(ref[0])
+
+
+class SubviewCacheSession:
+    """
+    Subview cache lookups and captures while writing one figure
+
+    Subviews that are not found in the cache are written as usual and their
+    keys are read back into the cache by collect(), once all chunks have
+    been written.
+    """
+
+    def __init__(self, cache: SubviewCache):
+        self.cache = cache
+        self.num_reused = 0
+        self.num_written = 0
+        # id(view) -> (view, fingerprint); the view is kept so its id is not
+        # reused while the session is alive
+        self._fingerprints: Dict[int, Tuple[Any, Optional[str]]] = {}
+        self._in_progress: set = set()
+        # (fingerprint, store, group path) of the subviews written
+        self._pending: List[Tuple[str, Any, str]] = []
+
+    def write_view(self, view: "FigpackView", group: "Group") -> None:
+        fingerprint = self.fingerprint(view)
+        zarr_group = group._zarr_group
+        if fingerprint is not None:
+            entry = self.cache.get(fingerprint)
+            if entry is not None:
+                _store_set_items(zarr_group.store, _key_prefix(zarr_group.path), entry)
+                self.num_reused += 1
+                return
+        view.write_to_zarr_group(group)
+        self.num_written += 1
+        if fingerprint is not None:
+            self._pending.append((fingerprint, zarr_group.store, zarr_group.path))
+
+    def collect(self) -> None:
+        """
+        Read the keys of the subviews written in this session into the
+        cache. Must be called after all chunks have been written.
+        """
+        pending = self._pending
+        self._pending = []
+        values: Dict[str, bytes] = {}
+        keys_by_store: Dict[int, List[str]] = {}
+        for fingerprint, store, path in pending:
+            if id(store) not in keys_by_store:
+                keys_by_store[id(store)] = _store_list(store)
+            prefix = _key_prefix(path)
+            entry = {}
+            for key in keys_by_store[id(store)]:
+                if not key.startswith(prefix):
+                    continue
+                # Nested subtrees share the values read from the store
+                if key not in values:
+                    values[key] = _store_get(store, key)
+                entry[key[len(prefix) :]] = values[key]
+            self.cache.put(fingerprint, entry)
+
+    def fingerprint(self, view: "FigpackView") -> Optional[str]:
+        """
+        Fingerprint of a view and everything it holds, or None if it holds
+        something that cannot be fingerprinted (the view is then always
+        rewritten)
+        """
+        memo = self._fingerprints.get(id(view))
+        if memo is not None:
+            return memo[1]
+        if id(view) in self._in_progress:
+            return None
+        self._in_progress.add(id(view))
+        try:
+            inputs = view._get_fingerprint_inputs()
+            h = hashlib.sha256()
+            cls = type(view)
+            h.update(f"{_versions()}|{cls.__module__}.{cls.__qualname__}".encode())
+            fingerprint = (
+                h.hexdigest()[:32]
+                if inputs is not None and self._update(h, inputs)
+                else None
+            )
+        finally:
+            self._in_progress.discard(id(view))
+        self._fingerprints[id(view)] = (view, fingerprint)
+        return fingerprint
+
+    def _update(self, h, value: Any) -> bool:
+        from .figpack_extension import FigpackExtension
+        from .figpack_view import FigpackView
+
+        if value is None or isinstance(value, (bool, int, float, complex, str)):
+            h.update(f"{type(value).__name__}:{value!r};".encode())
+        elif isinstance(value, bytes):
+            h.update(f"bytes:{len(value)};".encode())
+            h.update(value)
+        elif isinstance(value, np.ndarray):
+            h.update(f"ndarray:{value.dtype.str}:{value.shape};".encode())
+            if value.dtype.hasobject:
+                return self._update(h, value.tolist())
+            h.update(memoryview(np.ascontiguousarray(value)).cast("B"))
+        elif isinstance(value, np.generic):
+            h.update(f"{value.dtype.str}:".encode())
+            h.update(value.tobytes())
+        elif isinstance(value, (list, tuple)):
+            h.update(f"{type(value).__name__}:{len(value)};".encode())
+            return all(self._update(h, item) for item in value)
+        elif isinstance(value, dict):
+            h.update(f"dict:{len(value)};".encode())
+            return all(
+                self._update(h, k) and self._update(h, v) for k, v in value.items()
+            )
+        elif isinstance(value, FigpackView):
+            child_fingerprint = self.fingerprint(value)
+            if child_fingerprint is None:
+                return False
+            h.update(f"view:{child_fingerprint};".encode())
+        elif isinstance(value, FigpackExtension) or (
+            type(value).__module__.startswith("figpack.") and hasattr(value, "__dict__")
+        ):
+            # Helper objects of the figpack views (layout items, series, ...)
+            cls = type(value)
+            h.update(f"{cls.__module__}.{cls.__qualname__}:".encode())
+            return self._update(h, vars(value))
+        else:
+            return False
+        return True
+
+
+_subview_cache: Optional[SubviewCache] = None
+_subview_cache_lock = threading.Lock()
+
+
+def get_subview_cache() -> Optional[SubviewCache]:
+    """
+    Get or create the process subview cache, or None if it is disabled
+    (FIGPACK_SUBVIEW_CACHE_MB=0)
+    """
+    global _subview_cache
+    max_bytes = DEFAULT_MAX_CACHE_BYTES
+    if os.environ.get("FIGPACK_SUBVIEW_CACHE_MB"):
+        max_bytes = int(float(os.environ["FIGPACK_SUBVIEW_CACHE_MB"]) * 1024 * 1024)
+    if max_bytes <= 0:
+        return None
+    with _subview_cache_lock:
+        if _subview_cache is None:
+            _subview_cache = SubviewCache(max_bytes)
+        _subview_cache.max_bytes = max_bytes
+        return _subview_cache
+
+
+def _versions() -> str:
+    import zarr
+
+    from .. import __version__
+
+    return f"figpack {__version__}, zarr {zarr.__version__}"
+
+
+def _key_prefix(path: str) -> str:
+    path = path.strip("/")
+    return f"{path}/" if path else ""
+
+
+def _store_list(store) -> List[str]:
+    if _check_zarr_version() == 2:
+        return list(store.keys())
+    elif _check_zarr_version() == 3:
+        from zarr.core.sync import sync
+
+        async def _list():
+            return [key async for key in store.list()]
+
+        return sync(_list())
+    else:
+        raise RuntimeError("Unsupported Zarr version")
+
+
+def _store_get(store, key: str) -> bytes:
+    if _check_zarr_version() == 2:
+        return bytes(store[key])
+    elif _check_zarr_version() == 3:
+        from zarr.core.buffer import default_buffer_prototype
+        from zarr.core.sync import sync
+
+        return sync(store.get(key, prototype=default_buffer_prototype())).to_bytes()
+    else:
+        raise RuntimeError("Unsupported Zarr version")
+
+
+def _store_set_items(store, prefix: str, items: Dict[str, bytes]) -> None:
+    if _check_zarr_version() == 2:
+        for key, value in items.items():
+            store[prefix + key] = value
+    elif _check_zarr_version() == 3:
+        from zarr.core.buffer import default_buffer_prototype
+        from zarr.core.sync import sync
+
+        buffer = default_buffer_prototype().buffer
+        for key, value in items.items():
+            sync(store.set(prefix + key, buffer.from_bytes(value)))
+    else:
+        raise RuntimeError("Unsupported Zarr version")
@@ -1,21 +1,44 @@
-from typing import Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+import base64
 import hashlib
+import io
 import json
 import pathlib
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-import requests
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 
 from .. import __version__
 
+from ._content_hashes import compute_bundle_content_hashes
+from ._http_session import (
+    HTTP_POOL_SIZE,
+    get_connection_stats,
+    get_http_session,
+    get_s3_client,
+    transfer_slot,
+)
+from ._upload_journal import PendingFigures, UploadJournal, get_bundle_key
 from .config import FIGPACK_API_BASE_URL, FIGPACK_BUCKET
 
 thisdir = pathlib.Path(__file__).parent.resolve()
 
 
-MAX_WORKERS_FOR_UPLOAD = 16
+MAX_WORKERS_FOR_UPLOAD = HTTP_POOL_SIZE
+UPLOAD_BATCH_SIZE = 20
+# Number of batches whose signed URLs are requested ahead of the uploads
+UPLOAD_PREFETCH_BATCHES = 2
+
+# Files at least this large are uploaded in parts (multipart upload)
+MULTIPART_THRESHOLD = 32 * 1024 * 1024
+MULTIPART_PART_SIZE = 8 * 1024 * 1024
+MULTIPART_MAX_PARTS = 10_000
+# Size of the thread pool shared by the part uploads of all files
+MAX_PARTS_IN_PARALLEL = HTTP_POOL_SIZE
+
+_part_executor_lock = threading.Lock()
+_part_executor: Optional[ThreadPoolExecutor] = None
 
 
 def _get_upload_info(figure_url: str, files_batch: list, api_key: str) -> dict:
@@ -43,7 +66,7 @@ def _get_upload_info(figure_url: str, files_batch: list, api_key: str) -> dict:
         "x-api-key": api_key if api_key else "",
     }
 
-    response = requests.post(
+    response = get_http_session().post(
         f"{FIGPACK_API_BASE_URL}/upload", json=payload, headers=headers
     )
 
@@ -73,6 +96,60 @@ def _get_upload_mode(figure_url: str, files_batch: list, api_key: str) -> dict:
     return _get_upload_info(figure_url, files_batch, api_key)
 
 
+def _get_existing_blobs(
+    figure_url: str, files: list, content_hashes: Dict[str, str], api_key: str
+) -> Set[str]:
+    """
+    Send the content hash manifest of a batch of files to the API.
+
+    The server links every file whose content it already holds (from any
+    figure) into this figure, so those files do not need to be uploaded.
+
+    Returns:
+        Set of relative paths that the server now references and that should
+        not be uploaded
+    """
+    files_data = []
+    for relative_path, file_path in files:
+        files_data.append(
+            {
+                "relativePath": relative_path,
+                "size": file_path.stat().st_size,
+                "sha256": content_hashes[relative_path],
+            }
+        )
+
+    payload = {
+        "figureUrl": figure_url,
+        "files": files_data,
+    }
+
+    headers = {
+        "Content-Type": "application/json",
+        "x-api-key": api_key if api_key else "",
+    }
+
+    response = get_http_session().post(
+        f"{FIGPACK_API_BASE_URL}/upload/blobs", json=payload, headers=headers
+    )
+
+    if not response.ok:
+        try:
+            error_data = response.json()
+            error_msg = error_data.get("message", "Unknown error")
+        except Exception:
+            error_msg = f"HTTP {response.status_code}"
+        raise Exception(f"Failed to check existing content: {error_msg}")
+
+    response_data = response.json()
+    if not response_data.get("success"):
+        raise Exception(
+            f"Failed to check existing content: {response_data.get('message', 'Unknown error')}"
+        )
+
+    return set(response_data.get("existingFiles", []))
+
+
 def _upload_batch_client_signed(
     response_data: dict, files_batch: list, max_workers: int = MAX_WORKERS_FOR_UPLOAD
 ) -> int:
@@ -87,14 +164,6 @@ def _upload_batch_client_signed(
     Returns:
         int: Number of files uploaded
     """
-    try:
-        import boto3
-    except ImportError:
-        raise ImportError(
-            "boto3 is required for uploading to buckets with client-managed credentials. "
-            "Install it with: pip install boto3"
-        )
-
     bucket_info = response_data.get("bucket", {})
     native_bucket_name = bucket_info["nativeBucketName"]
     region = bucket_info.get("region", "us-east-1")
@@ -106,27 +175,20 @@ def _upload_batch_client_signed(
     # Build key lookup from API response
     key_map = {f["relativePath"]: f["key"] for f in files_info}
 
-    s3_client = boto3.client("s3", region_name=region)
-
-    def _upload_one(rel_path: str, file_path: pathlib.Path) -> str:
-        key = key_map.get(rel_path)
-        if not key:
-            raise Exception(f"No S3 key returned for {rel_path}")
-        content_type = _determine_content_type(rel_path)
-        with open(file_path, "rb") as f:
-            s3_client.put_object(
-                Bucket=native_bucket_name,
-                Key=key,
-                Body=f,
-                ContentType=content_type,
-            )
-        return rel_path
+    s3_client = get_s3_client(region)
 
     uploaded = 0
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         future_to_file = {}
         for rel_path, file_path in files_batch:
-            future = executor.submit(_upload_one, rel_path, file_path)
+            future = executor.submit(
+                _upload_single_file_client_signed,
+                s3_client,
+                native_bucket_name,
+                key_map.get(rel_path),
+                rel_path,
+                file_path,
+            )
             future_to_file[future] = rel_path
 
         for future in as_completed(future_to_file):
@@ -136,6 +198,39 @@ def _upload_batch_client_signed(
     return uploaded
 
 
+def _upload_single_file_client_signed(
+    s3_client: Any,
+    native_bucket_name: str,
+    key: Optional[str],
+    relative_path: str,
+    file_path: pathlib.Path,
+) -> str:
+    """
+    Upload a single file directly using boto3 (client-signed mode)
+
+    Args:
+        s3_client: The boto3 S3 client
+        native_bucket_name: Name of the bucket
+        key: The S3 key returned by the API for this file
+        relative_path: The relative path of the file
+        file_path: The path to the file to upload
+
+    Returns:
+        str: The relative path of the uploaded file
+    """
+    if not key:
+        raise Exception(f"No S3 key returned for {relative_path}")
+    content_type = _determine_content_type(relative_path)
+    with open(file_path, "rb") as f, transfer_slot():
+        s3_client.put_object(
+            Bucket=native_bucket_name,
+            Key=key,
+            Body=f,
+            ContentType=content_type,
+        )
+    return relative_path
+
+
 def _upload_single_file_with_signed_url(
     relative_path: str, file_path: pathlib.Path, signed_url: str, num_retries: int = 4
 ) -> str:
@@ -160,8 +255,8 @@ def _upload_single_file_with_signed_url(
 
     while retries_remaining >= 0:
         try:
-            with open(file_path, "rb") as f:
-                upload_response = requests.put(
+            with open(file_path, "rb") as f, transfer_slot():
+                upload_response = get_http_session().put(
                     signed_url, data=f, headers={"Content-Type": content_type}
                 )
 
@@ -188,12 +283,325 @@ def _upload_single_file_with_signed_url(
     raise last_exception
 
 
+def _post_to_api(endpoint: str, payload: dict, api_key: str, action: str) -> dict:
+    """
+    POST a JSON payload to an API endpoint and return the response data
+
+    Raises:
+        Exception: If the request fails or the API reports an error
+    """
+    headers = {
+        "Content-Type": "application/json",
+        "x-api-key": api_key if api_key else "",
+    }
+
+    response = get_http_session().post(
+        f"{FIGPACK_API_BASE_URL}{endpoint}", json=payload, headers=headers
+    )
+
+    if not response.ok:
+        try:
+            error_data = response.json()
+            error_msg = error_data.get("message", "Unknown error")
+        except Exception:
+            error_msg = f"HTTP {response.status_code}"
+        raise Exception(f"Failed to {action}: {error_msg}")
+
+    response_data = response.json()
+    if not response_data.get("success"):
+        raise Exception(
+            f"Failed to {action}: {response_data.get('message', 'Unknown error')}"
+        )
+
+    return response_data
+
+
+def _get_multipart_parts(file_size: int) -> List[Tuple[int, int, int]]:
+    """
+    Split a file into parts for a multipart upload
+
+    Returns:
+        List of (part_number, offset, length), with part numbers starting at 1
+    """
+    part_size = max(MULTIPART_PART_SIZE, -(-file_size // MULTIPART_MAX_PARTS))
+    return [
+        (i // part_size + 1, i, min(part_size, file_size - i))
+        for i in range(0, file_size, part_size)
+    ]
+
+
+class _FilePart(io.RawIOBase):
+    """
+    Readable, seekable view of a byte range of a file
+
+    Used as the body of a part upload, so that the part is streamed from
+    disk instead of being held in memory. It has a length but no fileno, so
+    that HTTP clients send exactly the range.
+    """
+
+    def __init__(self, file_path: pathlib.Path, offset: int, length: int):
+        super().__init__()
+        self._file = open(file_path, "rb")
+        self._offset = offset
+        self._length = length
+        self._position = 0
+        self._file.seek(offset)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._length
+        self._position = min(max(offset, 0), self._length)
+        self._file.seek(self._offset + self._position)
+        return self._position
+
+    def readinto(self, buffer: Any) -> int:
+        n = min(len(buffer), self._length - self._position)
+        if n <= 0:
+            return 0
+        n = self._file.readinto(memoryview(buffer)[:n])
+        self._position += n
+        return n
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+def _compute_range_md5(file_path: pathlib.Path, offset: int, length: int) -> str:
+    """
+    Base64 MD5 digest (as sent in Content-MD5) of a byte range of a file,
+    reading it in 1 MB blocks
+    """
+    hasher = hashlib.md5()
+    with _FilePart(file_path, offset, length) as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(block)
+    return base64.b64encode(hasher.digest()).decode("ascii")
+
+
+def _get_part_executor() -> ThreadPoolExecutor:
+    """
+    Get the thread pool that uploads the parts of all multipart uploads
+    (created on first use)
+
+    A single pool, rather than one per file, bounds the number of parts in
+    flight (and so the memory and connections they use) however many large
+    files are uploaded at once.
+    """
+    global _part_executor
+    with _part_executor_lock:
+        if _part_executor is None:
+            _part_executor = ThreadPoolExecutor(
+                max_workers=MAX_PARTS_IN_PARALLEL,
+                thread_name_prefix="figpack_upload_part",
+            )
+        return _part_executor
+
+
+def _upload_parts_in_parallel(
+    relative_path: str,
+    file_path: pathlib.Path,
+    upload_part: Callable[[int, Any, str], str],
+    num_retries: int = 4,
+) -> List[dict]:
+    """
+    Upload the parts of a file in parallel, retrying each part independently
+
+    The parts run on the shared part executor (see _get_part_executor). Each
+    part is streamed from the file and sent with its base64 MD5 digest
+    (Content-MD5) so that the storage rejects corrupted parts, which are then
+    retried.
+
+    Args:
+        relative_path: The relative path of the file
+        file_path: The path to the file to upload
+        upload_part: Function (part_number, body, content_md5) -> ETag that
+            uploads a single part, where body is a file-like object
+        num_retries: Number of retries per part with exponential backoff
+
+    Returns:
+        List of {"partNumber", "etag"} sorted by part number
+    """
+
+    def _upload_one_part(part: Tuple[int, int, int]) -> dict:
+        part_number, offset, length = part
+        content_md5 = _compute_range_md5(file_path, offset, length)
+
+        for attempt in range(num_retries + 1):
+            try:
+                with _FilePart(file_path, offset, length) as body, transfer_slot():
+                    etag = upload_part(part_number, body, content_md5)
+                return {"partNumber": part_number, "etag": etag}
+            except Exception as e:
+                if attempt == num_retries:
+                    raise
+                backoff_seconds = 2**attempt
+                print(
+                    f"Upload of part {part_number} of {relative_path} failed ({e}), retrying in {backoff_seconds} seconds..."
+                )
+                time.sleep(backoff_seconds)
+        raise AssertionError("unreachable")
+
+    parts = _get_multipart_parts(file_path.stat().st_size)
+    executor = _get_part_executor()
+    futures = [executor.submit(_upload_one_part, part) for part in parts]
+    try:
+        return [future.result() for future in futures]
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+
+
+def _upload_file_multipart_server_signed(
+    figure_url: str, relative_path: str, file_path: pathlib.Path, api_key: str
+) -> str:
+    """
+    Upload a large file in parts using server-signed part URLs
+
+    Returns:
+        str: The relative path of the uploaded file
+    """
+    file_size = file_path.stat().st_size
+    parts = _get_multipart_parts(file_size)
+    start_data = _post_to_api(
+        "/upload/multipart/start",
+        {
+            "figureUrl": figure_url,
+            "relativePath": relative_path,
+            "size": file_size,
+            "partSize": parts[0][2],
+            "numParts": len(parts),
+            "contentType": _determine_content_type(relative_path),
+        },
+        api_key,
+        f"start multipart upload of {relative_path}",
+    )
+    upload_id = start_data["uploadId"]
+    part_urls = {item["partNumber"]: item["signedUrl"] for item in start_data["parts"]}
+
+    def _upload_part(part_number: int, body: Any, content_md5: str) -> str:
+        response = get_http_session().put(
+            part_urls[part_number], data=body, headers={"Content-MD5": content_md5}
+        )
+        if not 200 <= response.status_code < 300:
+            raise Exception(f"HTTP {response.status_code} - {response.text[:500]}")
+        return response.headers.get("ETag", "")
+
+    try:
+        completed_parts = _upload_parts_in_parallel(
+            relative_path, file_path, _upload_part
+        )
+    except BaseException:
+        try:
+            _post_to_api(
+                "/upload/multipart/abort",
+                {
+                    "figureUrl": figure_url,
+                    "relativePath": relative_path,
+                    "uploadId": upload_id,
+                },
+                api_key,
+                f"abort multipart upload of {relative_path}",
+            )
+        except Exception as e:
+            print(f"Warning: {e}")
+        raise
+
+    _post_to_api(
+        "/upload/multipart/complete",
+        {
+            "figureUrl": figure_url,
+            "relativePath": relative_path,
+            "uploadId": upload_id,
+            "parts": completed_parts,
+        },
+        api_key,
+        f"complete multipart upload of {relative_path}",
+    )
+    return relative_path
+
+
+def _upload_file_multipart_client_signed(
+    s3_client: Any,
+    native_bucket_name: str,
+    key: Optional[str],
+    relative_path: str,
+    file_path: pathlib.Path,
+) -> str:
+    """
+    Upload a large file in parts directly using boto3 (client-signed mode)
+
+    Returns:
+        str: The relative path of the uploaded file
+    """
+    if not key:
+        raise Exception(f"No S3 key returned for {relative_path}")
+    response = s3_client.create_multipart_upload(
+        Bucket=native_bucket_name,
+        Key=key,
+        ContentType=_determine_content_type(relative_path),
+    )
+    upload_id = response["UploadId"]
+
+    def _upload_part(part_number: int, body: Any, content_md5: str) -> str:
+        part_response = s3_client.upload_part(
+            Bucket=native_bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=body,
+            ContentMD5=content_md5,
+        )
+        return part_response["ETag"]
+
+    try:
+        completed_parts = _upload_parts_in_parallel(
+            relative_path, file_path, _upload_part
+        )
+        s3_client.complete_multipart_upload(
+            Bucket=native_bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": part["partNumber"], "ETag": part["etag"]}
+                    for part in completed_parts
+                ]
+            },
+        )
+    except BaseException:
+        try:
+            s3_client.abort_multipart_upload(
+                Bucket=native_bucket_name, Key=key, UploadId=upload_id
+            )
+        except Exception as e:
+            print(f"Warning: could not abort multipart upload of {relative_path}: {e}")
+        raise
+    return relative_path
+
+
 def _create_or_get_figure(
     api_key: Optional[str],
     total_files: Optional[int] = None,
     total_size: Optional[int] = None,
     title: Optional[str] = None,
     ephemeral: bool = False,
+    resume_figure_url: Optional[str] = None,
 ) -> dict:
     """
     Create a new figure or get existing figure information
@@ -204,6 +612,9 @@ def _create_or_get_figure(
         total_size: Optional total size of files
         title: Optional title for the figure
         ephemeral: Whether to create an ephemeral figure
+        resume_figure_url: URL of a figure created by an interrupted upload of
+            the same bundle. The API returns that figure instead of creating a
+            new one if it is still pending (or already completed).
 
     Returns:
         dict: Figure information from the API
@@ -229,6 +640,8 @@ def _create_or_get_figure(
         payload["title"] = title
     if ephemeral:
         payload["ephemeral"] = True
+    if resume_figure_url is not None:
+        payload["resumeFigureUrl"] = resume_figure_url
 
     # Use the same endpoint for both regular and ephemeral figures
     url = f"{FIGPACK_API_BASE_URL}/figures/create"
@@ -236,7 +649,7 @@ def _create_or_get_figure(
         "Content-Type": "application/json",
         "x-api-key": api_key if api_key else "",
     }
-    response = requests.post(url, json=payload, headers=headers)
+    response = get_http_session().post(url, json=payload, headers=headers)
 
     if not response.ok:
         try:
@@ -274,7 +687,7 @@ def _finalize_figure(figure_url: str, api_key: str) -> dict:
         "x-api-key": api_key if api_key else "",
     }
 
-    response = requests.post(
+    response = get_http_session().post(
         f"{FIGPACK_API_BASE_URL}/figures/finalize", json=payload, headers=headers
     )
 
@@ -307,14 +720,6 @@ def _upload_figpack_json_client_side(
     """
     Upload figpack.json to S3 using boto3 (for client-managed credential buckets).
     """
-    try:
-        import boto3
-    except ImportError:
-        raise ImportError(
-            "boto3 is required for uploading to buckets with client-managed credentials. "
-            "Install it with: pip install boto3"
-        )
-
     native_bucket_name = bucket_info["nativeBucketName"]
     region = bucket_info.get("region", "us-east-1")
     bucket_base_url = bucket_info["bucketBaseUrl"]
@@ -330,7 +735,7 @@ def _upload_figpack_json_client_side(
         )
     key = figure_url_clean[len(prefix) :] + "/figpack.json"
 
-    s3_client = boto3.client("s3", region_name=region)
+    s3_client = get_s3_client(region)
     s3_client.put_object(
         Bucket=native_bucket_name,
         Key=key,
@@ -345,6 +750,7 @@ def _upload_bundle(
     title: Optional[str] = None,
     ephemeral: bool = False,
     use_consolidated_metadata_only: bool = False,
+    content_hashes: Optional[Dict[str, str]] = None,
 ) -> str:
     """
     Upload the prepared bundle to the cloud using the new database-driven approach
@@ -356,8 +762,11 @@ def _upload_bundle(
         ephemeral: Whether to create an ephemeral figure
         use_consolidated_metadata_only: If True, excludes individual zarr metadata files
             (.zgroup, .zarray, .zattrs) since they are included in .zmetadata
+        content_hashes: Optional SHA-256 of the bundle files by relative path, as
+            returned by prepare_figure_bundle. Missing hashes are computed here.
     """
     tmpdir_path = pathlib.Path(tmpdir)
+    stats_before = get_connection_stats()
 
     # Collect all files to upload
     all_files = []
@@ -377,114 +786,100 @@ def _upload_bundle(
         f"Found {total_files} files to upload, total size: {total_size / (1024 * 1024):.2f} MB"
     )
 
-    # Find available figure ID and create/get figure in database with metadata
+    files_to_upload = all_files
+
+    # Content hashes identify files across uploads (journal and deduplication)
+    content_hashes = dict(content_hashes) if content_hashes else {}
+    missing_hashes = [rel for rel, _ in files_to_upload if rel not in content_hashes]
+    if missing_hashes:
+        content_hashes.update(
+            compute_bundle_content_hashes(tmpdir_path, missing_hashes)
+        )
+    bundle_key = get_bundle_key(
+        {rel: content_hashes[rel] for rel, _ in files_to_upload},
+        title=title,
+        ephemeral=ephemeral,
+    )
+    pending_figures = PendingFigures()
+    resume_figure_url = pending_figures.get(bundle_key)
+
+    # Find available figure ID and create/get figure in database with metadata.
+    # If an earlier upload of the same bundle was interrupted, ask to resume
+    # its figure.
     result = _create_or_get_figure(
         api_key,
         total_files,
         total_size,
         title=title,
         ephemeral=ephemeral,
+        resume_figure_url=resume_figure_url,
     )
     figure_info = result.get("figure", {})
     figure_url = figure_info.get("figureUrl")
+    if resume_figure_url is not None and resume_figure_url != figure_url:
+        # The pending figure could not be resumed (e.g. it expired)
+        UploadJournal(resume_figure_url).remove()
 
     if figure_info["status"] == "completed":
         print(f"Figure already exists. No upload needed.")
+        pending_figures.remove(bundle_key)
         return figure_url
 
-    files_to_upload = all_files
-    total_files_to_upload = len(files_to_upload)
+    pending_figures.set(bundle_key, figure_url)
 
-    if total_files_to_upload == 0:
-        print("No files to upload")
-    else:
+    # Skip files that a previous, interrupted upload of this figure completed
+    journal = UploadJournal(figure_url)
+    pending_files = [
+        (rel_path, file_path)
+        for rel_path, file_path in files_to_upload
+        if not journal.is_completed(rel_path, content_hashes[rel_path])
+    ]
+    if len(pending_files) < len(files_to_upload):
         print(
-            f"Uploading {total_files_to_upload} files in batches of 20 with up to {MAX_WORKERS_FOR_UPLOAD} concurrent uploads per batch..."
+            f"Resuming upload: {len(files_to_upload) - len(pending_files)} files were already uploaded"
         )
 
-        # Thread-safe progress tracking
-        uploaded_count = 0
-        count_lock = threading.Lock()
-
-        # Determine upload mode from the first batch
-        first_batch = files_to_upload[:20]
-        response_data = _get_upload_mode(
-            figure_url, first_batch, api_key if api_key else ""
-        )
-        upload_mode = response_data.get("mode", "server-signed")
-
-        # Process files in batches of 20
-        batch_size = 20
-        for i in range(0, total_files_to_upload, batch_size):
-            batch = files_to_upload[i : i + batch_size]
-            batch_num = i // batch_size + 1
-            total_batches = (total_files_to_upload + batch_size - 1) // batch_size
-
+    # Skip files whose content the server already holds; these are stored as
+    # references to the existing blobs
+    if result.get("contentDedup") and pending_files:
+        existing_files: Set[str] = set()
+        try:
+            # The API bounds the number of files per request, as for uploads
+            for i in range(0, len(pending_files), UPLOAD_BATCH_SIZE):
+                existing_files |= _get_existing_blobs(
+                    figure_url,
+                    pending_files[i : i + UPLOAD_BATCH_SIZE],
+                    content_hashes,
+                    api_key if api_key else "",
+                )
+        except Exception as e:
+            print(f"Warning: could not check for existing content, uploading all: {e}")
+            existing_files = set()
+        if existing_files:
+            pending_files = [
+                (rel_path, file_path)
+                for rel_path, file_path in pending_files
+                if rel_path not in existing_files
+            ]
             print(
-                f"Processing batch {batch_num}/{total_batches} ({len(batch)} files)..."
+                f"{len(existing_files)} files are already stored on the server and will be referenced"
             )
+    total_files_to_upload = len(pending_files)
 
-            # For the first batch, reuse the response_data we already fetched
-            if i == 0:
-                batch_response = response_data
-            else:
-                batch_response = _get_upload_mode(
-                    figure_url, batch, api_key if api_key else ""
-                )
-
-            if upload_mode == "client-signed":
-                # Direct boto3 upload
-                try:
-                    count = _upload_batch_client_signed(batch_response, batch)
-                    with count_lock:
-                        uploaded_count += count
-                        print(
-                            f"Uploaded {uploaded_count}/{total_files_to_upload} files"
-                        )
-                except Exception as e:
-                    print(f"Failed to upload batch {batch_num}: {e}")
-                    raise
-            else:
-                # Server-signed mode: use presigned URLs
-                signed_urls_data = batch_response.get("signedUrls", [])
-                if not signed_urls_data:
-                    raise Exception(f"No signed URLs returned for batch {batch_num}")
-                signed_urls_map = {
-                    item["relativePath"]: item["signedUrl"] for item in signed_urls_data
-                }
-
-                # Upload files in this batch in parallel
-                with ThreadPoolExecutor(max_workers=MAX_WORKERS_FOR_UPLOAD) as executor:
-                    # Submit upload tasks for this batch
-                    future_to_file = {}
-                    for rel_path, file_path in batch:
-                        if rel_path in signed_urls_map:
-                            future = executor.submit(
-                                _upload_single_file_with_signed_url,
-                                rel_path,
-                                file_path,
-                                signed_urls_map[rel_path],
-                            )
-                            future_to_file[future] = rel_path
-                        else:
-                            print(f"Warning: No signed URL found for {rel_path}")
-
-                    # Process completed uploads for this batch
-                    for future in as_completed(future_to_file):
-                        relative_path = future_to_file[future]
-                        try:
-                            future.result()
-
-                            # Thread-safe progress update
-                            with count_lock:
-                                uploaded_count += 1
-                                print(
-                                    f"Uploaded {uploaded_count}/{total_files_to_upload}: {relative_path}"
-                                )
-
-                        except Exception as e:
-                            print(f"Failed to upload {relative_path}: {e}")
-                            raise
+    if total_files_to_upload == 0:
+        print("No files to upload")
+    else:
+        print(
+            f"Uploading {total_files_to_upload} files in batches of {UPLOAD_BATCH_SIZE} with up to {MAX_WORKERS_FOR_UPLOAD} concurrent uploads..."
+        )
+        _upload_files_pipelined(
+            figure_url,
+            pending_files,
+            content_hashes,
+            api_key if api_key else "",
+            journal,
+            multipart=bool(result.get("multipartUpload")),
+        )
 
     # Create manifest for finalization
     print("Creating manifest...")
@@ -497,7 +892,9 @@ def _upload_bundle(
 
     for rel_path, file_path in files_to_upload:
         file_size = file_path.stat().st_size
-        manifest["files"].append({"path": rel_path, "size": file_size})
+        manifest["files"].append(
+            {"path": rel_path, "size": file_size, "sha256": content_hashes[rel_path]}
+        )
         manifest["total_size"] += file_size
 
     print(f"Total size: {manifest['total_size'] / (1024 * 1024):.2f} MB")
@@ -547,11 +944,175 @@ def _upload_bundle(
     # Finalize the figure upload
     print("Finalizing figure...")
     _finalize_figure(figure_url, api_key if api_key else "")
-    print("Upload completed successfully")
+    journal.remove()
+    pending_figures.remove(bundle_key)
+    stats = get_connection_stats()
+    num_requests = stats["requests"] - stats_before["requests"]
+    num_connections = stats["new_connections"] - stats_before["new_connections"]
+    print(
+        f"Upload completed successfully "
+        f"({num_requests} requests over {num_connections} new connections)"
+    )
 
     return figure_url
 
 
+def _upload_files_pipelined(
+    figure_url: str,
+    files: list,
+    content_hashes: Dict[str, str],
+    api_key: str,
+    journal: UploadJournal,
+    max_workers: int = MAX_WORKERS_FOR_UPLOAD,
+    multipart: bool = False,
+) -> None:
+    """
+    Upload files in batches, fetching upload info ahead of the uploads
+
+    The upload info (signed URLs or S3 keys) for the next batches is requested
+    by a background thread while earlier batches are still uploading, and all
+    uploads share a single pool of worker threads, so there is no idle gap
+    between batches. Each completed file is recorded in the journal.
+
+    Args:
+        figure_url: The URL of the figure being uploaded
+        files: List of tuples (relative_path, file_path)
+        content_hashes: SHA-256 of the files by relative path
+        api_key: API key for authentication
+        journal: Journal in which to record completed uploads
+        max_workers: Number of concurrent upload threads
+        multipart: Whether the API supports server-signed multipart uploads.
+            In client-signed mode, large files always use multipart uploads.
+    """
+    batches = [
+        files[i : i + UPLOAD_BATCH_SIZE]
+        for i in range(0, len(files), UPLOAD_BATCH_SIZE)
+    ]
+    total_files = len(files)
+    uploaded_count = 0
+    upload_mode = None
+
+    info_futures: deque = deque()
+    next_batch_index = 0
+    in_flight: dict = {}  # future -> (relative path, file path)
+
+    def _wait_for_uploads(max_in_flight: int) -> None:
+        nonlocal uploaded_count
+        while len(in_flight) > max_in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                relative_path, file_path = in_flight.pop(future)
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Failed to upload {relative_path}: {e}")
+                    raise
+                journal.record(
+                    relative_path,
+                    content_hashes[relative_path],
+                    file_path.stat().st_size,
+                )
+                uploaded_count += 1
+                print(f"Uploaded {uploaded_count}/{total_files}: {relative_path}")
+
+    with ThreadPoolExecutor(max_workers=1) as info_executor, ThreadPoolExecutor(
+        max_workers=max_workers
+    ) as upload_executor:
+        try:
+            for batch_num, batch in enumerate(batches, start=1):
+                # Keep the upload info for the next few batches in flight
+                while (
+                    next_batch_index < len(batches)
+                    and len(info_futures) <= UPLOAD_PREFETCH_BATCHES
+                ):
+                    info_futures.append(
+                        info_executor.submit(
+                            _get_upload_mode,
+                            figure_url,
+                            batches[next_batch_index],
+                            api_key,
+                        )
+                    )
+                    next_batch_index += 1
+                batch_response = info_futures.popleft().result()
+
+                # The upload mode is determined by the first batch
+                if upload_mode is None:
+                    upload_mode = batch_response.get("mode", "server-signed")
+
+                print(
+                    f"Processing batch {batch_num}/{len(batches)} ({len(batch)} files)..."
+                )
+                if upload_mode == "client-signed":
+                    bucket_info = batch_response.get("bucket", {})
+                    native_bucket_name = bucket_info["nativeBucketName"]
+                    region = bucket_info.get("region", "us-east-1")
+                    files_info = batch_response.get("files", [])
+                    if not files_info:
+                        raise Exception(
+                            f"No files returned for client-signed batch {batch_num}"
+                        )
+                    key_map = {f["relativePath"]: f["key"] for f in files_info}
+                    for rel_path, file_path in batch:
+                        if file_path.stat().st_size >= MULTIPART_THRESHOLD:
+                            upload_function = _upload_file_multipart_client_signed
+                        else:
+                            upload_function = _upload_single_file_client_signed
+                        future = upload_executor.submit(
+                            upload_function,
+                            get_s3_client(region),
+                            native_bucket_name,
+                            key_map.get(rel_path),
+                            rel_path,
+                            file_path,
+                        )
+                        in_flight[future] = (rel_path, file_path)
+                else:
+                    signed_urls_data = batch_response.get("signedUrls", [])
+                    if not signed_urls_data:
+                        raise Exception(
+                            f"No signed URLs returned for batch {batch_num}"
+                        )
+                    signed_urls_map = {
+                        item["relativePath"]: item["signedUrl"]
+                        for item in signed_urls_data
+                    }
+                    for rel_path, file_path in batch:
+                        if (
+                            multipart
+                            and file_path.stat().st_size >= MULTIPART_THRESHOLD
+                        ):
+                            future = upload_executor.submit(
+                                _upload_file_multipart_server_signed,
+                                figure_url,
+                                rel_path,
+                                file_path,
+                                api_key,
+                            )
+                            in_flight[future] = (rel_path, file_path)
+                            continue
+                        if rel_path not in signed_urls_map:
+                            print(f"Warning: No signed URL found for {rel_path}")
+                            continue
+                        future = upload_executor.submit(
+                            _upload_single_file_with_signed_url,
+                            rel_path,
+                            file_path,
+                            signed_urls_map[rel_path],
+                        )
+                        in_flight[future] = (rel_path, file_path)
+
+                # Bound the number of queued uploads so that signed URLs are
+                # not requested too far ahead of their use
+                _wait_for_uploads(2 * max_workers)
+
+            _wait_for_uploads(0)
+        except BaseException:
+            for future in list(in_flight) + list(info_futures):
+                future.cancel()
+            raise
+
+
 def _determine_content_type(file_path: str) -> str:
     """
     Determine content type for upload based on file extension
@@ -0,0 +1,180 @@
+"""
+Local journal of completed file uploads, used to resume interrupted uploads
+"""
+
+import hashlib
+import json
+import pathlib
+from typing import Dict, Optional
+
+
+def _get_upload_journal_dir() -> pathlib.Path:
+    return pathlib.Path.home() / ".figpack" / "upload_journals"
+
+
+def get_bundle_key(
+    content_hashes: Dict[str, str],
+    *,
+    title: Optional[str] = None,
+    ephemeral: bool = False,
+) -> str:
+    """
+    Key identifying a bundle upload across runs
+
+    The API gives every created figure a new random URL, so an interrupted
+    upload is found again by the content of its bundle (and the options of
+    the upload) rather than by its figure URL.
+
+    Args:
+        content_hashes: SHA-256 of the bundle files by relative path
+        title: Title of the figure
+        ephemeral: Whether the figure is ephemeral
+    """
+    hasher = hashlib.sha256()
+    hasher.update(json.dumps([title, ephemeral]).encode("utf-8"))
+    for relative_path in sorted(content_hashes):
+        hasher.update(f"\n{relative_path}\0{content_hashes[relative_path]}".encode())
+    return hasher.hexdigest()
+
+
+class PendingFigures:
+    """
+    Figure URLs of bundle uploads that have not been finalized yet
+
+    Each entry maps a bundle key (see get_bundle_key) to the figure created
+    for it, so that a rerun can ask the API to resume that figure (and find
+    its UploadJournal) instead of creating a new one.
+    """
+
+    def __init__(self, journal_dir: Optional[pathlib.Path] = None):
+        """
+        Args:
+            journal_dir: Directory holding the journals (default:
+                ~/.figpack/upload_journals)
+        """
+        if journal_dir is None:
+            journal_dir = _get_upload_journal_dir()
+        self.journal_dir = journal_dir
+
+    def _path(self, bundle_key: str) -> pathlib.Path:
+        return self.journal_dir / f"pending_{bundle_key[:32]}.json"
+
+    def get(self, bundle_key: str) -> Optional[str]:
+        """
+        Figure URL recorded for a bundle, or None
+        """
+        try:
+            with open(self._path(bundle_key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if entry.get("bundleKey") != bundle_key:
+            return None
+        return entry.get("figureUrl")
+
+    def set(self, bundle_key: str, figure_url: str) -> None:
+        """
+        Record the figure created for a bundle
+        """
+        path = self._path(bundle_key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"bundleKey": bundle_key, "figureUrl": figure_url}, f)
+        tmp_path.replace(path)
+
+    def remove(self, bundle_key: str) -> None:
+        """
+        Forget the figure of a bundle (called once it has been finalized)
+        """
+        self._path(bundle_key).unlink(missing_ok=True)
+
+
+class UploadJournal:
+    """
+    Append-only record of the files that finished uploading for a figure
+
+    The journal lives in ~/.figpack/upload_journals and is keyed by the figure
+    URL. Each completed file is recorded with the SHA-256 of its content, so a
+    rerun that resumes the same (still pending) figure (see PendingFigures)
+    can skip files that are already uploaded with identical content. Each
+    entry is written and flushed as soon as its upload completes, so a crash
+    loses at most the uploads that were in flight.
+    """
+
+    def __init__(self, figure_url: str, journal_dir: Optional[pathlib.Path] = None):
+        """
+        Open (or start) the journal for a figure
+
+        Args:
+            figure_url: The URL of the figure being uploaded
+            journal_dir: Directory holding the journals (default:
+                ~/.figpack/upload_journals)
+        """
+        if journal_dir is None:
+            journal_dir = _get_upload_journal_dir()
+        self.figure_url = figure_url
+        url_hash = hashlib.sha256(figure_url.encode("utf-8")).hexdigest()[:32]
+        self.path = journal_dir / f"{url_hash}.jsonl"
+        self._completed: Dict[str, str] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A partially written last line from an interrupted run
+                    continue
+                if entry.get("figureUrl") != self.figure_url:
+                    continue
+                if "path" in entry and "sha256" in entry:
+                    self._completed[entry["path"]] = entry["sha256"]
+
+    @property
+    def num_completed(self) -> int:
+        return len(self._completed)
+
+    def is_completed(self, relative_path: str, sha256: str) -> bool:
+        """
+        Check whether a file was already uploaded with the same content
+
+        Args:
+            relative_path: Path of the file relative to the bundle root
+            sha256: SHA-256 hex digest of the current file content
+
+        Returns:
+            bool: True if the journal has an entry for this path with this hash
+        """
+        return self._completed.get(relative_path) == sha256
+
+    def record(self, relative_path: str, sha256: str, size: int) -> None:
+        """
+        Record a completed upload
+
+        Args:
+            relative_path: Path of the file relative to the bundle root
+            sha256: SHA-256 hex digest of the uploaded content
+            size: Size of the uploaded file in bytes
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "figureUrl": self.figure_url,
+            "path": relative_path,
+            "sha256": sha256,
+            "size": size,
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+        self._completed[relative_path] = sha256
+
+    def remove(self) -> None:
+        """
+        Delete the journal (called once the figure has been finalized)
+        """
+        self.path.unlink(missing_ok=True)
+        self._completed = {}
@@ -11,7 +11,7 @@ import threading
 import webbrowser
 from typing import Union
 
-from ._server_manager import ProcessServerManager
+from ._server_manager import create_http_server
 
 
 def serve_files(
@@ -22,9 +22,10 @@ def serve_files(
     allow_origin: Union[str, None] = None,
     enable_file_upload: bool = False,
     max_file_size: int = 10 * 1024 * 1024,
+    backend: Union[str, None] = None,
 ):
     """
-    Serve files from a directory using the ProcessServerManager.
+    Serve files from a directory using the same server as the ProcessServerManager.
 
     Args:
         tmpdir: Directory to serve
@@ -33,6 +34,8 @@ def serve_files(
         allow_origin: CORS allow origin header
         enable_file_upload: Whether to enable PUT requests for file uploads
         max_file_size: Maximum file size in bytes for uploads (default 10MB)
+        backend: Server backend, "threading" or "asyncio" (defaults to the
+            FIGPACK_SERVER_BACKEND environment variable, or "threading")
     """
     tmpdir_2 = pathlib.Path(tmpdir)
     tmpdir_2 = tmpdir_2.resolve()
@@ -43,44 +46,21 @@ def serve_files(
     # Note: We can't use the singleton ProcessServerManager here because it serves
     # from its own temp directory, but we need to serve from the specified tmpdir
 
-    # Import the required classes for direct server creation
-    from ._server_manager import CORSRequestHandler, ThreadingHTTPServer
-    from ._file_handler import FileUploadCORSRequestHandler
-
     # if port is None, find a free port
     if port is None:
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
             s.bind(("", 0))
             port = s.getsockname()[1]
 
-    # Choose handler based on file upload requirement
-    if enable_file_upload:
-
-        def handler_factory_upload_enabled(*args, **kwargs):
-            return FileUploadCORSRequestHandler(
-                *args,
-                directory=str(tmpdir_2),
-                allow_origin=allow_origin,
-                enable_file_upload=True,
-                max_file_size=max_file_size,
-                **kwargs,
-            )
-
-        upload_status = (
-            " (file upload enabled)" if handler_factory_upload_enabled else ""
-        )
-
-        httpd = ThreadingHTTPServer(("0.0.0.0", port), handler_factory_upload_enabled)  # type: ignore
-    else:
-
-        def handler_factory(*args, **kwargs):
-            return CORSRequestHandler(
-                *args, directory=str(tmpdir_2), allow_origin=allow_origin, **kwargs
-            )
-
-        upload_status = ""
-
-        httpd = ThreadingHTTPServer(("0.0.0.0", port), handler_factory)  # type: ignore
+    httpd = create_http_server(
+        ("0.0.0.0", port),
+        directory=str(tmpdir_2),
+        allow_origin=allow_origin,
+        enable_file_upload=enable_file_upload,
+        max_file_size=max_file_size,
+        backend=backend,
+    )
+    upload_status = " (file upload enabled)" if enable_file_upload else ""
 
     print(
         f"Serving {tmpdir_2} at http://localhost:{port} (CORS → {allow_origin}){upload_status}"
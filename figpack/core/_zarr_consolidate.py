@@ -1,7 +1,15 @@
+import math
 import os
 import pathlib
 import json
-from typing import Dict, List, Tuple
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+# Arrays up to this total size are typically loaded in full when a view
+# opens, so they are packed first, next to each other
+SMALL_ARRAY_SIZE = 1_000_000
 
 
 def consolidate_zarr_chunks(
@@ -26,19 +34,50 @@ def consolidate_zarr_chunks(
     with open(zmetadata_path, "r") as f:
         zmetadata = json.load(f)
 
+    if not pack_chunk_files(zarr_dir, zmetadata, max_file_size=max_file_size):
+        return
+
+    # Write updated .zmetadata
+    with open(zmetadata_path, "w") as f:
+        json.dump(zmetadata, f, indent=2)
+
+
+def pack_chunk_files(
+    zarr_dir: pathlib.Path, zmetadata: dict, max_file_size: int = 100_000_000
+) -> bool:
+    """
+    Pack the chunk files of a zarr directory into consolidated files, after
+    any pack files that were already written (see _pack_store), and add them
+    to the refs mapping of zmetadata (updated in place, not written).
+
+    Args:
+        zarr_dir: Path to the zarr directory
+        zmetadata: Consolidated metadata of the zarr directory
+        max_file_size: Maximum size for each consolidated file in bytes (default: 100 MB)
+
+    Returns:
+        Whether there were chunk files to pack
+    """
     # Collect all chunk files (non-metadata files)
     chunk_files = _collect_chunk_files(zarr_dir)
 
     if not chunk_files:
         # No chunk files to consolidate
-        return
+        _remove_empty_directories(zarr_dir)
+        return False
 
     # Group chunk files into consolidated files
-    consolidated_groups = _group_files_by_size(chunk_files, max_file_size)
+    consolidated_groups = _group_files_by_locality(
+        chunk_files,
+        max_file_size,
+        get_array_paths(zmetadata),
+        get_array_nbytes(zmetadata),
+    )
 
     # Create consolidated files and build refs mapping
-    refs: Dict[str, List] = {}
-    for group_idx, file_group in enumerate(consolidated_groups):
+    refs: Dict[str, List] = zmetadata.get("refs", {})
+    first_group_idx = len(list(zarr_dir.glob("_consolidated_*.dat")))
+    for group_idx, file_group in enumerate(consolidated_groups, first_group_idx):
         consolidated_filename = f"_consolidated_{group_idx}.dat"
         consolidated_path = zarr_dir / consolidated_filename
 
@@ -63,13 +102,8 @@ def consolidate_zarr_chunks(
                 # Update offset
                 current_offset += len(chunk_data)
 
-    # Update .zmetadata with refs
     zmetadata["refs"] = refs
 
-    # Write updated .zmetadata
-    with open(zmetadata_path, "w") as f:
-        json.dump(zmetadata, f, indent=2)
-
     # Delete original chunk files
     for file_path, _ in chunk_files:
         try:
@@ -79,6 +113,45 @@ def consolidate_zarr_chunks(
 
     # Clean up empty directories
     _remove_empty_directories(zarr_dir)
+    return True
+
+
+def pack_chunks_in_memory(
+    chunks: Dict[str, bytes], zmetadata: dict, max_file_size: int = 100_000_000
+) -> Dict[str, bytes]:
+    """
+    Pack chunks held in memory into consolidated files, in locality order
+    (see group_chunks_for_packing), and add the refs mapping to zmetadata.
+
+    The layout is the same as that of consolidate_zarr_chunks and
+    PackFiles.finalize for the same chunks.
+
+    Args:
+        chunks: Mapping from chunk key (relative path) to chunk data
+        zmetadata: Consolidated metadata, updated in place with the refs
+        max_file_size: Maximum size for each consolidated file in bytes (default: 100 MB)
+
+    Returns:
+        Mapping from consolidated file name to its content
+    """
+    groups = group_chunks_for_packing(
+        {key: len(data) for key, data in chunks.items()},
+        get_array_paths(zmetadata),
+        max_file_size,
+        get_array_nbytes(zmetadata),
+    )
+
+    refs: Dict[str, List] = zmetadata.get("refs", {})
+    packed: Dict[str, bytes] = {}
+    for group_idx, keys in enumerate(groups):
+        consolidated_filename = f"_consolidated_{group_idx}.dat"
+        current_offset = 0
+        for key in keys:
+            refs[key] = [consolidated_filename, current_offset, len(chunks[key])]
+            current_offset += len(chunks[key])
+        packed[consolidated_filename] = b"".join(chunks[key] for key in keys)
+    zmetadata["refs"] = refs
+    return packed
 
 
 def _collect_chunk_files(zarr_dir: pathlib.Path) -> List[Tuple[pathlib.Path, str]]:
@@ -109,60 +182,228 @@ def _collect_chunk_files(zarr_dir: pathlib.Path) -> List[Tuple[pathlib.Path, str
     return chunk_files
 
 
-def _group_files_by_size(
-    files: List[Tuple[pathlib.Path, str]], max_size: int
+def get_array_paths(zmetadata: dict) -> List[str]:
+    """
+    Paths of all arrays listed in consolidated metadata
+    """
+    return [
+        key[: -len(".zarray")].rstrip("/")
+        for key in zmetadata.get("metadata", {})
+        if key == ".zarray" or key.endswith("/.zarray")
+    ]
+
+
+def get_array_nbytes(zmetadata: dict) -> Dict[str, int]:
+    """
+    Uncompressed size in bytes of the arrays listed in consolidated metadata
+    """
+    array_nbytes: Dict[str, int] = {}
+    for key, zarray in zmetadata.get("metadata", {}).items():
+        if key == ".zarray" or key.endswith("/.zarray"):
+            nbytes = get_zarray_nbytes(zarray)
+            if nbytes is not None:
+                array_nbytes[key[: -len(".zarray")].rstrip("/")] = nbytes
+    return array_nbytes
+
+
+def get_zarray_nbytes(zarray: dict) -> Optional[int]:
+    """
+    Uncompressed size in bytes of an array given its .zarray metadata, or
+    None if it cannot be determined
+    """
+    try:
+        itemsize = np.dtype(zarray["dtype"]).itemsize
+        return math.prod(int(n) for n in zarray["shape"]) * itemsize
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _split_chunk_key(
+    chunk_key: str, array_paths: Set[str]
+) -> Tuple[str, Tuple[int, ...]]:
+    """
+    Split a chunk key such as "a/b/3.0" into its array path and chunk index
+    """
+    parts = chunk_key.split("/")
+    array_path = "/".join(parts[:-1])
+    # With "/" as dimension separator the index spans several path components
+    for n in range(1, len(parts)):
+        candidate = "/".join(parts[:-n])
+        if candidate in array_paths:
+            array_path = candidate
+            break
+    index_str = chunk_key[len(array_path) :].lstrip("/")
+    # Non-numeric components (the "c" prefix of zarr 3 keys) are ignored
+    index = tuple(int(p) for p in re.split(r"[./]", index_str) if p.isdigit())
+    return array_path, index
+
+
+def get_array_rank(array_path: str, array_size: int) -> Tuple[int, int]:
+    """
+    Packing class of an array: small arrays, then downsampled pyramid levels
+    (one class per level), then all other arrays
+
+    Args:
+        array_path: Path of the array in the store
+        array_size: Size of the array in bytes (see sort_chunks_by_locality)
+    """
+    match = re.search(r"_ds_(\d+)$", array_path)
+    if match:
+        # Downsampled pyramid levels, coarsest first
+        return (1, -int(match.group(1)))
+    if array_size <= SMALL_ARRAY_SIZE:
+        return (0, 0)
+    return (2, 0)
+
+
+def sort_chunks_by_locality(
+    chunk_sizes: Dict[str, int],
+    array_paths: Iterable[str],
+    array_nbytes: Optional[Dict[str, int]] = None,
+) -> List[str]:
+    """
+    Order chunks so that the chunks a viewer requests together are adjacent
+
+    Small arrays (other than pyramid levels) come first, then downsampled
+    pyramid levels from coarsest to finest, then all other arrays (see
+    get_array_rank). Each array's chunks are kept contiguous and in chunk
+    index order.
+
+    Args:
+        chunk_sizes: Mapping from chunk key (relative path) to size in bytes
+        array_paths: Paths of the arrays in the store
+        array_nbytes: Uncompressed size of the arrays (see get_array_nbytes),
+            used to tell small arrays apart. Arrays missing from it are sized
+            by the total size of their chunks.
+
+    Returns:
+        The chunk keys in packing order
+    """
+    return [key for key, _ in _locality_order(chunk_sizes, array_paths, array_nbytes)]
+
+
+def _locality_order(
+    chunk_sizes: Dict[str, int],
+    array_paths: Iterable[str],
+    array_nbytes: Optional[Dict[str, int]],
+) -> List[Tuple[str, Tuple[int, int]]]:
+    array_path_set = set(array_paths)
+    split_keys = {
+        key: _split_chunk_key(key, array_path_set) for key in chunk_sizes.keys()
+    }
+    array_sizes: Dict[str, int] = {}
+    for key, (array_path, _) in split_keys.items():
+        array_sizes[array_path] = array_sizes.get(array_path, 0) + chunk_sizes[key]
+    if array_nbytes:
+        for array_path in array_sizes:
+            if array_path in array_nbytes:
+                array_sizes[array_path] = array_nbytes[array_path]
+    ranks = {
+        array_path: get_array_rank(array_path, size)
+        for array_path, size in array_sizes.items()
+    }
+
+    def _sort_key(key: str):
+        array_path, index = split_keys[key]
+        return (ranks[array_path], array_path, index)
+
+    return [
+        (key, ranks[split_keys[key][0]])
+        for key in sorted(chunk_sizes.keys(), key=_sort_key)
+    ]
+
+
+def group_chunks_for_packing(
+    chunk_sizes: Dict[str, int],
+    array_paths: Iterable[str],
+    max_file_size: int,
+    array_nbytes: Optional[Dict[str, int]] = None,
+) -> List[List[str]]:
+    """
+    Split chunks into pack files, in locality order (see
+    sort_chunks_by_locality)
+
+    Each class of arrays (see get_array_rank) starts a new pack file, and pack
+    files are filled one at a time (next-fit) within a class. This matches the
+    files that PackFiles writes while streaming, one sequence per class, so
+    those can be kept as they are. A class that is small in total is added to
+    the previous pack file if it fits, to avoid a file per small class.
+
+    Args:
+        chunk_sizes: Mapping from chunk key (relative path) to size in bytes
+        array_paths: Paths of the arrays in the store
+        max_file_size: Maximum size of each pack file in bytes. A chunk
+            larger than this ends up alone in its file.
+        array_nbytes: Uncompressed size of the arrays (see get_array_nbytes)
+
+    Returns:
+        The chunk keys of each pack file, in order
+    """
+    order = _locality_order(chunk_sizes, array_paths, array_nbytes)
+    rank_sizes: Dict[Tuple[int, int], int] = {}
+    for key, rank in order:
+        rank_sizes[rank] = rank_sizes.get(rank, 0) + chunk_sizes[key]
+
+    groups: List[List[str]] = []
+    current_size = 0
+    current_rank = None
+    for key, rank in order:
+        size = chunk_sizes[key]
+        if rank != current_rank:
+            current_rank = rank
+            new_file = (
+                rank_sizes[rank] > SMALL_ARRAY_SIZE
+                or current_size + rank_sizes[rank] > max_file_size
+            )
+        else:
+            new_file = current_size + size > max_file_size
+        if not groups or new_file:
+            groups.append([])
+            current_size = 0
+        groups[-1].append(key)
+        current_size += size
+    return groups
+
+
+def _group_files_by_locality(
+    files: List[Tuple[pathlib.Path, str]],
+    max_size: int,
+    array_paths: Iterable[str],
+    array_nbytes: Optional[Dict[str, int]] = None,
 ) -> List[List[Tuple[pathlib.Path, str]]]:
     """
-    Group files into bins where each bin's total size is <= max_size.
+    Group files into bins where each bin's total size is <= max_size, in
+    locality order (see group_chunks_for_packing).
 
-    Uses a simple first-fit bin packing algorithm.
+    Bins are filled one at a time (next-fit), which is linear in the number
+    of files and keeps consecutive chunks in the same bin.
 
     Args:
         files: List of (file_path, relative_path) tuples
         max_size: Maximum total size for each group in bytes
+        array_paths: Paths of the arrays in the store
+        array_nbytes: Uncompressed size of the arrays (see get_array_nbytes)
 
     Returns:
         List of groups, where each group is a list of (file_path, relative_path) tuples
     """
     # Get file sizes
-    files_with_sizes = []
+    files_by_path: Dict[str, pathlib.Path] = {}
+    sizes: Dict[str, int] = {}
     for file_path, relative_path in files:
         try:
-            size = file_path.stat().st_size
-            files_with_sizes.append((file_path, relative_path, size))
+            sizes[relative_path] = file_path.stat().st_size
+            files_by_path[relative_path] = file_path
         except Exception as e:
             print(f"Warning: could not get size of {file_path}: {e}")
             continue
 
-    # Sort by size (largest first) for better packing
-    files_with_sizes.sort(key=lambda x: x[2], reverse=True)
-
-    # First-fit bin packing
-    groups: List[List[Tuple[pathlib.Path, str]]] = []
-    group_sizes: List[int] = []
-
-    for file_path, relative_path, size in files_with_sizes:
-        # If file is larger than max_size, put it in its own group
-        if size > max_size:
-            groups.append([(file_path, relative_path)])
-            group_sizes.append(size)
-            continue
-
-        # Try to fit into existing group
-        placed = False
-        for i, group_size in enumerate(group_sizes):
-            if group_size + size <= max_size:
-                groups[i].append((file_path, relative_path))
-                group_sizes[i] += size
-                placed = True
-                break
-
-        # If doesn't fit anywhere, create new group
-        if not placed:
-            groups.append([(file_path, relative_path)])
-            group_sizes.append(size)
-
-    return groups
+    return [
+        [(files_by_path[relative_path], relative_path) for relative_path in group]
+        for group in group_chunks_for_packing(
+            sizes, array_paths, max_size, array_nbytes
+        )
+    ]
 
 
 def _remove_empty_directories(zarr_dir: pathlib.Path) -> None:
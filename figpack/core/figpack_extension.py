@@ -2,8 +2,23 @@
 Extension system for figpack - allows runtime loading of custom view components
 """
 
+import hashlib
+import os
+import pathlib
+import socket
+import sys
+import tempfile
 from typing import Dict, Optional, List
 
+# Name of the directory, inside wheels and source trees, holding extension
+# assets to seed the cache with, laid out as <name>/<version>/<filename>
+EXTENSION_ASSETS_SEED_DIR = "figpack_extension_assets"
+
+# Timeout of the connection to, and of each read from, the server of an
+# extension asset, so that an unresponsive CDN does not hang the import of
+# the extension
+EXTENSION_ASSET_DOWNLOAD_TIMEOUT_SEC = 30
+
 
 class FigpackExtension:
     """
@@ -67,3 +82,185 @@ class FigpackExtension:
             original_name: f"extension-{safe_name}-{original_name}"
             for original_name in self.additional_files.keys()
         }
+
+
+def get_extension_asset_cache_dir() -> pathlib.Path:
+    """
+    Directory of the cache of third-party JavaScript libraries used by
+    extensions: FIGPACK_EXTENSION_CACHE_DIR if set, otherwise the user cache
+    directory of the platform (e.g. ~/.cache/figpack/extension-assets)
+    """
+    if os.environ.get("FIGPACK_EXTENSION_CACHE_DIR"):
+        return pathlib.Path(os.environ["FIGPACK_EXTENSION_CACHE_DIR"])
+    if sys.platform == "win32":
+        base = pathlib.Path(
+            os.environ.get("LOCALAPPDATA", pathlib.Path.home() / "AppData" / "Local")
+        )
+        cache_dir = base / "figpack" / "Cache"
+    elif sys.platform == "darwin":
+        cache_dir = pathlib.Path.home() / "Library" / "Caches" / "figpack"
+    else:
+        base = pathlib.Path(
+            os.environ.get("XDG_CACHE_HOME", pathlib.Path.home() / ".cache")
+        )
+        cache_dir = base / "figpack"
+    return cache_dir / "extension-assets"
+
+
+def get_extension_asset(
+    url: str,
+    *,
+    name: str,
+    version: str,
+    filename: Optional[str] = None,
+    sha256: Optional[str] = None,
+) -> str:
+    """
+    Get a third-party JavaScript library used by an extension, e.g. to pass
+    it in additional_files, from the extension asset cache, downloading it
+    on first use
+
+    Assets are cached as <cache dir>/<name>/<version>/<filename>, next to a
+    <filename>.sha256 file with their SHA-256. The content is verified
+    against the expected hash (or, if none is given, the hash recorded when
+    the asset was cached) every time it is read; a corrupt asset is
+    downloaded again.
+
+    With FIGPACK_OFFLINE=1 nothing is downloaded: the asset must have been
+    cached or seeded beforehand (see seed_extension_asset_cache).
+
+    Args:
+        url: URL to download the asset from
+        name: Name of the extension (first component of the cache key)
+        version: Version of the asset (second component of the cache key)
+        filename: File name of the asset in the cache (defaults to the last
+            component of the URL)
+        sha256: Expected SHA-256 of the asset (hex), if known
+
+    Returns:
+        The content of the asset
+
+    Raises:
+        RuntimeError: If the asset is not cached and cannot be downloaded, or
+            does not match the expected SHA-256
+    """
+    if filename is None:
+        filename = url.rstrip("/").rsplit("/", 1)[-1]
+    path = get_extension_asset_cache_dir() / name / version / filename
+
+    content = _read_cached_asset(path, sha256)
+    if content is not None:
+        return content.decode("utf-8")
+
+    if os.environ.get("FIGPACK_OFFLINE") == "1":
+        raise RuntimeError(
+            f"Extension asset {name}/{version}/{filename} is not cached in "
+            f"{get_extension_asset_cache_dir()} and FIGPACK_OFFLINE=1. "
+            "Seed the cache with `figpack extensions seed-cache`."
+        )
+
+    import urllib.error
+    import urllib.request
+
+    try:
+        with urllib.request.urlopen(
+            url, timeout=EXTENSION_ASSET_DOWNLOAD_TIMEOUT_SEC
+        ) as response:
+            content = response.read()
+    except (urllib.error.URLError, socket.timeout) as e:
+        raise RuntimeError(f"Failed to download {url}: {e}")
+    digest = hashlib.sha256(content).hexdigest()
+    if sha256 is not None and digest != sha256.lower():
+        raise RuntimeError(
+            f"SHA-256 mismatch for {url}: expected {sha256}, got {digest}"
+        )
+
+    try:
+        _write_cached_asset(path, content, digest)
+    except OSError as e:
+        print(f"Warning: Failed to cache {url}: {e}")
+    return content.decode("utf-8")
+
+
+def seed_extension_asset_cache(source: str) -> List[pathlib.Path]:
+    """
+    Add extension assets to the cache without network access, e.g. on an
+    air-gapped machine
+
+    Args:
+        source: A wheel (.whl) or a directory. Assets are taken from the
+            figpack_extension_assets/<name>/<version>/<filename> entries of
+            a wheel, and from the <name>/<version>/<filename> files of a
+            directory (e.g. the cache directory of another machine, or the
+            figpack_extension_assets directory of a source tree). The
+            recorded SHA-256 of an asset, if present, is verified.
+
+    Returns:
+        The paths of the assets added to the cache
+    """
+    import zipfile
+
+    assets: Dict[str, bytes] = {}
+    source_path = pathlib.Path(source)
+    if source_path.is_dir():
+        for path in source_path.glob("*/*/*"):
+            if path.is_file():
+                assets[path.relative_to(source_path).as_posix()] = path.read_bytes()
+    elif zipfile.is_zipfile(source_path):
+        with zipfile.ZipFile(source_path) as wheel:
+            for entry in wheel.namelist():
+                parts = entry.split("/")
+                if EXTENSION_ASSETS_SEED_DIR not in parts[:-1]:
+                    continue
+                key = parts[parts.index(EXTENSION_ASSETS_SEED_DIR) + 1 :]
+                if len(key) == 3 and key[-1]:
+                    assets["/".join(key)] = wheel.read(entry)
+    else:
+        raise ValueError(f"Expected a wheel or a directory: {source}")
+
+    cache_dir = get_extension_asset_cache_dir()
+    seeded = []
+    for key, content in sorted(assets.items()):
+        if key.endswith(".sha256"):
+            continue
+        digest = hashlib.sha256(content).hexdigest()
+        recorded = assets.get(f"{key}.sha256")
+        if recorded is not None and recorded.decode("ascii").strip() != digest:
+            raise RuntimeError(f"SHA-256 mismatch for extension asset {key}")
+        path = cache_dir / key
+        _write_cached_asset(path, content, digest)
+        seeded.append(path)
+    return seeded
+
+
+def _read_cached_asset(path: pathlib.Path, sha256: Optional[str]) -> Optional[bytes]:
+    try:
+        content = path.read_bytes()
+        recorded = (
+            path.with_name(path.name + ".sha256").read_text(encoding="ascii").strip()
+        )
+    except OSError:
+        return None
+    digest = hashlib.sha256(content).hexdigest()
+    expected = sha256.lower() if sha256 is not None else recorded
+    if digest != expected or digest != recorded:
+        print(f"Warning: Discarding corrupt cached extension asset {path}")
+        return None
+    return content
+
+
+def _write_cached_asset(path: pathlib.Path, content: bytes, digest: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write atomically so that concurrent processes never read partial files
+    for target, data in (
+        (path, content),
+        (path.with_name(path.name + ".sha256"), f"{digest}\n".encode("ascii")),
+    ):
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_name, target)
+        except BaseException:
+            pathlib.Path(tmp_name).unlink(missing_ok=True)
+            raise
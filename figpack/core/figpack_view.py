@@ -5,7 +5,7 @@ Base view class for figpack visualization components
 import os
 import random
 import string
-from typing import Optional
+from typing import Any, Iterator, List, Optional
 
 from .zarr import Group
 
@@ -195,3 +195,67 @@ class FigpackView:
             group: Zarr group to write data into
         """
         raise NotImplementedError("Subclasses must implement write_to_zarr_group")
+
+    def iter_child_views(self) -> Iterator["FigpackView"]:
+        """
+        The views directly contained in this view (e.g. the views of the
+        items of a layout), used by passes over the view tree such as
+        extension discovery (see walk_view_tree).
+
+        The default implementation looks for views among the public instance
+        attributes: a view, a list or tuple of views or of items holding a
+        `view` (like LayoutItem), or an object holding a `view`. Container
+        views override this to yield their children directly, and views
+        holding large lists of non-view items override it to yield nothing.
+        """
+        for name, value in vars(self).items():
+            if name.startswith("_"):
+                continue
+            if isinstance(value, FigpackView):
+                yield value
+            elif isinstance(value, (list, tuple)):
+                for item in value:
+                    if isinstance(item, FigpackView):
+                        yield item
+                    else:
+                        child = getattr(item, "view", None)
+                        if isinstance(child, FigpackView):
+                            yield child
+            else:
+                child = getattr(value, "view", None)
+                if isinstance(child, FigpackView):
+                    yield child
+
+    def _get_fingerprint_inputs(self) -> Any:
+        """
+        The inputs that determine what write_to_zarr_group writes, used to
+        reuse the data of an unchanged subview when a figure is shown again
+        (see Group.write_view). Defaults to the instance attributes.
+        Subclasses whose output depends on anything else (e.g. the content
+        of a file) override this, or return None to always be rewritten.
+        """
+        return vars(self)
+
+
+def walk_view_tree(view: FigpackView) -> List[FigpackView]:
+    """
+    All the views of a view tree, in depth-first pre-order, each view once
+    (see FigpackView.iter_child_views)
+
+    Args:
+        view: The root view
+
+    Returns:
+        The views, starting with the root
+    """
+    views: List[FigpackView] = []
+    visited = set()
+    stack = [view]
+    while stack:
+        v = stack.pop()
+        if id(v) in visited:
+            continue
+        visited.add(id(v))
+        views.append(v)
+        stack.extend(reversed(list(v.iter_child_views())))
+    return views
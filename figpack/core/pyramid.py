@@ -0,0 +1,426 @@
+"""
+Streaming power-of-4 downsampling pyramids for uniformly sampled series
+
+Views that render long uniformly sampled data (timeseries, spectrograms, ...)
+store the raw data together with coarser levels at factors 4, 16, 64, ...
+This module builds all of those levels in a single pass over the input,
+consuming it in blocks along the time axis, so that the input never needs to
+be padded, copied or held in memory as a whole.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .quantization import Quantization
+from .zarr import Group
+
+REDUCTIONS = ("minmax", "max", "mean")
+
+DEFAULT_BLOCK_SIZE_MB = 64.0
+
+
+def get_downsample_factors(n_timepoints: int) -> List[int]:
+    """
+    Power-of-4 downsampling factors for a series of the given length. The
+    factor 4 level is always present (if it fits); higher levels are added
+    while factor < N / 1000.
+
+    Args:
+        n_timepoints: Number of timepoints in the series
+
+    Returns:
+        List of downsampling factors
+    """
+    factors: List[int] = []
+    if n_timepoints < 4:
+        # No level with factor >= 4 fits the stop condition (factor < N)
+        return factors
+    factors.append(4)
+    factor = 16
+    while factor < n_timepoints / 1000:
+        factors.append(factor)
+        factor *= 4
+    return factors
+
+
+def get_level_shape(
+    n_timepoints: int, n_channels: int, factor: int, reduction: str
+) -> Tuple[int, ...]:
+    """
+    Shape of the pyramid level at the given factor
+
+    Returns:
+        (ceil(N/factor), 2, M) for "minmax", (ceil(N/factor), M) otherwise
+    """
+    n_bins = -(-n_timepoints // factor)
+    if reduction == "minmax":
+        return (n_bins, 2, n_channels)
+    return (n_bins, n_channels)
+
+
+class PyramidBuilder:
+    """
+    Incrementally builds a downsampling pyramid from consecutive blocks of samples.
+
+    Supported reductions:
+        - "minmax": each bin stores [min, max] -> levels of shape (B, 2, M)
+        - "max": each bin stores the max -> levels of shape (B, M)
+        - "mean": each bin stores the mean -> levels of shape (B, M)
+
+    NaN values are ignored (a bin is NaN only if all of its samples are NaN).
+    Each level keeps at most 3 pending entries that do not yet form a complete
+    group of 4, so memory use is independent of the series length. Completed
+    bins of every level are passed to `emit(factor, bins)` in order. Calling
+    finish() reduces the trailing partial groups over the available entries
+    only, which is equivalent to padding the series with NaNs.
+    """
+
+    def __init__(
+        self,
+        *,
+        factors: List[int],
+        n_channels: int,
+        emit: Callable[[int, np.ndarray], None],
+        reduction: str = "minmax",
+    ):
+        """
+        Args:
+            factors: Downsampling factors (4, 16, 64, ...) as returned by
+                get_downsample_factors
+            n_channels: Number of channels (size of the second axis of the blocks)
+            emit: Callback receiving (factor, bins) for each batch of completed bins
+            reduction: One of "minmax", "max" or "mean"
+        """
+        if reduction not in REDUCTIONS:
+            raise ValueError(
+                f"Unsupported reduction: {reduction} (expected one of {REDUCTIONS})"
+            )
+        for i, factor in enumerate(factors):
+            if factor != 4 ** (i + 1):
+                raise ValueError(f"Unexpected downsampling factors: {factors}")
+        self._factors = factors
+        self._emit = emit
+        self._reduction = reduction
+
+        # Internal per-bin state (B, S, M): [min, max] for minmax, [max] for
+        # max and [sum, count] for mean
+        self._state_dtype = np.float64 if reduction == "mean" else np.float32
+        n_state = 1 if reduction == "max" else 2
+        self._pending_raw = np.empty((0, n_channels), dtype=np.float32)
+        self._pending_states = [
+            np.empty((0, n_state, n_channels), dtype=self._state_dtype) for _ in factors
+        ]
+
+    def add_block(self, block: np.ndarray) -> None:
+        """
+        Add the next (n, M) block of raw samples
+        """
+        if not self._factors or len(block) == 0:
+            return
+        block, self._pending_raw = _take_groups_of_4(self._pending_raw, block)
+        if len(block) == 0:
+            return
+        blk = block.reshape((len(block) // 4, 4, block.shape[1]))
+        self._add_states(0, self._reduce_raw(blk))
+
+    def finish(self) -> None:
+        """
+        Flush the trailing partial groups at every level
+        """
+        if not self._factors:
+            return
+        if len(self._pending_raw) > 0:
+            rest = self._pending_raw
+            self._pending_raw = rest[:0]
+            self._add_states(0, self._reduce_raw(rest[np.newaxis]))
+        for level in range(1, len(self._factors)):
+            rest = self._pending_states[level]
+            if len(rest) > 0:
+                self._pending_states[level] = rest[:0]
+                self._add_states(level, self._combine_states(rest[np.newaxis]))
+
+    def _add_states(self, level: int, states: np.ndarray) -> None:
+        self._emit(self._factors[level], self._finalize(states))
+        next_level = level + 1
+        if next_level >= len(self._factors):
+            return
+        states, self._pending_states[next_level] = _take_groups_of_4(
+            self._pending_states[next_level], states
+        )
+        if len(states) == 0:
+            return
+        blk = states.reshape((len(states) // 4, 4) + states.shape[1:])
+        self._add_states(next_level, self._combine_states(blk))
+
+    def _reduce_raw(self, blk: np.ndarray) -> np.ndarray:
+        """(B, k, M) raw samples -> (B, S, M) states"""
+        out = np.empty(
+            (blk.shape[0], self._pending_states[0].shape[1], blk.shape[2]),
+            dtype=self._state_dtype,
+        )
+        if self._reduction == "minmax":
+            # fmin/fmax ignore NaNs without the temporary copies made by nanmin/nanmax
+            np.fmin.reduce(blk, axis=1, out=out[:, 0, :])
+            np.fmax.reduce(blk, axis=1, out=out[:, 1, :])
+        elif self._reduction == "max":
+            np.fmax.reduce(blk, axis=1, out=out[:, 0, :])
+        else:
+            valid = ~np.isnan(blk)
+            out[:, 0, :] = np.where(valid, blk, 0).sum(axis=1, dtype=np.float64)
+            out[:, 1, :] = valid.sum(axis=1)
+        return out
+
+    def _combine_states(self, blk: np.ndarray) -> np.ndarray:
+        """(B, k, S, M) states -> (B, S, M) states"""
+        if self._reduction == "minmax":
+            out = np.empty((blk.shape[0],) + blk.shape[2:], dtype=self._state_dtype)
+            np.fmin.reduce(blk[:, :, 0, :], axis=1, out=out[:, 0, :])
+            np.fmax.reduce(blk[:, :, 1, :], axis=1, out=out[:, 1, :])
+            return out
+        elif self._reduction == "max":
+            return np.fmax.reduce(blk, axis=1)
+        else:
+            return blk.sum(axis=1)
+
+    def _finalize(self, states: np.ndarray) -> np.ndarray:
+        """(B, S, M) states -> output bins"""
+        if self._reduction == "minmax":
+            return states
+        elif self._reduction == "max":
+            return states[:, 0, :]
+        else:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return (states[:, 0, :] / states[:, 1, :]).astype(np.float32)
+
+
+def _take_groups_of_4(
+    pending: np.ndarray, new: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Combine pending entries with new entries and split into a part whose
+    length is a multiple of 4 and the remaining (< 4) entries. When nothing is
+    pending, the multiple-of-4 prefix of `new` is returned without copying.
+    """
+    if len(pending) > 0:
+        n_fill = min(4 - len(pending), len(new))
+        head = np.concatenate([pending, new[:n_fill]], axis=0)
+        new = new[n_fill:]
+        if len(head) < 4:
+            return head[:0], head
+    else:
+        head = None
+    n_full = (len(new) // 4) * 4
+    rest = new[n_full:].copy()
+    full = new[:n_full]
+    if head is not None:
+        full = np.concatenate([head, full], axis=0)
+    return full, rest
+
+
+class ChunkedWriter:
+    """
+    Appends rows to a pre-allocated zarr array, buffering so that every write
+    covers whole chunks along the first axis (avoiding read-modify-write of
+    partially written chunks). Writes go through `group.write` when a group
+    is given, so they run in the background if the group writes in parallel.
+    """
+
+    def __init__(self, array: Any, group: Optional[Group] = None):
+        self._array = array
+        self._group = group
+        self._chunk_len = array.chunks[0]
+        self._offset = 0
+        self._buffer: List[np.ndarray] = []
+        self._buffer_len = 0
+
+    def append(self, rows: np.ndarray) -> None:
+        if len(rows) == 0:
+            return
+        if self._buffer_len == 0:
+            # Fast path: write the chunk-aligned prefix directly
+            n_direct = (len(rows) // self._chunk_len) * self._chunk_len
+            if n_direct > 0:
+                self._write(rows[:n_direct])
+                rows = rows[n_direct:]
+            if len(rows) > 0:
+                self._buffer.append(rows.copy())
+                self._buffer_len = len(rows)
+            return
+        self._buffer.append(rows)
+        self._buffer_len += len(rows)
+        if self._buffer_len >= self._chunk_len:
+            combined = np.concatenate(self._buffer, axis=0)
+            self._buffer = []
+            self._buffer_len = 0
+            self.append(combined)
+
+    def flush(self) -> None:
+        if self._buffer_len > 0:
+            combined = np.concatenate(self._buffer, axis=0)
+            self._buffer = []
+            self._buffer_len = 0
+            self._write(combined)
+
+    def _write(self, rows: np.ndarray) -> None:
+        selection = slice(self._offset, self._offset + len(rows))
+        if self._group is not None:
+            self._group.write(self._array, selection, rows)
+        else:
+            self._array[selection] = rows
+        self._offset += len(rows)
+
+
+def get_block_size_timepoints(
+    n_channels: int, block_size_mb: float = DEFAULT_BLOCK_SIZE_MB, align: int = 1
+) -> int:
+    """
+    Number of timepoints per block such that a float32 block is about
+    block_size_mb, rounded down to a multiple of `align` when possible and
+    always to a multiple of 4 (so first-level bins never straddle blocks).
+    """
+    block_size = int(block_size_mb * 1024 * 1024) // (max(n_channels, 1) * 4)
+    if block_size >= align:
+        block_size = (block_size // align) * align
+    return max((block_size // 4) * 4, 4)
+
+
+def iter_blocks(data: Any, block_size: int) -> Iterator[np.ndarray]:
+    """
+    Iterate over consecutive float32 blocks of timepoints of a 2D array-like
+    source (numpy array, np.memmap, h5py dataset, zarr array, ...)
+    """
+    n_timepoints = data.shape[0]
+    for i in range(0, n_timepoints, block_size):
+        block = data[i : min(i + block_size, n_timepoints)]
+        yield np.asarray(block, dtype=np.float32)
+
+
+def compute_pyramid(
+    data: Any,
+    *,
+    reduction: str = "minmax",
+    block_size_mb: float = DEFAULT_BLOCK_SIZE_MB,
+) -> Dict[int, np.ndarray]:
+    """
+    Compute all pyramid levels of a 2D (N, M) series as in-memory arrays
+
+    Args:
+        data: 2D array-like source (N timepoints × M channels)
+        reduction: One of "minmax", "max" or "mean"
+        block_size_mb: Approximate size of the blocks read from the source
+
+    Returns:
+        dict: {factor: float32 array} with shapes given by get_level_shape
+    """
+    n_timepoints, n_channels = data.shape
+    factors = get_downsample_factors(n_timepoints)
+    levels: Dict[int, List[np.ndarray]] = {factor: [] for factor in factors}
+
+    builder = PyramidBuilder(
+        factors=factors,
+        n_channels=n_channels,
+        emit=lambda factor, bins: levels[factor].append(bins),
+        reduction=reduction,
+    )
+    block_size = get_block_size_timepoints(n_channels, block_size_mb)
+    for block in iter_blocks(data, block_size):
+        builder.add_block(block)
+    builder.finish()
+
+    return {
+        factor: np.concatenate(parts, axis=0).astype(np.float32, copy=False)
+        for factor, parts in levels.items()
+    }
+
+
+def _identity(x: np.ndarray) -> np.ndarray:
+    return x
+
+
+def write_series_with_pyramid(
+    group: Group,
+    data: Any,
+    *,
+    get_chunks: Callable[[Tuple[int, ...]], Tuple[int, ...]],
+    reduction: str = "minmax",
+    block_size_mb: float = DEFAULT_BLOCK_SIZE_MB,
+    name: str = "data",
+    quantization: Optional[Quantization] = None,
+) -> Dict[int, Tuple[int, ...]]:
+    """
+    Write a 2D (N, M) series to `group[name]` as float32 together with its
+    pyramid levels `group[f"{name}_ds_{factor}"]`, in a single pass over the
+    data. Peak memory is bounded by the block size.
+
+    With a quantization, the series and its levels are stored in the integer
+    dtype of the quantization instead. The levels are computed from the
+    quantized series, so they are exactly the min/max of the stored values.
+
+    Args:
+        group: Zarr group to write into
+        data: 2D array-like source (N timepoints × M channels)
+        get_chunks: Function mapping an array shape to its chunk shape
+        reduction: One of "minmax", "max" or "mean"
+        block_size_mb: Approximate size of the blocks read from the source
+        name: Name of the raw dataset (levels are named f"{name}_ds_{factor}")
+        quantization: Optional integer quantization (see quantization.py)
+
+    Returns:
+        dict: {factor: shape} of the written pyramid levels
+    """
+    if quantization is not None and reduction == "mean":
+        raise ValueError("Quantized storage does not support the mean reduction")
+    n_timepoints, n_channels = data.shape
+    dtype = quantization.dtype if quantization is not None else np.float32
+    to_stored = quantization.to_stored if quantization is not None else _identity
+
+    data_chunks = get_chunks((n_timepoints, n_channels))
+    data_writer = ChunkedWriter(
+        group.create_dataset(
+            name,
+            shape=(n_timepoints, n_channels),
+            dtype=dtype,
+            chunks=data_chunks,
+            role="signal",
+        ),
+        group,
+    )
+
+    level_shapes: Dict[int, Tuple[int, ...]] = {}
+    level_writers: Dict[int, ChunkedWriter] = {}
+    for factor in get_downsample_factors(n_timepoints):
+        shape = get_level_shape(n_timepoints, n_channels, factor, reduction)
+        level_shapes[factor] = shape
+        level_writers[factor] = ChunkedWriter(
+            group.create_dataset(
+                f"{name}_ds_{factor}",
+                shape=shape,
+                dtype=dtype,
+                chunks=get_chunks(shape),
+                role="signal",
+            ),
+            group,
+        )
+
+    builder = PyramidBuilder(
+        factors=list(level_shapes.keys()),
+        n_channels=n_channels,
+        emit=lambda factor, bins: level_writers[factor].append(to_stored(bins)),
+        reduction=reduction,
+    )
+    block_size = get_block_size_timepoints(
+        n_channels, block_size_mb, align=data_chunks[0]
+    )
+    for block in iter_blocks(data, block_size):
+        if quantization is not None:
+            block = quantization.quantize(block)
+        data_writer.append(to_stored(block))
+        builder.add_block(block)
+    builder.finish()
+
+    data_writer.flush()
+    for writer in level_writers.values():
+        writer.flush()
+
+    return level_shapes
@@ -0,0 +1,186 @@
+"""
+Quantized integer storage of uniformly sampled series
+
+Views that store long uniformly sampled series (see pyramid.py) can store the
+raw data and the min/max pyramid levels as int16 or int8 instead of float32.
+Each channel has a scale and an offset, and the viewer displays
+
+    value = stored * scale + offset
+
+Channels whose values are all integers that fit in the storage dtype (int16
+recordings, for example) are stored exactly, with a scale of 1. Other
+channels are mapped linearly onto the range of the storage dtype, which is a
+lossy quantization: every stored value, including the min and max of the
+pyramid bins, is within scale / 2 of the true value. If the series has NaNs,
+they are stored as the smallest value of the dtype, which is then not used for
+data. Otherwise the whole range of the dtype holds data, so that int16 data
+spanning -32768..32767 is stored unchanged.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+STORAGE_DTYPES = ("float32", "int16", "int8")
+
+
+class Quantization:
+    """
+    Per-channel linear quantization of a series to an integer dtype
+    """
+
+    def __init__(
+        self,
+        *,
+        dtype: Any,
+        scale: np.ndarray,
+        offset: np.ndarray,
+        exact: np.ndarray,
+        has_nan: bool = True,
+    ):
+        """
+        Args:
+            dtype: Integer storage dtype (int16 or int8)
+            scale: Per-channel scale (M,)
+            offset: Per-channel offset (M,)
+            exact: Per-channel flags, True when the channel is stored exactly
+            has_nan: Whether the series has NaNs, for which the smallest value
+                of the dtype is then reserved
+        """
+        self.dtype = np.dtype(dtype)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.offset = np.asarray(offset, dtype=np.float64)
+        self.exact = np.asarray(exact, dtype=bool)
+        info = np.iinfo(self.dtype)
+        self.max_stored = int(info.max)
+        if has_nan:
+            # The smallest value is reserved for NaN, which keeps the range
+            # symmetric
+            self.nan_value: Optional[int] = int(info.min)
+            self.min_stored = -self.max_stored
+        else:
+            self.nan_value = None
+            self.min_stored = int(info.min)
+
+    @property
+    def max_error(self) -> np.ndarray:
+        """
+        Per-channel bound of the absolute quantization error
+        """
+        return np.where(self.exact, 0.0, self.scale / 2)
+
+    def quantize(self, block: np.ndarray) -> np.ndarray:
+        """
+        Quantize an (n, M) float32 block to integer-valued float32 (NaNs are
+        kept), from which the pyramid levels are computed
+        """
+        ret = np.round((block - self.offset) / self.scale).astype(np.float32)
+        np.clip(ret, self.min_stored, self.max_stored, out=ret)
+        return ret
+
+    def to_stored(self, quantized: np.ndarray) -> np.ndarray:
+        """
+        Convert the output of quantize() to the storage dtype
+        """
+        if self.nan_value is None:
+            return quantized.astype(self.dtype)
+        return np.where(np.isnan(quantized), self.nan_value, quantized).astype(
+            self.dtype
+        )
+
+    def dequantize(self, stored: np.ndarray) -> np.ndarray:
+        """
+        The values represented by stored integers, as float32
+        """
+        ret = stored * self.scale + self.offset
+        if self.nan_value is not None:
+            ret[stored == self.nan_value] = np.nan
+        return ret.astype(np.float32)
+
+    def to_attrs(self) -> Dict[str, Any]:
+        """
+        The zarr attribute describing the quantization, read by the viewer
+        (nan_value is null when the series has no NaNs)
+        """
+        return {
+            "dtype": self.dtype.name,
+            "scale": [float(x) for x in self.scale],
+            "offset": [float(x) for x in self.offset],
+            "nan_value": self.nan_value,
+            "max_error": [float(x) for x in self.max_error],
+        }
+
+
+def get_quantization(
+    blocks: Any,
+    *,
+    n_channels: int,
+    storage_dtype: str,
+    max_error: Optional[float] = None,
+) -> Optional[Quantization]:
+    """
+    Compute the quantization of a series from a pass over its blocks
+
+    Args:
+        blocks: Iterable of (n, M) float32 blocks of the series (see
+            pyramid.iter_blocks)
+        n_channels: Number of channels M
+        storage_dtype: One of STORAGE_DTYPES
+        max_error: Optional bound of the absolute quantization error. A
+            ValueError is raised if a channel cannot be stored within it.
+
+    Returns:
+        The quantization, or None for float32 storage
+    """
+    if storage_dtype not in STORAGE_DTYPES:
+        raise ValueError(
+            f"Unsupported storage dtype: {storage_dtype} "
+            f"(expected one of {STORAGE_DTYPES})"
+        )
+    if storage_dtype == "float32":
+        return None
+
+    info = np.iinfo(np.dtype(storage_dtype))
+    max_stored = int(info.max)
+    data_min = np.full(n_channels, np.inf)
+    data_max = np.full(n_channels, -np.inf)
+    integral = np.ones(n_channels, dtype=bool)
+    has_nan = False
+    for block in blocks:
+        with np.errstate(invalid="ignore"):
+            data_min = np.fmin(data_min, np.fmin.reduce(block, axis=0))
+            data_max = np.fmax(data_max, np.fmax.reduce(block, axis=0))
+            is_nan = np.isnan(block)
+            integral &= np.all((block == np.round(block)) | is_nan, axis=0)
+            has_nan = has_nan or bool(is_nan.any())
+    # Without NaNs, the smallest value of the dtype is available for data
+    min_stored = -max_stored if has_nan else int(info.min)
+
+    empty = ~(data_min <= data_max)
+    data_min[empty] = 0
+    data_max[empty] = 0
+    center = np.round((data_min + data_max) / 2)
+    exact = (
+        integral & (data_max - center <= max_stored) & (data_min - center >= min_stored)
+    )
+    scale = np.where(exact, 1.0, (data_max - data_min) / (2 * max_stored))
+    offset = np.where(exact, center, (data_min + data_max) / 2)
+    # Constant channels are stored exactly
+    exact |= scale == 0
+    scale[scale == 0] = 1.0
+
+    quantization = Quantization(
+        dtype=storage_dtype, scale=scale, offset=offset, exact=exact, has_nan=has_nan
+    )
+    if max_error is not None:
+        too_coarse: List[int] = np.flatnonzero(
+            quantization.max_error > max_error
+        ).tolist()
+        if too_coarse:
+            raise ValueError(
+                f"Quantization to {storage_dtype} exceeds the maximum error "
+                f"{max_error} on channels {too_coarse} (errors up to "
+                f"{float(quantization.max_error.max()):g}); use a wider "
+                f"storage dtype"
+            )
+    return quantization
@@ -1,28 +1,252 @@
-from typing import Any, Dict
+import threading
+from collections.abc import MutableMapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
 import numpy as np
 
+from ._codecs import select_codecs
+
+if TYPE_CHECKING:
+    from ._subview_cache import SubviewCacheSession
+    from .figpack_view import FigpackView
+
 _UNSPECIFIED = object()
 
+# Approximate amount of data handed to a single parallel write task
+PARALLEL_WRITE_BLOCK_BYTES = 4 * 1024 * 1024
+
+
+class ParallelChunkWriter:
+    """
+    Thread pool that compresses and writes zarr chunks in the background
+
+    Each task writes a chunk-aligned block of an array, so concurrent tasks
+    never touch the same chunk. The compressors (blosc, zstd, zlib, ...)
+    release the GIL, so the work spreads over all workers. The number of
+    queued tasks is bounded so that pending data does not pile up in memory.
+    """
+
+    def __init__(self, num_workers: int):
+        self.num_workers = num_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=num_workers, thread_name_prefix="figpack_zarr_write"
+        )
+        self._slots = threading.BoundedSemaphore(2 * num_workers)
+        self._lock = threading.Lock()
+        self._futures: List[Future] = []
+
+    def submit(self, fn: Callable[..., None], *args: Any) -> None:
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        with self._lock:
+            self._futures.append(future)
+
+    def flush(self) -> None:
+        """
+        Wait for all submitted writes, raising the first error encountered
+        """
+        with self._lock:
+            futures = self._futures
+            self._futures = []
+        for future in futures:
+            future.result()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+class GroupAttributes(MutableMapping):
+    """
+    The attributes of a Group, with writes buffered until the group is
+    flushed
+
+    Each assignment to the attributes of a zarr group rewrites its whole
+    .zattrs document, and views set many attributes one at a time. Here the
+    assignments are collected and written with a single update per group
+    when Group.flush() is called. Reads see the buffered values, so the
+    values must not be modified in place before the flush.
+    """
+
+    def __init__(self, zarr_group: Any, dirty: List["GroupAttributes"]):
+        """
+        Args:
+            zarr_group: The underlying zarr group
+            dirty: The attributes with buffered writes, shared by a group
+                and its subgroups so that flushing one flushes them all
+        """
+        self._zarr_group = zarr_group
+        self._zarr_attrs = zarr_group.attrs
+        self._dirty = dirty
+        self._pending: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._pending:
+            return self._pending[key]
+        return self._zarr_attrs[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if not self._pending:
+            self._dirty.append(self)
+        self._pending[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        self.flush()
+        del self._zarr_attrs[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._pending
+        for key in self._zarr_attrs:
+            if key not in self._pending:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._pending or key in self._zarr_attrs
+
+    def flush(self) -> None:
+        """
+        Write the buffered attributes to the zarr group
+        """
+        if not self._pending:
+            return
+        pending = self._pending
+        self._pending = {}
+        if _check_zarr_version() == 3:
+            # Attributes.update of zarr 3 writes the metadata once per key
+            self._zarr_group.update_attributes(pending)
+        else:
+            self._zarr_attrs.update(pending)
+
 
 class Group:
-    def __init__(self, zarr_group):
+    def __init__(
+        self,
+        zarr_group,
+        *,
+        parallel_writer: Optional[ParallelChunkWriter] = None,
+        subview_cache: Optional["SubviewCacheSession"] = None,
+        _dirty_attrs: Optional[List[GroupAttributes]] = None,
+    ):
+        """
+        Args:
+            zarr_group: The underlying zarr group
+            parallel_writer: If provided, dataset data is written in the
+                background by this writer (shared by all subgroups) and
+                flush() must be called before the data is read back
+            subview_cache: If provided, write_view reuses the data written
+                for unchanged subviews (shared by all subgroups)
+
+        Attribute writes are buffered (see GroupAttributes): they reach the
+        zarr groups when flush() is called on any group of the tree, or
+        before a member is returned by group[key].
+        """
         self._zarr_group = zarr_group
+        self._parallel_writer = parallel_writer
+        self._subview_cache = subview_cache
+        self._dirty_attrs: List[GroupAttributes] = (
+            _dirty_attrs if _dirty_attrs is not None else []
+        )
+        self._attrs: Optional[GroupAttributes] = None
 
     def create_group(self, name: str) -> "Group":
-        return Group(self._zarr_group.create_group(name))
+        return Group(
+            self._zarr_group.create_group(name),
+            parallel_writer=self._parallel_writer,
+            subview_cache=self._subview_cache,
+            _dirty_attrs=self._dirty_attrs,
+        )
+
+    def write_view(self, view: "FigpackView") -> None:
+        """
+        Write a child view into this group, which must have just been created
+        for it. With a subview cache, the data of a view that was already
+        written in this process is copied instead of being recomputed.
+        """
+        if self._subview_cache is None:
+            view.write_to_zarr_group(self)
+        else:
+            self._subview_cache.write_view(view, self)
 
     def create_dataset(
         self,
         name: str,
         *,
         data=_UNSPECIFIED,
+        shape=_UNSPECIFIED,
         dtype=_UNSPECIFIED,
         chunks=_UNSPECIFIED,
         compressor=_UNSPECIFIED,
-    ) -> None:
+        filters=_UNSPECIFIED,
+        role: Optional[str] = None,
+    ) -> Any:
+        """
+        Create a dataset in this group.
+
+        Either provide `data`, or provide `shape` and `dtype` to create an empty
+        dataset that is subsequently filled by slice assignment on the returned
+        array (used for writing data that does not fit in memory).
+
+        With a parallel writer, the chunks of `data` are compressed and
+        written in the background, so `data` must not be modified before
+        flush() is called.
+
+        Args:
+            role: What the dataset holds ("signal", "timestamps", "indices",
+                "precompressed" or "text"), used to pick its codecs unless
+                `compressor` or `filters` is given (see _codecs)
+
+        Returns:
+            The underlying zarr array
+        """
+        if (
+            compressor is _UNSPECIFIED
+            and filters is _UNSPECIFIED
+            and _get_zarr_format(self._zarr_group) == 2
+        ):
+            if data is not _UNSPECIFIED:
+                dataset_dtype = getattr(data, "dtype", None)
+            else:
+                dataset_dtype = dtype if dtype is not _UNSPECIFIED else None
+            if dataset_dtype is not None:
+                codecs = select_codecs(
+                    dataset_dtype,
+                    role,
+                    sample=data if isinstance(data, np.ndarray) else None,
+                )
+                if codecs is not None:
+                    filters, compressor = codecs
+
+        if self._parallel_writer is not None and _is_parallel_writable(data):
+            array = self.create_dataset(
+                name,
+                shape=data.shape,
+                dtype=data.dtype,
+                chunks=chunks,
+                compressor=compressor,
+                filters=filters,
+            )
+            chunk_len = array.chunks[0]
+            row_bytes = max(data[:1].nbytes, 1)
+            chunks_per_block = max(
+                1, PARALLEL_WRITE_BLOCK_BYTES // (row_bytes * chunk_len)
+            )
+            block_len = chunk_len * chunks_per_block
+            for i in range(0, data.shape[0], block_len):
+                self.write(array, slice(i, i + block_len), data[i : i + block_len])
+            return array
+
         kwargs = {}
         if data is not _UNSPECIFIED:
             kwargs["data"] = data
+        if shape is not _UNSPECIFIED:
+            kwargs["shape"] = shape
         if dtype is not _UNSPECIFIED:
             kwargs["dtype"] = dtype
         if chunks is not _UNSPECIFIED:
@@ -32,20 +256,58 @@ class Group:
                 chunks2 = _get_optimal_chunk_size(data.shape, data.dtype)
                 if chunks2 is not _UNSPECIFIED:
                     kwargs["chunks"] = chunks2
+            elif shape is not _UNSPECIFIED and dtype is not _UNSPECIFIED:
+                chunks2 = _get_optimal_chunk_size(shape, dtype)
+                if chunks2 is not _UNSPECIFIED:
+                    kwargs["chunks"] = chunks2
         if compressor is not _UNSPECIFIED:
             kwargs["compressor"] = compressor
+        if filters is not _UNSPECIFIED:
+            kwargs["filters"] = filters
         if _check_zarr_version() == 2:
-            self._zarr_group.create_dataset(name, **kwargs)
+            return self._zarr_group.create_dataset(name, **kwargs)
         elif _check_zarr_version() == 3:
-            self._zarr_group.create_array(name, **kwargs)  # type: ignore
+            if "compressor" in kwargs:
+                # `compressor` is deprecated in zarr 3
+                kwargs["compressors"] = kwargs.pop("compressor")
+            return self._zarr_group.create_array(name, **kwargs)  # type: ignore
         else:
             raise RuntimeError("Unsupported Zarr version")
 
+    def write(self, array: Any, selection: Any, values: Any) -> None:
+        """
+        Assign `array[selection] = values`, in the background if this group
+        has a parallel writer. The selection must cover whole chunks.
+        """
+        if self._parallel_writer is None:
+            array[selection] = values
+        else:
+            self._parallel_writer.submit(array.__setitem__, selection, values)
+
+    def flush(self) -> None:
+        """
+        Write the buffered attributes of this group and of the groups created
+        from it, and wait until all background writes have completed
+        """
+        self._flush_attrs()
+        if self._parallel_writer is not None:
+            self._parallel_writer.flush()
+
+    def _flush_attrs(self) -> None:
+        dirty = list(self._dirty_attrs)
+        self._dirty_attrs.clear()
+        for attrs in dirty:
+            attrs.flush()
+
     @property
-    def attrs(self) -> Dict[str, Any]:
-        return self._zarr_group.attrs  # type: ignore
+    def attrs(self) -> GroupAttributes:
+        if self._attrs is None:
+            self._attrs = GroupAttributes(self._zarr_group, self._dirty_attrs)
+        return self._attrs
 
     def __getitem__(self, key: str) -> Any:
+        # The returned zarr object reads its attributes from the store
+        self._flush_attrs()
         return self._zarr_group[key]
 
     # implement in operator
@@ -59,6 +321,24 @@ class Group:
         return reversed(self._zarr_group)
 
 
+def _is_parallel_writable(data: Any) -> bool:
+    # Object and string arrays need codecs that are only picked when the data
+    # is passed to zarr directly, so they are written synchronously
+    return (
+        isinstance(data, np.ndarray)
+        and data.ndim >= 1
+        and data.shape[0] > 0
+        and data.dtype.kind in "biufc"
+    )
+
+
+def _get_zarr_format(zarr_group) -> int:
+    # The codecs of select_codecs are those of the zarr v2 format, which is
+    # the one figure bundles use. zarr 3 also creates v3 groups.
+    metadata = getattr(zarr_group, "metadata", None)
+    return getattr(metadata, "zarr_format", 2)
+
+
 def _check_zarr_version():
     import zarr
 
@@ -2,7 +2,7 @@
 Box view for figpack - a layout container that handles other views
 """
 
-from typing import List, Literal, Optional
+from typing import Iterator, List, Literal, Optional
 
 from ..core.figpack_view import FigpackView
 from ..core.zarr import Group
@@ -42,6 +42,11 @@ class Box(FigpackView):
         self.items = items
         self.title = title
 
+    def iter_child_views(self) -> Iterator[FigpackView]:
+        """The views of the layout items"""
+        for item in self.items:
+            yield item.view
+
     def write_to_zarr_group(self, group: Group) -> None:
         """
         Write the Box layout data to a Zarr group
@@ -73,7 +78,7 @@ class Box(FigpackView):
             item_group = group.create_group(item_name)
 
             # Recursively write the child view to the subgroup
-            item.view.write_to_zarr_group(item_group)
+            item_group.write_view(item.view)
 
         # Store the items metadata
         group.attrs["items"] = items_metadata
@@ -2,7 +2,7 @@
 CaptionedView for figpack - displays a view with a caption below it
 """
 
-from typing import Optional
+from typing import Iterator, Optional
 import numpy as np
 
 from ..core.figpack_view import FigpackView
@@ -34,6 +34,10 @@ class CaptionedView(FigpackView):
         self.caption = caption
         self.font_size = font_size if font_size is not None else 14
 
+    def iter_child_views(self) -> Iterator[FigpackView]:
+        """The captioned view"""
+        yield self.view
+
     def write_to_zarr_group(self, group: Group) -> None:
         """
         Write the CaptionedView data to a Zarr group
@@ -52,7 +56,7 @@ class CaptionedView(FigpackView):
         caption_array = np.frombuffer(caption_bytes, dtype=np.uint8)
 
         # Store the caption as a zarr array
-        group.create_dataset("caption_data", data=caption_array)
+        group.create_dataset("caption_data", data=caption_array, role="text")
 
         # Store caption size in attrs
         group.attrs["caption_size"] = len(caption_bytes)
@@ -61,4 +65,4 @@ class CaptionedView(FigpackView):
         child_group = group.create_group("child_view")
 
         # Recursively write the child view to the subgroup
-        self.view.write_to_zarr_group(child_group)
+        child_group.write_view(self.view)
@@ -1,15 +1,38 @@
 """
 DataFrame view for figpack - displays pandas DataFrames as interactive tables
+
+Each column is stored as its own zarr array, column_<i>, chunked by rows so
+that the viewer can load the table a page of rows at a time:
+
+- Numeric columns keep their dtype, bool columns are stored as uint8 (0/1)
+- Datetime columns are stored as int64 counts of the coarsest unit ("s",
+  "ms", "us" or "ns") that represents all values exactly, in the wall time of
+  the column's time zone. Nanosecond counts exceed the integers that a
+  JavaScript number holds exactly, so "ns" columns store whole seconds, with
+  the remaining nanoseconds as int32 in column_<i>_nanoseconds
+- Other columns (strings, categories, objects) are dictionary encoded: the
+  column stores integer codes (-1 for missing values) into a list of distinct
+  values, stored as JSON (UTF-8 bytes) in column_<i>_dictionary
+
+Missing values of integer, bool and datetime columns are flagged by a uint8
+column_<i>_mask (1 for missing), missing floats are NaN. The column_info
+attribute describes the columns and their encodings.
 """
 
 import json
+from typing import Any, Dict
 
 import numpy as np
-import zarr
 
 from ..core.figpack_view import FigpackView
 from ..core.zarr import Group
 
+# Number of rows per chunk of the column arrays
+ROW_CHUNK_SIZE = 100_000
+
+# Datetime units, with their number of nanoseconds, from the coarsest
+DATETIME_UNITS = (("s", 10**9), ("ms", 10**6), ("us", 10**3), ("ns", 1))
+
 
 class DataFrame(FigpackView):
     """
@@ -44,50 +67,31 @@ class DataFrame(FigpackView):
         group.attrs["view_type"] = "DataFrame"
 
         try:
-            # Convert DataFrame to CSV string
-            csv_string = self.df.to_csv(index=False)
-
-            # Convert CSV string to bytes and store in numpy array
-            csv_bytes = csv_string.encode("utf-8")
-            csv_array = np.frombuffer(csv_bytes, dtype=np.uint8)
-
-            # Store the CSV data as compressed array
-            group.create_dataset(
-                "csv_data",
-                data=csv_array,
-            )
+            row_count = len(self.df)
+            chunks = (max(1, min(row_count, ROW_CHUNK_SIZE)),)
 
-            # Store metadata about the DataFrame
-            group.attrs["data_size"] = len(csv_bytes)
-            group.attrs["row_count"] = len(self.df)
-            group.attrs["column_count"] = len(self.df.columns)
-
-            # Store column information
+            # Store the columns one at a time
             column_info = []
-            for col in self.df.columns:
-                dtype_str = str(self.df[col].dtype)
-                # Simplify dtype names for frontend
-                if dtype_str.startswith("int"):
-                    simple_dtype = "integer"
-                elif dtype_str.startswith("float"):
-                    simple_dtype = "float"
-                elif dtype_str.startswith("bool"):
-                    simple_dtype = "boolean"
-                elif dtype_str.startswith("datetime"):
-                    simple_dtype = "datetime"
-                elif dtype_str == "object":
-                    # Check if it's actually strings
-                    if self.df[col].dtype == "object":
-                        simple_dtype = "string"
-                    else:
-                        simple_dtype = "object"
-                else:
-                    simple_dtype = "string"
-
+            for i, col in enumerate(self.df.columns):
+                info = _write_column(
+                    group, f"column_{i}", self.df.iloc[:, i], chunks=chunks
+                )
+                dtype_str = str(self.df.iloc[:, i].dtype)
                 column_info.append(
-                    {"name": str(col), "dtype": dtype_str, "simple_dtype": simple_dtype}
+                    {
+                        "name": str(col),
+                        "dtype": dtype_str,
+                        "simple_dtype": _get_simple_dtype(dtype_str),
+                        **info,
+                    }
                 )
 
+            # Store metadata about the DataFrame
+            group.attrs["format"] = "columns"
+            group.attrs["row_count"] = row_count
+            group.attrs["column_count"] = len(self.df.columns)
+            group.attrs["row_chunk_size"] = chunks[0]
+
             # Store column info as JSON string
             column_info_json = json.dumps(column_info)
             group.attrs["column_info"] = column_info_json
@@ -97,7 +101,119 @@ class DataFrame(FigpackView):
             group.attrs["error"] = f"Failed to process DataFrame: {str(e)}"
             group.attrs["row_count"] = 0
             group.attrs["column_count"] = 0
-            group.attrs["data_size"] = 0
             group.attrs["column_info"] = "[]"
-            # Create empty array as placeholder
-            group.create_dataset("csv_data", data=np.array([], dtype=np.uint8))
+
+
+def _get_simple_dtype(dtype_str: str) -> str:
+    # Simplify dtype names for frontend (nullable dtypes are capitalized)
+    dtype_str = dtype_str.lower()
+    if dtype_str.startswith("int") or dtype_str.startswith("uint"):
+        return "integer"
+    elif dtype_str.startswith("float"):
+        return "float"
+    elif dtype_str.startswith("bool"):
+        return "boolean"
+    elif dtype_str.startswith("datetime"):
+        return "datetime"
+    else:
+        return "string"
+
+
+def _write_column(group: Group, name: str, series, *, chunks) -> Dict[str, Any]:
+    """
+    Write a column (see the module docstring)
+
+    Returns:
+        The encoding of the column, added to its column info
+    """
+    import pandas as pd
+
+    dtype = series.dtype
+    missing = series.isna().to_numpy()
+    if pd.api.types.is_bool_dtype(dtype):
+        values = series.to_numpy(dtype=np.uint8, na_value=0)
+        info = {"encoding": "boolean"}
+        role = "indices"
+    elif pd.api.types.is_integer_dtype(dtype):
+        numpy_dtype = getattr(dtype, "numpy_dtype", dtype)
+        values = series.to_numpy(dtype=numpy_dtype, na_value=0)
+        info = {"encoding": "numeric"}
+        role = None
+    elif pd.api.types.is_float_dtype(dtype):
+        # float16 is not decoded by the viewer
+        numpy_dtype = np.promote_types(getattr(dtype, "numpy_dtype", dtype), np.float32)
+        values = series.to_numpy(dtype=numpy_dtype, na_value=np.nan)
+        info = {"encoding": "numeric"}
+        # NaNs mark the missing values
+        missing = None
+        role = None
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        values, info = _encode_datetimes(series, missing)
+        role = None
+        if info["unit"] == "ns":
+            seconds, nanoseconds = np.divmod(values, 10**9)
+            values = seconds
+            group.create_dataset(
+                f"{name}_nanoseconds",
+                data=nanoseconds.astype(np.int32),
+                chunks=chunks,
+                role=role,
+            )
+    else:
+        values, dictionary = _encode_dictionary(series)
+        group.create_dataset(
+            f"{name}_dictionary",
+            data=np.frombuffer(json.dumps(dictionary).encode("utf-8"), dtype=np.uint8),
+            role="text",
+        )
+        info = {"encoding": "dictionary"}
+        # Code -1 marks the missing values
+        missing = None
+        role = "indices"
+
+    group.create_dataset(name, data=values, chunks=chunks, role=role)
+    if missing is not None and missing.any():
+        group.create_dataset(
+            f"{name}_mask", data=missing.astype(np.uint8), chunks=chunks, role="indices"
+        )
+        info["has_mask"] = True
+    return info
+
+
+def _encode_datetimes(series, missing: np.ndarray):
+    """
+    Datetimes as int64 counts of the coarsest exact unit
+    """
+    if getattr(series.dt, "tz", None) is not None:
+        # Wall time of the time zone
+        series = series.dt.tz_localize(None)
+    values = series.to_numpy(dtype="datetime64[ns]").view(np.int64).copy()
+    values[missing] = 0
+    for unit, ns in DATETIME_UNITS:
+        if np.all(values % ns == 0):
+            values //= ns
+            break
+    date_only = unit == "s" and bool(np.all(values % 86400 == 0))
+    return values, {"encoding": "datetime", "unit": unit, "date_only": date_only}
+
+
+def _encode_dictionary(series):
+    """
+    Integer codes (-1 for missing) into the list of distinct values, as strings
+    """
+    import pandas as pd
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        dictionary = [str(value) for value in series.cat.categories]
+    else:
+        # Values as strings (objects such as lists are not hashable)
+        strings = series.astype(object).where(series.isna(), series.astype(str))
+        codes, uniques = pd.factorize(strings, use_na_sentinel=True)
+        dictionary = [str(value) for value in uniques]
+    for code_dtype in (np.int8, np.int16, np.int32):
+        if len(dictionary) <= np.iinfo(code_dtype).max:
+            break
+    else:
+        code_dtype = np.int64
+    return codes.astype(code_dtype), dictionary
@@ -2,7 +2,7 @@
 Gallery view for figpack - a gallery layout container that handles other views with separate timeseries contexts
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 from ..core.figpack_view import FigpackView
 from ..core.zarr import Group
@@ -44,6 +44,11 @@ class Gallery(FigpackView):
             max(0, min(initial_item_index, len(items) - 1)) if items else 0
         )
 
+    def iter_child_views(self) -> Iterator[FigpackView]:
+        """The views of the gallery items"""
+        for item in self.items:
+            yield item.view
+
     def write_to_zarr_group(self, group: Group) -> None:
         """
         Write the Gallery data to a Zarr group
@@ -80,7 +85,7 @@ class Gallery(FigpackView):
 
             # Recursively write the child view to the subgroup
             # This allows any figpack view to be contained within a gallery item
-            item.view.write_to_zarr_group(item_group)
+            item_group.write_view(item.view)
 
         # Store the complete items metadata in the group attributes
         # This will be used by the frontend to render the gallery structure
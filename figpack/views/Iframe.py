@@ -37,7 +37,7 @@ class Iframe(FigpackView):
         url_array = np.frombuffer(url_bytes, dtype=np.uint8)
 
         # Store the URL as a zarr array
-        group.create_dataset("url_data", data=url_array)
+        group.create_dataset("url_data", data=url_array, role="text")
 
         # Store URL size in attrs
         group.attrs["data_size"] = len(url_bytes)
@@ -2,6 +2,7 @@
 Image view for figpack - displays PNG and JPG images
 """
 
+import os
 from typing import Union
 
 import numpy as np
@@ -69,6 +70,16 @@ class Image(FigpackView):
         except Exception as e:
             raise ValueError(f"Failed to download image from URL: {str(e)}")
 
+    def _get_fingerprint_inputs(self):
+        if isinstance(self.image_path_or_data, str):
+            # The file may have changed since the figure was last shown
+            try:
+                stat = os.stat(self.image_path_or_data)
+            except OSError:
+                return None
+            return [self.image_path_or_data, stat.st_size, stat.st_mtime_ns]
+        return vars(self)
+
     def write_to_zarr_group(self, group: Group) -> None:
         """
         Write the image data to a Zarr group
@@ -98,6 +109,7 @@ class Image(FigpackView):
             group.create_dataset(
                 "image_data",
                 data=image_array,
+                role="precompressed",
             )
 
             # Try to determine format from file signature
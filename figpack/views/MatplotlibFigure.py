@@ -6,7 +6,6 @@ import io
 import numpy as np
 from typing import Any, Union
 
-import zarr
 
 from ..core.figpack_view import FigpackView
 from ..core.zarr import Group
@@ -55,6 +54,7 @@ class MatplotlibFigure(FigpackView):
             group.create_dataset(
                 "svg_data",
                 data=svg_array,
+                role="text",
             )
 
             # Store figure dimensions for reference
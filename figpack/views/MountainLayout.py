@@ -2,7 +2,7 @@
 MountainLayout view for figpack - a workspace-style layout container with left panel and split right panel
 """
 
-from typing import List
+from typing import Iterator, List
 
 from ..core.figpack_view import FigpackView
 from ..core.zarr import Group
@@ -33,6 +33,11 @@ class MountainLayout(FigpackView):
         """
         self.items = items
 
+    def iter_child_views(self) -> Iterator[FigpackView]:
+        """The views of the mountain layout items"""
+        for item in self.items:
+            yield item.view
+
     def write_to_zarr_group(self, group: Group) -> None:
         """
         Write the MountainLayout data to a Zarr group
@@ -65,7 +70,7 @@ class MountainLayout(FigpackView):
 
             # Recursively write the child view to the subgroup
             # This allows any figpack view to be contained within a mountain layout item
-            item.view.write_to_zarr_group(item_group)
+            item_group.write_view(item.view)
 
         # Store the complete items metadata in the group attributes
         # This will be used by the frontend to render the mountain layout structure
@@ -3,11 +3,18 @@ Multi-channel timeseries visualization component
 """
 
 import math
-from typing import List, Optional, Union
+from typing import Any, List, Optional, Union
 
 import numpy as np
 
 from ..core.figpack_view import FigpackView
+from ..core.pyramid import (
+    compute_pyramid,
+    get_block_size_timepoints,
+    iter_blocks,
+    write_series_with_pyramid,
+)
+from ..core.quantization import STORAGE_DTYPES, get_quantization
 from ..core.zarr import Group
 
 
@@ -21,8 +28,11 @@ class MultiChannelTimeseries(FigpackView):
         *,
         start_time_sec: float,
         sampling_frequency_hz: float,
-        data: np.ndarray,
+        data: Any,
         channel_ids: Optional[List[Union[str, int]]] = None,
+        block_size_mb: float = 64.0,
+        storage_dtype: str = "float32",
+        max_quantization_error: Optional[float] = None,
     ):
         """
         Initialize a MultiChannelTimeseries view
@@ -30,15 +40,48 @@ class MultiChannelTimeseries(FigpackView):
         Args:
             start_time_sec: Starting time in seconds
             sampling_frequency_hz: Sampling rate in Hz
-            data: N×M numpy array where N is timepoints and M is channels
+            data: N×M array where N is timepoints and M is channels. Either an
+                in-memory numpy array or an array-like source that supports
+                `shape`, `dtype` and slicing along the first axis (np.memmap,
+                h5py/lindi dataset, zarr array). Array-like sources are read
+                block by block and are never loaded into memory as a whole.
             channel_ids: Optional list of channel identifiers
+            block_size_mb: Approximate size (as float32) of the blocks of
+                timepoints read at a time when writing the data and computing
+                the downsampled levels. This bounds the peak memory usage.
+            storage_dtype: "float32" (default), or "int16" or "int8" to store
+                the data and the downsampled levels as integers with a
+                per-channel scale and offset (see figpack.core.quantization).
+                Integer data that fits in the dtype (e.g. raw int16
+                recordings) is stored exactly; other data is quantized.
+            max_quantization_error: Optional bound of the absolute error of
+                the quantized values. Writing the view raises a ValueError if
+                a channel cannot be stored within it.
         """
-        assert data.ndim == 2, "Data must be a 2D array (timepoints × channels)"
+        assert len(data.shape) == 2, "Data must be a 2D array (timepoints × channels)"
         assert sampling_frequency_hz > 0, "Sampling frequency must be positive"
+        assert block_size_mb > 0, "Block size must be positive"
+        if storage_dtype not in STORAGE_DTYPES:
+            raise ValueError(
+                f"Unsupported storage dtype: {storage_dtype} "
+                f"(expected one of {STORAGE_DTYPES})"
+            )
 
         self.start_time_sec = start_time_sec
         self.sampling_frequency_hz = sampling_frequency_hz
-        self.data = data.astype(np.float32)  # Ensure float32 for efficiency
+        self.storage_dtype = storage_dtype
+        self.max_quantization_error = max_quantization_error
+        if (
+            isinstance(data, np.ndarray)
+            and not isinstance(data, np.memmap)
+            and not (storage_dtype != "float32" and data.dtype.kind in "iu")
+        ):
+            self.data = data.astype(np.float32)  # Ensure float32 for efficiency
+        else:
+            # Out-of-core source, or integer data stored as integers: keep a
+            # reference and convert block by block
+            self.data = data
+        self.block_size_mb = block_size_mb
 
         n_timepoints, n_channels = data.shape
 
@@ -52,82 +95,31 @@ class MultiChannelTimeseries(FigpackView):
             )
             self.channel_ids = [str(ch_id) for ch_id in channel_ids]
 
-        # Prepare downsampled arrays for efficient rendering
-        self.downsampled_data = self._compute_downsampled_data()
+        self._downsampled_data: Optional[dict] = None
+
+    @property
+    def downsampled_data(self) -> dict:
+        """
+        The downsampled min/max pyramid as in-memory arrays (computed on first
+        access). Note that write_to_zarr_group does not use this; it streams the
+        pyramid directly into the output group.
+        """
+        if self._downsampled_data is None:
+            self._downsampled_data = self._compute_downsampled_data()
+        return self._downsampled_data
 
     def _compute_downsampled_data(self) -> dict:
         """
-        Compute downsampled arrays at power-of-4 factors using a vectorized
-        min/max pyramid with NaN padding for partial bins.
+        Compute downsampled arrays at power-of-4 factors as a min/max pyramid,
+        where partial bins at the end only reduce over the available samples.
 
         Returns:
             dict: {factor: (ceil(N/factor), 2, M) float32 array}, where the second
                 axis stores [min, max] per bin per channel.
         """
-        data = self.data  # (N, M), float32
-        n_timepoints, n_channels = data.shape
-        downsampled = {}
-
-        if n_timepoints < 4:
-            # No level with factor >= 4 fits the stop condition (factor < N)
-            return downsampled
-
-        def _first_level_from_raw(x: np.ndarray) -> np.ndarray:
-            """Build the factor=4 level directly from the raw data."""
-            N, M = x.shape
-            n_bins = math.ceil(N / 4)
-            pad = n_bins * 4 - N
-            # Pad time axis with NaNs so min/max ignore the padded tail
-            x_pad = np.pad(
-                x, ((0, pad), (0, 0)), mode="constant", constant_values=np.nan
-            )
-            blk = x_pad.reshape(n_bins, 4, M)  # (B, 4, M)
-            mins = np.nanmin(blk, axis=1)  # (B, M)
-            maxs = np.nanmax(blk, axis=1)  # (B, M)
-            out = np.empty((n_bins, 2, M), dtype=np.float32)
-            out[:, 0, :] = mins
-            out[:, 1, :] = maxs
-            return out
-
-        def _downsample4_bins(level_minmax: np.ndarray) -> np.ndarray:
-            """
-            Build the next pyramid level from the previous one by grouping every 4
-            bins. Input is (B, 2, M) -> Output is (ceil(B/4), 2, M).
-            """
-            B, two, M = level_minmax.shape
-            assert two == 2
-            n_bins_next = math.ceil(B / 4)
-            pad = n_bins_next * 4 - B
-            lvl_pad = np.pad(
-                level_minmax,
-                ((0, pad), (0, 0), (0, 0)),
-                mode="constant",
-                constant_values=np.nan,
-            )
-            blk = lvl_pad.reshape(n_bins_next, 4, 2, M)  # (B', 4, 2, M)
-
-            # Next mins from mins; next maxs from maxs
-            mins = np.nanmin(blk[:, :, 0, :], axis=1)  # (B', M)
-            maxs = np.nanmax(blk[:, :, 1, :], axis=1)  # (B', M)
-
-            out = np.empty((n_bins_next, 2, M), dtype=np.float32)
-            out[:, 0, :] = mins
-            out[:, 1, :] = maxs
-            return out
-
-        # Level 1: factor = 4 from raw data
-        factor = 4
-        level = _first_level_from_raw(data)
-        downsampled[factor] = level
-
-        # Higher levels: factor *= 4 each time, built from previous level
-        factor *= 4  # -> 16
-        while factor < n_timepoints / 1000:
-            level = _downsample4_bins(level)
-            downsampled[factor] = level
-            factor *= 4
-
-        return downsampled
+        return compute_pyramid(
+            self.data, reduction="minmax", block_size_mb=self.block_size_mb
+        )
 
     def _calculate_optimal_chunk_size(
         self, shape: tuple, target_size_mb: float = 5.0
@@ -142,8 +134,8 @@ class MultiChannelTimeseries(FigpackView):
         Returns:
             Tuple of chunk dimensions
         """
-        # Calculate bytes per element (float32 = 4 bytes)
-        bytes_per_element = 4
+        # Bytes per element of the stored data (4 for float32, 2 for int16)
+        bytes_per_element = np.dtype(self.storage_dtype).itemsize
         target_size_bytes = target_size_mb * 1024 * 1024
 
         if len(shape) == 2:  # Original data: (n_timepoints, n_channels)
@@ -178,6 +170,10 @@ class MultiChannelTimeseries(FigpackView):
         """
         Write the multi-channel timeseries data to a Zarr group
 
+        The data and all downsampled levels are written block by block in a
+        single pass over the source, so peak memory is bounded by the block size
+        rather than by the length of the recording.
+
         Args:
             group: Zarr group to write data into
         """
@@ -192,35 +188,35 @@ class MultiChannelTimeseries(FigpackView):
         group.attrs["n_timepoints"] = n_timepoints
         group.attrs["n_channels"] = n_channels
 
-        # Store original data with optimal chunking
-        original_chunks = self._calculate_optimal_chunk_size(self.data.shape)
-        group.create_dataset(
-            "data",
-            data=self.data,
-            chunks=original_chunks,
+        quantization = get_quantization(
+            iter_blocks(
+                self.data, get_block_size_timepoints(n_channels, self.block_size_mb)
+            ),
+            n_channels=n_channels,
+            storage_dtype=self.storage_dtype,
+            max_error=self.max_quantization_error,
         )
-
-        # Store downsampled data arrays
-        downsample_factors = list(self.downsampled_data.keys())
+        if quantization is not None:
+            group.attrs["quantization"] = quantization.to_attrs()
+
+        # Write the original data and all downsampled levels in a single pass
+        ds_shapes = write_series_with_pyramid(
+            group,
+            self.data,
+            get_chunks=self._calculate_optimal_chunk_size,
+            reduction="minmax",
+            block_size_mb=self.block_size_mb,
+            quantization=quantization,
+        )
+        downsample_factors = list(ds_shapes.keys())
         group.attrs["downsample_factors"] = downsample_factors
 
-        for factor, downsampled_array in self.downsampled_data.items():
-            dataset_name = f"data_ds_{factor}"
-
-            # Calculate optimal chunks for this downsampled array
-            ds_chunks = self._calculate_optimal_chunk_size(downsampled_array.shape)
-
-            group.create_dataset(
-                dataset_name,
-                data=downsampled_array,
-                chunks=ds_chunks,
-            )
-
+        original_chunks = self._calculate_optimal_chunk_size(self.data.shape)
         print(
             f"Stored MultiChannelTimeseries with {len(downsample_factors)} downsampled levels:"
         )
         print(f"  Original: {self.data.shape} (chunks: {original_chunks})")
         for factor in downsample_factors:
-            ds_shape = self.downsampled_data[factor].shape
+            ds_shape = ds_shapes[factor]
             ds_chunks = self._calculate_optimal_chunk_size(ds_shape)
             print(f"  Factor {factor}: {ds_shape} (chunks: {ds_chunks})")
@@ -46,7 +46,7 @@ class PlotlyFigure(figpack.ExtensionView):
         json_array = np.frombuffer(json_bytes, dtype=np.uint8)
 
         # Store the figure data as compressed array
-        group.create_dataset("figure_data", data=json_array)
+        group.create_dataset("figure_data", data=json_array, role="text")
 
         # Store data size for reference
         group.attrs["data_size"] = len(json_bytes)
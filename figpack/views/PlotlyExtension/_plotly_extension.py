@@ -1,10 +1,6 @@
-import urllib.request
-import urllib.error
 import os
-import tempfile
-import hashlib
 
-from ...core.figpack_extension import FigpackExtension
+from ...core.figpack_extension import FigpackExtension, get_extension_asset
 
 
 def _load_javascript_code():
@@ -20,45 +16,15 @@ def _load_javascript_code():
         )
 
 
-def _get_cache_path(url):
-    """Get the cache file path for a given URL"""
-    # Create a unique filename based on the URL
-    url_hash = hashlib.md5(url.encode()).hexdigest()
-    cache_dir = os.path.join(tempfile.gettempdir(), "figpack_plotly_cache")
-    os.makedirs(cache_dir, exist_ok=True)
-    return os.path.join(cache_dir, f"plotly_{url_hash}.js")
-
-
 def _download_plotly_library():
-    """Download the Plotly library with caching support"""
-    url = "https://cdn.plot.ly/plotly-2.35.2.min.js"
-    cache_path = _get_cache_path(url)
-
-    # Try to load from cache first
-    if os.path.exists(cache_path):
-        try:
-            with open(cache_path, "r", encoding="utf-8") as f:
-                return f.read()
-        except Exception as e:
-            print(f"Warning: Failed to read cached plotly library: {e}")
-            # Continue to download if cache read fails
-
-    # Download from CDN
-    try:
-        with urllib.request.urlopen(url) as response:
-            content = response.read().decode("utf-8")
-
-        # Save to cache
-        try:
-            with open(cache_path, "w", encoding="utf-8") as f:
-                f.write(content)
-        except Exception as e:
-            print(f"Warning: Failed to cache plotly library: {e}")
-            # Continue even if caching fails
-
-        return content
-    except urllib.error.URLError as e:
-        raise RuntimeError(f"Failed to download plotly library from {url}: {e}")
+    """Get the Plotly library from the extension asset cache"""
+    return get_extension_asset(
+        "https://cdn.plot.ly/plotly-2.35.2.min.js",
+        name="figpack-plotly",
+        version="2.35.2",
+        filename="plotly.min.js",
+        sha256="6d21266ce1bd7d9e5ab4e115989c70c20de0382fd973a8f26ab58619eba4d603",
+    )
 
 
 # Download the plotly library and create the extension with additional files
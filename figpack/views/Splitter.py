@@ -2,7 +2,7 @@
 Splitter view for figpack - a resizable split layout container
 """
 
-from typing import Literal
+from typing import Iterator, Literal
 
 from ..core.figpack_view import FigpackView
 from ..core.zarr import Group
@@ -36,6 +36,11 @@ class Splitter(FigpackView):
         self.item2 = item2
         self.split_pos = max(0.1, min(0.9, split_pos))  # Clamp between 0.1 and 0.9
 
+    def iter_child_views(self) -> Iterator[FigpackView]:
+        """The views of the two panes"""
+        yield self.item1.view
+        yield self.item2.view
+
     def write_to_zarr_group(self, group: Group) -> None:
         """
         Write the Splitter layout data to a Zarr group
@@ -61,7 +66,7 @@ class Splitter(FigpackView):
 
         # Create subgroups for each item's view
         item1_group = group.create_group("item1")
-        self.item1.view.write_to_zarr_group(item1_group)
+        item1_group.write_view(self.item1.view)
 
         item2_group = group.create_group("item2")
-        self.item2.view.write_to_zarr_group(item2_group)
+        item2_group.write_view(self.item2.view)
@@ -2,7 +2,7 @@
 TabLayout view for figpack - a tabbed layout container that handles other views
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 from ..core.figpack_view import FigpackView
 from ..core.zarr import Group
@@ -32,6 +32,11 @@ class TabLayout(FigpackView):
             max(0, min(initial_tab_index, len(items) - 1)) if items else 0
         )
 
+    def iter_child_views(self) -> Iterator[FigpackView]:
+        """The views of the tabs"""
+        for item in self.items:
+            yield item.view
+
     def write_to_zarr_group(self, group: Group) -> None:
         """
         Write the TabLayout data to a Zarr group
@@ -61,7 +66,7 @@ class TabLayout(FigpackView):
             item_group = group.create_group(item_name)
 
             # Recursively write the child view to the subgroup
-            item.view.write_to_zarr_group(item_group)
+            item_group.write_view(item.view)
 
         # Store the items metadata
         group.attrs["items"] = items_metadata
@@ -8,6 +8,13 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 import numpy as np
 
 from ..core.figpack_view import FigpackView
+from ..core.pyramid import (
+    compute_pyramid,
+    get_block_size_timepoints,
+    iter_blocks,
+    write_series_with_pyramid,
+)
+from ..core.quantization import STORAGE_DTYPES, get_quantization
 from ..core.zarr import Group
 
 
@@ -171,6 +178,8 @@ class TimeseriesGraph(FigpackView):
         channel_spacing: Optional[float] = None,
         auto_channel_spacing: Optional[float] = None,
         timestamps_for_inserting_nans: Optional[np.ndarray] = None,
+        storage_dtype: str = "float32",
+        max_quantization_error: Optional[float] = None,
     ) -> None:
         """
         Add a uniform timeseries to the graph with optional multi-channel support
@@ -186,6 +195,8 @@ class TimeseriesGraph(FigpackView):
             channel_spacing: Vertical spacing between channels
             auto_channel_spacing: sets channel spacing to this multiple of the estimated RMS noise level
             timestamps_for_inserting_nans: Optional array of timestamps used to determine where to insert NaNs in the data
+            storage_dtype: "float32" (default), or "int16" or "int8" to store the data and its downsampled levels as integers with a per-channel scale and offset (integer data that fits in the dtype is stored exactly)
+            max_quantization_error: Optional bound of the absolute error of the quantized values (a ValueError is raised when writing if it is exceeded)
         """
         if isinstance(data, list):
             data = np.array(data)
@@ -201,6 +212,8 @@ class TimeseriesGraph(FigpackView):
                 channel_spacing=channel_spacing,
                 auto_channel_spacing=auto_channel_spacing,
                 timestamps_for_inserting_nans=timestamps_for_inserting_nans,
+                storage_dtype=storage_dtype,
+                max_quantization_error=max_quantization_error,
             )
         )
 
@@ -269,8 +282,8 @@ class TGLineSeries:
         group.attrs["dash"] = self.dash if self.dash is not None else []
         group.attrs["y_min"] = float(np.nanmin(self.y))
         group.attrs["y_max"] = float(np.nanmax(self.y))
-        group.create_dataset("t", data=self.t)
-        group.create_dataset("y", data=self.y)
+        group.create_dataset("t", data=self.t, role="timestamps")
+        group.create_dataset("y", data=self.y, role="signal")
 
 
 class TGMarkerSeries:
@@ -301,8 +314,8 @@ class TGMarkerSeries:
         Args:
             group: Zarr group to write data into
         """
-        group.create_dataset("t", data=self.t)
-        group.create_dataset("y", data=self.y)
+        group.create_dataset("t", data=self.t, role="timestamps")
+        group.create_dataset("y", data=self.y, role="signal")
         group.attrs["series_type"] = "marker"
         group.attrs["color"] = self.color
         group.attrs["radius"] = self.radius
@@ -344,8 +357,8 @@ class TGIntervalSeries:
         Args:
             group: Zarr group to write data into
         """
-        group.create_dataset("t_start", data=self.t_start)
-        group.create_dataset("t_end", data=self.t_end)
+        group.create_dataset("t_start", data=self.t_start, role="timestamps")
+        group.create_dataset("t_end", data=self.t_end, role="timestamps")
         group.attrs["series_type"] = "interval"
         group.attrs["color"] = self.color
         group.attrs["alpha"] = self.alpha
@@ -366,8 +379,15 @@ class TGUniformSeries:
         channel_spacing: Optional[float] = None,
         auto_channel_spacing: Optional[float] = None,
         timestamps_for_inserting_nans: Optional[np.ndarray] = None,
+        storage_dtype: str = "float32",
+        max_quantization_error: Optional[float] = None,
     ) -> None:
         assert sampling_frequency_hz > 0, "Sampling frequency must be positive"
+        if storage_dtype not in STORAGE_DTYPES:
+            raise ValueError(
+                f"Unsupported storage dtype: {storage_dtype} "
+                f"(expected one of {STORAGE_DTYPES})"
+            )
 
         # Handle both 1D and 2D data
         if data.ndim == 1:
@@ -385,6 +405,8 @@ class TGUniformSeries:
         self.start_time_sec = start_time_sec
         self.sampling_frequency_hz = sampling_frequency_hz
         self.data = data.astype(np.float32)  # Ensure float32 for efficiency
+        self.storage_dtype = storage_dtype
+        self.max_quantization_error = max_quantization_error
 
         if timestamps_for_inserting_nans is not None:
             self.data = insert_nans_based_on_timestamps(
@@ -452,82 +474,28 @@ class TGUniformSeries:
 
         self.width = width
 
-        # Prepare downsampled arrays for efficient rendering
-        self.downsampled_data = self._compute_downsampled_data()
+        self._downsampled_data: Optional[dict] = None
 
-    def _compute_downsampled_data(self) -> Dict[int, np.ndarray]:
+    @property
+    def downsampled_data(self) -> dict:
+        """
+        The downsampled pyramid as in-memory arrays (computed on first access).
+        write_to_zarr_group streams the pyramid directly into the output group.
         """
-        Compute downsampled arrays at power-of-4 factors using a vectorized
-        min/max pyramid with NaN padding for partial bins.
+        if self._downsampled_data is None:
+            self._downsampled_data = self._compute_downsampled_data()
+        return self._downsampled_data
+
+    def _compute_downsampled_data(self) -> dict:
+        """
+        Compute downsampled arrays at power-of-4 factors as a min/max pyramid,
+        where partial bins at the end only reduce over the available samples.
 
         Returns:
             dict: {factor: (ceil(N/factor), 2, M) float32 array}, where the second
                 axis stores [min, max] per bin per channel.
         """
-        data = self.data  # (N, M), float32
-        n_timepoints, n_channels = data.shape
-        downsampled = {}
-
-        if n_timepoints < 4:
-            # No level with factor >= 4 fits the stop condition (factor < N)
-            return downsampled
-
-        def _first_level_from_raw(x: np.ndarray) -> np.ndarray:
-            """Build the factor=4 level directly from the raw data."""
-            N, M = x.shape
-            n_bins = math.ceil(N / 4)
-            pad = n_bins * 4 - N
-            # Pad time axis with NaNs so min/max ignore the padded tail
-            x_pad = np.pad(
-                x, ((0, pad), (0, 0)), mode="constant", constant_values=np.nan
-            )
-            blk = x_pad.reshape(n_bins, 4, M)  # (B, 4, M)
-            mins = np.nanmin(blk, axis=1)  # (B, M)
-            maxs = np.nanmax(blk, axis=1)  # (B, M)
-            out = np.empty((n_bins, 2, M), dtype=np.float32)
-            out[:, 0, :] = mins
-            out[:, 1, :] = maxs
-            return out
-
-        def _downsample4_bins(level_minmax: np.ndarray) -> np.ndarray:
-            """
-            Build the next pyramid level from the previous one by grouping every 4
-            bins. Input is (B, 2, M) -> Output is (ceil(B/4), 2, M).
-            """
-            B, two, M = level_minmax.shape
-            assert two == 2
-            n_bins_next = math.ceil(B / 4)
-            pad = n_bins_next * 4 - B
-            lvl_pad = np.pad(
-                level_minmax,
-                ((0, pad), (0, 0), (0, 0)),
-                mode="constant",
-                constant_values=np.nan,
-            )
-            blk = lvl_pad.reshape(n_bins_next, 4, 2, M)  # (B', 4, 2, M)
-
-            # Next mins from mins; next maxs from maxs
-            mins = np.nanmin(blk[:, :, 0, :], axis=1)  # (B', M)
-            maxs = np.nanmax(blk[:, :, 1, :], axis=1)  # (B', M)
-
-            out = np.empty((n_bins_next, 2, M), dtype=np.float32)
-            out[:, 0, :] = mins
-            out[:, 1, :] = maxs
-            return out
-
-        # Level 1: factor = 4 from raw data
-        factor = 4
-        level = _first_level_from_raw(data)
-        downsampled[factor] = level
-
-        # Higher levels: factor *= 4 each time, built from previous level
-        factor *= 4  # -> 16
-        while factor < n_timepoints / 1000:
-            level = _downsample4_bins(level)
-            downsampled[factor] = level
-            factor *= 4
-
-        return downsampled
+        return compute_pyramid(self.data, reduction="minmax")
 
     def _calculate_optimal_chunk_size(
         self, shape: Tuple[int, ...], target_size_mb: float = 5.0
@@ -542,8 +510,8 @@ class TGUniformSeries:
         Returns:
             Tuple of chunk dimensions
         """
-        # Calculate bytes per element (float32 = 4 bytes)
-        bytes_per_element = 4
+        # Bytes per element of the stored data (4 for float32, 2 for int16)
+        bytes_per_element = np.dtype(self.storage_dtype).itemsize
         target_size_bytes = target_size_mb * 1024 * 1024
 
         if len(shape) == 2:  # Original data: (n_timepoints, n_channels)
@@ -603,29 +571,24 @@ class TGUniformSeries:
             group.attrs["y_min"] = float(y_min)
             group.attrs["y_max"] = float(y_max)
 
-        # Store original data with optimal chunking
-        original_chunks = self._calculate_optimal_chunk_size(self.data.shape)
-        group.create_dataset(
-            "data",
-            data=self.data,
-            chunks=original_chunks,
+        quantization = get_quantization(
+            iter_blocks(self.data, get_block_size_timepoints(n_channels)),
+            n_channels=n_channels,
+            storage_dtype=self.storage_dtype,
+            max_error=self.max_quantization_error,
         )
-
-        # Store downsampled data arrays
-        downsample_factors = list(self.downsampled_data.keys())
-        group.attrs["downsample_factors"] = downsample_factors
-
-        for factor, downsampled_array in self.downsampled_data.items():
-            dataset_name = f"data_ds_{factor}"
-
-            # Calculate optimal chunks for this downsampled array
-            ds_chunks = self._calculate_optimal_chunk_size(downsampled_array.shape)
-
-            group.create_dataset(
-                dataset_name,
-                data=downsampled_array,
-                chunks=ds_chunks,
-            )
+        if quantization is not None:
+            group.attrs["quantization"] = quantization.to_attrs()
+
+        # Store original data and downsampled (min/max) levels in a single pass
+        ds_shapes = write_series_with_pyramid(
+            group,
+            self.data,
+            get_chunks=self._calculate_optimal_chunk_size,
+            reduction="minmax",
+            quantization=quantization,
+        )
+        group.attrs["downsample_factors"] = list(ds_shapes.keys())
 
 
 def insert_nans_based_on_timestamps(
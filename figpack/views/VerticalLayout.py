@@ -2,7 +2,7 @@
 VerticalLayout view for figpack - a vertically scrolling layout container
 """
 
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 from ..core.figpack_view import FigpackView
 from ..core.zarr import Group
@@ -39,6 +39,11 @@ class VerticalLayout(FigpackView):
         self.show_titles = show_titles
         self.title = title
 
+    def iter_child_views(self) -> Iterator[FigpackView]:
+        """The views of the layout items"""
+        for item in self.items:
+            yield item.view
+
     def write_to_zarr_group(self, group: Group) -> None:
         """
         Write the VerticalLayout data to a Zarr group
@@ -69,7 +74,7 @@ class VerticalLayout(FigpackView):
             item_group = group.create_group(item_name)
 
             # Recursively write the child view to the subgroup
-            item.view.write_to_zarr_group(item_group)
+            item_group.write_view(item.view)
 
         # Store the items metadata
         group.attrs["items"] = items_metadata
@@ -1,22 +1,85 @@
-from .Box import Box
-from .CaptionedView import CaptionedView
-from .DataFrame import DataFrame
-from .Gallery import Gallery
-from .GalleryItem import GalleryItem
-from .Iframe import Iframe
-from .Image import Image
-from .LayoutItem import LayoutItem
-from .Markdown import Markdown
-from .MatplotlibFigure import MatplotlibFigure
-from .MountainLayout import MountainLayout
-from .MountainLayoutItem import MountainLayoutItem
-from .MultiChannelTimeseries import MultiChannelTimeseries
-from .Spectrogram import Spectrogram
-from .Splitter import Splitter
-from .TabLayout import TabLayout
-from .TabLayoutItem import TabLayoutItem
-from .TimeseriesGraph import TimeseriesGraph
-from .VerticalLayout import VerticalLayout
-from .VerticalLayoutItem import VerticalLayoutItem
-
-from .PlotlyExtension import PlotlyFigure
+import importlib
+import sys
+import types
+from typing import TYPE_CHECKING
+
+# Each view module is imported on first access (PEP 562), so that
+# `import figpack.views` stays cheap and a script only pays for the views it
+# uses (e.g. DataFrame and Spectrogram are not imported by a script that
+# only uses TimeseriesGraph)
+_LAZY_ATTRIBUTES = {
+    "Box": ".Box",
+    "CaptionedView": ".CaptionedView",
+    "DataFrame": ".DataFrame",
+    "Gallery": ".Gallery",
+    "GalleryItem": ".GalleryItem",
+    "Iframe": ".Iframe",
+    "Image": ".Image",
+    "LayoutItem": ".LayoutItem",
+    "Markdown": ".Markdown",
+    "MatplotlibFigure": ".MatplotlibFigure",
+    "MountainLayout": ".MountainLayout",
+    "MountainLayoutItem": ".MountainLayoutItem",
+    "MultiChannelTimeseries": ".MultiChannelTimeseries",
+    "Spectrogram": ".Spectrogram",
+    "Splitter": ".Splitter",
+    "TabLayout": ".TabLayout",
+    "TabLayoutItem": ".TabLayoutItem",
+    "TimeseriesGraph": ".TimeseriesGraph",
+    "VerticalLayout": ".VerticalLayout",
+    "VerticalLayoutItem": ".VerticalLayoutItem",
+    "PlotlyFigure": ".PlotlyExtension",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+if TYPE_CHECKING:
+    from .Box import Box
+    from .CaptionedView import CaptionedView
+    from .DataFrame import DataFrame
+    from .Gallery import Gallery
+    from .GalleryItem import GalleryItem
+    from .Iframe import Iframe
+    from .Image import Image
+    from .LayoutItem import LayoutItem
+    from .Markdown import Markdown
+    from .MatplotlibFigure import MatplotlibFigure
+    from .MountainLayout import MountainLayout
+    from .MountainLayoutItem import MountainLayoutItem
+    from .MultiChannelTimeseries import MultiChannelTimeseries
+    from .Spectrogram import Spectrogram
+    from .Splitter import Splitter
+    from .TabLayout import TabLayout
+    from .TabLayoutItem import TabLayoutItem
+    from .TimeseriesGraph import TimeseriesGraph
+    from .VerticalLayout import VerticalLayout
+    from .VerticalLayoutItem import VerticalLayoutItem
+
+    from .PlotlyExtension import PlotlyFigure
+
+
+class _ViewsModule(types.ModuleType):
+    def __setattr__(self, name, value):
+        # The view modules are named after their classes. The import system
+        # binds a submodule to its package when it is first imported (e.g.
+        # figpack.views.LayoutItem when Box.py imports it), which would hide
+        # the class, so keep the names for the classes.
+        if name in _LAZY_ATTRIBUTES and isinstance(value, types.ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _ViewsModule
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
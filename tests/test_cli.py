@@ -42,7 +42,7 @@ def test_download_file(mock_response, tmp_path):
     base_url = "https://example.com/fig/"
     file_info = {"path": "test.json", "size": 12}
 
-    with patch("requests.get", return_value=mock_response) as mock_get:
+    with patch("requests.Session.get", return_value=mock_response) as mock_get:
         file_path, success = download_file(base_url, file_info, tmp_path)
 
         assert success is True
@@ -60,7 +60,7 @@ def test_download_file_binary(mock_response, tmp_path):
     base_url = "https://example.com/fig/"
     file_info = {"path": "test.dat", "size": 12}
 
-    with patch("requests.get", return_value=mock_response) as mock_get:
+    with patch("requests.Session.get", return_value=mock_response) as mock_get:
         file_path, success = download_file(base_url, file_info, tmp_path)
 
         assert success is True
@@ -78,7 +78,7 @@ def test_download_file_empty_response(tmp_path):
     mock_resp.text = ""
     mock_resp.content = b""
 
-    with patch("requests.get", return_value=mock_resp):
+    with patch("requests.Session.get", return_value=mock_resp):
         file_path, success = download_file(base_url, file_info, tmp_path)
         assert success is True
         downloaded_file = tmp_path / "test.json"
@@ -90,7 +90,9 @@ def test_download_file_failure(tmp_path):
     base_url = "https://example.com/fig/"
     file_info = {"path": "test.json", "size": 12}
 
-    with patch("requests.get", side_effect=requests.exceptions.RequestException):
+    with patch(
+        "requests.Session.get", side_effect=requests.exceptions.RequestException
+    ):
         file_path, success = download_file(base_url, file_info, tmp_path)
 
         assert success is False
@@ -124,7 +126,7 @@ def mock_manifest_response():
 def test_download_figure(mock_manifest_response, mock_response, tmp_path):
     dest_path = str(tmp_path / "figure.tar.gz")
 
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         # Set up mock responses for manifest and file downloads
         mock_get.side_effect = [mock_manifest_response, mock_response, mock_response]
 
@@ -144,7 +146,7 @@ def test_download_figure(mock_manifest_response, mock_response, tmp_path):
 
 def test_download_figure_manifest_error():
     with patch(
-        "requests.get", side_effect=requests.exceptions.RequestException
+        "requests.Session.get", side_effect=requests.exceptions.RequestException
     ), pytest.raises(SystemExit) as excinfo:
         download_figure("https://example.com/fig", "test.tar.gz")
     assert excinfo.value.code == 1
@@ -154,7 +156,7 @@ def test_download_figure_invalid_manifest():
     mock_resp = MagicMock()
     mock_resp.json.side_effect = json.JSONDecodeError("Invalid JSON", "{", 0)
 
-    with patch("requests.get", return_value=mock_resp), pytest.raises(
+    with patch("requests.Session.get", return_value=mock_resp), pytest.raises(
         SystemExit
     ) as excinfo:
         download_figure("https://example.com/fig", "test.tar.gz")
@@ -164,7 +166,7 @@ def test_download_figure_invalid_manifest():
 def test_download_figure_all_files_failed(mock_manifest_response, tmp_path):
     dest_path = str(tmp_path / "figure.tar.gz")
 
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         # Return manifest but make all file downloads fail
         mock_get.side_effect = [mock_manifest_response] + [
             requests.exceptions.RequestException()
@@ -204,7 +206,7 @@ def test_main_download(mock_manifest_response, mock_response, tmp_path):
 
     with patch(
         "sys.argv", ["figpack", "download", "https://example.com/fig", dest_path]
-    ), patch("requests.get") as mock_get:
+    ), patch("requests.Session.get") as mock_get:
         # Set up mock responses
         mock_get.side_effect = [mock_manifest_response, mock_response, mock_response]
 
@@ -0,0 +1,110 @@
+"""
+Tests for the selection of the codecs of datasets from their role
+"""
+
+import numpy as np
+import pytest
+import zarr
+from numcodecs import Blosc, Delta
+
+import figpack
+from figpack.core._codecs import select_codecs, tune_codecs
+from figpack.core._pack_store import create_memory_store
+from figpack.core.zarr import ParallelChunkWriter, _check_zarr_version
+
+
+def _make_v2_group(parallel_writer=None):
+    store, _ = create_memory_store()
+    if _check_zarr_version() == 3:
+        zarr_group = zarr.open_group(store, mode="w", zarr_format=2)
+    else:
+        zarr_group = zarr.open_group(store, mode="w")
+    return figpack.Group(zarr_group, parallel_writer=parallel_writer)
+
+
+def _codecs(array):
+    if _check_zarr_version() == 3:
+        return list(array.metadata.filters or []), array.metadata.compressor
+    return list(array.filters or []), array.compressor
+
+
+@pytest.fixture(autouse=True)
+def codec_mode(monkeypatch):
+    monkeypatch.delenv("FIGPACK_CODECS", raising=False)
+
+
+def test_role_codecs():
+    filters, compressor = select_codecs(np.int64, "timestamps")
+    assert filters == [Delta(dtype="<i8")]
+    assert compressor.cname == "zstd"
+    assert select_codecs(np.float32, "timestamps")[0] is None
+    assert select_codecs(np.uint8, "precompressed") == (None, None)
+    assert select_codecs(np.uint16, "indices")[1].shuffle == Blosc.BITSHUFFLE
+    # No role, or data that needs zarr's object codecs: zarr's default
+    assert select_codecs(np.float32, None) is None
+    assert select_codecs(np.dtype("O"), "text") is None
+    with pytest.raises(ValueError):
+        select_codecs(np.float32, "audio")
+
+
+def test_default_mode(monkeypatch):
+    monkeypatch.setenv("FIGPACK_CODECS", "default")
+    assert select_codecs(np.int64, "timestamps") is None
+
+
+@pytest.mark.parametrize("num_workers", [1, 4])
+def test_datasets_round_trip(num_workers):
+    rng = np.random.default_rng(0)
+    arrays = {
+        "timestamps": np.cumsum(rng.integers(0, 100, 100_000)),
+        "signal": rng.standard_normal((20_000, 4)).astype(np.float32),
+        "indices": rng.integers(0, 200, 100_000).astype(np.uint16),
+        "precompressed": rng.integers(0, 256, 10_000).astype(np.uint8),
+        "text": np.frombuffer(b"a,b\n1,2\n" * 1000, dtype=np.uint8),
+    }
+    parallel_writer = ParallelChunkWriter(num_workers) if num_workers > 1 else None
+    group = _make_v2_group(parallel_writer)
+    for role, data in arrays.items():
+        group.create_dataset(
+            role, data=data, chunks=(5000,) + data.shape[1:], role=role
+        )
+    group.flush()
+
+    for role, data in arrays.items():
+        np.testing.assert_array_equal(group[role][:], data)
+        filters, compressor = select_codecs(data.dtype, role)
+        assert _codecs(group[role]) == (filters or [], compressor)
+    assert _codecs(group["precompressed"]) == ([], None)
+
+    # An explicit compressor takes precedence over the role
+    array = group.create_dataset(
+        "explicit", data=arrays["signal"], compressor=None, role="signal"
+    )
+    assert _codecs(array) == ([], None)
+    if parallel_writer is not None:
+        parallel_writer.shutdown()
+
+
+def test_zarr_v3_groups_keep_default_codecs():
+    if _check_zarr_version() != 3:
+        pytest.skip("zarr 3 only")
+    group = figpack.Group(zarr.group(store=zarr.storage.MemoryStore()))
+    data = np.arange(1000, dtype=np.int64)
+    array = group.create_dataset("t", data=data, role="timestamps")
+    np.testing.assert_array_equal(array[:], data)
+
+
+def test_auto_tuner(monkeypatch):
+    rng = np.random.default_rng(0)
+    # Incompressible data is stored uncompressed
+    assert tune_codecs(rng.integers(0, 256, 200_000).astype(np.uint8)) == (None, None)
+    # Sorted sample indices are delta encoded
+    sample_indices = np.sort(rng.integers(0, 30_000 * 3600, 200_000))
+    filters, _ = tune_codecs(sample_indices)
+    assert filters == [Delta(dtype="<i8")]
+
+    monkeypatch.setenv("FIGPACK_CODECS", "auto")
+    group = _make_v2_group()
+    array = group.create_dataset("t", data=sample_indices)
+    assert _codecs(array)[0] == [Delta(dtype="<i8")]
+    np.testing.assert_array_equal(array[:], sample_indices)
@@ -1,3 +1,6 @@
+import json
+import sys
+
 import numpy as np
 import pandas as pd
 import pytest
@@ -71,6 +74,26 @@ def test_dataframe_init_invalid():
         DataFrame(None)
 
 
+def _read_column(group, i, info):
+    """Decode a stored column back to a list of values (None for missing)"""
+    values = group[f"column_{i}"][:]
+    if info["encoding"] == "dictionary":
+        dictionary = json.loads(group[f"column_{i}_dictionary"][:].tobytes())
+        return [dictionary[code] if code >= 0 else None for code in values]
+    if info["encoding"] == "datetime":
+        if info["unit"] == "ns":
+            nanoseconds = group[f"column_{i}_nanoseconds"][:]
+            values = values * 10**9 + nanoseconds
+        values = pd.to_datetime(values, unit=info["unit"]).to_numpy()
+    ret = [None if v != v else v for v in values.tolist()]
+    if info.get("has_mask"):
+        mask = group[f"column_{i}_mask"][:]
+        ret = [None if m else v for v, m in zip(ret, mask)]
+    if info["encoding"] == "boolean":
+        ret = [None if v is None else bool(v) for v in ret]
+    return ret
+
+
 def test_write_to_zarr_basic(sample_dataframe):
     """Test basic writing to zarr group"""
     view = DataFrame(sample_dataframe)
@@ -82,30 +105,32 @@ def test_write_to_zarr_basic(sample_dataframe):
 
     # Check basic attributes
     assert group.attrs["view_type"] == "DataFrame"
-    assert "csv_data" in group
-    assert "data_size" in group.attrs
+    assert group.attrs["format"] == "columns"
     assert "row_count" in group.attrs
     assert "column_count" in group.attrs
     assert "column_info" in group.attrs
-
-    # Verify array properties
-    csv_data_array = group["csv_data"]
-    assert csv_data_array.dtype == np.uint8
+    assert "csv_data" not in group
 
     # Check metadata
     assert group.attrs["row_count"] == len(sample_dataframe)
     assert group.attrs["column_count"] == len(sample_dataframe.columns)
 
-    # Convert array back to string for content verification
-    csv_data = csv_data_array[:].tobytes().decode("utf-8")
-    assert (
-        "name,age,salary,is_active,start_date" in csv_data
-    )  # Header should be present
-    assert "Alice" in csv_data  # Data should be present
-    assert "25" in csv_data  # Numeric data should be present
-
-    # Verify data size
-    assert group.attrs["data_size"] == len(csv_data.encode("utf-8"))
+    # Each column is stored as its own typed array
+    column_info = json.loads(group.attrs["column_info"])
+    encodings = {col["name"]: col["encoding"] for col in column_info}
+    assert encodings == {
+        "name": "dictionary",
+        "age": "numeric",
+        "salary": "numeric",
+        "is_active": "boolean",
+        "start_date": "datetime",
+    }
+    assert group["column_1"].dtype == np.int64
+    assert group["column_2"].dtype == np.float64
+    assert group["column_3"].dtype == np.uint8
+    assert group["column_4"].dtype == np.int64
+    assert column_info[4]["unit"] == "s"
+    assert column_info[4]["date_only"]
 
 
 def test_write_to_zarr_empty_dataframe(empty_dataframe):
@@ -121,14 +146,8 @@ def test_write_to_zarr_empty_dataframe(empty_dataframe):
     assert group.attrs["view_type"] == "DataFrame"
     assert group.attrs["row_count"] == 0
     assert group.attrs["column_count"] == 0
-    assert "csv_data" in group
-
-    # Convert array back to string
-    csv_data_array = group["csv_data"]
-    csv_data = csv_data_array[:].tobytes().decode("utf-8")
-
-    # Empty DataFrame should still have a header line (empty)
-    assert csv_data.strip() == ""
+    assert group.attrs["column_info"] == "[]"
+    assert "column_0" not in group
 
 
 def test_write_to_zarr_mixed_types(mixed_types_dataframe):
@@ -146,8 +165,6 @@ def test_write_to_zarr_mixed_types(mixed_types_dataframe):
     assert group.attrs["column_count"] == len(mixed_types_dataframe.columns)
 
     # Check column info
-    import json
-
     column_info = json.loads(group.attrs["column_info"])
     assert len(column_info) == len(mixed_types_dataframe.columns)
 
@@ -179,8 +196,6 @@ def test_column_info_structure(sample_dataframe):
 
     view.write_to_zarr_group(group)
 
-    import json
-
     column_info = json.loads(group.attrs["column_info"])
 
     # Check structure of each column info
@@ -193,8 +208,8 @@ def test_column_info_structure(sample_dataframe):
         assert isinstance(col_info["simple_dtype"], str)
 
 
-def test_csv_roundtrip(sample_dataframe):
-    """Test that CSV conversion preserves data integrity"""
+def test_columns_roundtrip(sample_dataframe):
+    """Test that the stored columns preserve the data"""
     view = DataFrame(sample_dataframe)
     store = zarr.storage.MemoryStore()
     root = zarr.group(store=store)
@@ -202,28 +217,112 @@ def test_csv_roundtrip(sample_dataframe):
 
     view.write_to_zarr_group(group)
 
-    # Extract CSV data
-    csv_data_array = group["csv_data"]
-    csv_string = csv_data_array[:].tobytes().decode("utf-8")
+    column_info = json.loads(group.attrs["column_info"])
+    assert [col["name"] for col in column_info] == list(sample_dataframe.columns)
+    for i, info in enumerate(column_info):
+        expected = sample_dataframe.iloc[:, i].tolist()
+        if info["encoding"] == "datetime":
+            expected = sample_dataframe.iloc[:, i].to_numpy().tolist()
+        assert _read_column(group, i, info) == expected
+
+
+def test_missing_values():
+    """Test that missing values are stored as NaN, code -1 or in a mask"""
+    df = pd.DataFrame(
+        {
+            "str_col": ["a", None, "b"],
+            "float_col": [1.5, np.nan, 2.5],
+            "int_col": pd.array([1, None, 3], dtype="Int64"),
+            "bool_col": pd.array([True, False, None], dtype="boolean"),
+            "datetime_col": [datetime(2023, 1, 1), pd.NaT, datetime(2023, 1, 3)],
+            "category_col": pd.Categorical(["x", None, "y"]),
+        }
+    )
+    view = DataFrame(df)
+    store = zarr.storage.MemoryStore()
+    root = zarr.group(store=store)
+    group = figpack.Group(root.create_group("test"))
+
+    view.write_to_zarr_group(group)
+
+    column_info = json.loads(group.attrs["column_info"])
+    decoded = {
+        info["name"]: _read_column(group, i, info) for i, info in enumerate(column_info)
+    }
+    assert decoded["str_col"] == ["a", None, "b"]
+    assert decoded["float_col"] == [1.5, None, 2.5]
+    assert decoded["int_col"] == [1, None, 3]
+    assert decoded["bool_col"] == [True, False, None]
+    assert decoded["datetime_col"][1] is None
+    assert decoded["category_col"] == ["x", None, "y"]
+    # Only the columns without another representation of missing values
+    # have a mask
+    assert [info.get("has_mask", False) for info in column_info] == [
+        False,
+        False,
+        True,
+        True,
+        True,
+        False,
+    ]
+    assert group["column_0"].dtype == np.int8
+
+
+def test_datetime_units():
+    """Test that datetimes are stored in the coarsest exact unit"""
+    df = pd.DataFrame(
+        {
+            "seconds": pd.date_range("2023-01-01", periods=3, freq="s"),
+            "millis": pd.date_range("2023-01-01", periods=3, freq="5ms"),
+            "nanos": pd.date_range("2023-01-01", periods=3, freq="7ns"),
+            "zoned": pd.date_range(
+                "2023-01-01 12:00", periods=3, freq="h", tz="US/Eastern"
+            ),
+        }
+    )
+    view = DataFrame(df)
+    store = zarr.storage.MemoryStore()
+    root = zarr.group(store=store)
+    group = figpack.Group(root.create_group("test"))
+
+    view.write_to_zarr_group(group)
+
+    column_info = json.loads(group.attrs["column_info"])
+    assert [info["unit"] for info in column_info] == ["s", "ms", "ns", "s"]
+    assert not any(info["date_only"] for info in column_info)
+    # Time zones are stored as wall time
+    assert group["column_3"][0] == pd.Timestamp("2023-01-01 12:00").timestamp()
+    assert _read_column(group, 2, column_info[2]) == df["nanos"].to_numpy().tolist()
 
-    # Parse CSV back to DataFrame
-    from io import StringIO
 
-    reconstructed_df = pd.read_csv(StringIO(csv_string))
+def test_nanosecond_datetimes_are_split():
+    """Test that nanosecond datetimes are stored as seconds and nanoseconds"""
+    timestamps = pd.to_datetime(
+        ["2023-11-14 22:13:20.123456789", "1969-12-31 23:59:59.999999999", pd.NaT]
+    )
+    df = pd.DataFrame({"t": timestamps})
+    view = DataFrame(df)
+    store = zarr.storage.MemoryStore()
+    root = zarr.group(store=store)
+    group = figpack.Group(root.create_group("test"))
 
-    # Check that we have the same number of rows and columns
-    assert len(reconstructed_df) == len(sample_dataframe)
-    assert len(reconstructed_df.columns) == len(sample_dataframe.columns)
+    view.write_to_zarr_group(group)
 
-    # Check column names
-    assert list(reconstructed_df.columns) == list(sample_dataframe.columns)
+    (info,) = json.loads(group.attrs["column_info"])
+    assert info["unit"] == "ns"
+    # Both parts are exact as JavaScript numbers
+    assert group["column_0"][:].tolist() == [1700000000, -1, 0]
+    assert group["column_0_nanoseconds"].dtype == np.int32
+    assert group["column_0_nanoseconds"][:].tolist() == [123456789, 999999999, 0]
+    assert _read_column(group, 0, info) == timestamps[:2].to_numpy().tolist() + [None]
 
 
 def test_error_handling():
     """Test error handling in write_to_zarr_group"""
     # Create a mock DataFrame that will raise an exception
     mock_df = MagicMock()
-    mock_df.to_csv.side_effect = Exception("CSV conversion failed")
+    mock_df.__len__.return_value = 2
+    mock_df.iloc.__getitem__.side_effect = Exception("Column access failed")
     mock_df.columns = ["col1", "col2"]
 
     view = DataFrame.__new__(DataFrame)  # Create instance without calling __init__
@@ -241,9 +340,7 @@ def test_error_handling():
     assert "Failed to process DataFrame" in group.attrs["error"]
     assert group.attrs["row_count"] == 0
     assert group.attrs["column_count"] == 0
-    assert group.attrs["data_size"] == 0
     assert group.attrs["column_info"] == "[]"
-    assert "csv_data" in group
 
 
 def test_dtype_mapping():
@@ -269,8 +366,6 @@ def test_dtype_mapping():
 
     view.write_to_zarr_group(group)
 
-    import json
-
     column_info = json.loads(group.attrs["column_info"])
     simple_dtypes = {col["name"]: col["simple_dtype"] for col in column_info}
 
@@ -284,8 +379,10 @@ def test_dtype_mapping():
     assert simple_dtypes["category_col"] == "string"  # category defaults to string
 
 
-def test_large_dataframe():
-    """Test with a larger DataFrame to ensure performance"""
+def test_large_dataframe(monkeypatch):
+    """Test with a larger DataFrame, stored in chunks of rows"""
+    # (figpack.views.DataFrame is the class, the module is looked up by name)
+    monkeypatch.setattr(sys.modules[DataFrame.__module__], "ROW_CHUNK_SIZE", 300)
     # Create a larger DataFrame
     n_rows = 1000
     df = pd.DataFrame(
@@ -308,8 +405,11 @@ def test_large_dataframe():
     assert group.attrs["view_type"] == "DataFrame"
     assert group.attrs["row_count"] == n_rows
     assert group.attrs["column_count"] == 4
-    assert "csv_data" in group
-
-    # Verify compression worked
-    csv_data_array = group["csv_data"]
-    assert csv_data_array.dtype == np.uint8
+    assert group.attrs["row_chunk_size"] == 300
+    for i in range(4):
+        assert group[f"column_{i}"].chunks == (300,)
+
+    # The categories are stored once, as a dictionary
+    assert group["column_2"].dtype == np.int8
+    dictionary = json.loads(group["column_2_dictionary"][:].tobytes())
+    assert sorted(dictionary) == ["A", "B", "C"]
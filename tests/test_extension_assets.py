@@ -0,0 +1,133 @@
+"""
+Tests for the cache of third-party JavaScript libraries used by extensions
+"""
+
+import hashlib
+import io
+import socket
+import urllib.error
+import urllib.request
+import zipfile
+
+import pytest
+
+from figpack.core.figpack_extension import (
+    EXTENSION_ASSET_DOWNLOAD_TIMEOUT_SEC,
+    get_extension_asset,
+    get_extension_asset_cache_dir,
+    seed_extension_asset_cache,
+)
+
+URL = "https://cdn.example.com/lib@1.2.3/dist/lib.min.js"
+CONTENT = b"window.lib = function () { return 1; };"
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("FIGPACK_EXTENSION_CACHE_DIR", str(cache_dir))
+    monkeypatch.delenv("FIGPACK_OFFLINE", raising=False)
+    return cache_dir
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    """Serve CONTENT for every URL and record the URLs requested"""
+    requested = []
+
+    def _urlopen(url, timeout=None):
+        # Downloads never wait indefinitely
+        assert timeout == EXTENSION_ASSET_DOWNLOAD_TIMEOUT_SEC
+        requested.append(url)
+        return io.BytesIO(CONTENT)
+
+    monkeypatch.setattr(urllib.request, "urlopen", _urlopen)
+    return requested
+
+
+def test_asset_is_downloaded_once(cache_dir, downloads):
+    assert get_extension_asset(URL, name="ext", version="1.2.3") == CONTENT.decode()
+    assert get_extension_asset(URL, name="ext", version="1.2.3") == CONTENT.decode()
+    assert downloads == [URL]
+    path = cache_dir / "ext" / "1.2.3" / "lib.min.js"
+    assert path.read_bytes() == CONTENT
+    assert (cache_dir / "ext" / "1.2.3" / "lib.min.js.sha256").read_text().strip() == (
+        hashlib.sha256(CONTENT).hexdigest()
+    )
+    assert get_extension_asset_cache_dir() == cache_dir
+
+    # Another version has its own cache entry
+    get_extension_asset(URL, name="ext", version="2.0.0")
+    assert len(downloads) == 2
+
+
+def test_integrity_is_verified(cache_dir, downloads):
+    with pytest.raises(RuntimeError, match="SHA-256 mismatch"):
+        get_extension_asset(URL, name="ext", version="1.2.3", sha256="0" * 64)
+    assert not (cache_dir / "ext").exists()
+
+    sha256 = hashlib.sha256(CONTENT).hexdigest()
+    get_extension_asset(URL, name="ext", version="1.2.3", sha256=sha256)
+    path = cache_dir / "ext" / "1.2.3" / "lib.min.js"
+    path.write_bytes(b"truncated")
+    # A corrupt cached asset is downloaded again
+    assert get_extension_asset(URL, name="ext", version="1.2.3") == CONTENT.decode()
+    assert len(downloads) == 3
+    assert path.read_bytes() == CONTENT
+
+
+def test_offline(cache_dir, monkeypatch):
+    def _urlopen(url, timeout=None):
+        raise urllib.error.URLError("no network")
+
+    monkeypatch.setattr(urllib.request, "urlopen", _urlopen)
+    with pytest.raises(RuntimeError, match="Failed to download"):
+        get_extension_asset(URL, name="ext", version="1.2.3")
+
+    class _StalledResponse(io.BytesIO):
+        def read(self, *args):
+            raise socket.timeout("timed out")
+
+    monkeypatch.setattr(
+        urllib.request, "urlopen", lambda url, timeout=None: _StalledResponse()
+    )
+    with pytest.raises(RuntimeError, match="Failed to download"):
+        get_extension_asset(URL, name="ext", version="1.2.3")
+
+    monkeypatch.setenv("FIGPACK_OFFLINE", "1")
+    with pytest.raises(RuntimeError, match="FIGPACK_OFFLINE"):
+        get_extension_asset(URL, name="ext", version="1.2.3")
+
+    seed_dir = cache_dir.parent / "seed"
+    (seed_dir / "ext" / "1.2.3").mkdir(parents=True)
+    (seed_dir / "ext" / "1.2.3" / "lib.min.js").write_bytes(CONTENT)
+    assert seed_extension_asset_cache(str(seed_dir)) == [
+        cache_dir / "ext" / "1.2.3" / "lib.min.js"
+    ]
+    assert get_extension_asset(URL, name="ext", version="1.2.3") == CONTENT.decode()
+
+
+def test_seed_from_wheel(cache_dir, tmp_path):
+    wheel_path = tmp_path / "figpack_ext-0.1.0-py3-none-any.whl"
+    with zipfile.ZipFile(wheel_path, "w") as wheel:
+        wheel.writestr("figpack_ext/__init__.py", "")
+        wheel.writestr(
+            "figpack_ext/figpack_extension_assets/ext/1.2.3/lib.min.js", CONTENT
+        )
+        wheel.writestr(
+            "figpack_ext/figpack_extension_assets/ext/1.2.3/lib.min.js.sha256",
+            hashlib.sha256(CONTENT).hexdigest() + "\n",
+        )
+    seeded = seed_extension_asset_cache(str(wheel_path))
+    assert seeded == [cache_dir / "ext" / "1.2.3" / "lib.min.js"]
+    assert seeded[0].read_bytes() == CONTENT
+
+    bad_wheel_path = tmp_path / "figpack_bad-0.1.0-py3-none-any.whl"
+    with zipfile.ZipFile(bad_wheel_path, "w") as wheel:
+        wheel.writestr("figpack_extension_assets/ext/1.2.3/lib.min.js", CONTENT)
+        wheel.writestr("figpack_extension_assets/ext/1.2.3/lib.min.js.sha256", "0" * 64)
+    with pytest.raises(RuntimeError, match="SHA-256 mismatch"):
+        seed_extension_asset_cache(str(bad_wheel_path))
+
+    with pytest.raises(ValueError):
+        seed_extension_asset_cache(str(tmp_path / "missing.whl"))
@@ -19,9 +19,13 @@ class TestFileUploadHandler:
         yield manager
         manager._cleanup()
 
-    def test_file_upload_disabled_by_default(self, manager):
+    @pytest.fixture(params=["threading", "asyncio"])
+    def backend(self, request):
+        return request.param
+
+    def test_file_upload_disabled_by_default(self, manager, backend):
         """Test that PUT requests are rejected when file upload is disabled."""
-        url, port = manager.start_server(enable_file_upload=False)
+        url, port = manager.start_server(enable_file_upload=False, backend=backend)
 
         conn = HTTPConnection("localhost", port)
         try:
@@ -31,9 +35,11 @@ class TestFileUploadHandler:
         finally:
             conn.close()
 
-    def test_file_upload_enabled(self, manager):
+    def test_file_upload_enabled(self, manager, backend):
         """Test that PUT requests work when file upload is enabled."""
-        url, port = manager.start_server(enable_file_upload=True, allow_origin="*")
+        url, port = manager.start_server(
+            enable_file_upload=True, allow_origin="*", backend=backend
+        )
 
         test_content = b"Hello, World!"
         conn = HTTPConnection("localhost", port)
@@ -61,9 +67,9 @@ class TestFileUploadHandler:
         finally:
             conn.close()
 
-    def test_file_update(self, manager):
+    def test_file_update(self, manager, backend):
         """Test updating an existing file."""
-        url, port = manager.start_server(enable_file_upload=True)
+        url, port = manager.start_server(enable_file_upload=True, backend=backend)
 
         # Create initial file
         temp_dir = manager.get_temp_dir()
@@ -89,9 +95,49 @@ class TestFileUploadHandler:
         finally:
             conn.close()
 
-    def test_subdirectory_creation(self, manager):
+    def test_file_update_changes_etag(self, manager, backend):
+        """Test that a PUT invalidates the ETag and immutable caching of a file."""
+        url, port = manager.start_server(enable_file_upload=True, backend=backend)
+        figure_dir = manager.create_figure_subdir()
+        (figure_dir / "_consolidated_0.dat").write_bytes(b"original content")
+        path = f"/{figure_dir.name}/_consolidated_0.dat"
+
+        def _get():
+            conn = HTTPConnection("localhost", port)
+            try:
+                conn.request("GET", path)
+                response = conn.getresponse()
+                return dict(response.getheaders()), response.read()
+            finally:
+                conn.close()
+
+        headers, body = _get()
+        etag = headers["ETag"]
+        assert "immutable" in headers["Cache-Control"]
+
+        new_content = b"updated content!"
+        conn = HTTPConnection("localhost", port)
+        try:
+            conn.request(
+                "PUT",
+                path,
+                body=new_content,
+                headers={"Content-Length": str(len(new_content))},
+            )
+            response = conn.getresponse()
+            assert response.status == 200
+            response.read()
+        finally:
+            conn.close()
+
+        headers, body = _get()
+        assert body == new_content
+        assert headers["ETag"] != etag
+        assert headers["Cache-Control"] == "no-cache"
+
+    def test_subdirectory_creation(self, manager, backend):
         """Test that subdirectories are created automatically."""
-        url, port = manager.start_server(enable_file_upload=True)
+        url, port = manager.start_server(enable_file_upload=True, backend=backend)
 
         test_content = b"nested file content"
         conn = HTTPConnection("localhost", port)
@@ -115,9 +161,9 @@ class TestFileUploadHandler:
         finally:
             conn.close()
 
-    def test_path_traversal_protection(self, manager):
+    def test_path_traversal_protection(self, manager, backend):
         """Test that directory traversal attacks are prevented."""
-        url, port = manager.start_server(enable_file_upload=True)
+        url, port = manager.start_server(enable_file_upload=True, backend=backend)
 
         malicious_paths = [
             "/../../../etc/passwd",
@@ -142,11 +188,11 @@ class TestFileUploadHandler:
         finally:
             conn.close()
 
-    def test_file_size_limit(self, manager):
+    def test_file_size_limit(self, manager, backend):
         """Test that file size limits are enforced."""
         max_size = 1024  # 1KB limit
         url, port = manager.start_server(
-            enable_file_upload=True, max_file_size=max_size
+            enable_file_upload=True, max_file_size=max_size, backend=backend
         )
 
         # Try to upload a file larger than the limit
@@ -165,9 +211,9 @@ class TestFileUploadHandler:
         finally:
             conn.close()
 
-    def test_missing_content_length(self, manager):
+    def test_missing_content_length(self, manager, backend):
         """Test that requests without Content-Length header are rejected."""
-        url, port = manager.start_server(enable_file_upload=True)
+        url, port = manager.start_server(enable_file_upload=True, backend=backend)
 
         conn = HTTPConnection("localhost", port)
         try:
@@ -184,9 +230,9 @@ class TestFileUploadHandler:
         finally:
             conn.close()
 
-    def test_invalid_content_length(self, manager):
+    def test_invalid_content_length(self, manager, backend):
         """Test that invalid Content-Length values are rejected."""
-        url, port = manager.start_server(enable_file_upload=True)
+        url, port = manager.start_server(enable_file_upload=True, backend=backend)
 
         invalid_lengths = ["not-a-number", "-1", ""]
 
@@ -203,9 +249,9 @@ class TestFileUploadHandler:
         finally:
             conn.close()
 
-    def test_empty_path(self, manager):
+    def test_empty_path(self, manager, backend):
         """Test that empty file paths are rejected."""
-        url, port = manager.start_server(enable_file_upload=True)
+        url, port = manager.start_server(enable_file_upload=True, backend=backend)
 
         conn = HTTPConnection("localhost", port)
         try:
@@ -216,11 +262,11 @@ class TestFileUploadHandler:
         finally:
             conn.close()
 
-    def test_cors_headers_with_put(self, manager):
+    def test_cors_headers_with_put(self, manager, backend):
         """Test that CORS headers include PUT when file upload is enabled."""
         allow_origin = "https://example.com"
         url, port = manager.start_server(
-            enable_file_upload=True, allow_origin=allow_origin
+            enable_file_upload=True, allow_origin=allow_origin, backend=backend
         )
 
         conn = HTTPConnection("localhost", port)
@@ -236,11 +282,11 @@ class TestFileUploadHandler:
         finally:
             conn.close()
 
-    def test_cors_headers_without_put(self, manager):
+    def test_cors_headers_without_put(self, manager, backend):
         """Test that CORS headers don't include PUT when file upload is disabled."""
         allow_origin = "https://example.com"
         url, port = manager.start_server(
-            enable_file_upload=False, allow_origin=allow_origin
+            enable_file_upload=False, allow_origin=allow_origin, backend=backend
         )
 
         conn = HTTPConnection("localhost", port)
@@ -255,9 +301,9 @@ class TestFileUploadHandler:
         finally:
             conn.close()
 
-    def test_url_encoding_in_paths(self, manager):
+    def test_url_encoding_in_paths(self, manager, backend):
         """Test that URL-encoded paths are handled correctly."""
-        url, port = manager.start_server(enable_file_upload=True)
+        url, port = manager.start_server(enable_file_upload=True, backend=backend)
 
         # Test file with spaces and special characters
         test_content = b"special file content"
@@ -284,9 +330,9 @@ class TestFileUploadHandler:
         finally:
             conn.close()
 
-    def test_concurrent_uploads(self, manager):
+    def test_concurrent_uploads(self, manager, backend):
         """Test that concurrent file uploads work correctly."""
-        url, port = manager.start_server(enable_file_upload=True)
+        url, port = manager.start_server(enable_file_upload=True, backend=backend)
 
         def upload_file(filename, content):
             conn = HTTPConnection("localhost", port)
@@ -0,0 +1,89 @@
+"""
+Tests for the shared pooled HTTP session
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from figpack.core._http_session import (
+    HTTP_POOL_SIZE,
+    get_connection_stats,
+    get_http_session,
+    reset_http_session,
+)
+from figpack.core._local_api_server import LocalApiServer
+
+
+@pytest.fixture(autouse=True)
+def fresh_session():
+    reset_http_session()
+    yield
+    reset_http_session()
+
+
+def test_session_is_shared_and_pooled():
+    session = get_http_session()
+    assert get_http_session() is session
+    adapter = session.get_adapter("https://example.com")
+    assert adapter._pool_maxsize == HTTP_POOL_SIZE
+    assert adapter.max_retries.total > 0
+    assert "POST" not in adapter.max_retries.allowed_methods
+    assert "PUT" not in adapter.max_retries.allowed_methods
+
+
+def test_put_is_not_retried_by_the_session():
+    """The upload retry loops own the retry policy of PUT requests"""
+    requests_received = []
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_PUT(self):
+            requests_received.append(self.command)
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_GET(self):
+            requests_received.append(self.command)
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/file"
+        response = get_http_session().put(url, data=b"x" * 100)
+        assert response.status_code == 503
+        assert requests_received == ["PUT"]
+
+        # GET requests are still retried
+        del requests_received[:]
+        get_http_session().get(url)
+        assert len(requests_received) > 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_connection_reuse_stats():
+    assert get_connection_stats() == {
+        "requests": 0,
+        "new_connections": 0,
+        "reused_connections": 0,
+    }
+    with LocalApiServer() as server:
+        session = get_http_session()
+        for _ in range(5):
+            response = session.get(f"{server.base_url}/figures/unknown/index.html")
+            assert response.status_code == 404
+        stats = get_connection_stats()
+    assert stats["requests"] == 5
+    assert stats["new_connections"] == 1
+    assert stats["reused_connections"] == 4
@@ -0,0 +1,77 @@
+"""
+Tests for the lazy imports of figpack, figpack.core and figpack.views
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+import figpack
+import figpack.views as vv
+
+
+def _run(code: str) -> str:
+    return subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def test_import_does_not_load_heavy_dependencies():
+    output = _run(
+        "import sys\n"
+        "import figpack, figpack.views\n"
+        "heavy = ['numpy', 'zarr', 'requests', 'psutil', 'figpack.cli']\n"
+        "print([m for m in heavy if m in sys.modules])"
+    )
+    assert output == "[]"
+
+
+def test_cli_import_does_not_load_subcommand_dependencies():
+    output = _run(
+        "import sys\n"
+        "import figpack.cli\n"
+        "heavy = ['numpy', 'zarr', 'requests', 'psutil', 'tarfile',"
+        " 'figpack.core._upload_bundle']\n"
+        "print([m for m in heavy if m in sys.modules])"
+    )
+    assert output == "[]"
+
+
+def test_view_is_imported_on_first_access():
+    output = _run(
+        "import sys\n"
+        "import figpack.views as vv\n"
+        "vv.Markdown\n"
+        "print('figpack.views.Markdown' in sys.modules,"
+        " 'figpack.views.DataFrame' in sys.modules)"
+    )
+    assert output == "True False"
+
+
+def test_lazy_attributes():
+    assert figpack.Group.__name__ == "Group"
+    assert figpack.FigpackView.__name__ == "FigpackView"
+    assert callable(figpack.view_figure)
+    assert "ExtensionView" in dir(figpack)
+    for name in vv.__all__:
+        assert getattr(vv, name).__name__ == name
+    assert "TimeseriesGraph" in dir(vv)
+
+
+def test_view_names_are_not_shadowed_by_submodules():
+    # Importing a view module binds it to the package; the name must still
+    # refer to the view class
+    from figpack.views.LayoutItem import LayoutItem
+
+    import figpack.views.Box
+
+    assert vv.LayoutItem is LayoutItem
+    assert isinstance(vv.Box, type)
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError):
+        vv.NotAView
+    with pytest.raises(AttributeError):
+        figpack.not_an_attribute
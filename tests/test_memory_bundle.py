@@ -0,0 +1,188 @@
+"""
+Tests for figures served from memory by the local server
+"""
+
+import json
+import os
+import threading
+from http.client import HTTPConnection
+
+import numpy as np
+import pytest
+
+import figpack.views as vv
+from figpack.core import _bundle_utils, _memory_bundle
+from figpack.core._bundle_utils import (
+    prepare_figure_bundle,
+    prepare_figure_bundle_in_memory,
+)
+from figpack.core._memory_bundle import InMemoryFigures, MemoryFile
+from figpack.core._server_manager import ProcessServerManager
+
+
+@pytest.fixture
+def dist_dir(tmp_path, monkeypatch):
+    dist_dir = tmp_path / "dist"
+    (dist_dir / "assets").mkdir(parents=True)
+    (dist_dir / "index.html").write_text("<html>figure</html>")
+    (dist_dir / "assets" / "index-B1c2D3e4.js").write_text("console.log(1)")
+    monkeypatch.setattr(_bundle_utils, "FIGURE_DIST_DIR", dist_dir)
+    return dist_dir
+
+
+def _make_view():
+    t = np.arange(20_000) / 100
+    graph = vv.TimeseriesGraph()
+    graph.add_line_series(name="sine", t=t, y=np.sin(t).astype(np.float32))
+    return vv.Box(
+        direction="vertical",
+        items=[vv.LayoutItem(graph), vv.LayoutItem(vv.Markdown("# Title"))],
+    )
+
+
+def test_in_memory_bundle_matches_disk_bundle(tmp_path, dist_dir):
+    view = _make_view()
+    bundle_dir = tmp_path / "bundle"
+    bundle_dir.mkdir()
+    prepare_figure_bundle(view, str(bundle_dir), title="Test")
+    files = prepare_figure_bundle_in_memory(view, title="Test")
+
+    disk_files = {
+        path.relative_to(bundle_dir).as_posix(): path.read_bytes()
+        for path in bundle_dir.rglob("*")
+        if path.is_file()
+    }
+    dist_files = {"index.html", "assets/index-B1c2D3e4.js"}
+    assert set(files) == set(disk_files) - dist_files
+    for relative_path, content in files.items():
+        assert content == disk_files[relative_path], relative_path
+    assert "data.zarr/_consolidated_0.dat" in files
+
+
+def test_in_memory_figures_resolve_and_spill(tmp_path, dist_dir):
+    figures = InMemoryFigures(tmp_path / "spill", dist_dir, max_memory_bytes=1000)
+    figures.add("fig_a", {"data.zarr/.zmetadata": b"a" * 600})
+    resolved = figures.resolve("/fig_a/data.zarr/.zmetadata")
+    assert isinstance(resolved, MemoryFile)
+    assert resolved.content == b"a" * 600
+    assert figures.resolve("/fig_a/") == dist_dir / "index.html"
+    assert figures.resolve("/fig_a/assets/index-B1c2D3e4.js") == (
+        dist_dir / "assets" / "index-B1c2D3e4.js"
+    )
+    assert figures.resolve("/fig_a") is None
+    assert figures.resolve("/fig_a/missing.json") is None
+    assert figures.resolve("/fig_a/../fig_a/data.zarr/.zmetadata") is None
+    assert figures.resolve("/other/index.html") is None
+
+    # Adding a second figure exceeds the cap: the least recently used figure
+    # is written to disk and served from there
+    figures.add("fig_b", {"data.zarr/.zmetadata": b"b" * 600})
+    assert not figures.is_in_memory("fig_a")
+    assert figures.is_in_memory("fig_b")
+    assert figures.memory_bytes == 600
+    spilled_path = tmp_path / "spill" / "fig_a" / "data.zarr" / ".zmetadata"
+    assert figures.resolve("/fig_a/data.zarr/.zmetadata") == spilled_path
+    assert spilled_path.read_bytes() == b"a" * 600
+
+    figures.materialize("fig_b")
+    assert figures.memory_bytes == 0
+    assert "fig_b" in figures
+
+
+def test_spill_writes_outside_the_registry_lock(tmp_path, dist_dir, monkeypatch):
+    figures = InMemoryFigures(tmp_path / "spill", dist_dir, max_memory_bytes=1000)
+    figures.add("fig_a", {"data.zarr/.zmetadata": b"a" * 600})
+
+    # Block the write of the spilled figure until released
+    writing = threading.Event()
+    release = threading.Event()
+    utime = os.utime
+
+    def blocking_utime(*args, **kwargs):
+        writing.set()
+        assert release.wait(10)
+        return utime(*args, **kwargs)
+
+    monkeypatch.setattr(_memory_bundle.os, "utime", blocking_utime)
+    adder = threading.Thread(
+        target=figures.add, args=("fig_b", {"data.zarr/.zmetadata": b"b" * 600})
+    )
+    adder.start()
+    try:
+        assert writing.wait(10)
+        # While fig_a is written, the registry answers requests, and fig_a is
+        # still served from memory
+        assert figures.memory_bytes == 600
+        assert figures.resolve("/fig_b/data.zarr/.zmetadata").content == b"b" * 600
+        resolved = figures.resolve("/fig_a/data.zarr/.zmetadata")
+        assert isinstance(resolved, MemoryFile)
+        assert resolved.content == b"a" * 600
+        assert "fig_a" in figures
+    finally:
+        release.set()
+        adder.join()
+
+    spilled_path = tmp_path / "spill" / "fig_a" / "data.zarr" / ".zmetadata"
+    assert figures.resolve("/fig_a/data.zarr/.zmetadata") == spilled_path
+    assert not figures.is_in_memory("fig_a")
+
+
+@pytest.mark.parametrize("backend", ["threading", "asyncio"])
+def test_serve_figure_from_memory(dist_dir, backend):
+    manager = ProcessServerManager()
+    try:
+        figure_dir = manager.create_figure_subdir()
+        files = {
+            "data.zarr/.zmetadata": json.dumps({"refs": {}}).encode(),
+            "data.zarr/_consolidated_0.dat": bytes(range(256)) * 40,
+        }
+        manager.get_memory_figures().add(figure_dir.name, files)
+        url, port = manager.start_server(enable_file_upload=True, backend=backend)
+
+        def _request(method, path, headers=None, body=None):
+            conn = HTTPConnection("localhost", port)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                return response.status, dict(response.getheaders()), response.read()
+            finally:
+                conn.close()
+
+        name = figure_dir.name
+        status, headers, body = _request("GET", f"/{name}")
+        assert status == 301
+        status, headers, body = _request("GET", f"/{name}/")
+        assert status == 200
+        assert body == b"<html>figure</html>"
+        assert headers["Content-Type"].startswith("text/html")
+
+        pack_path = f"/{name}/data.zarr/_consolidated_0.dat"
+        status, headers, body = _request("GET", pack_path, {"Range": "bytes=10-19"})
+        assert status == 206
+        assert body == bytes(range(10, 20))
+        assert "immutable" in headers["Cache-Control"]
+        status, headers, body = _request(
+            "GET", pack_path, {"If-None-Match": headers["ETag"]}
+        )
+        assert status == 304
+
+        # Nothing was written to disk
+        assert list(figure_dir.iterdir()) == []
+
+        # An upload writes the figure to disk first
+        content = b'{"annotations": []}'
+        status, headers, body = _request(
+            "PUT",
+            f"/{name}/annotations.json",
+            {"Content-Length": str(len(content))},
+            content,
+        )
+        assert status == 201
+        assert not manager.get_memory_figures().is_in_memory(name)
+        assert (figure_dir / "data.zarr" / "_consolidated_0.dat").exists()
+        status, headers, body = _request("GET", f"/{name}/annotations.json")
+        assert body == content
+        status, headers, body = _request("GET", pack_path, {"Range": "bytes=10-19"})
+        assert body == bytes(range(10, 20))
+    finally:
+        manager._cleanup()
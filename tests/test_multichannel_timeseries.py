@@ -221,3 +221,65 @@ def test_zarr_chunking(tmp_path):
         ds = group[f"data_ds_{factor}"]
         assert ds.chunks[1:] == (2, 4)  # (min/max, channels)
         assert math.log2(ds.chunks[0]).is_integer()  # Power of 2
+
+
+def test_out_of_core_memmap_source(tmp_path):
+    """Test streaming from a memmap source with blocks smaller than the data"""
+    data = np.random.randn(70001, 3).astype(np.float32)
+    data[::97, 1] = np.nan
+    mm = np.memmap(tmp_path / "data.bin", dtype=np.int16, mode="w+", shape=(70001, 3))
+    mm[:] = (np.nan_to_num(data) * 1000).astype(np.int16)
+    mm.flush()
+
+    view = MultiChannelTimeseries(
+        start_time_sec=0.0,
+        sampling_frequency_hz=1000.0,
+        data=mm,
+        block_size_mb=0.01,
+    )
+    # The source is referenced, not copied into memory
+    assert view.data is mm
+
+    reference = MultiChannelTimeseries(
+        start_time_sec=0.0,
+        sampling_frequency_hz=1000.0,
+        data=np.array(mm),
+    )
+
+    store = zarr.storage.MemoryStore()
+    root = zarr.group(store=store)
+    group = figpack.Group(root.create_group("test"))
+    view.write_to_zarr_group(group)
+
+    np.testing.assert_array_equal(group["data"][:], np.array(mm, dtype=np.float32))
+    assert group.attrs["downsample_factors"] == list(reference.downsampled_data)
+    for factor, expected in reference.downsampled_data.items():
+        np.testing.assert_array_equal(group[f"data_ds_{factor}"][:], expected)
+
+
+def test_out_of_core_zarr_source():
+    """Test streaming from a zarr array source"""
+    data = np.random.randn(20003, 2).astype(np.float32)
+    source_group = figpack.Group(zarr.group(store=zarr.storage.MemoryStore()))
+    source = source_group.create_dataset("source", data=data, chunks=(1000, 2))
+
+    view = MultiChannelTimeseries(
+        start_time_sec=0.0,
+        sampling_frequency_hz=1000.0,
+        data=source,
+        block_size_mb=0.001,
+    )
+
+    reference = MultiChannelTimeseries(
+        start_time_sec=0.0,
+        sampling_frequency_hz=1000.0,
+        data=data,
+    )
+    for factor, expected in reference.downsampled_data.items():
+        np.testing.assert_array_equal(view.downsampled_data[factor], expected)
+
+    store = zarr.storage.MemoryStore()
+    root = zarr.group(store=store)
+    group = figpack.Group(root.create_group("test"))
+    view.write_to_zarr_group(group)
+    np.testing.assert_array_equal(group["data"][:], data)
@@ -0,0 +1,189 @@
+"""
+Tests for the zarr store that writes chunks directly into pack files
+"""
+
+import json
+
+import numpy as np
+import zarr
+
+import figpack
+from figpack.core._pack_store import (
+    consolidated_metadata,
+    create_pack_store,
+    write_consolidated_metadata,
+)
+from figpack.core._zarr_consolidate import (
+    SMALL_ARRAY_SIZE,
+    consolidate_zarr_chunks,
+    get_array_paths,
+    sort_chunks_by_locality,
+)
+from figpack.core.pyramid import write_series_with_pyramid
+from figpack.core.zarr import _check_zarr_version
+
+
+def _read_refs(zarr_dir):
+    with open(zarr_dir / ".zmetadata") as f:
+        zmetadata = json.load(f)
+    chunks = {}
+    for key, (file_name, offset, size) in zmetadata["refs"].items():
+        with open(zarr_dir / file_name, "rb") as f:
+            f.seek(offset)
+            chunks[key] = f.read(size)
+    return zmetadata, chunks
+
+
+def _open_group(store):
+    if _check_zarr_version() == 3:
+        return zarr.open_group(store, mode="w", zarr_format=2)
+    return zarr.open_group(store, mode="w")
+
+
+def _create(group, name, **kwargs):
+    if _check_zarr_version() == 3:
+        return group.create_array(name, **kwargs)
+    return group.create_dataset(name, **kwargs)
+
+
+def test_pack_store_matches_directory_store(tmp_path):
+    data = np.random.default_rng(0).integers(0, 2**31, 50_000, dtype=np.int32)
+
+    packed_dir = tmp_path / "packed.zarr"
+    store = create_pack_store(packed_dir, max_file_size=50_000)
+    group = _open_group(store)
+    _create(group, "a", data=data, chunks=(5000,))
+    sub = group.create_group("sub")
+    b = _create(sub, "b", shape=(100,), dtype="f8", chunks=(30,))
+    # Partial writes read back and overwrite chunks in the pack files
+    b[10:50] = 1.5
+    b[40:45] = 2.0
+    np.testing.assert_array_equal(group["a"][:], data)
+    assert sorted(group.keys()) == ["a", "sub"]
+
+    write_consolidated_metadata(store)
+
+    plain_dir = tmp_path / "plain.zarr"
+    group = _open_group(str(plain_dir))
+    _create(group, "a", data=data, chunks=(5000,))
+    b = _create(group.create_group("sub"), "b", shape=(100,), dtype="f8", chunks=(30,))
+    b[10:50] = 1.5
+    b[40:45] = 2.0
+    zarr.consolidate_metadata(str(plain_dir))
+    consolidate_zarr_chunks(plain_dir)
+
+    packed_metadata, packed_chunks = _read_refs(packed_dir)
+    plain_metadata, plain_chunks = _read_refs(plain_dir)
+    assert packed_chunks == plain_chunks
+    for value in plain_metadata["metadata"].values():
+        # Added to the subgroups by the consolidation of zarr 3
+        value.pop("consolidated_metadata", None)
+    assert packed_metadata["metadata"] == plain_metadata["metadata"]
+    # .zmetadata is the only metadata file
+    assert sorted(
+        p.name for p in packed_dir.rglob("*") if not p.name.endswith(".dat")
+    ) == [".zmetadata"]
+
+    # Overwritten chunks were dropped and the size limit respected
+    pack_files = sorted(packed_dir.glob("_consolidated_*.dat"))
+    assert len(pack_files) > 1
+    assert all(p.stat().st_size <= 50_000 for p in pack_files)
+    assert sum(p.stat().st_size for p in pack_files) == sum(
+        len(c) for c in packed_chunks.values()
+    )
+
+
+def test_consolidated_metadata_ignores_write_order():
+    items = {
+        "b/.zattrs": b'{"x": 1}',
+        ".zgroup": b'{"zarr_format": 2}',
+        "a/.zarray": b'{"shape": [3]}',
+        "a/0": b"chunk",
+    }
+    reordered = dict(reversed(list(items.items())))
+    assert json.dumps(consolidated_metadata(items)) == json.dumps(
+        consolidated_metadata(reordered)
+    )
+    assert list(consolidated_metadata(items)["metadata"]) == [
+        ".zgroup",
+        "a/.zarray",
+        "b/.zattrs",
+    ]
+
+
+def test_consolidate_keeps_existing_pack_files(tmp_path):
+    zarr_dir = tmp_path / "data.zarr"
+    store = create_pack_store(zarr_dir)
+    group = _open_group(store)
+    _create(group, "a", data=np.arange(1000, dtype=np.int16), chunks=(100,))
+    write_consolidated_metadata(store)
+    _, chunks_before = _read_refs(zarr_dir)
+
+    # A chunk file written outside of the store is packed into a new file
+    (zarr_dir / "extra").mkdir()
+    (zarr_dir / "extra" / "0").write_bytes(b"loose chunk")
+    consolidate_zarr_chunks(zarr_dir)
+
+    _, chunks_after = _read_refs(zarr_dir)
+    assert chunks_after.pop("extra/0") == b"loose chunk"
+    assert chunks_after == chunks_before
+    assert not (zarr_dir / "extra").exists()
+
+
+def test_sort_chunks_by_locality():
+    chunk_sizes = {
+        "s/data/10.0": 5_000_000,
+        "s/data/2.0": 5_000_000,
+        "s/data_ds_4/1.0.0": 600_000,
+        "s/data_ds_4/0.0.0": 600_000,
+        "s/data_ds_16/0.0.0": 300_000,
+        "s/channel_ids/0": 100,
+        "a/0.0": 100,
+        "t/data_ds_4/0.0.0": 600_000,
+        "t/data_ds_4/1.0.0": 600_000,
+    }
+    array_paths = ["s/data", "s/data_ds_4", "s/data_ds_16", "s/channel_ids", "a"]
+    assert sort_chunks_by_locality(chunk_sizes, array_paths + ["t/data_ds_4"]) == [
+        "a/0.0",
+        "s/channel_ids/0",
+        "s/data_ds_16/0.0.0",
+        "s/data_ds_4/0.0.0",
+        "s/data_ds_4/1.0.0",
+        "t/data_ds_4/0.0.0",
+        "t/data_ds_4/1.0.0",
+        "s/data/2.0",
+        "s/data/10.0",
+    ]
+
+
+def test_pack_store_writes_pyramid_in_locality_order(tmp_path):
+    zarr_dir = tmp_path / "data.zarr"
+    store = create_pack_store(zarr_dir, max_file_size=500_000)
+    group = figpack.Group(_open_group(store))
+    data = np.random.default_rng(0).standard_normal((200_000, 2)).astype(np.float32)
+    if _check_zarr_version() == 3:
+        # As when writing a figure: the chunks of each write are stored in order
+        with zarr.config.set({"async.concurrency": 1}):
+            write_series_with_pyramid(
+                group, data, get_chunks=lambda shape: (1000,) + tuple(shape[1:])
+            )
+    else:
+        write_series_with_pyramid(
+            group, data, get_chunks=lambda shape: (1000,) + tuple(shape[1:])
+        )
+    write_consolidated_metadata(store)
+    # The raw data and the pyramid levels were streamed into separate segment
+    # files, which became the pack files without being copied (except for
+    # small levels merged into the previous pack file)
+    assert 0 < store.pack_files.num_bytes_copied <= SMALL_ARRAY_SIZE
+    assert not list(zarr_dir.glob("*.tmp"))
+
+    zmetadata, chunks = _read_refs(zarr_dir)
+    refs = zmetadata["refs"]
+    packed_order = sorted(refs, key=lambda key: (refs[key][0], refs[key][1]))
+    assert packed_order == sort_chunks_by_locality(
+        {key: len(chunk) for key, chunk in chunks.items()},
+        get_array_paths(zmetadata),
+    )
+    assert packed_order[0].startswith("data_ds_64/")
+    assert packed_order[-1] == "data/199.0"
@@ -0,0 +1,118 @@
+"""
+Tests for the streaming downsampling pyramid
+"""
+
+import numpy as np
+import pytest
+import zarr
+import zarr.storage
+
+import figpack
+from figpack.core.zarr import ParallelChunkWriter
+from figpack.core.pyramid import (
+    PyramidBuilder,
+    compute_pyramid,
+    get_downsample_factors,
+    write_series_with_pyramid,
+)
+
+
+def _reference_level(data: np.ndarray, factor: int, func) -> np.ndarray:
+    """Reduce NaN-padded bins of `factor` samples with a nan-aware function"""
+    n_timepoints, n_channels = data.shape
+    n_bins = -(-n_timepoints // factor)
+    padded = np.full((n_bins * factor, n_channels), np.nan, dtype=np.float32)
+    padded[:n_timepoints] = data
+    with np.errstate(all="ignore"):
+        return func(padded.reshape(n_bins, factor, n_channels), axis=1)
+
+
+def _make_data(n_timepoints: int, n_channels: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    data = rng.standard_normal((n_timepoints, n_channels)).astype(np.float32)
+    data[rng.random(data.shape) < 0.05] = np.nan
+    return data
+
+
+def test_get_downsample_factors():
+    assert get_downsample_factors(3) == []
+    assert get_downsample_factors(4) == [4]
+    assert get_downsample_factors(16_000) == [4]
+    assert get_downsample_factors(16_001) == [4, 16]
+    assert get_downsample_factors(1_000_000) == [4, 16, 64, 256]
+
+
+@pytest.mark.parametrize("block_size_mb", [64.0, 0.001, 0.0003])
+def test_minmax_matches_reference(block_size_mb):
+    data = _make_data(70_001, 3)
+    levels = compute_pyramid(data, reduction="minmax", block_size_mb=block_size_mb)
+    assert list(levels) == [4, 16, 64]
+    for factor, level in levels.items():
+        assert level.shape == (-(-70_001 // factor), 2, 3)
+        assert level.dtype == np.float32
+        np.testing.assert_array_equal(
+            level[:, 0, :], _reference_level(data, factor, np.nanmin)
+        )
+        np.testing.assert_array_equal(
+            level[:, 1, :], _reference_level(data, factor, np.nanmax)
+        )
+
+
+def test_max_and_mean_match_reference():
+    data = _make_data(50_003, 2)
+    max_levels = compute_pyramid(data, reduction="max", block_size_mb=0.001)
+    mean_levels = compute_pyramid(data, reduction="mean", block_size_mb=0.001)
+    for factor in get_downsample_factors(len(data)):
+        np.testing.assert_array_equal(
+            max_levels[factor], _reference_level(data, factor, np.nanmax)
+        )
+        np.testing.assert_allclose(
+            mean_levels[factor],
+            _reference_level(data, factor, np.nanmean),
+            rtol=1e-5,
+            atol=1e-6,
+        )
+
+
+def test_blocks_not_multiple_of_4():
+    data = _make_data(1_000, 2)
+    levels = {4: []}
+    builder = PyramidBuilder(
+        factors=[4], n_channels=2, emit=lambda f, bins: levels[f].append(bins)
+    )
+    for start in range(0, 1_000, 7):
+        builder.add_block(data[start : start + 7])
+    builder.finish()
+    result = np.concatenate(levels[4], axis=0)
+    np.testing.assert_array_equal(result[:, 1, :], _reference_level(data, 4, np.nanmax))
+
+
+def test_invalid_reduction():
+    with pytest.raises(ValueError, match="Unsupported reduction"):
+        PyramidBuilder(factors=[4], n_channels=1, emit=lambda f, b: None, reduction="x")
+
+
+@pytest.mark.parametrize("num_write_workers", [1, 4])
+def test_write_series_with_pyramid(num_write_workers):
+    data = _make_data(20_001, 4)
+    parallel_writer = (
+        ParallelChunkWriter(num_write_workers) if num_write_workers > 1 else None
+    )
+    group = figpack.Group(
+        zarr.group(store=zarr.storage.MemoryStore()), parallel_writer=parallel_writer
+    )
+    shapes = write_series_with_pyramid(
+        group,
+        data,
+        get_chunks=lambda shape: (1000,) + tuple(shape[1:]),
+        reduction="minmax",
+        block_size_mb=0.01,
+    )
+    group.flush()
+    if parallel_writer is not None:
+        parallel_writer.shutdown()
+    assert shapes == {4: (5001, 2, 4), 16: (1251, 2, 4)}
+    np.testing.assert_array_equal(group["data"][:], data)
+    expected = compute_pyramid(data, reduction="minmax")
+    for factor in shapes:
+        np.testing.assert_array_equal(group[f"data_ds_{factor}"][:], expected[factor])
@@ -0,0 +1,195 @@
+"""
+Tests for the quantized integer storage of uniformly sampled series
+"""
+
+import numpy as np
+import pytest
+import zarr
+import zarr.storage
+
+import figpack
+from figpack.core.pyramid import compute_pyramid
+from figpack.core.quantization import get_quantization
+from figpack.views.MultiChannelTimeseries import MultiChannelTimeseries
+from figpack.views.TimeseriesGraph import TimeseriesGraph
+
+
+def _make_group():
+    root = zarr.group(store=zarr.storage.MemoryStore())
+    return figpack.Group(root.create_group("test"))
+
+
+def test_get_quantization():
+    data = np.zeros((1000, 4), dtype=np.float32)
+    data[:, 0] = np.arange(1000) - 500  # integers: exact
+    data[:, 1] = np.linspace(-2.5, 7.5, 1000)  # quantized
+    data[:, 2] = 3.25  # constant: exact
+    data[:, 3] = np.nan  # all NaN
+    data[10, 1] = np.nan
+
+    q = get_quantization([data[:600], data[600:]], n_channels=4, storage_dtype="int16")
+    assert q.dtype == np.int16
+    assert list(q.exact) == [True, False, True, True]
+    assert q.scale[0] == 1
+    stored = q.to_stored(q.quantize(data))
+    values = q.dequantize(stored)
+    np.testing.assert_array_equal(values[:, [0, 2, 3]], data[:, [0, 2, 3]])
+    assert np.isnan(values[10, 1])
+    valid = ~np.isnan(data[:, 1])
+    error = np.abs(values[valid, 1] - data[valid, 1])
+    assert error.max() <= q.max_error[1] * (1 + 1e-5)
+    assert q.max_error[1] == pytest.approx(10 / 65534 / 2)
+    # The stored range is symmetric, with the smallest value kept for NaN
+    assert stored[:, 1].max() == 32767
+    assert stored[:, 1][valid].min() == -32767
+
+    assert get_quantization([data], n_channels=4, storage_dtype="float32") is None
+    with pytest.raises(ValueError):
+        get_quantization([data], n_channels=4, storage_dtype="int8", max_error=0.01)
+    with pytest.raises(ValueError):
+        get_quantization([data], n_channels=4, storage_dtype="float16")
+
+
+def test_multichannel_timeseries_int16_source_is_exact():
+    rng = np.random.default_rng(0)
+    data = rng.integers(-32767, 32768, (50003, 3)).astype(np.int16)
+    view = MultiChannelTimeseries(
+        start_time_sec=0.0,
+        sampling_frequency_hz=30000.0,
+        data=data,
+        storage_dtype="int16",
+        max_quantization_error=0,
+        block_size_mb=0.05,
+    )
+    # The integer data is not converted to float32 in memory
+    assert view.data is data
+
+    group = _make_group()
+    view.write_to_zarr_group(group)
+    assert group["data"].dtype == np.int16
+    np.testing.assert_array_equal(group["data"][:], data)
+    quantization = group.attrs["quantization"]
+    assert quantization["scale"] == [1.0, 1.0, 1.0]
+    assert quantization["max_error"] == [0.0, 0.0, 0.0]
+    for factor, expected in compute_pyramid(data).items():
+        stored = group[f"data_ds_{factor}"][:]
+        assert stored.dtype == np.int16
+        np.testing.assert_array_equal(stored, expected)
+
+
+def test_full_range_int16_is_stored_unchanged():
+    data = np.array([[-32768, 0], [32767, 5], [0, -32768]], dtype=np.int16)
+    q = get_quantization([data], n_channels=2, storage_dtype="int16")
+    assert list(q.exact) == [True, True]
+    assert q.nan_value is None
+    assert q.to_attrs()["nan_value"] is None
+    stored = q.to_stored(q.quantize(data))
+    assert stored.dtype == np.int16
+    # The full-range channel is passed through (offset 0)
+    np.testing.assert_array_equal(stored[:, 0], data[:, 0])
+    np.testing.assert_array_equal(q.dequantize(stored), data)
+
+    # With NaNs the smallest value is reserved, so the full range no longer
+    # fits exactly
+    with_nan = np.vstack([data, [[np.nan, 0]]]).astype(np.float32)
+    q = get_quantization([with_nan], n_channels=2, storage_dtype="int16")
+    assert list(q.exact) == [False, True]
+    assert q.nan_value == -32768
+    stored = q.to_stored(q.quantize(with_nan))
+    assert stored[-1, 0] == -32768
+    assert stored[:-1, 0].min() == -32767
+
+    # Full-range int16 recordings are written unchanged
+    rng = np.random.default_rng(2)
+    recording = rng.integers(-32768, 32768, (5000, 2)).astype(np.int16)
+    recording[0] = -32768
+    recording[1] = 32767
+    view = MultiChannelTimeseries(
+        start_time_sec=0.0,
+        sampling_frequency_hz=30000.0,
+        data=recording,
+        storage_dtype="int16",
+        max_quantization_error=0,
+    )
+    group = _make_group()
+    view.write_to_zarr_group(group)
+    np.testing.assert_array_equal(group["data"][:], recording)
+    assert group.attrs["quantization"]["offset"] == [0.0, 0.0]
+
+
+@pytest.mark.parametrize("storage_dtype", ["float32", "int16", "int8"])
+def test_chunk_size_follows_storage_dtype(storage_dtype):
+    data = np.zeros((10_000_000, 4), dtype=np.float32)
+    view = MultiChannelTimeseries(
+        start_time_sec=0.0,
+        sampling_frequency_hz=30000.0,
+        data=data,
+        storage_dtype=storage_dtype,
+    )
+    itemsize = np.dtype(storage_dtype).itemsize
+    for shape in [data.shape, (1_000_000, 2, 4)]:
+        chunks = view._calculate_optimal_chunk_size(shape)
+        chunk_bytes = np.prod(chunks) * itemsize
+        # The largest power of two number of timepoints within 5 MB
+        assert 2.5 * 1024 * 1024 < chunk_bytes <= 5 * 1024 * 1024
+
+
+def test_multichannel_timeseries_quantized_levels_bound_the_data():
+    rng = np.random.default_rng(1)
+    data = rng.standard_normal((20000, 2)).astype(np.float32)
+    view = MultiChannelTimeseries(
+        start_time_sec=0.0,
+        sampling_frequency_hz=1000.0,
+        data=data,
+        storage_dtype="int8",
+    )
+    group = _make_group()
+    view.write_to_zarr_group(group)
+
+    attrs = group.attrs["quantization"]
+    scale = np.array(attrs["scale"])
+    offset = np.array(attrs["offset"])
+    max_error = np.array(attrs["max_error"])
+    values = group["data"][:] * scale + offset
+    assert np.all(np.abs(values - data) <= max_error * (1 + 1e-5))
+    # The min/max levels are those of the stored values
+    for factor, expected in compute_pyramid(values).items():
+        np.testing.assert_allclose(
+            group[f"data_ds_{factor}"][:] * scale + offset, expected, rtol=1e-6
+        )
+
+    with pytest.raises(ValueError):
+        MultiChannelTimeseries(
+            start_time_sec=0.0,
+            sampling_frequency_hz=1000.0,
+            data=data,
+            storage_dtype="uint8",
+        )
+
+
+def test_uniform_series_quantization_with_nans():
+    data = np.arange(1000, dtype=np.int16).reshape(-1, 2)
+    timestamps = np.arange(500) / 100.0
+    timestamps[250:] += 1.0  # one second gap, filled with NaNs
+    graph = TimeseriesGraph()
+    graph.add_uniform_series(
+        name="u",
+        start_time_sec=0.0,
+        sampling_frequency_hz=100.0,
+        data=data,
+        timestamps_for_inserting_nans=timestamps,
+        storage_dtype="int16",
+    )
+    root = zarr.group(store=zarr.storage.MemoryStore())
+    group = figpack.Group(root)
+    graph.write_to_zarr_group(group)
+    group.flush()
+
+    series = root["u"]
+    attrs = series.attrs["quantization"]
+    stored = series["data"][:]
+    assert stored.dtype == np.int16
+    values = stored * np.array(attrs["scale"]) + np.array(attrs["offset"])
+    values[stored == attrs["nan_value"]] = np.nan
+    np.testing.assert_array_equal(values, graph._series[0].data)
+    assert series.attrs["y_max"] == 999
@@ -1,11 +1,17 @@
 import os
 import pathlib
 import json
+import threading
+import time
 import pytest
 from http.client import HTTPConnection
+from email.parser import BytesParser
+import figpack.core._server_manager as server_manager
 from figpack.core._server_manager import (
     ProcessServerManager,
+    _FileValidatorCache,
     _is_process_alive,
+    _parse_byte_ranges,
 )
 
 
@@ -16,6 +22,75 @@ def test_is_process_alive():
     assert _is_process_alive(999999) is False
 
 
+def test_parse_byte_ranges():
+    assert _parse_byte_ranges("0-99", 1000) == [(0, 99)]
+    assert _parse_byte_ranges("900-", 1000) == [(900, 999)]
+    assert _parse_byte_ranges("-100", 1000) == [(900, 999)]
+    # Truncated at the end of the file
+    assert _parse_byte_ranges("990-2000", 1000) == [(990, 999)]
+    # Sorted, with overlapping and adjacent ranges merged
+    assert _parse_byte_ranges("500-599, 0-9,5-19,20-29", 1000) == [
+        (0, 29),
+        (500, 599),
+    ]
+    # Unsatisfiable ranges are dropped
+    assert _parse_byte_ranges("1000-1100", 1000) == []
+    assert _parse_byte_ranges("5-3,10-19", 1000) == [(10, 19)]
+    for invalid in ["", "abc", "10", "-", "a-b"]:
+        with pytest.raises(ValueError):
+            _parse_byte_ranges(invalid, 1000)
+
+
+def test_concurrent_validator_requests_hash_once(tmp_path, monkeypatch):
+    data_file = tmp_path / "data.bin"
+    data_file.write_bytes(b"x" * 1000)
+    compute = server_manager._compute_file_sha256
+    num_hashes = []
+
+    def _slow_sha256(path):
+        num_hashes.append(path)
+        time.sleep(0.2)
+        return compute(path)
+
+    monkeypatch.setattr(server_manager, "_compute_file_sha256", _slow_sha256)
+    cache = _FileValidatorCache()
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get(str(data_file))))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(num_hashes) == 1
+    assert len(results) == 8
+    assert len({etag for etag, _ in results}) == 1
+
+    # A changed file is hashed again
+    data_file.write_bytes(b"y" * 1000)
+    assert cache.get(str(data_file))[0] != results[0][0]
+    assert len(num_hashes) == 2
+
+
+def test_pack_file_validators_are_not_hashed(tmp_path, monkeypatch):
+    def _fail(path):
+        raise AssertionError(f"{path} should not be hashed")
+
+    monkeypatch.setattr(server_manager, "_compute_file_sha256", _fail)
+    pack_file = tmp_path / "_consolidated_0.dat"
+    pack_file.write_bytes(b"x" * 1000)
+    cache = _FileValidatorCache()
+    etag, _ = cache.get(str(pack_file))
+    assert etag == cache.get(str(pack_file))[0]
+
+    # Rewriting the pack file changes its validator
+    time.sleep(0.01)
+    pack_file.write_bytes(b"x" * 1001)
+    assert cache.get(str(pack_file))[0] != etag
+
+
 def create_test_process_dir(
     temp_dir: pathlib.Path, pid: int = None, port: int = None
 ) -> pathlib.Path:
@@ -38,6 +113,10 @@ class TestProcessServerManager:
         yield manager
         manager._cleanup()
 
+    @pytest.fixture(params=["threading", "asyncio"])
+    def backend(self, request):
+        return request.param
+
     def test_singleton_pattern(self):
         manager1 = ProcessServerManager.get_instance()
         manager2 = ProcessServerManager.get_instance()
@@ -55,9 +134,9 @@ class TestProcessServerManager:
         assert subdir.is_dir()
         assert subdir.parent == manager.get_temp_dir()
 
-    def test_server_start_stop(self, manager):
+    def test_server_start_stop(self, manager, backend):
         # Start server
-        url, port = manager.start_server()
+        url, port = manager.start_server(backend=backend)
         assert url == f"http://localhost:{port}"
 
         # Verify server is running
@@ -78,10 +157,10 @@ class TestProcessServerManager:
             conn.request("GET", "/")
             conn.getresponse()
 
-    def test_cors_headers(self, manager):
+    def test_cors_headers(self, manager, backend):
         # Start server with CORS
         allow_origin = "http://example.com"
-        url, port = manager.start_server(allow_origin=allow_origin)
+        url, port = manager.start_server(allow_origin=allow_origin, backend=backend)
 
         # Check CORS headers
         conn = HTTPConnection("localhost", port)
@@ -125,3 +204,121 @@ class TestProcessServerManager:
             conn = HTTPConnection("localhost", port)
             conn.request("GET", "/")
             conn.getresponse()
+
+    def test_range_requests(self, manager, backend):
+        content = (bytes(range(256)) * 400)[:100_000]
+        (manager.get_temp_dir() / "data.bin").write_bytes(content)
+        url, port = manager.start_server(backend=backend)
+
+        def _get(range_header=None):
+            conn = HTTPConnection("localhost", port)
+            try:
+                headers = {"Range": range_header} if range_header else {}
+                conn.request("GET", "/data.bin", headers=headers)
+                response = conn.getresponse()
+                return response.status, dict(response.getheaders()), response.read()
+            finally:
+                conn.close()
+
+        status, headers, body = _get()
+        assert status == 200
+        assert body == content
+
+        status, headers, body = _get("bytes=1000-1999")
+        assert status == 206
+        assert headers["Content-Range"] == "bytes 1000-1999/100000"
+        assert body == content[1000:2000]
+
+        status, headers, body = _get("bytes=-10")
+        assert status == 206
+        assert body == content[-10:]
+
+        status, headers, body = _get("bytes=200000-")
+        assert status == 416
+        assert headers["Content-Range"] == "bytes */100000"
+
+        status, headers, body = _get("bytes=50000-50099,10-19,99990-")
+        assert status == 206
+        assert int(headers["Content-Length"]) == len(body)
+        message = BytesParser().parsebytes(
+            f"Content-Type: {headers['Content-Type']}\r\n\r\n".encode() + body
+        )
+        assert message.get_content_type() == "multipart/byteranges"
+        parts = [
+            (part["Content-Range"], part.get_payload(decode=True))
+            for part in message.get_payload()
+        ]
+        assert parts == [
+            ("bytes 10-19/100000", content[10:20]),
+            ("bytes 50000-50099/100000", content[50000:50100]),
+            ("bytes 99990-99999/100000", content[99990:]),
+        ]
+
+    def test_conditional_requests(self, manager, backend):
+        data_file = manager.get_temp_dir() / "data.bin"
+        data_file.write_bytes(b"0123456789" * 100)
+        url, port = manager.start_server(backend=backend)
+
+        def _get(headers=None):
+            conn = HTTPConnection("localhost", port)
+            try:
+                conn.request("GET", "/data.bin", headers=headers or {})
+                response = conn.getresponse()
+                return response.status, dict(response.getheaders()), response.read()
+            finally:
+                conn.close()
+
+        status, headers, body = _get()
+        assert status == 200
+        etag = headers["ETag"]
+        assert headers["Cache-Control"] == "no-cache"
+        assert "Last-Modified" in headers
+
+        status, headers, body = _get({"If-None-Match": etag})
+        assert status == 304
+        assert body == b""
+        assert headers["ETag"] == etag
+
+        status, headers, body = _get({"If-None-Match": f'"other", W/{etag}'})
+        assert status == 304
+
+        # A stale If-Range validator gets the full, current file
+        status, headers, body = _get({"Range": "bytes=0-9", "If-Range": '"stale"'})
+        assert status == 200
+        assert len(body) == 1000
+        status, headers, body = _get({"Range": "bytes=0-9", "If-Range": etag})
+        assert status == 206
+        assert body == b"0123456789"
+
+        # Editing the file in place changes its ETag
+        data_file.write_bytes(b"abcdefghij" * 100)
+        status, headers, body = _get({"If-None-Match": etag})
+        assert status == 200
+        assert headers["ETag"] != etag
+        assert body == b"abcdefghij" * 100
+
+    def test_immutable_pack_files(self, manager, backend):
+        url, port = manager.start_server(backend=backend)
+        sealed_dir = manager.create_figure_subdir()
+        dev_dir = manager.create_figure_subdir(_local_figure_name="dev_figure")
+        for figure_dir in (sealed_dir, dev_dir):
+            (figure_dir / "data.zarr").mkdir()
+            (figure_dir / "data.zarr" / "_consolidated_0.dat").write_bytes(b"x" * 10)
+            (figure_dir / "index.html").write_text("<html></html>")
+
+        def _cache_control(path):
+            conn = HTTPConnection("localhost", port)
+            try:
+                conn.request("GET", path)
+                response = conn.getresponse()
+                response.read()
+                return response.getheader("Cache-Control")
+            finally:
+                conn.close()
+
+        immutable = "public, max-age=31536000, immutable"
+        pack_path = "data.zarr/_consolidated_0.dat"
+        assert _cache_control(f"/{sealed_dir.name}/{pack_path}") == immutable
+        assert _cache_control(f"/{sealed_dir.name}/index.html") == "no-cache"
+        assert _cache_control(f"/dev_figure/{pack_path}") == "no-cache"
+        assert _cache_control("/missing.txt") == "no-cache, no-store, must-revalidate"
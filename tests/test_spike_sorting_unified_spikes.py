@@ -0,0 +1,481 @@
+"""
+Tests for the unified spike arrays of the figpack_spike_sorting extension
+(RasterPlot, SpikeAmplitudes), their chunk index, and the storage of spike
+times as sample indices
+"""
+
+import numpy as np
+import pytest
+import zarr
+import zarr.storage
+
+import figpack
+
+try:
+    from figpack_spike_sorting.views import (
+        RasterPlot,
+        RasterPlotItem,
+        SpikeAmplitudes,
+        SpikeAmplitudesItem,
+        SpikeLocations,
+        SpikeLocationsItem,
+    )
+    from figpack_spike_sorting.views._unified_spikes import (
+        MAX_EVENT_CHUNK_LENGTH,
+        MIN_EVENT_CHUNK_LENGTH,
+        encode_spike_times,
+        generate_reference_arrays,
+        get_chunk_index,
+        get_event_chunk_length,
+        get_unit_index_dtype,
+        merge_spike_trains,
+    )
+except (ImportError, FileNotFoundError):
+    # Not installed, or its JavaScript bundle has not been built
+    pytest.skip("figpack_spike_sorting is not available", allow_module_level=True)
+
+
+def _merge_with_loop(spike_times_per_unit, unit_indices, values_per_unit=None):
+    # The implementation that merge_spike_trains replaced
+    all_spikes = []
+    for k, times in enumerate(spike_times_per_unit):
+        for j, time in enumerate(times):
+            value = float(values_per_unit[k][j]) if values_per_unit else 0.0
+            all_spikes.append((float(time), unit_indices[k], value))
+    all_spikes.sort(key=lambda x: x[0])
+    return (
+        np.array([spike[0] for spike in all_spikes], dtype=np.float32),
+        np.array([spike[1] for spike in all_spikes], dtype=np.uint16),
+        np.array([spike[2] for spike in all_spikes], dtype=np.float32),
+    )
+
+
+def _reference_arrays_with_loop(timestamps, interval_sec=1.0):
+    # The implementation that generate_reference_arrays replaced
+    if len(timestamps) == 0:
+        return np.array([], dtype=np.float32), np.array([], dtype=np.uint32)
+    reference_times = [timestamps[0]]
+    reference_indices = [0]
+    current_ref_time = timestamps[0]
+    for i, timestamp in enumerate(timestamps):
+        if timestamp >= current_ref_time + interval_sec:
+            reference_times.append(timestamp)
+            reference_indices.append(i)
+            current_ref_time = timestamp
+    return np.array(reference_times, dtype=np.float32), np.array(
+        reference_indices, dtype=np.uint32
+    )
+
+
+def _make_trains(rng, num_units, max_spikes, duration_sec):
+    trains = []
+    for _ in range(num_units):
+        # Times on a coarse grid, so that units share many spike times
+        times = np.round(rng.uniform(0, duration_sec, rng.integers(0, max_spikes)), 1)
+        times.sort()
+        trains.append(times.astype(np.float32))
+    return trains
+
+
+def _write_view(view):
+    root = zarr.group(store=zarr.storage.MemoryStore())
+    group = figpack.Group(root.create_group("view"))
+    view.write_to_zarr_group(group)
+    group.flush()
+    return root["view"]
+
+
+def _read_spike_times(group, name="timestamps"):
+    # As the viewer does (spikeTimesFromStored)
+    data = group[name][:]
+    if "sampling_frequency_hz" not in group.attrs:
+        return data
+    return (group.attrs["sample_offset"] + data.astype(np.float64)) / group.attrs[
+        "sampling_frequency_hz"
+    ]
+
+
+def test_merge_spike_trains_matches_loop():
+    rng = np.random.default_rng(0)
+    trains = _make_trains(rng, num_units=6, max_spikes=400, duration_sec=20)
+    amplitudes = [rng.standard_normal(len(t)).astype(np.float32) for t in trains]
+    # Units are not in index order, and two units share an index
+    unit_indices = [3, 0, 5, 1, 1, 2]
+
+    timestamps, merged_units, values = merge_spike_trains(
+        trains, unit_indices, amplitudes
+    )
+    expected = _merge_with_loop(trains, unit_indices, amplitudes)
+    np.testing.assert_array_equal(timestamps, expected[0])
+    np.testing.assert_array_equal(merged_units, expected[1])
+    np.testing.assert_array_equal(values, expected[2])
+    assert timestamps.dtype == np.float32
+    assert merged_units.dtype == np.uint8
+
+
+def test_merge_spike_trains_breaks_ties_by_unit_order():
+    trains = [
+        np.array([1.0, 2.0, 2.0], dtype=np.float32),
+        np.array([0.5, 2.0], dtype=np.float32),
+        np.array([2.0], dtype=np.float32),
+    ]
+    amplitudes = [np.array([10, 11, 12]), np.array([20, 21]), np.array([30])]
+    timestamps, unit_indices, values = merge_spike_trains(trains, [2, 0, 1], amplitudes)
+    np.testing.assert_array_equal(timestamps, [0.5, 1.0, 2.0, 2.0, 2.0, 2.0])
+    # Ties keep the order of the units, then the order within each unit
+    np.testing.assert_array_equal(unit_indices, [0, 2, 2, 2, 0, 1])
+    np.testing.assert_array_equal(values, [20, 10, 11, 12, 21, 30])
+
+
+def test_merge_spike_trains_with_empty_units():
+    empty = np.array([], dtype=np.float32)
+    trains = [empty, np.array([3.0, 1.0], dtype=np.float32), empty]
+    timestamps, unit_indices, values = merge_spike_trains(trains, [0, 1, 2])
+    # Unsorted trains are sorted too
+    np.testing.assert_array_equal(timestamps, [1.0, 3.0])
+    np.testing.assert_array_equal(unit_indices, [1, 1])
+    assert values is None
+
+    timestamps, unit_indices, values = merge_spike_trains(
+        [empty, empty], [0, 1], [empty, empty]
+    )
+    assert len(timestamps) == len(unit_indices) == len(values) == 0
+
+
+@pytest.mark.parametrize("interval_sec", [0.25, 1.0, 7.0])
+def test_generate_reference_arrays_matches_loop(interval_sec):
+    rng = np.random.default_rng(1)
+    # Bursts of spikes separated by gaps longer than the interval, and spikes
+    # exactly one interval apart
+    timestamps = np.concatenate(
+        [
+            np.sort(rng.uniform(0, 30, 2000)),
+            np.sort(rng.uniform(60, 61, 500)),
+            100 + np.arange(20) * interval_sec,
+        ]
+    ).astype(np.float32)
+
+    reference_times, reference_indices = generate_reference_arrays(
+        timestamps, interval_sec
+    )
+    expected_times, expected_indices = _reference_arrays_with_loop(
+        timestamps, interval_sec
+    )
+    np.testing.assert_array_equal(reference_times, expected_times)
+    np.testing.assert_array_equal(reference_indices, expected_indices)
+    assert reference_indices.dtype == np.uint32
+    np.testing.assert_array_equal(timestamps[reference_indices], reference_times)
+    assert np.all(np.diff(reference_times) >= interval_sec)
+
+
+def test_generate_reference_arrays_edge_cases():
+    times, indices = generate_reference_arrays(np.array([], dtype=np.float32))
+    assert len(times) == len(indices) == 0
+
+    times, indices = generate_reference_arrays(np.array([5.0], dtype=np.float32))
+    np.testing.assert_array_equal(indices, [0])
+
+    # All spikes at the same time
+    timestamps = np.full(10, 2.5, dtype=np.float32)
+    times, indices = generate_reference_arrays(timestamps)
+    np.testing.assert_array_equal(indices, [0])
+    np.testing.assert_array_equal(times, [2.5])
+
+
+def test_prepare_unified_data_matches_loop():
+    rng = np.random.default_rng(2)
+    trains = _make_trains(rng, num_units=4, max_spikes=300, duration_sec=10)
+    amplitudes = [rng.standard_normal(len(t)).astype(np.float32) for t in trains]
+    unit_ids = ["u3", "u1", "u7", "u2"]
+
+    raster = RasterPlot(
+        start_time_sec=0,
+        end_time_sec=10,
+        plots=[
+            RasterPlotItem(unit_id=unit_id, spike_times_sec=times)
+            for unit_id, times in zip(unit_ids, trains)
+        ],
+    )
+    amplitudes_view = SpikeAmplitudes(
+        start_time_sec=0,
+        end_time_sec=10,
+        plots=[
+            SpikeAmplitudesItem(
+                unit_id=unit_id, spike_times_sec=times, spike_amplitudes=values
+            )
+            for unit_id, times, values in zip(unit_ids, trains, amplitudes)
+        ],
+    )
+    expected = _merge_with_loop(trains, [0, 1, 2, 3], amplitudes)
+    expected_references = _reference_arrays_with_loop(expected[0])
+    for view in [raster, amplitudes_view]:
+        unified = view._prepare_unified_data()
+        np.testing.assert_array_equal(unified["timestamps"], expected[0])
+        np.testing.assert_array_equal(unified["unit_indices"], expected[1])
+        np.testing.assert_array_equal(
+            unified["reference_indices"], expected_references[1]
+        )
+        assert unified["unit_ids"] == unit_ids
+        assert unified["total_spikes"] == sum(len(t) for t in trains)
+    np.testing.assert_array_equal(
+        amplitudes_view._prepare_unified_data()["amplitudes"], expected[2]
+    )
+
+
+SAMPLING_FREQUENCY = 30000.0
+
+
+def _sample_grid_trains(rng, num_units, num_spikes, first_sample, num_samples):
+    # float64 spike times on the sample grid, as computed from sample indices
+    return [
+        np.sort(rng.integers(first_sample, first_sample + num_samples, num_spikes))
+        / SAMPLING_FREQUENCY
+        for _ in range(num_units)
+    ]
+
+
+def test_encode_spike_times():
+    samples = np.array([120_000, 120_001, 150_000, 4_000_000_000], dtype=np.int64)
+    indices, sample_offset = encode_spike_times(
+        samples / SAMPLING_FREQUENCY, SAMPLING_FREQUENCY
+    )
+    assert sample_offset == 120_000
+    assert indices.dtype == np.uint32
+    np.testing.assert_array_equal(indices + sample_offset, samples)
+
+    indices, sample_offset = encode_spike_times(
+        samples / SAMPLING_FREQUENCY, SAMPLING_FREQUENCY, sample_offset=100_000
+    )
+    assert sample_offset == 100_000
+    np.testing.assert_array_equal(indices, samples - 100_000)
+
+    # Spans of more than 2^32 samples fall back to uint64
+    samples = np.array([7, 2**32 + 7, 2**33], dtype=np.int64)
+    indices, sample_offset = encode_spike_times(
+        samples / SAMPLING_FREQUENCY, SAMPLING_FREQUENCY
+    )
+    assert indices.dtype == np.uint64
+    assert sample_offset == 7
+    np.testing.assert_array_equal(indices, samples - 7)
+
+    indices, sample_offset = encode_spike_times(np.array([]), SAMPLING_FREQUENCY)
+    assert len(indices) == 0 and indices.dtype == np.uint32 and sample_offset == 0
+
+
+def test_encode_spike_times_before_offset():
+    with pytest.raises(ValueError, match="before the sample offset"):
+        encode_spike_times(
+            np.array([1.0, 2.0]), SAMPLING_FREQUENCY, sample_offset=40_000
+        )
+
+
+def test_get_unit_index_dtype():
+    assert get_unit_index_dtype(1) == np.uint8
+    assert get_unit_index_dtype(256) == np.uint8
+    assert get_unit_index_dtype(257) == np.uint16
+    assert get_unit_index_dtype(65536) == np.uint16
+    assert get_unit_index_dtype(65537) == np.uint32
+
+
+@pytest.mark.parametrize("num_units", [3, 300])
+def test_raster_plot_stores_exact_sample_indices(num_units):
+    rng = np.random.default_rng(3)
+    # Four hours into the recording, where float32 seconds are off by up to
+    # about 0.5 ms
+    trains = _sample_grid_trains(
+        rng, num_units, 50, first_sample=432_000_000, num_samples=3_000_000
+    )
+    plots = [
+        RasterPlotItem(unit_id=f"u{i}", spike_times_sec=times)
+        for i, times in enumerate(trains)
+    ]
+    group = _write_view(
+        RasterPlot(
+            start_time_sec=14_400,
+            end_time_sec=14_500,
+            plots=plots,
+            sampling_frequency_hz=SAMPLING_FREQUENCY,
+        )
+    )
+    assert group["timestamps"].dtype == np.uint32
+    assert group.attrs["sample_offset"] == min(
+        int(t[0] * SAMPLING_FREQUENCY) for t in trains
+    )
+    expected, expected_units, _ = merge_spike_trains(
+        trains, list(range(num_units)), timestamps_dtype=np.float64
+    )
+    np.testing.assert_array_equal(_read_spike_times(group), expected)
+    np.testing.assert_array_equal(group["unit_indices"][:], expected_units)
+    assert group["unit_indices"].dtype == (np.uint8 if num_units <= 256 else np.uint16)
+
+    # Without the sampling frequency, the times are float32 seconds
+    group = _write_view(
+        RasterPlot(start_time_sec=14_400, end_time_sec=14_500, plots=plots)
+    )
+    assert "sampling_frequency_hz" not in group.attrs
+    assert group["timestamps"].dtype == np.float32
+    np.testing.assert_array_equal(_read_spike_times(group), expected.astype(np.float32))
+    assert np.abs(_read_spike_times(group) - expected).max() > 1e-4
+
+
+def test_spike_amplitudes_stores_exact_sample_indices():
+    rng = np.random.default_rng(4)
+    # Enough spikes for a subsampled level
+    trains = _sample_grid_trains(
+        rng, 2, 300_000, first_sample=1_000, num_samples=200_000_000
+    )
+    group = _write_view(
+        SpikeAmplitudes(
+            start_time_sec=0,
+            end_time_sec=7000,
+            plots=[
+                SpikeAmplitudesItem(
+                    unit_id=i,
+                    spike_times_sec=times,
+                    spike_amplitudes=np.zeros(len(times), dtype=np.float32),
+                )
+                for i, times in enumerate(trains)
+            ],
+            sampling_frequency_hz=SAMPLING_FREQUENCY,
+        )
+    )
+    expected, _, _ = merge_spike_trains(trains, [0, 1], timestamps_dtype=np.float64)
+    np.testing.assert_array_equal(_read_spike_times(group), expected)
+    level = group["subsampled_data/factor_4"]
+    assert level["timestamps"].dtype == np.uint32
+    np.testing.assert_array_equal(_read_spike_times(level), expected[::4])
+
+
+def test_spike_locations_share_the_sample_offset():
+    trains = [np.array([30_000, 45_000]), np.array([15_000, 90_000])]
+    group = _write_view(
+        SpikeLocations(
+            units=[
+                SpikeLocationsItem(
+                    unit_id=i,
+                    spike_times_sec=samples / SAMPLING_FREQUENCY,
+                    x_locations=np.zeros(2),
+                    y_locations=np.zeros(2),
+                )
+                for i, samples in enumerate(trains)
+            ],
+            x_range=(0, 1),
+            y_range=(0, 1),
+            sampling_frequency_hz=SAMPLING_FREQUENCY,
+        )
+    )
+    assert group.attrs["sample_offset"] == 15_000
+    for i, samples in enumerate(trains):
+        np.testing.assert_array_equal(
+            _read_spike_times(group, f"unit_{i}/spike_times_sec"),
+            samples / SAMPLING_FREQUENCY,
+        )
+
+
+def test_get_event_chunk_length():
+    assert get_event_chunk_length(np.array([])) == 1
+    assert get_event_chunk_length(np.array([12.5])) == 1
+    # All spikes at the same time (span 0): a single chunk
+    assert get_event_chunk_length(np.full(10, 3.0)) == 10
+    assert get_event_chunk_length(np.full(100_000, 3.0)) == 100_000
+    # About 30 s per chunk
+    timestamps = np.linspace(0, 100, 1_000_000)
+    assert get_event_chunk_length(timestamps) == 300_000
+    assert get_event_chunk_length(timestamps, chunk_duration_sec=10) == 100_000
+    # Sparse spikes: at least MIN_EVENT_CHUNK_LENGTH (but no more than all)
+    timestamps = np.linspace(0, 10_000, 200_000)
+    assert get_event_chunk_length(timestamps) == MIN_EVENT_CHUNK_LENGTH
+    assert get_event_chunk_length(timestamps[:1000]) == 1000
+    # Dense spikes: at most MAX_EVENT_CHUNK_LENGTH
+    timestamps = np.linspace(0, 1, 3_000_000)
+    assert get_event_chunk_length(timestamps) == MAX_EVENT_CHUNK_LENGTH
+
+
+def test_get_chunk_index():
+    timestamps = np.array([0.5, 1.0, 1.0, 2.0, 3.5, 3.5, 3.5, 7.0, 9.0, 9.5])
+    chunk_index = get_chunk_index(timestamps, 4)
+    assert chunk_index.dtype == np.float64
+    np.testing.assert_array_equal(
+        chunk_index,
+        [
+            [0.5, 2.0, 0],
+            [3.5, 7.0, 4],
+            # The last chunk is partial
+            [9.0, 9.5, 8],
+        ],
+    )
+    # Chunks that divide the spikes evenly
+    np.testing.assert_array_equal(
+        get_chunk_index(timestamps, 5), [[0.5, 3.5, 0], [3.5, 9.5, 5]]
+    )
+    np.testing.assert_array_equal(get_chunk_index(timestamps, 10), [[0.5, 9.5, 0]])
+
+    # A single spike, and all spikes at the same time
+    np.testing.assert_array_equal(
+        get_chunk_index(np.array([4.25]), 1), [[4.25, 4.25, 0]]
+    )
+    np.testing.assert_array_equal(
+        get_chunk_index(np.full(5, 2.0), 2),
+        [[2.0, 2.0, 0], [2.0, 2.0, 2], [2.0, 2.0, 4]],
+    )
+    assert get_chunk_index(np.array([]), 1).shape == (0, 3)
+
+
+def _check_chunk_index(group):
+    # The chunk index matches the zarr chunks and the times the viewer decodes
+    timestamps = _read_spike_times(group)
+    chunk_length = group["timestamps"].chunks[0]
+    assert group["unit_indices"].chunks[0] == chunk_length
+    chunk_index = group["chunk_index"][:]
+    np.testing.assert_array_equal(
+        chunk_index, get_chunk_index(timestamps, chunk_length)
+    )
+    offsets = chunk_index[:, 2].astype(np.int64)
+    np.testing.assert_array_equal(offsets, np.arange(0, len(timestamps), chunk_length))
+    np.testing.assert_array_equal(chunk_index[:, 0], timestamps[offsets])
+    np.testing.assert_array_equal(
+        chunk_index[:, 1], timestamps[np.append(offsets[1:], len(timestamps)) - 1]
+    )
+    return chunk_index
+
+
+@pytest.mark.parametrize("sampling_frequency_hz", [None, SAMPLING_FREQUENCY])
+def test_views_write_chunk_index(sampling_frequency_hz):
+    rng = np.random.default_rng(5)
+    # Two hours of spikes: several chunks at full resolution and in the
+    # subsampled level
+    trains = _sample_grid_trains(
+        rng, 3, 200_000, first_sample=0, num_samples=216_000_000
+    )
+    raster = _write_view(
+        RasterPlot(
+            start_time_sec=0,
+            end_time_sec=7200,
+            plots=[
+                RasterPlotItem(unit_id=i, spike_times_sec=times)
+                for i, times in enumerate(trains)
+            ],
+            sampling_frequency_hz=sampling_frequency_hz,
+        )
+    )
+    chunk_index = _check_chunk_index(raster)
+    assert len(chunk_index) > 1
+
+    amplitudes = _write_view(
+        SpikeAmplitudes(
+            start_time_sec=0,
+            end_time_sec=7200,
+            plots=[
+                SpikeAmplitudesItem(
+                    unit_id=i,
+                    spike_times_sec=times,
+                    spike_amplitudes=np.ones(len(times), dtype=np.float32),
+                )
+                for i, times in enumerate(trains)
+            ],
+            sampling_frequency_hz=sampling_frequency_hz,
+        )
+    )
+    _check_chunk_index(amplitudes)
+    level = amplitudes["subsampled_data/factor_4"]
+    assert len(_check_chunk_index(level)) > 1
@@ -0,0 +1,153 @@
+"""
+Tests for the reuse of unchanged subviews when a figure is shown again
+"""
+
+import numpy as np
+import pytest
+
+import figpack.views as vv
+from figpack.core import _bundle_utils
+from figpack.core._bundle_utils import (
+    prepare_figure_bundle,
+    prepare_figure_bundle_in_memory,
+)
+from figpack.core._subview_cache import SubviewCache, get_subview_cache
+from figpack.core.figpack_view import FigpackView
+
+
+@pytest.fixture(autouse=True)
+def dist_dir(tmp_path, monkeypatch):
+    dist_dir = tmp_path / "dist"
+    dist_dir.mkdir()
+    (dist_dir / "index.html").write_text("<html>figure</html>")
+    monkeypatch.setattr(_bundle_utils, "FIGURE_DIST_DIR", dist_dir)
+    return dist_dir
+
+
+class CountingView(FigpackView):
+    """A view that records how many times it was written"""
+
+    num_writes = 0
+
+    def __init__(self, data):
+        self.data = data
+
+    def write_to_zarr_group(self, group):
+        CountingView.num_writes += 1
+        group.attrs["view_type"] = "CountingView"
+        group.create_dataset("data", data=self.data)
+
+
+@pytest.fixture(autouse=True)
+def reset_counter():
+    CountingView.num_writes = 0
+
+
+def _make_box(panels):
+    return vv.Box(items=[vv.LayoutItem(panel) for panel in panels])
+
+
+def test_reshow_rewrites_only_changed_subviews():
+    cache = SubviewCache()
+    panels = [CountingView(np.arange(1000) * i) for i in range(3)]
+    first = prepare_figure_bundle_in_memory(
+        _make_box(panels), title="T", subview_cache=cache
+    )
+    assert CountingView.num_writes == 3
+    assert len(cache) == 3
+
+    # Same panels: nothing is rewritten
+    again = prepare_figure_bundle_in_memory(
+        _make_box(panels), title="T", subview_cache=cache
+    )
+    assert CountingView.num_writes == 3
+    assert again == first
+
+    # Change one panel in place: only that one is rewritten
+    panels[1].data[0] = -1
+    changed = prepare_figure_bundle_in_memory(
+        _make_box(panels), title="T", subview_cache=cache
+    )
+    assert CountingView.num_writes == 4
+    assert changed == prepare_figure_bundle_in_memory(_make_box(panels), title="T")
+
+
+def test_reused_subviews_match_disk_bundle(tmp_path):
+    cache = SubviewCache()
+    t = np.arange(50_000) / 100
+    graph = vv.TimeseriesGraph()
+    graph.add_line_series(name="sine", t=t, y=np.sin(t).astype(np.float32))
+    view = vv.TabLayout(
+        items=[
+            vv.TabLayoutItem(label="graph", view=graph),
+            vv.TabLayoutItem(label="text", view=vv.Markdown("# Hello")),
+        ]
+    )
+    prepare_figure_bundle_in_memory(view, title="T", subview_cache=cache)
+    assert len(cache) == 2
+
+    bundle_dir = tmp_path / "bundle"
+    bundle_dir.mkdir()
+    prepare_figure_bundle(view, str(bundle_dir), title="T", subview_cache=cache)
+    reference_dir = tmp_path / "reference"
+    reference_dir.mkdir()
+    prepare_figure_bundle(view, str(reference_dir), title="T")
+    for path in reference_dir.rglob("*"):
+        if path.is_file():
+            relative_path = path.relative_to(reference_dir)
+            assert (bundle_dir / relative_path).read_bytes() == path.read_bytes()
+
+
+def test_subviews_that_cannot_be_fingerprinted_are_rewritten():
+    cache = SubviewCache()
+    assert cache.session().fingerprint(CountingView(np.arange(10))) is not None
+
+    opaque = CountingView(np.arange(10))
+    opaque.extra = object()
+    assert cache.session().fingerprint(opaque) is None
+    # The fingerprint of a layout depends on those of its children
+    assert cache.session().fingerprint(_make_box([opaque])) is None
+
+    for _ in range(2):
+        prepare_figure_bundle_in_memory(
+            _make_box([opaque]), title="T", subview_cache=cache
+        )
+    assert CountingView.num_writes == 2
+
+
+def test_image_file_changes_are_detected(tmp_path):
+    image_path = tmp_path / "image.png"
+    image_path.write_bytes(b"\x89PNG\r\n\x1a\n" + b"a" * 100)
+    session = SubviewCache().session()
+    fingerprint = session.fingerprint(vv.Image(str(image_path)))
+    image_path.write_bytes(b"\x89PNG\r\n\x1a\n" + b"b" * 200)
+    assert SubviewCache().session().fingerprint(vv.Image(str(image_path))) != (
+        fingerprint
+    )
+
+
+def test_cache_cap_counts_shared_values_once():
+    cache = SubviewCache(max_bytes=1000)
+    shared = b"x" * 400
+    cache.put("parent", {"child/0": shared, ".zattrs": b"{}"})
+    cache.put("child", {"0": shared})
+    assert cache.nbytes == 402
+    cache.put("other", {"0": b"y" * 500})
+    assert cache.nbytes == 902
+    # Exceeding the cap evicts the least recently used entries
+    assert cache.get("parent") is not None
+    cache.put("another", {"0": b"z" * 500})
+    assert cache.get("child") is None
+    assert cache.get("other") is None
+    assert cache.get("parent") is not None
+    assert cache.nbytes == 902
+    # Entries larger than the cap are not cached
+    cache.put("huge", {"0": b"h" * 2000})
+    assert cache.get("huge") is None
+
+
+def test_get_subview_cache_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("FIGPACK_SUBVIEW_CACHE_MB", "0")
+    assert get_subview_cache() is None
+    monkeypatch.setenv("FIGPACK_SUBVIEW_CACHE_MB", "16")
+    assert get_subview_cache().max_bytes == 16 * 1024 * 1024
@@ -1,3 +1,6 @@
+import base64
+import hashlib
+import json
 from unittest import mock
 
 import pytest
@@ -7,10 +10,15 @@ from figpack.core._upload_bundle import (
     _create_or_get_figure,
     _determine_content_type,
     _finalize_figure,
+    _get_multipart_parts,
     _get_upload_mode,
+    _upload_parts_in_parallel,
     _upload_bundle,
+    _upload_file_multipart_client_signed,
     _upload_single_file_with_signed_url,
 )
+from figpack.core._content_hashes import _compute_file_sha256
+from figpack.core._upload_journal import PendingFigures, UploadJournal, get_bundle_key
 
 
 def test_get_upload_mode(tmp_path):
@@ -38,7 +46,7 @@ def test_get_upload_mode(tmp_path):
         ],
     }
 
-    with mock.patch("requests.post") as mock_post:
+    with mock.patch("requests.Session.post") as mock_post:
         mock_post.return_value = mock_response
         result = _get_upload_mode(figure_url, files_batch, api_key)
 
@@ -55,7 +63,7 @@ def test_get_upload_mode(tmp_path):
 
 
 def test_get_upload_mode_http_error():
-    with mock.patch("requests.post") as mock_post:
+    with mock.patch("requests.Session.post") as mock_post:
         mock_post.return_value.ok = False
         mock_post.return_value.status_code = 500
 
@@ -73,7 +81,7 @@ def test_get_upload_mode_api_error(tmp_path):
     mock_response.ok = True
     mock_response.json.return_value = {"success": False, "message": "API error message"}
 
-    with mock.patch("requests.post") as mock_post:
+    with mock.patch("requests.Session.post") as mock_post:
         mock_post.return_value = mock_response
         with pytest.raises(
             Exception, match="Failed to get upload info for batch: API error message"
@@ -86,7 +94,7 @@ def test_upload_single_file_with_signed_url(tmp_path):
     test_file = tmp_path / "test.txt"
     test_file.write_text("test content")
 
-    with mock.patch("requests.put") as mock_put:
+    with mock.patch("requests.Session.put") as mock_put:
         mock_put.return_value.ok = True
         mock_put.return_value.status_code = 200
 
@@ -106,7 +114,7 @@ def test_upload_single_file_with_retry(tmp_path):
     test_file = tmp_path / "test.txt"
     test_file.write_text("test content")
 
-    with mock.patch("requests.put") as mock_put, mock.patch("time.sleep"):
+    with mock.patch("requests.Session.put") as mock_put, mock.patch("time.sleep"):
         # First attempt fails, second succeeds
         mock_put.side_effect = [
             mock.Mock(ok=False, status_code=500),
@@ -131,7 +139,7 @@ def test_create_or_get_figure():
         "figure": {"figureUrl": "test-url", "status": "pending"},
     }
 
-    with mock.patch("requests.post") as mock_post:
+    with mock.patch("requests.Session.post") as mock_post:
         mock_post.return_value = mock_response
         result = _create_or_get_figure(api_key)
 
@@ -143,7 +151,7 @@ def test_create_or_get_figure():
 
 
 def test_create_or_get_figure_error():
-    with mock.patch("requests.post") as mock_post:
+    with mock.patch("requests.Session.post") as mock_post:
         mock_post.return_value.ok = False
         mock_post.return_value.status_code = 500
 
@@ -162,7 +170,7 @@ def test_finalize_figure():
         "figure": {"status": "completed"},
     }
 
-    with mock.patch("requests.post") as mock_post:
+    with mock.patch("requests.Session.post") as mock_post:
         mock_post.return_value = mock_response
         result = _finalize_figure(figure_url, api_key)
 
@@ -237,7 +245,7 @@ def test_upload_bundle(tmp_path):
     }
 
     with mock.patch.multiple(
-        "requests",
+        "requests.Session",
         post=mock.Mock(
             side_effect=[
                 mock_create_response,
@@ -255,7 +263,7 @@ def test_upload_bundle(tmp_path):
         assert result == figure_url
 
         # Verify all API calls in sequence
-        api_calls = requests.post.call_args_list
+        api_calls = requests.Session.post.call_args_list
 
         # 1. Create figure call
         create_call = api_calls[0]
@@ -274,4 +282,417 @@ def test_upload_bundle(tmp_path):
         assert "finalize" in finalize_call[0][0]
 
         # Verify file uploads
-        assert requests.put.call_count >= 3  # 2 files + manifest
+        assert requests.Session.put.call_count >= 3  # 2 files + manifest
+
+
+@pytest.fixture(autouse=True)
+def upload_journal_dir(tmp_path, monkeypatch):
+    journal_dir = tmp_path / "upload_journals"
+    monkeypatch.setattr(
+        "figpack.core._upload_journal._get_upload_journal_dir", lambda: journal_dir
+    )
+    return journal_dir
+
+
+def test_upload_journal(tmp_path, upload_journal_dir):
+    file1 = tmp_path / "test1.txt"
+    file1.write_text("content1")
+
+    journal = UploadJournal("figure-url")
+    assert journal.num_completed == 0
+    sha256 = _compute_file_sha256(file1)
+    assert not journal.is_completed("test1.txt", sha256)
+
+    journal.record("test1.txt", sha256, 8)
+    # Simulate a partially written entry from an interrupted run
+    with open(journal.path, "a") as f:
+        f.write('{"figureUrl": "figure-url", "pa')
+
+    reloaded = UploadJournal("figure-url")
+    assert reloaded.num_completed == 1
+    assert reloaded.is_completed("test1.txt", sha256)
+    assert UploadJournal("other-figure-url").num_completed == 0
+
+    # Changed content is uploaded again
+    file1.write_text("changed")
+    assert not reloaded.is_completed("test1.txt", _compute_file_sha256(file1))
+
+    reloaded.remove()
+    assert not journal.path.exists()
+
+
+def test_upload_bundle_resumes_from_journal(tmp_path):
+    bundle_dir = tmp_path / "bundle"
+    bundle_dir.mkdir()
+    file1 = bundle_dir / "test1.txt"
+    file2 = bundle_dir / "test2.txt"
+    file1.write_text("content1")
+    file2.write_text("content2")
+
+    figure_url = "test-figure-url"
+    journal = UploadJournal(figure_url)
+    journal.record("test1.txt", _compute_file_sha256(file1), 8)
+
+    def _response(data):
+        response = mock.Mock()
+        response.ok = True
+        response.json.return_value = data
+        return response
+
+    upload_response = mock.Mock()
+    upload_response.status_code = 200
+
+    with mock.patch.multiple(
+        "requests.Session",
+        post=mock.Mock(
+            side_effect=[
+                _response(
+                    {
+                        "success": True,
+                        "figure": {"figureUrl": figure_url, "status": "pending"},
+                    }
+                ),
+                _response(
+                    {
+                        "success": True,
+                        "mode": "server-signed",
+                        "signedUrls": [
+                            {"relativePath": "test2.txt", "signedUrl": "signed-url-2"}
+                        ],
+                    }
+                ),
+                _response(
+                    {
+                        "success": True,
+                        "mode": "server-signed",
+                        "signedUrls": [
+                            {
+                                "relativePath": "manifest.json",
+                                "signedUrl": "signed-url-manifest",
+                            }
+                        ],
+                    }
+                ),
+                _response({"success": True, "figure": {"status": "completed"}}),
+            ]
+        ),
+        put=mock.Mock(return_value=upload_response),
+    ):
+        result = _upload_bundle(str(bundle_dir), "test-key")
+        assert result == figure_url
+
+        # Only the remaining file was requested and uploaded, then the manifest
+        upload_call = requests.Session.post.call_args_list[1]
+        assert [f["relativePath"] for f in upload_call[1]["json"]["files"]] == [
+            "test2.txt"
+        ]
+        put_urls = [call[0][0] for call in requests.Session.put.call_args_list]
+        assert put_urls == ["signed-url-2", "signed-url-manifest"]
+
+    # The journal is removed once the figure is finalized
+    assert not journal.path.exists()
+
+
+def test_upload_bundle_pipelines_batches(tmp_path):
+    bundle_dir = tmp_path / "bundle"
+    bundle_dir.mkdir()
+    for i in range(45):
+        (bundle_dir / f"file{i:02d}.txt").write_text(f"content{i}")
+
+    figure_url = "test-figure-url"
+
+    def _post(url, json=None, headers=None):
+        response = mock.Mock()
+        response.ok = True
+        if url.endswith("/figures/create"):
+            data = {
+                "success": True,
+                "figure": {"figureUrl": figure_url, "status": "pending"},
+            }
+        elif url.endswith("/upload"):
+            data = {
+                "success": True,
+                "mode": "server-signed",
+                "signedUrls": [
+                    {"relativePath": f["relativePath"], "signedUrl": f["relativePath"]}
+                    for f in json["files"]
+                ],
+            }
+        else:
+            data = {"success": True, "figure": {"status": "completed"}}
+        response.json.return_value = data
+        return response
+
+    upload_response = mock.Mock()
+    upload_response.status_code = 200
+
+    with mock.patch.multiple(
+        "requests.Session",
+        post=mock.Mock(side_effect=_post),
+        put=mock.Mock(return_value=upload_response),
+    ):
+        _upload_bundle(str(bundle_dir), "test-key")
+
+        upload_calls = [
+            call
+            for call in requests.Session.post.call_args_list
+            if call[0][0].endswith("/upload")
+        ]
+        # 3 batches of files + the manifest
+        assert [len(call[1]["json"]["files"]) for call in upload_calls] == [
+            20,
+            20,
+            5,
+            1,
+        ]
+        put_urls = sorted(call[0][0] for call in requests.Session.put.call_args_list)
+        assert put_urls == sorted(
+            [f"file{i:02d}.txt" for i in range(45)] + ["manifest.json"]
+        )
+
+
+def _write_bundle(bundle_dir, data_content):
+    (bundle_dir / "assets").mkdir(parents=True)
+    (bundle_dir / "index.html").write_text("<html></html>")
+    (bundle_dir / "assets" / "index.js").write_text("console.log('figpack');" * 100)
+    (bundle_dir / "data.zarr").mkdir()
+    (bundle_dir / "data.zarr" / "chunk.dat").write_bytes(data_content)
+
+
+@pytest.mark.parametrize("content_dedup", [True, False])
+def test_upload_bundle_content_dedup(tmp_path, monkeypatch, content_dedup):
+    from figpack.core._local_api_server import LocalApiServer
+
+    with LocalApiServer(content_dedup=content_dedup) as server:
+        monkeypatch.setattr(
+            "figpack.core._upload_bundle.FIGPACK_API_BASE_URL", server.base_url
+        )
+
+        _write_bundle(tmp_path / "bundle1", b"data1" * 1000)
+        figure_url1 = _upload_bundle(str(tmp_path / "bundle1"), "test-key")
+        # 3 files + manifest
+        assert server.num_puts == 4
+
+        _write_bundle(tmp_path / "bundle2", b"data2" * 1000)
+        puts_before = server.num_puts
+        figure_url2 = _upload_bundle(str(tmp_path / "bundle2"), "test-key")
+        assert figure_url2 != figure_url1
+        if content_dedup:
+            # Only the changed data file and the manifest are uploaded
+            assert server.num_puts - puts_before == 2
+        else:
+            assert server.num_puts - puts_before == 4
+
+        # Both figures are complete and serve the right content
+        for figure_url, bundle_dir in [
+            (figure_url1, tmp_path / "bundle1"),
+            (figure_url2, tmp_path / "bundle2"),
+        ]:
+            figure_id = server.get_figure_id(figure_url)
+            assert server.figures[figure_id]["status"] == "completed"
+            for rel_path in ["index.html", "assets/index.js", "data.zarr/chunk.dat"]:
+                response = requests.get(
+                    f"{server.base_url}/figures/{figure_id}/{rel_path}"
+                )
+                assert response.content == (bundle_dir / rel_path).read_bytes()
+            manifest = json.loads(server.get_file(figure_id, "manifest.json"))
+            assert all(len(f["sha256"]) == 64 for f in manifest["files"])
+
+
+def test_pending_figures(upload_journal_dir):
+    hashes = {"a.txt": "1" * 64, "b.txt": "2" * 64}
+    key = get_bundle_key(hashes, title="t")
+    assert key == get_bundle_key(dict(reversed(list(hashes.items()))), title="t")
+    assert key != get_bundle_key(hashes, title="other")
+    assert key != get_bundle_key(hashes, title="t", ephemeral=True)
+    assert key != get_bundle_key({**hashes, "b.txt": "3" * 64}, title="t")
+
+    pending = PendingFigures()
+    assert pending.get(key) is None
+    pending.set(key, "figure-url")
+    assert PendingFigures().get(key) == "figure-url"
+    pending.remove(key)
+    assert pending.get(key) is None
+
+
+def test_upload_bundle_resumes_after_interruption(tmp_path, monkeypatch):
+    from figpack.core import _upload_bundle as upload_bundle_module
+    from figpack.core._local_api_server import LocalApiServer
+
+    _write_bundle(tmp_path / "bundle", b"data" * 1000)
+
+    with LocalApiServer(content_dedup=False, multipart=False) as server:
+        monkeypatch.setattr(
+            "figpack.core._upload_bundle.FIGPACK_API_BASE_URL", server.base_url
+        )
+
+        # The first run is interrupted after all files but before finalization
+        finalize_figure = upload_bundle_module._finalize_figure
+
+        def _interrupted_finalize(figure_url, api_key):
+            raise RuntimeError("interrupted")
+
+        monkeypatch.setattr(
+            "figpack.core._upload_bundle._finalize_figure", _interrupted_finalize
+        )
+        with pytest.raises(RuntimeError, match="interrupted"):
+            _upload_bundle(str(tmp_path / "bundle"), "test-key")
+        # 3 files + manifest
+        assert server.num_puts == 4
+
+        # The rerun goes through a second create call, which resumes the
+        # pending figure, so only the manifest is uploaded again
+        monkeypatch.setattr(
+            "figpack.core._upload_bundle._finalize_figure", finalize_figure
+        )
+        figure_url = _upload_bundle(str(tmp_path / "bundle"), "test-key")
+        assert server.num_creates == 2
+        assert len(server.figures) == 1
+        assert server.num_puts == 5
+        figure_id = server.get_figure_id(figure_url)
+        assert server.figures[figure_id]["status"] == "completed"
+
+        # A finalized bundle is not resumed again
+        assert not list(tmp_path.glob("upload_journals/*"))
+        _upload_bundle(str(tmp_path / "bundle"), "test-key")
+        assert len(server.figures) == 2
+
+
+def test_get_multipart_parts(monkeypatch):
+    monkeypatch.setattr("figpack.core._upload_bundle.MULTIPART_PART_SIZE", 100)
+    assert _get_multipart_parts(250) == [(1, 0, 100), (2, 100, 100), (3, 200, 50)]
+    assert _get_multipart_parts(200) == [(1, 0, 100), (2, 100, 100)]
+    # The part size grows so that the number of parts stays bounded
+    monkeypatch.setattr("figpack.core._upload_bundle.MULTIPART_MAX_PARTS", 4)
+    parts = _get_multipart_parts(1000)
+    assert len(parts) == 4
+    assert sum(length for _, _, length in parts) == 1000
+
+
+def test_upload_bundle_multipart_server_signed(tmp_path, monkeypatch):
+    from figpack.core._local_api_server import LocalApiServer
+
+    monkeypatch.setattr("figpack.core._upload_bundle.MULTIPART_THRESHOLD", 2500)
+    monkeypatch.setattr("figpack.core._upload_bundle.MULTIPART_PART_SIZE", 256)
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+
+    large_content = bytes(range(256)) * 12 + b"tail"
+    _write_bundle(tmp_path / "bundle", large_content)
+
+    with LocalApiServer() as server:
+        monkeypatch.setattr(
+            "figpack.core._upload_bundle.FIGPACK_API_BASE_URL", server.base_url
+        )
+        # Transient failures are retried per part
+        server.fail_next_part_puts = 2
+        figure_url = _upload_bundle(str(tmp_path / "bundle"), "test-key")
+
+        figure_id = server.get_figure_id(figure_url)
+        assert server.figures[figure_id]["status"] == "completed"
+        assert server.get_file(figure_id, "data.zarr/chunk.dat") == large_content
+        assert server.num_part_puts == 13
+        assert server.fail_next_part_puts == 0
+        assert not server.multipart_uploads
+
+
+def test_part_uploads_share_a_bounded_executor(tmp_path, monkeypatch):
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    monkeypatch.setattr("figpack.core._upload_bundle.MULTIPART_PART_SIZE", 100)
+    monkeypatch.setattr("figpack.core._upload_bundle.MAX_PARTS_IN_PARALLEL", 3)
+    monkeypatch.setattr("figpack.core._upload_bundle._part_executor", None)
+
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    received = {}
+
+    def _upload_part(file_name, part_number, body, content_md5):
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.01)
+        # Parts are streamed from the file, not passed as bytes
+        assert not isinstance(body, bytes)
+        data = body.read()
+        assert content_md5 == base64.b64encode(hashlib.md5(data).digest()).decode()
+        with lock:
+            received[(file_name, part_number)] = data
+            in_flight -= 1
+        return f"etag-{part_number}"
+
+    contents = {}
+    for i in range(4):
+        contents[f"file{i}"] = bytes([i]) * 1050
+        (tmp_path / f"file{i}").write_bytes(contents[f"file{i}"])
+
+    # Four large files uploaded at once by the file workers
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(
+            executor.map(
+                lambda name: _upload_parts_in_parallel(
+                    name,
+                    tmp_path / name,
+                    lambda *args: _upload_part(name, *args),
+                ),
+                contents,
+            )
+        )
+    assert max_in_flight <= 3
+    for name, parts in zip(contents, results):
+        assert [p["partNumber"] for p in parts] == list(range(1, 12))
+        assert b"".join(received[(name, i)] for i in range(1, 12)) == contents[name]
+
+
+def test_upload_file_multipart_client_signed(tmp_path, monkeypatch):
+    monkeypatch.setattr("figpack.core._upload_bundle.MULTIPART_PART_SIZE", 100)
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    file_path = tmp_path / "_consolidated_0.dat"
+    content = bytes(range(250))
+    file_path.write_bytes(content)
+
+    s3_client = mock.Mock()
+    s3_client.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+    received = {}
+    failures = {2: 1}
+
+    def _upload_part(**kwargs):
+        part_number = kwargs["PartNumber"]
+        if failures.get(part_number, 0) > 0:
+            failures[part_number] -= 1
+            raise Exception("transient error")
+        data = kwargs["Body"].read()
+        assert kwargs["ContentMD5"] == base64.b64encode(
+            hashlib.md5(data).digest()
+        ).decode("ascii")
+        received[part_number] = data
+        return {"ETag": f"etag-{part_number}"}
+
+    s3_client.upload_part.side_effect = _upload_part
+
+    result = _upload_file_multipart_client_signed(
+        s3_client,
+        "bucket",
+        "figures/x/_consolidated_0.dat",
+        "_consolidated_0.dat",
+        file_path,
+    )
+    assert result == "_consolidated_0.dat"
+    assert b"".join(received[i] for i in sorted(received)) == content
+    assert s3_client.upload_part.call_count == 4
+    s3_client.complete_multipart_upload.assert_called_once_with(
+        Bucket="bucket",
+        Key="figures/x/_consolidated_0.dat",
+        UploadId="upload-1",
+        MultipartUpload={
+            "Parts": [
+                {"PartNumber": 1, "ETag": "etag-1"},
+                {"PartNumber": 2, "ETag": "etag-2"},
+                {"PartNumber": 3, "ETag": "etag-3"},
+            ]
+        },
+    )
+    s3_client.abort_multipart_upload.assert_not_called()
@@ -0,0 +1,83 @@
+"""
+Tests for the walk over the view tree used by extension discovery
+"""
+
+import figpack.views as vv
+from figpack import ExtensionView, FigpackExtension
+from figpack.core._bundle_utils import _discover_required_extensions
+from figpack.core.figpack_view import FigpackView, walk_view_tree
+
+
+class LeafView(FigpackView):
+    def write_to_zarr_group(self, group):
+        group.attrs["view_type"] = "LeafView"
+
+
+class ExpensivePropertyView(FigpackView):
+    """A view with a property that must not be evaluated by the walk"""
+
+    def __init__(self, child):
+        self.child = child
+
+    @property
+    def expensive(self):
+        raise AssertionError("property evaluated")
+
+    def write_to_zarr_group(self, group):
+        group.attrs["view_type"] = "ExpensivePropertyView"
+
+
+def _extension(name):
+    return FigpackExtension(name=name, javascript_code="// js")
+
+
+def test_walk_order_and_deduplication():
+    a, b, c = LeafView(), LeafView(), LeafView()
+    splitter = vv.Splitter(item1=vv.LayoutItem(a), item2=vv.LayoutItem(b))
+    box = vv.Box(
+        items=[
+            vv.LayoutItem(splitter),
+            vv.LayoutItem(vv.CaptionedView(view=c, caption="c")),
+            vv.LayoutItem(a),
+        ]
+    )
+    views = walk_view_tree(box)
+    assert views[:4] == [box, splitter, a, b]
+    assert views[5] is c
+    assert len(views) == 6
+    assert list(box.iter_child_views())[2] is a
+
+
+def test_default_iter_child_views_skips_properties():
+    child = LeafView()
+    view = ExpensivePropertyView(child)
+    view.items = [vv.LayoutItem(LeafView()), "not a view"]
+    view._private = LeafView()
+    children = list(view.iter_child_views())
+    assert children[0] is child
+    assert children[1] is view.items[0].view
+    assert len(children) == 2
+
+
+def test_nested_extension_views_are_discovered():
+    ext1, ext2, ext3 = _extension("ext1"), _extension("ext2"), _extension("ext3")
+    inner = ExtensionView(extension=ext1, view_type="ext1.View")
+    other = ExtensionView(extension=ext2, view_type="ext2.View")
+    other.other_extensions = [ext3, ext1]
+    view = vv.TabLayout(
+        items=[
+            vv.TabLayoutItem(
+                label="a",
+                view=vv.Splitter(
+                    item1=vv.LayoutItem(vv.Markdown("x")),
+                    item2=vv.LayoutItem(vv.CaptionedView(view=inner, caption="")),
+                ),
+            ),
+            vv.TabLayoutItem(label="b", view=ExpensivePropertyView(other)),
+        ]
+    )
+    assert [ext.name for ext in _discover_required_extensions(view)] == [
+        "ext1",
+        "ext2",
+        "ext3",
+    ]
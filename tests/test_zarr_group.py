@@ -0,0 +1,85 @@
+"""
+Tests for the figpack zarr Group wrapper
+"""
+
+import numpy as np
+import pytest
+import zarr
+import zarr.storage
+
+import figpack
+from figpack.core.zarr import ParallelChunkWriter
+
+
+def _make_group(parallel_writer=None):
+    return figpack.Group(
+        zarr.group(store=zarr.storage.MemoryStore()), parallel_writer=parallel_writer
+    )
+
+
+def test_parallel_create_dataset_matches_serial():
+    rng = np.random.default_rng(0)
+    arrays = {
+        "a": rng.standard_normal((10_001, 3)).astype(np.float32),
+        "b": np.arange(12_345, dtype=np.int64),
+        "c": rng.integers(0, 255, size=(7, 5, 3), dtype=np.uint8),
+        "empty": np.zeros((0, 4), dtype=np.float32),
+        "strings": np.array(["x", "yy", "zzz"]),
+    }
+
+    serial = _make_group()
+    parallel_writer = ParallelChunkWriter(4)
+    parallel = _make_group(parallel_writer)
+    for group in (serial, parallel):
+        sub = group.create_group("sub")
+        for name, data in arrays.items():
+            sub.create_dataset(name, data=data, chunks=(1000,) + data.shape[1:])
+    parallel.flush()
+    parallel_writer.shutdown()
+
+    for name in arrays:
+        expected = serial["sub"][name]
+        actual = parallel["sub"][name]
+        assert actual.chunks == expected.chunks
+        assert actual.dtype == expected.dtype
+        np.testing.assert_array_equal(actual[:], expected[:])
+
+
+class _FailingArray:
+    def __setitem__(self, selection, values):
+        raise ValueError("write failed")
+
+
+def test_parallel_write_errors_raised_on_flush():
+    parallel_writer = ParallelChunkWriter(2)
+    group = _make_group(parallel_writer)
+    group.write(_FailingArray(), slice(0, 5), np.ones(5, dtype=np.float32))
+    with pytest.raises(ValueError, match="write failed"):
+        group.flush()
+    # A failed flush does not leave stale tasks behind
+    group.flush()
+    parallel_writer.shutdown()
+
+
+def test_attribute_writes_are_buffered_until_flush():
+    zarr_group = zarr.group(store=zarr.storage.MemoryStore())
+    group = figpack.Group(zarr_group)
+    sub = group.create_group("sub")
+    group.attrs["view_type"] = "Box"
+    sub.attrs["a"] = 1
+    sub.attrs["b"] = [1, 2]
+    sub.attrs["a"] = 2
+    assert sub.attrs["a"] == 2
+    assert dict(sub.attrs) == {"a": 2, "b": [1, 2]}
+    assert "view_type" not in zarr_group.attrs
+
+    # Flushing any group of the tree writes the attributes of all of them
+    sub.flush()
+    assert zarr_group.attrs["view_type"] == "Box"
+    assert dict(zarr_group["sub"].attrs) == {"a": 2, "b": [1, 2]}
+
+    # Members returned by the group see the buffered attributes
+    sub.attrs["c"] = "x"
+    assert group["sub"].attrs["c"] == "x"
+    del sub.attrs["a"]
+    assert dict(zarr_group["sub"].attrs) == {"b": [1, 2], "c": "x"}